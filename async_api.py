@@ -0,0 +1,174 @@
+import os
+import asyncio
+import logging
+from multiprocessing import cpu_count
+
+from main import (process_file, timeout_result, warm_up, configure_worker, COST_HISTORY_FILE,
+                  DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_CHECK_TIME_LIMIT,
+                  DEFAULT_DOCUMENT_TIME_LIMIT, DEFAULT_HARD_TIMEOUT)
+from utils import metrics
+from utils.cost_model import CostModel
+from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChecker:
+    """
+    Асинхронный интерфейс проверки документов для приложений на asyncio.
+
+    Документы (пути к файлам или содержимое в байтах) обрабатываются в пуле процессов,
+    а результаты ожидаются через asyncio.wrap_future, поэтому цикл событий не блокируется.
+    Одновременно в пул отправляется не больше max_concurrency документов; check_many читает
+    следующий источник, только когда освобождается место, поэтому медленный потребитель
+    результатов не приводит к накоплению задач (обратное давление). Отмена ожидающей корутины
+    или прекращение итерации отменяет ещё не запущенные задачи пула. Результаты возвращаются
+    вызывающему коду, поэтому отчёты в Markdown не записываются; reports_dir хранит только историю
+    времени проверок.
+
+    Пример:
+        async with AsyncChecker(num_workers=4) as checker:
+            async for position, result in checker.check_many(paths):
+                ...
+    """
+
+    def __init__(self, num_workers=None, max_concurrency=None, reports_dir="reports",
+                 check_time_limit=DEFAULT_CHECK_TIME_LIMIT, document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT,
+                 hard_timeout=DEFAULT_HARD_TIMEOUT, mp_context=PREFORK_START_METHOD, input_limits=None,
+                 max_findings_per_rule=None, profile_dir=None, memory_top=None):
+        self.num_workers = num_workers or cpu_count()
+        # По умолчанию в очереди пула держим по одной задаче на процесс сверх выполняемых
+        self.max_concurrency = max_concurrency or 2 * self.num_workers
+        self.reports_dir = reports_dir
+        self.hard_timeout = hard_timeout
+        self.mp_context = mp_context
+        # Параметры процессов пула те же, что у пакетной обработки (см. main.configure_worker)
+        self.worker_args = (check_time_limit, document_time_limit, input_limits, max_findings_per_rule, profile_dir,
+                            memory_top)
+        self.cost_model = CostModel(os.path.join(reports_dir, COST_HISTORY_FILE))
+        self._pool = None
+        self._semaphore = None
+        self._start_lock = asyncio.Lock()
+        self._next_index = 0
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        """Запускает пул процессов (вызывается автоматически при первой проверке)."""
+        async with self._start_lock:
+            if self._pool is None:
+                # Прогрев и запуск процессов занимают секунды, поэтому выполняются вне цикла событий
+                self._pool = await asyncio.to_thread(self._start_pool)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    def _start_pool(self):
+        os.makedirs(self.reports_dir, exist_ok=True)
+        configure_worker(*self.worker_args)
+        if self.mp_context == "fork":
+            warm_up()
+        return WorkerPool(process_file, self.num_workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                          max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_worker,
+                          initargs=self.worker_args, mp_context=self.mp_context, prestart=True)
+
+    async def close(self):
+        """Отменяет ожидающие задачи, останавливает пул и сохраняет историю времени проверок."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, cancel_pending=True)
+            self.cost_model.save()
+
+    def _task_args(self, source, name, file_index):
+        """Возвращает аргументы process_file и характеристики документа для пути или содержимого."""
+        if isinstance(source, (bytes, bytearray)):
+            file_name = name or f"document_{file_index}.docx"
+            data = bytes(source)
+            return (file_name, file_index, None, data), CostModel.document_features(file_name, data=data)
+        file_path = os.fspath(source)
+        return (file_path, file_index, None), CostModel.document_features(file_path)
+
+    async def check(self, source, name=None):
+        """
+        Проверяет один документ и возвращает результат process_file.
+
+        Args:
+            source: Путь к файлу .docx или его содержимое (bytes).
+            name (str, optional): Имя документа, переданного в байтах (для отчёта и сообщений).
+        """
+        await self.start()
+        async with self._semaphore:
+            file_index = self._next_index
+            self._next_index += 1
+            # Характеристики документа требуют разбора архива, поэтому считаются вне цикла событий
+            args, features = await asyncio.to_thread(self._task_args, source, name, file_index)
+            future = self._pool.submit(args, memory=self.cost_model.estimate_memory(features),
+                                       timeout=self.hard_timeout)
+            try:
+                # Отмена ожидания отменяет и задачу пула, если она ещё не запущена
+                result = await asyncio.wrap_future(future)
+            except TaskTimeoutError:
+                logger.error("Файл %s превысил жёсткий срок обработки %s с", args[0], self.hard_timeout)
+                result = timeout_result(args[0], self.hard_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ошибка в процессе пула: %s", e)
+                result = {"file_path": args[0], "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
+                          "time": 0.0}
+        metrics.observe_result(result)
+        if result.get("check_times"):
+            self.cost_model.observe(features, result["check_times"])
+        return result
+
+    async def check_many(self, sources):
+        """
+        Проверяет документы из sources (обычный или асинхронный итерируемый объект путей,
+        содержимого в байтах или пар (имя, содержимое)) и выдаёт пары (позиция в sources, результат)
+        по мере завершения проверок.
+        """
+        await self.start()
+        if hasattr(sources, "__aiter__"):
+            iterator = sources.__aiter__()
+            next_source = iterator.__anext__
+        else:
+            iterator = iter(sources)
+
+            async def next_source():
+                try:
+                    return next(iterator)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        async def run(position, source):
+            name = None
+            if isinstance(source, tuple):
+                name, source = source
+            return position, await self.check(source, name)
+
+        tasks = set()
+        position = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(tasks) < self.max_concurrency:
+                    try:
+                        source = await next_source()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    tasks.add(asyncio.ensure_future(run(position, source)))
+                    position += 1
+                if not tasks:
+                    break
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
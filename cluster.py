@@ -0,0 +1,515 @@
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+from collections import deque
+from multiprocessing import cpu_count
+
+from main import (process_file, timeout_result, warm_up, configure_worker, format_results, print_progress,
+                  COST_HISTORY_FILE, DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER,
+                  DEFAULT_CHECK_TIME_LIMIT, DEFAULT_DOCUMENT_TIME_LIMIT, DEFAULT_HARD_TIMEOUT)
+from modules.findings import to_json, from_json
+from utils.cost_model import CostModel, EtaTracker
+from utils.journal import BatchJournal
+from utils.archives import ArchiveReader, expand_archives, split_member
+from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+from utils import metrics
+from utils.logs import setup_logging, add_logging_arguments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# Рабочий узел отправляет heartbeat с этим периодом; координатор считает узел потерянным,
+# если от него нет сообщений дольше DEFAULT_HEARTBEAT_TIMEOUT, и раздаёт его документы другим узлам
+DEFAULT_HEARTBEAT_INTERVAL = 2.0
+DEFAULT_HEARTBEAT_TIMEOUT = 10.0
+# Сколько раз документ выдаётся узлам, которые затем теряются, прежде чем он получает результат с ошибкой
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Кадр протокола: длина JSON-заголовка и длина двоичных данных (big-endian), затем заголовок и данные.
+# Документы передаются как двоичные данные без pickle, поэтому узлы не исполняют присланный код
+FRAME = struct.Struct("!II")
+MAX_HEADER_SIZE = 16 * 1024 * 1024
+MAX_PAYLOAD_SIZE = 1024 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Некорректное сообщение протокола координатора и рабочих узлов."""
+
+
+def send_message(sock, message, payload=b""):
+    """Отправляет сообщение (словарь, сериализуемый в JSON) и необязательные двоичные данные."""
+    header = json.dumps(message, ensure_ascii=False, default=to_json).encode("utf-8")
+    sock.sendall(FRAME.pack(len(header), len(payload)) + header)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise ConnectionError("Соединение закрыто")
+    return data
+
+
+def recv_message(stream):
+    """Читает сообщение из файлового объекта сокета и возвращает пару (сообщение, двоичные данные)."""
+    header_size, payload_size = FRAME.unpack(_recv_exact(stream, FRAME.size))
+    if header_size > MAX_HEADER_SIZE or payload_size > MAX_PAYLOAD_SIZE:
+        raise ProtocolError(f"Слишком большое сообщение: {header_size} + {payload_size} байт")
+    try:
+        message = json.loads(_recv_exact(stream, header_size), object_hook=from_json)
+    except ValueError as e:
+        raise ProtocolError(f"Некорректный заголовок сообщения: {str(e)}")
+    payload = _recv_exact(stream, payload_size) if payload_size else b""
+    return message, payload
+
+
+class _RemoteWorker:
+    """Подключённый к координатору рабочий узел."""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.name = f"{address[0]}:{address[1]}"
+        self.slots = 0
+        self.tasks = set()  # Хеши документов, выданных узлу и ещё не вернувшихся
+        self.last_seen = time.monotonic()
+        self.send_lock = threading.Lock()
+
+    def send(self, message, payload=b""):
+        with self.send_lock:
+            send_message(self.sock, message, payload)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class Coordinator:
+    """
+    Координатор пакетной обработки на нескольких машинах.
+
+    Документы раздаются рабочим узлам (см. ClusterWorker) по TCP как задачи с хешем содержимого:
+    узел читает документ по общему пути, если путь доступен и хеш совпадает, или запрашивает
+    содержимое у координатора. Одинаковые по содержимому файлы проверяются один раз. Документы
+    выдаются в порядке убывания оценки стоимости; каждый узел получает не больше объявленного им
+    количества задач. Документы потерянного узла (разрыв соединения или отсутствие heartbeat
+    дольше heartbeat_timeout) возвращаются в начало очереди и выдаются другим узлам, но не больше
+    max_attempts раз: документ, после которого узлы теряются снова и снова, получает результат с ошибкой.
+    """
+
+    def __init__(self, file_paths, host="127.0.0.1", port=DEFAULT_PORT, token=None,
+                 heartbeat_timeout=DEFAULT_HEARTBEAT_TIMEOUT, share_paths=True, cost_model=None,
+                 progress_callback=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.file_paths = list(file_paths)
+        self.token = token
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.share_paths = share_paths
+        self.progress_callback = progress_callback
+        self.cost_model = cost_model or CostModel()
+
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._workers = []
+        self._results = [None] * len(self.file_paths)
+        self._completed = 0
+        self._indices = {}  # хеш содержимого -> индексы файлов с этим содержимым
+        self._features = {}
+        self._attempts = {}  # хеш содержимого -> сколько раз документ возвращался в очередь
+        # Документы из архивов ("архив!имя") всегда передаются узлам содержимым
+        self._archive_reader = ArchiveReader()
+        for idx, file_path in enumerate(self.file_paths):
+            data = None
+            if split_member(file_path):
+                try:
+                    data = self._archive_reader.read(file_path)
+                except Exception as e:
+                    logger.error("Не удалось прочитать документ %s из архива: %s", file_path, e)
+            content_hash = BatchJournal.file_hash(file_path) if data is None else hashlib.sha256(data).hexdigest()
+            if content_hash is None:
+                self._results[idx] = {"file_path": file_path,
+                                      "results": {"error": [f"Файл не найден: {file_path}"]}, "time": 0.0}
+                self._completed += 1
+                continue
+            if content_hash not in self._indices:
+                self._indices[content_hash] = []
+                self._features[content_hash] = self.cost_model.document_features(file_path, data=data)
+            self._indices[content_hash].append(idx)
+        self._pending = deque(sorted(self._indices, key=lambda h: self.cost_model.estimate(self._features[h]),
+                                     reverse=True))
+        self._finished = set()
+        self._eta = EtaTracker({h: self.cost_model.estimate(self._features[h]) for h in self._indices}, 1)
+        if not self._pending:
+            self._done.set()
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+
+    def run(self, timeout=None):
+        """Раздаёт документы подключающимся узлам и возвращает результаты в порядке file_paths."""
+        threading.Thread(target=self._accept_loop, name="CoordinatorAccept", daemon=True).start()
+        threading.Thread(target=self._monitor_loop, name="CoordinatorMonitor", daemon=True).start()
+        logger.info("Координатор ожидает рабочие узлы на %s:%s, документов к проверке: %s",
+                    self.address[0], self.address[1], len(self._pending))
+        finished = self._done.wait(timeout)
+        self.close()
+        if not finished:
+            logger.error("Пакет не завершён за отведённое время")
+        return self._results
+
+    def close(self):
+        self._done.set()
+        self.server.close()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                worker.send({"type": "shutdown"})
+            except OSError:
+                pass
+            worker.close()
+        self._archive_reader.close()
+
+    def _accept_loop(self):
+        # Таймаут нужен, чтобы поток заметил завершение пакета, не дожидаясь нового подключения
+        self.server.settimeout(0.5)
+        while not self._done.is_set():
+            try:
+                sock, address = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._serve_worker, args=(sock, address), daemon=True).start()
+
+    def _monitor_loop(self):
+        while not self._done.wait(self.heartbeat_timeout / 4):
+            now = time.monotonic()
+            with self._lock:
+                stale = [worker for worker in self._workers if now - worker.last_seen > self.heartbeat_timeout]
+            for worker in stale:
+                logger.warning("Рабочий узел %s не отвечает дольше %s с", worker.name, self.heartbeat_timeout)
+                self._lose(worker)
+
+    def _serve_worker(self, sock, address):
+        worker = _RemoteWorker(sock, address)
+        stream = sock.makefile("rb")
+        try:
+            message, _ = recv_message(stream)
+            if message.get("type") != "hello" or (self.token and message.get("token") != self.token):
+                logger.warning("Рабочий узел %s отклонён: некорректное приветствие", worker.name)
+                worker.close()
+                return
+            worker.slots = max(1, int(message.get("slots", 1)))
+            with self._lock:
+                if self._done.is_set():
+                    worker.send({"type": "shutdown"})
+                    worker.close()
+                    return
+                self._workers.append(worker)
+                self._update_capacity()
+            logger.info("Подключён рабочий узел %s (%s, слотов: %s)", worker.name, message.get('host'), worker.slots)
+            self._dispatch(worker)
+            while True:
+                message, payload = recv_message(stream)
+                worker.last_seen = time.monotonic()
+                kind = message.get("type")
+                if kind == "result":
+                    self._finish(worker, message["hash"], message["result"])
+                    self._dispatch(worker)
+                elif kind == "fetch":
+                    self._send_blob(worker, message["hash"])
+                elif kind != "heartbeat":
+                    raise ProtocolError(f"Неизвестный тип сообщения: {kind}")
+        except (OSError, ConnectionError, ProtocolError, KeyError, ValueError) as e:
+            if not self._done.is_set():
+                logger.warning("Соединение с рабочим узлом %s потеряно: %s", worker.name, e)
+        finally:
+            stream.close()
+            self._lose(worker)
+
+    def _task_message(self, content_hash):
+        idx = self._indices[content_hash][0]
+        file_path = self.file_paths[idx]
+        member = split_member(file_path)
+        return {
+            "type": "task",
+            "hash": content_hash,
+            "name": os.path.basename(member[1] if member else file_path),
+            "file_index": idx,
+            "path": os.path.abspath(file_path) if self.share_paths and not member else None,
+            "memory": self.cost_model.estimate_memory(self._features[content_hash])
+        }
+
+    def _dispatch(self, worker):
+        """Выдаёт узлу задачи из очереди в пределах его свободных слотов."""
+        with self._lock:
+            if worker not in self._workers:
+                return
+            assigned = []
+            while self._pending and len(worker.tasks) < worker.slots:
+                content_hash = self._pending.popleft()
+                if content_hash in self._finished:
+                    continue
+                worker.tasks.add(content_hash)
+                assigned.append(content_hash)
+        try:
+            for content_hash in assigned:
+                worker.send(self._task_message(content_hash))
+        except OSError as e:
+            logger.warning("Не удалось отправить задачу рабочему узлу %s: %s", worker.name, e)
+            self._lose(worker)
+
+    def _send_blob(self, worker, content_hash):
+        file_path = self.file_paths[self._indices[content_hash][0]]
+        try:
+            if split_member(file_path):
+                data = self._archive_reader.read(file_path)
+            else:
+                with open(file_path, "rb") as f:
+                    data = f.read()
+        except Exception as e:
+            # Файл удалён или стал недоступен после вычисления хеша: это ошибка документа, а не узла
+            logger.error("Не удалось прочитать документ %s: %s", file_path, e)
+            self._finish(worker, content_hash, self._error_result(file_path, f"Не удалось прочитать файл: {str(e)}"))
+            self._dispatch(worker)
+            return
+        worker.send({"type": "blob", "hash": content_hash}, data)
+
+    @staticmethod
+    def _error_result(file_path, message):
+        return {"file_path": file_path, "results": {"error": [message]}, "time": 0.0}
+
+    def _finish(self, worker, content_hash, result):
+        with self._lock:
+            worker.tasks.discard(content_hash)
+            # Результат мог прийти повторно от узла, документы которого уже раздали другим узлам
+            if content_hash in self._finished or content_hash not in self._indices:
+                return
+            self._finished.add(content_hash)
+            for idx in self._indices[content_hash]:
+                self._results[idx] = dict(result, file_path=self.file_paths[idx])
+                self._completed += 1
+            metrics.observe_result(result)
+            metrics.BATCH_DOCUMENTS.set(self._completed, state="completed")
+            if result.get("check_times"):
+                self.cost_model.observe(self._features[content_hash], result["check_times"])
+            self._eta.complete(content_hash, result.get("time", 0.0))
+            completed = self._completed
+            eta = self._eta.eta()
+            if len(self._finished) == len(self._indices):
+                self._done.set()
+        if self.progress_callback:
+            self.progress_callback(completed, len(self.file_paths), eta)
+
+    def _update_capacity(self):
+        # Оценка оставшегося времени считает слоты всех подключённых узлов параллельными процессами
+        self._eta.num_workers = max(1, sum(worker.slots for worker in self._workers))
+
+    def _lose(self, worker):
+        """Убирает узел и возвращает его незавершённые документы в начало очереди."""
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self._workers.remove(worker)
+            lost, failed = [], []
+            for content_hash in worker.tasks:
+                if content_hash in self._finished:
+                    continue
+                self._attempts[content_hash] = self._attempts.get(content_hash, 0) + 1
+                (failed if self._attempts[content_hash] >= self.max_attempts else lost).append(content_hash)
+            worker.tasks.clear()
+            self._pending.extendleft(lost)
+            self._update_capacity()
+            workers = list(self._workers)
+        worker.close()
+        if lost:
+            logger.warning("Документы рабочего узла %s (%s) возвращены в очередь", worker.name, len(lost))
+        for content_hash in failed:
+            file_path = self.file_paths[self._indices[content_hash][0]]
+            logger.error("Документ %s не обработан: рабочие узлы потеряны %s раз", file_path, self.max_attempts)
+            self._finish(worker, content_hash, self._error_result(
+                file_path, f"Документ не обработан: рабочие узлы потеряны {self.max_attempts} раз"))
+        for other in workers:
+            self._dispatch(other)
+
+
+class ClusterWorker:
+    """
+    Рабочий узел: подключается к координатору и проверяет выданные документы в локальном пуле
+    прогретых процессов. Отчёты сохраняются в reports_dir на этом узле.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, num_workers=None, reports_dir="reports", token=None,
+                 heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL, check_time_limit=DEFAULT_CHECK_TIME_LIMIT,
+                 document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT, hard_timeout=DEFAULT_HARD_TIMEOUT, input_limits=None,
+                 max_findings_per_rule=None, profile_dir=None, memory_top=None):
+        self.host = host
+        self.port = port
+        self.num_workers = num_workers or cpu_count()
+        self.reports_dir = reports_dir
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.hard_timeout = hard_timeout
+        # Параметры процессов пула те же, что у пакетной обработки (см. main.configure_worker)
+        self.worker_args = (check_time_limit, document_time_limit, input_limits, max_findings_per_rule, profile_dir,
+                            memory_top)
+        self._outbox = queue.Queue()
+        self._stopped = threading.Event()
+
+    def run(self):
+        os.makedirs(self.reports_dir, exist_ok=True)
+        configure_worker(*self.worker_args)
+        if PREFORK_START_METHOD:
+            warm_up()
+        with WorkerPool(process_file, self.num_workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                        max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_worker,
+                        initargs=self.worker_args, mp_context=PREFORK_START_METHOD, prestart=True) as pool:
+            sock = socket.create_connection((self.host, self.port))
+            stream = sock.makefile("rb")
+            # Два слота на процесс: следующий документ загружается, пока проверяется текущий
+            send_message(sock, {"type": "hello", "host": socket.gethostname(), "slots": 2 * self.num_workers,
+                                "token": self.token})
+            sender = threading.Thread(target=self._send_loop, args=(sock,), name="ClusterWorkerSender", daemon=True)
+            sender.start()
+            waiting = {}  # хеш -> задачи, ожидающие содержимого от координатора
+            try:
+                while True:
+                    message, payload = recv_message(stream)
+                    kind = message.get("type")
+                    if kind == "shutdown":
+                        break
+                    if kind == "task":
+                        data = self._read_shared(message)
+                        if data is None:
+                            waiting.setdefault(message["hash"], []).append(message)
+                            self._outbox.put(({"type": "fetch", "hash": message["hash"]}, b""))
+                        else:
+                            self._submit(pool, message, data)
+                    elif kind == "blob":
+                        for task in waiting.pop(message["hash"], []):
+                            self._submit(pool, task, payload)
+            except (OSError, ConnectionError, ProtocolError) as e:
+                logger.error("Соединение с координатором потеряно: %s", e)
+            finally:
+                self._stopped.set()
+                self._outbox.put(None)
+                sender.join()
+                stream.close()
+                sock.close()
+                pool.shutdown(wait=False, cancel_pending=True)
+
+    @staticmethod
+    def _read_shared(task):
+        """Читает документ по общему пути, если он доступен и его хеш совпадает с хешем задачи."""
+        path = task.get("path")
+        if not path or not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return data if hashlib.sha256(data).hexdigest() == task["hash"] else None
+
+    def _submit(self, pool, task, data):
+        future = pool.submit((task["name"], task["file_index"], self.reports_dir, data),
+                             memory=task.get("memory", 0), timeout=self.hard_timeout)
+        future.add_done_callback(lambda f: self._outbox.put((self._result_message(task, f), b"")))
+
+    def _result_message(self, task, future):
+        try:
+            result = future.result()
+        except TaskTimeoutError:
+            result = timeout_result(task["name"], self.hard_timeout)
+        except Exception as e:
+            result = {"file_path": task["name"], "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
+                      "time": 0.0}
+        return {"type": "result", "hash": task["hash"], "result": result}
+
+    def _send_loop(self, sock):
+        """Отправляет координатору результаты и запросы, а в паузах — heartbeat."""
+        while not self._stopped.is_set():
+            try:
+                item = self._outbox.get(timeout=self.heartbeat_interval)
+            except queue.Empty:
+                item = ({"type": "heartbeat"}, b"")
+            if item is None:
+                break
+            try:
+                send_message(sock, *item)
+            except OSError:
+                break
+
+
+def main():
+    """Консольный запуск координатора или рабочего узла."""
+    parser = argparse.ArgumentParser(description="Пакетная проверка документов .docx на нескольких машинах.")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+    coordinator_parser = subparsers.add_parser("coordinator", help="Раздать документы рабочим узлам")
+    coordinator_parser.add_argument("files", nargs='+', help="Путь к файлам .docx или архивам .zip для обработки")
+    coordinator_parser.add_argument("--reports-dir", type=str, default="reports",
+                                    help="Директория для истории времени проверок (по умолчанию: reports)")
+    coordinator_parser.add_argument("--heartbeat-timeout", type=float, default=DEFAULT_HEARTBEAT_TIMEOUT,
+                                    help="Через сколько секунд без сообщений узел считается потерянным (по умолчанию: 10)")
+    coordinator_parser.add_argument("--no-shared-paths", action="store_true",
+                                    help="Не передавать узлам пути к файлам: всегда отправлять содержимое")
+    worker_parser = subparsers.add_parser("worker", help="Проверять документы, выдаваемые координатором")
+    worker_parser.add_argument("--processes", type=int, default=None,
+                               help="Количество процессов на узле (по умолчанию: число CPU)")
+    worker_parser.add_argument("--reports-dir", type=str, default="reports",
+                               help="Директория для сохранения отчётов на узле (по умолчанию: reports)")
+    for subparser in (coordinator_parser, worker_parser):
+        subparser.add_argument("--host", type=str, default="127.0.0.1",
+                               help="Адрес координатора (по умолчанию: 127.0.0.1)")
+        subparser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                               help=f"Порт координатора (по умолчанию: {DEFAULT_PORT})")
+        subparser.add_argument("--token", type=str, default=None,
+                               help="Общий ключ, который узлы передают координатору при подключении")
+        add_logging_arguments(subparser)
+        metrics.add_metrics_arguments(subparser)
+    args = parser.parse_args()
+    try:
+        setup_logging(args.log_level, args.log_file)
+    except ValueError as e:
+        parser.error(str(e))
+    stop_metrics = metrics.start_metrics(args)
+
+    if args.role == "worker":
+        try:
+            ClusterWorker(args.host, args.port, num_workers=args.processes, reports_dir=args.reports_dir,
+                          token=args.token).run()
+        finally:
+            stop_metrics()
+        return
+
+    os.makedirs(args.reports_dir, exist_ok=True)
+    cost_model = CostModel(os.path.join(args.reports_dir, COST_HISTORY_FILE))
+    coordinator = Coordinator(expand_archives(args.files), args.host, args.port, token=args.token,
+                              heartbeat_timeout=args.heartbeat_timeout, share_paths=not args.no_shared_paths,
+                              cost_model=cost_model, progress_callback=print_progress)
+    try:
+        results_list = coordinator.run()
+    finally:
+        stop_metrics()
+    cost_model.save()
+    for file_index, result in enumerate(results_list):
+        if result is None:
+            continue
+        print(f"\nРезультаты для файла {result['file_path']} (ID: file_{file_index}) "
+              f"(время обработки: {result['time']:.2f} секунд):")
+        print(format_results(result["results"]))
+
+
+if __name__ == "__main__":
+    main()
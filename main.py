@@ -1,104 +1,316 @@
 import os
+import gc
+import hashlib
 import time
 import logging
 import argparse
-from multiprocessing import Pool, cpu_count
+from concurrent.futures import wait, FIRST_COMPLETED
+from multiprocessing import cpu_count
 from modules.parser import DocumentParser
 from modules.template import CheckTemplate
+from utils.cost_model import CostModel, EtaTracker, plan_chunks
+from utils.journal import BatchJournal
+from utils.report_sink import open_report_sink
+from utils.analytics import AnalyticsStore, ANALYTICS_FILE, parse_tags
+from utils.archives import ArchiveReader, expand_archives, split_member
+from utils.validation import InputLimits, InputLimitError, prevalidate
+from utils.logs import setup_logging, add_logging_arguments
+from utils import metrics
 
-# Настройка логирования (вызываем один раз)
-if not logging.getLogger().hasHandlers():  # Проверяем, чтобы не добавлять дублирующие обработчики
-    logging.basicConfig(
-        level=logging.DEBUG,  # Устанавливаем уровень DEBUG, чтобы записывать все сообщения
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("processing.log", mode='w', encoding='utf-8'),  # Перезаписываем файл
-            logging.StreamHandler()
-        ]
-    )
+# Журнал настраивается в точке входа (setup_logging), а не при импорте
 logger = logging.getLogger(__name__)
 
+# Файл с историей времени проверок в директории отчётов (используется моделью стоимости)
+COST_HISTORY_FILE = "cost_history.json"
+# Журнал пакетной обработки в директории отчётов (используется для продолжения прерванного пакета)
+JOURNAL_FILE = "journal.sqlite"
+# Порог RSS процесса пула и количество задач, после которых процесс перезапускается
+DEFAULT_WORKER_RSS_LIMIT = 1024 * 1024 * 1024
+DEFAULT_MAX_TASKS_PER_WORKER = 200
+# Лимиты времени в секундах: на одну проверку и на все проверки документа (проверки прерываются
+# и возвращают неполные результаты), а также жёсткий срок, после которого процесс останавливается
+DEFAULT_CHECK_TIME_LIMIT = 60
+DEFAULT_DOCUMENT_TIME_LIMIT = 180
+DEFAULT_HARD_TIMEOUT = 300
+# Лимиты, с которыми process_file создаёт шаблон проверки (задаются в процессах пула через configure_time_limits)
+TIME_LIMITS = {"check": DEFAULT_CHECK_TIME_LIMIT, "document": DEFAULT_DOCUMENT_TIME_LIMIT}
+# Ограничения на входные документы (размер, количество частей, степень сжатия, количество элементов)
+INPUT_LIMITS = InputLimits()
+# Сколько записей одного правила попадает в результат документа (остальные сводятся в одну запись
+# с их количеством); однотипные нарушения подряд идущих параграфов объединяются в диапазоны всегда
+DEFAULT_MAX_FINDINGS_PER_RULE = 100
+MAX_FINDINGS_PER_RULE = DEFAULT_MAX_FINDINGS_PER_RULE
+# Директория профилей проверок (режим --profile, см. utils.profiling); None — профилирование выключено
+PROFILE_DIR = None
+# Замер памяти при проверке каждого документа (режим --memory-profile, см. utils.profiling.MemoryTracker):
+# None — выключен, иначе количество мест программы с наибольшим объёмом выделенной памяти в результате
+MEMORY_TOP = None
+
+# Документы из архивов, переданные в пул ключом "архив!имя", читаются в процессе пула из отображённого
+# в память архива (архив открывается один раз на процесс): родительский процесс не держит содержимое
+# документов, ожидающих в очереди пула
+_archive_reader = None
+
+# Шаблон проверки создаётся один раз на процесс: в родительском процессе до запуска пула (см. warm_up),
+# откуда его наследуют процессы пула, либо при первой обработке файла
+_template = None
+
+def configure_time_limits(check_time_limit, document_time_limit):
+    """Задаёт лимиты времени проверок для текущего процесса (используется как initializer пула)."""
+    TIME_LIMITS["check"] = check_time_limit
+    TIME_LIMITS["document"] = document_time_limit
+    if _template is not None:
+        _template.check_time_limit = check_time_limit
+        _template.document_time_limit = document_time_limit
+
+def configure_worker(check_time_limit, document_time_limit, input_limits=None, max_findings_per_rule=None,
+                     profile_dir=None, memory_top=None):
+    """
+    Задаёт лимиты времени, ограничения на входные документы, число записей одного правила
+    (0 — без ограничения), директорию профилей и режим замера памяти для процесса пула
+    (initializer пула).
+    """
+    global INPUT_LIMITS, MAX_FINDINGS_PER_RULE, PROFILE_DIR, MEMORY_TOP
+    configure_time_limits(check_time_limit, document_time_limit)
+    PROFILE_DIR = profile_dir
+    MEMORY_TOP = memory_top
+    if input_limits is not None:
+        INPUT_LIMITS = input_limits
+    if max_findings_per_rule is not None:
+        MAX_FINDINGS_PER_RULE = max_findings_per_rule
+        if _template is not None:
+            _template.max_findings_per_rule = max_findings_per_rule
+
+def build_template():
+    """Создаёт шаблон проверки дипломной работы с подготовленными заранее регулярными выражениями."""
+    return CheckTemplate(
+        structure_params={
+            "require_headings": True,
+            "required_sections": ["Оглавление", "Введение", "Заключение", "Список литературы"]
+        },
+        page_params={"page_size": "A4", "margins": {"left": 3, "right": 1, "top": 2, "bottom": 2}},
+        formatting_params={
+            "font": "Times New Roman",
+            "font_size": 14,
+            "line_spacing": 1.5,
+            "alignment": "justify",
+            "first_line_indent": 1.25
+        },
+        references_params={"standard": "ГОСТ Р 7.0.5-2008"},
+        tables_params={"use_chapter_numbering": False},
+        illustrations_params={"use_chapter_numbering": False},
+        appendices_params={"appendix_number_style": "numeric"},
+        check_time_limit=TIME_LIMITS["check"],
+        document_time_limit=TIME_LIMITS["document"],
+        max_findings_per_rule=MAX_FINDINGS_PER_RULE
+    ).compile()
+
+def get_template():
+    """Возвращает шаблон проверки текущего процесса, создавая его при первом обращении."""
+    global _template
+    if _template is None:
+        _template = build_template()
+    return _template
+
+def warm_up():
+    """
+    Готовит текущий процесс к запуску пула: создаёт шаблон проверки и переводит все созданные
+    объекты в постоянное поколение сборщика мусора, чтобы процессы, созданные через fork,
+    разделяли эти страницы памяти с родителем и не копировали их при сборке мусора.
+    Модули проверок и python-docx загружаются лениво, поэтому здесь они импортируются явно.
+    """
+    DocumentParser.load_backend('.docx')
+    get_template().load_checks()
+    gc.freeze()
+
 def process_file(args):
-    """Обрабатывает один файл и возвращает результаты вместе с временем обработки."""
-    file_path, file_index, reports_dir = args  # Добавляем reports_dir как параметр
-    logger.debug(f"Начало обработки файла: {file_path} (индекс: {file_index})")
+    """
+    Обрабатывает один файл и возвращает результаты вместе с временем обработки.
+
+    args: (file_path, file_index, reports_dir) или (имя файла, file_index, reports_dir, содержимое),
+    если документ передан из памяти в виде bytes (тогда временный файл не создаётся).
+    Если reports_dir равен None, отчёт в Markdown не записывается (отчёты сохраняет хранилище
+    отчётов в родительском процессе, см. utils.report_sink).
+    """
+    file_path, file_index, reports_dir = args[:3]  # Добавляем reports_dir как параметр
+    data = args[3] if len(args) > 3 else None
+    logger.debug("Начало обработки файла: %s (индекс: %s)", file_path, file_index)
     try:
-        if not os.path.exists(file_path):
-            logger.error(f"Файл не найден: {file_path}")
+        if data is None and not os.path.exists(file_path):
+            logger.error("Файл не найден: %s", file_path)
             return {
                 "file_path": file_path,
                 "results": {"error": [f"Файл не найден: {file_path}"]},
                 "time": 0.0
             }
         if not file_path.lower().endswith('.docx'):
-            logger.error(f"Неподдерживаемый формат файла: {file_path}")
+            logger.error("Неподдерживаемый формат файла: %s", file_path)
             return {
                 "file_path": file_path,
                 "results": {"error": ["Неподдерживаемый формат файла, ожидается .docx"]},
                 "time": 0.0
             }
 
+        # Быстрая проверка по центральному каталогу архива до разбора документа
+        problems = prevalidate(file_path, data, INPUT_LIMITS)
+        if problems:
+            logger.error("Файл %s отклонён: %s", file_path, '; '.join(problems))
+            return rejected_result(file_path, problems)
+
+        memory_tracker = None
+        if MEMORY_TOP is not None:
+            # tracemalloc замедляет проверку, поэтому модуль нужен только в режиме замера памяти
+            from utils.profiling import MemoryTracker
+            memory_tracker = MemoryTracker(MEMORY_TOP)
+            memory_tracker.start()
+
+        parse_start = time.perf_counter()
         parser = DocumentParser()
-        doc = parser.parse(file_path)
-
-        diploma_template = CheckTemplate(
-            structure_params={
-                "require_headings": True,
-                "required_sections": ["Оглавление", "Введение", "Заключение", "Список литературы"]
-            },
-            page_params={"page_size": "A4", "margins": {"left": 3, "right": 1, "top": 2, "bottom": 2}},
-            formatting_params={
-                "font": "Times New Roman",
-                "font_size": 14,
-                "line_spacing": 1.5,
-                "alignment": "justify",
-                "first_line_indent": 1.25
-            },
-            references_params={"standard": "ГОСТ Р 7.0.5-2008"},
-            tables_params={"use_chapter_numbering": False},
-            illustrations_params={"use_chapter_numbering": False},
-            appendices_params={"appendix_number_style": "numeric"}
-        )
-
-        # Проверяем, что директория для отчётов существует и доступна
         try:
-            os.makedirs(reports_dir, exist_ok=True)
-            os.chmod(reports_dir, 0o700)
-        except Exception as e:
-            logger.error(f"Ошибка при создании директории {reports_dir}: {str(e)}")
-            return {
-                "file_path": file_path,
-                "results": {"error": [f"Ошибка при создании директории {reports_dir}: {str(e)}"]},
-                "time": 0.0
-            }
+            doc = parser.parse(file_path, data=data, limits=INPUT_LIMITS)
+        except InputLimitError as e:
+            logger.error("Файл %s отклонён при разборе: %s", file_path, e)
+            if memory_tracker is not None:
+                memory_tracker.stop()
+            return rejected_result(file_path, [str(e)])
+        parse_time = time.perf_counter() - parse_start
+
+        diploma_template = get_template()
+
+        report_file = None
+        if reports_dir is not None:
+            # Проверяем, что директория для отчётов существует и доступна
+            try:
+                os.makedirs(reports_dir, exist_ok=True)
+                os.chmod(reports_dir, 0o700)
+            except Exception as e:
+                logger.error("Ошибка при создании директории %s: %s", reports_dir, e)
+                return {
+                    "file_path": file_path,
+                    "results": {"error": [f"Ошибка при создании директории {reports_dir}: {str(e)}"]},
+                    "time": 0.0
+                }
 
-        report_filename = f"report_check_file_{file_index}.md"
-        report_file = os.path.join(reports_dir, report_filename)
+            report_filename = f"report_check_file_{file_index}.md"
+            report_file = os.path.join(reports_dir, report_filename)
 
         start_time = time.time()
-        results = diploma_template.apply(doc, file_path, report_file=report_file)
+        if PROFILE_DIR is not None:
+            # cProfile и сэмплер стеков нужны только в режиме профилирования
+            from utils.profiling import DocumentProfiler
+            with DocumentProfiler(PROFILE_DIR, f"file_{file_index}") as profiler:
+                results = diploma_template.apply(doc, file_path, report_file=report_file, source=data,
+                                                 profiler=profiler)
+        else:
+            results = diploma_template.apply(doc, file_path, report_file=report_file, source=data)
         end_time = time.time()
         processing_time = end_time - start_time
+        # Документ больше не нужен: освобождаем его до замера оставшейся занятой памяти
+        del doc
+        memory = memory_tracker.stop() if memory_tracker is not None else None
 
-        logger.info(f"Файл {file_path} обработан за {processing_time:.2f} секунд")
-        logger.debug(f"Результаты для файла {file_path}: {results}")
+        logger.info("Файл %s обработан за %.2f секунд", file_path, processing_time)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Результаты для файла %s: нарушений: %s", file_path, sum(len(r) for r in results.values()))
 
-        return {
+        result = {
             "file_path": file_path,
             "results": results,
-            "time": processing_time
+            "time": processing_time,
+            "check_times": {"parse": parse_time, **diploma_template.check_times},
+            "counters": diploma_template.check_counters,
+            "truncated": diploma_template.truncated_checks
         }
+        if memory is not None:
+            result["memory"] = memory
+        return result
 
     except Exception as e:
-        logger.error(f"Ошибка при обработке файла {file_path}: {str(e)}")
+        logger.error("Ошибка при обработке файла %s: %s", file_path, e)
         return {
             "file_path": file_path,
             "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
             "time": 0.0
         }
 
-def process_multiple_files(file_paths, reports_dir, num_processes=None):
-    """Обрабатывает несколько файлов параллельно."""
+def read_member_args(args):
+    """
+    Дополняет аргументы process_file для документа из архива ("архив!имя" без содержимого) его содержимым,
+    прочитанным из архива в текущем процессе. Если документ прочитать не удалось, он обрабатывается как
+    путь и получает результат "Файл не найден".
+    """
+    global _archive_reader
+    if len(args) > 3 or not split_member(args[0]):
+        return args
+    if _archive_reader is None:
+        _archive_reader = ArchiveReader()
+    try:
+        return (*args, _archive_reader.read(args[0]))
+    except Exception as e:
+        logger.error("Не удалось прочитать документ %s из архива: %s", args[0], e)
+        return args
+
+def process_chunk(chunk_args):
+    """Обрабатывает пакет файлов в одном процессе и возвращает пары (индекс файла, результат)."""
+    return [(args[1], process_file(read_member_args(args))) for args in chunk_args]
+
+def rejected_result(file_path, problems):
+    """Результат для файла, отклонённого из-за превышения ограничений на входные документы."""
+    return {
+        "file_path": file_path,
+        "results": {"error": [f"Документ отклонён: {problem}" for problem in problems]},
+        "time": 0.0,
+        "rejected": True
+    }
+
+def timeout_result(file_path, hard_timeout):
+    """Результат для файла, обработка которого остановлена по жёсткому сроку."""
+    return {
+        "file_path": file_path,
+        "results": {"error": [f"Обработка файла остановлена: превышен жёсткий срок {hard_timeout} с"]},
+        "time": float(hard_timeout),
+        "timed_out": True
+    }
+
+def process_multiple_files(file_paths, reports_dir, num_processes=None, progress_callback=None, cost_model=None,
+                           memory_budget=None, worker_rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                           max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER,
+                           check_time_limit=DEFAULT_CHECK_TIME_LIMIT, document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT,
+                           hard_timeout=DEFAULT_HARD_TIMEOUT, journal=None, resume=False, input_limits=None,
+                           max_findings_per_rule=None, report_sink=None, profile_dir=None, memory_top=None):
+    """
+    Обрабатывает несколько файлов параллельно.
+
+    Перед отправкой в пул файлы упорядочиваются по оценке стоимости (самые долгие первыми),
+    мелкие файлы объединяются в пакеты, которые раздаются процессам по мере освобождения.
+    Пакет допускается к выполнению, только если оценка нужной ему памяти укладывается
+    в memory_budget (байты); процессы перезапускаются при превышении worker_rss_limit
+    или после max_tasks_per_worker пакетов.
+    Проверки прерываются по check_time_limit и document_time_limit (секунды) с неполными
+    результатами; процесс, не уложившийся в hard_timeout на файл, останавливается: пакет из
+    нескольких файлов повторно отправляется по одному файлу, а для одиночного файла
+    записывается результат с "timed_out".
+    Документы, нарушающие input_limits (InputLimits, по умолчанию INPUT_LIMITS), отклоняются
+    по центральному каталогу архива ещё до отправки в пул и получают результат с "rejected".
+    max_findings_per_rule ограничивает число записей одного правила в результате документа
+    (0 — без ограничения, None — MAX_FINDINGS_PER_RULE).
+    Если передан report_sink (хранилище отчётов из utils.report_sink), процессы пула не пишут
+    отдельный файл отчёта на каждый документ: результаты пакетами сохраняются в хранилище,
+    а отчёты в Markdown/HTML формируются из него по запросу.
+    Если передан profile_dir, каждая проверка каждого документа профилируется (cProfile и свёрнутые
+    стеки для flamegraph, см. utils.profiling), а профили сохраняются в profile_dir.
+    Если memory_top не None, для каждого документа в процессе пула замеряются пик памяти Python
+    (tracemalloc), изменение RSS и память, оставшаяся занятой после проверки; результат содержит
+    их в "memory" (с memory_top местами программы, выделившими больше всего памяти, если memory_top > 0).
+    Если обработать нужно один файл, он обрабатывается в текущем процессе без запуска пула
+    (жёсткий срок hard_timeout в этом случае не применяется, лимиты проверок действуют).
+    Если передан journal (BatchJournal), результат каждого файла сразу записывается в журнал
+    вместе с хешем содержимого (он же сохраняется в результате как "content_hash"); при resume=True файлы,
+    уже успешно обработанные или отклонённые по журналу, не обрабатываются повторно, а их результаты
+    берутся из журнала (файлы с ошибкой или превышением срока обрабатываются заново).
+    progress_callback(обработано, всего, оставшееся время в секундах) вызывается после каждого пакета.
+    Результаты возвращаются в порядке file_paths.
+    """
     if not file_paths:
         logger.error("Список файлов пуст")
         return []
@@ -107,18 +319,176 @@ def process_multiple_files(file_paths, reports_dir, num_processes=None):
         num_processes = min(cpu_count(), len(file_paths))
     num_processes = max(1, num_processes)
 
-    logger.info(f"Обработка {len(file_paths)} файлов с использованием {num_processes} процессов...")
+    # Документы из архивов ("архив!имя") читаются из отображённого в память архива один раз — для хеша,
+    # оценки стоимости и предварительной проверки; в пул они передаются ключом и читаются процессом пула
+    # только при обработке (см. read_member_args), поэтому очередь пула не держит их содержимое
+    archive_reader = ArchiveReader()
+
+    def document_data(idx):
+        if not split_member(file_paths[idx]):
+            return None
+        try:
+            return archive_reader.read(file_paths[idx])
+        except Exception as e:
+            # Документ передаётся в пул как путь и получает результат "Файл не найден"
+            logger.error("Не удалось прочитать документ %s из архива: %s", file_paths[idx], e)
+            return None
 
-    file_args = [(file_path, idx, reports_dir) for idx, file_path in enumerate(file_paths)]
+    def task_args(idx, data=None):
+        task_reports_dir = reports_dir if report_sink is None else None
+        if data is None:
+            return (file_paths[idx], idx, task_reports_dir)
+        return (file_paths[idx], idx, task_reports_dir, data)
 
     try:
-        with Pool(processes=num_processes) as pool:
-            results_list = pool.map(process_file, file_args)
-    except Exception as e:
-        logger.error(f"Ошибка при параллельной обработке: {str(e)}")
-        return []
+        results_list = [None] * len(file_paths)
+        completed = 0
+        content_hashes = [None] * len(file_paths)
+        if cost_model is None:
+            cost_model = CostModel(os.path.join(reports_dir, COST_HISTORY_FILE))
+        input_limits = input_limits or INPUT_LIMITS
+        todo = []
+        features = {}
+        rejected = []
+        for idx in range(len(file_paths)):
+            # Содержимое документа из архива читается здесь один раз и сразу освобождается
+            data = document_data(idx)
+            if journal is not None:
+                content_hashes[idx] = (hashlib.sha256(data).hexdigest() if data is not None
+                                       else BatchJournal.file_hash(file_paths[idx]))
+                stored = None
+                if resume and content_hashes[idx]:
+                    stored = journal.get_result(content_hashes[idx], statuses=BatchJournal.REUSABLE_STATUSES)
+                if stored is not None:
+                    stored["file_path"] = file_paths[idx]
+                    stored["content_hash"] = content_hashes[idx]
+                    results_list[idx] = stored
+                    if report_sink is not None:
+                        report_sink.write(idx, stored)
+                    completed += 1
+                    continue
+            todo.append(idx)
+            features[idx] = cost_model.document_features(file_paths[idx], data=data)
+            # Файлы без содержимого или другого формата получат сообщение об ошибке от process_file
+            if file_paths[idx].lower().endswith('.docx') and (data is not None or os.path.isfile(file_paths[idx])):
+                problems = prevalidate(file_paths[idx], data, input_limits)
+                if problems:
+                    logger.error("Файл %s отклонён: %s", file_paths[idx], '; '.join(problems))
+                    rejected.append((idx, rejected_result(file_paths[idx], problems)))
+        if resume and journal is not None:
+            logger.info("Продолжение пакета: %s файлов уже обработано по журналу %s", completed, journal.path)
+        metrics.BATCH_DOCUMENTS.set(len(file_paths), state="total")
+        metrics.BATCH_DOCUMENTS.set(completed, state="completed")
+        if not todo:
+            return results_list
+        rejected_ids = {idx for idx, _ in rejected}
+        todo = [idx for idx in todo if idx not in rejected_ids]
+        costs = {idx: cost_model.estimate(features[idx]) for idx in todo}
+        memory = {idx: cost_model.estimate_memory(features[idx]) for idx in todo}
+        chunks = [[todo[i] for i in chunk] for chunk in plan_chunks([costs[idx] for idx in todo], num_processes)]
+        eta = EtaTracker(costs, num_processes)
+
+        logger.info("Обработка %s файлов с использованием %s процессов (%s пакетов, оценка времени: %.1f с)...",
+                    len(todo), num_processes, len(chunks), eta.eta())
+
+        def record(chunk_results):
+            nonlocal completed
+            for idx, result in chunk_results:
+                results_list[idx] = result
+                completed += 1
+                metrics.observe_result(result)
+                if content_hashes[idx]:
+                    result["content_hash"] = content_hashes[idx]
+                if report_sink is not None:
+                    report_sink.write(idx, result)
+                if journal is not None and content_hashes[idx]:
+                    report_path = None
+                    if report_sink is not None:
+                        report_path = report_sink.report_ref(idx)
+                    elif "error" not in result["results"]:
+                        report_path = os.path.join(reports_dir, f"report_check_file_{idx}.md")
+                    journal.record(content_hashes[idx], result, report_path)
+                if result.get("check_times"):
+                    cost_model.observe(features[idx], result["check_times"])
+                eta.complete(idx, result["time"])
+            metrics.BATCH_DOCUMENTS.set(completed, state="completed")
+            if progress_callback:
+                progress_callback(completed, len(file_paths), eta.eta())
+
+        if rejected:
+            record(rejected)
+        if not todo:
+            cost_model.save()
+            return results_list
 
-    return results_list
+        if len(todo) == 1:
+            # Для одного файла запуск процессов и копирование шаблона стоят дороже самой проверки
+            configure_worker(check_time_limit, document_time_limit, input_limits, max_findings_per_rule, profile_dir,
+                             memory_top)
+            record(process_chunk([task_args(todo[0], document_data(todo[0]))]))
+            cost_model.save()
+            return results_list
+
+        # Пул нужен только для нескольких файлов, поэтому модуль с psutil и multiprocessing загружается здесь
+        from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+
+        if PREFORK_START_METHOD:
+            warm_up()
+        try:
+            with WorkerPool(process_chunk, num_processes, memory_budget=memory_budget, rss_limit=worker_rss_limit,
+                            max_tasks_per_worker=max_tasks_per_worker, initializer=configure_worker,
+                            initargs=(check_time_limit, document_time_limit, input_limits, max_findings_per_rule,
+                                      profile_dir, memory_top),
+                            mp_context=PREFORK_START_METHOD,
+                            prestart=True) as pool:
+                pending = {}
+
+                def submit(chunk):
+                    # Файлы пакета обрабатываются последовательно, поэтому пакету нужна память самого большого из них
+                    future = pool.submit([task_args(i) for i in chunk], memory=max(memory[i] for i in chunk),
+                                         timeout=hard_timeout * len(chunk) if hard_timeout else None)
+                    pending[future] = chunk
+
+                for chunk in chunks:
+                    submit(chunk)
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk = pending.pop(future)
+                        try:
+                            chunk_results = future.result()
+                        except TaskTimeoutError:
+                            if len(chunk) > 1:
+                                # Неизвестно, какой файл пакета завис: отправляем файлы пакета по одному
+                                logger.warning("Пакет из %s файлов превысил жёсткий срок, повторная отправка по одному файлу", len(chunk))
+                                for idx in chunk:
+                                    submit([idx])
+                                continue
+                            logger.error("Файл %s превысил жёсткий срок обработки %s с", file_paths[chunk[0]], hard_timeout)
+                            chunk_results = [(chunk[0], timeout_result(file_paths[chunk[0]], hard_timeout))]
+                        except Exception as e:
+                            logger.error("Ошибка в процессе пула: %s", e)
+                            chunk_results = [(idx, {
+                                "file_path": file_paths[idx],
+                                "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
+                                "time": 0.0
+                            }) for idx in chunk]
+                        record(chunk_results)
+        except Exception as e:
+            logger.error("Ошибка при параллельной обработке: %s", e)
+            return []
+
+        cost_model.save()
+        return results_list
+    finally:
+        archive_reader.close()
+        if report_sink is not None:
+            report_sink.flush()
+
+def print_progress(completed, total, eta_seconds):
+    """Выводит прогресс пакетной обработки и оценку оставшегося времени."""
+    print(f"Обработано {completed}/{total} файлов, осталось примерно {eta_seconds:.0f} с", flush=True)
 
 def format_results(results):
     """Форматирует результаты для вывода."""
@@ -141,13 +511,77 @@ def format_results(results):
 def main():
     """Основная функция для консольного запуска."""
     parser = argparse.ArgumentParser(description="Проверка документов .docx на соответствие требованиям.")
-    parser.add_argument("files", nargs='+', help="Путь к файлам .docx для обработки")
+    parser.add_argument("files", nargs='+',
+                        help="Путь к файлам .docx для обработки (архивы .zip проверяются без распаковки на диск)")
     parser.add_argument("--processes", type=int, default=None,
                         help="Количество процессов для параллельной обработки (по умолчанию: число CPU или количество файлов)")
     parser.add_argument("--reports-dir", type=str, default="reports",
                         help="Директория для сохранения отчётов (по умолчанию: reports)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Продолжить прерванный пакет: пропустить файлы, успешно обработанные "
+                             "или отклонённые по журналу")
+    parser.add_argument("--journal", type=str, default=None,
+                        help="Путь к журналу пакетной обработки (по умолчанию: journal.sqlite в директории отчётов)")
+    parser.add_argument("--memory-budget", type=int, default=None,
+                        help="Бюджет памяти на одновременно обрабатываемые документы в МБ (по умолчанию: 75%% доступной памяти)")
+    parser.add_argument("--worker-rss-limit", type=int, default=DEFAULT_WORKER_RSS_LIMIT >> 20,
+                        help="Порог RSS процесса в МБ, после которого процесс перезапускается (по умолчанию: 1024)")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=DEFAULT_MAX_TASKS_PER_WORKER,
+                        help="Количество пакетов, после которого процесс перезапускается (по умолчанию: 200)")
+    parser.add_argument("--check-time-limit", type=float, default=DEFAULT_CHECK_TIME_LIMIT,
+                        help="Лимит времени одной проверки в секундах, 0 — без ограничения (по умолчанию: 60)")
+    parser.add_argument("--document-time-limit", type=float, default=DEFAULT_DOCUMENT_TIME_LIMIT,
+                        help="Лимит времени всех проверок документа в секундах, 0 — без ограничения (по умолчанию: 180)")
+    parser.add_argument("--hard-timeout", type=float, default=DEFAULT_HARD_TIMEOUT,
+                        help="Жёсткий срок обработки файла в секундах, после которого процесс останавливается, "
+                             "0 — без ограничения (по умолчанию: 300)")
+    parser.add_argument("--max-uncompressed-size", type=int, default=InputLimits.max_uncompressed_size >> 20,
+                        help="Максимальный распакованный размер документа в МБ, 0 — без ограничения (по умолчанию: 512)")
+    parser.add_argument("--max-parts", type=int, default=InputLimits.max_parts,
+                        help="Максимальное количество частей в архиве документа, 0 — без ограничения (по умолчанию: 5000)")
+    parser.add_argument("--max-compression-ratio", type=float, default=InputLimits.max_compression_ratio,
+                        help="Максимальная степень сжатия части документа, 0 — без ограничения (по умолчанию: 500)")
+    parser.add_argument("--max-elements", type=int, default=InputLimits.max_elements,
+                        help="Максимальное количество элементов XML в документе, 0 — без ограничения "
+                             "(по умолчанию: 5000000)")
+    parser.add_argument("--report-format", choices=["md", "sqlite", "jsonl"], default="md",
+                        help="Куда сохранять отчёты: md — файл report_check_file_N.md на каждый документ, "
+                             "sqlite или jsonl — одно хранилище reports.sqlite/reports.jsonl в директории отчётов "
+                             "с пакетной записью; отчёты из него формирует python -m utils.report_sink "
+                             "(по умолчанию: md)")
+    parser.add_argument("--max-findings-per-rule", type=int, default=DEFAULT_MAX_FINDINGS_PER_RULE,
+                        help="Сколько нарушений одного правила выводить для документа (остальные сводятся в одну "
+                             "запись с их количеством), 0 — без ограничения (по умолчанию: 100)")
+    parser.add_argument("--analytics", type=str, nargs="?", const="", default=None,
+                        help="Сохранить статистику нарушений в аналитическое хранилище (по умолчанию: analytics.sqlite "
+                             "в директории отчётов); запросы к нему выполняет python -m utils.analytics")
+    parser.add_argument("--tag", action="append", default=[],
+                        help="Метка пакета для аналитики в виде ключ=значение, например cohort=2026, group=ИВТ-41, "
+                             "draft=2 (можно указать несколько раз)")
+    parser.add_argument("--profile", type=str, default=None, metavar="DIR",
+                        help="Профилировать проверки: для каждого документа сохранить в DIR профили cProfile "
+                             "(file_N.<проверка>.pstats и сводный file_N.pstats) и свёрнутые стеки для "
+                             "flamegraph (file_N.collapsed)")
+    parser.add_argument("--memory-profile", type=int, nargs="?", const=0, default=None, metavar="TOP",
+                        help="Замерять память при проверке каждого документа: пик памяти Python (tracemalloc), "
+                             "прирост RSS процесса и память, оставшуюся занятой; TOP — сколько мест программы "
+                             "с наибольшим объёмом выделенной памяти показать; рост RSS процессов пула от документа "
+                             "к документу выводится как подозрение на утечку")
+    add_logging_arguments(parser)
+    metrics.add_metrics_arguments(parser)
 
     args = parser.parse_args()
+    try:
+        setup_logging(args.log_level, args.log_file)
+        tags = parse_tags(args.tag)
+    except ValueError as e:
+        parser.error(str(e))
+    stop_metrics = metrics.start_metrics(args)
+    input_limits = InputLimits(
+        max_uncompressed_size=args.max_uncompressed_size * 1024 * 1024 or None,
+        max_parts=args.max_parts or None,
+        max_compression_ratio=args.max_compression_ratio or None,
+        max_elements=args.max_elements or None)
 
     logger.debug("Запуск программы")
 
@@ -156,8 +590,10 @@ def main():
     valid_files = [f for f in input_files if os.path.exists(f)]
     if len(valid_files) != len(input_files):
         missing_files = set(input_files) - set(valid_files)
-        logger.warning(f"Следующие файлы не найдены и будут пропущены: {missing_files}")
+        logger.warning("Следующие файлы не найдены и будут пропущены: %s", missing_files)
         input_files = valid_files
+    # Документы из архивов обозначаются как "архив.zip!имя.docx"
+    input_files = expand_archives(input_files)
 
     if not input_files:
         logger.error("Нет доступных файлов для обработки")
@@ -165,14 +601,46 @@ def main():
         return
 
     # Обрабатываем файлы
-    results_list = process_multiple_files(input_files, args.reports_dir, num_processes=args.processes)
+    os.makedirs(args.reports_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(args.reports_dir, JOURNAL_FILE)
+    report_sink = open_report_sink(args.report_format, args.reports_dir) if args.report_format != "md" else None
+    try:
+        with BatchJournal(journal_path) as journal:
+            results_list = process_multiple_files(
+                input_files, args.reports_dir, num_processes=args.processes, progress_callback=print_progress,
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                worker_rss_limit=args.worker_rss_limit * 1024 * 1024,
+                max_tasks_per_worker=args.max_tasks_per_worker,
+                check_time_limit=args.check_time_limit or None,
+                document_time_limit=args.document_time_limit or None,
+                hard_timeout=args.hard_timeout or None,
+                journal=journal, resume=args.resume, input_limits=input_limits,
+                max_findings_per_rule=args.max_findings_per_rule, report_sink=report_sink,
+                profile_dir=args.profile, memory_top=args.memory_profile)
+    finally:
+        if report_sink is not None:
+            report_sink.close()
+        stop_metrics()
+    if report_sink is not None:
+        print(f"Отчёты сохранены в {report_sink.path} (python -m utils.report_sink {report_sink.path} --index N)")
+    if args.profile:
+        print(f"Профили проверок сохранены в {args.profile} (python -m pstats {args.profile}/file_N.pstats)")
+    if args.memory_profile is not None:
+        from utils.profiling import LeakDetector, format_memory_summary
+        leak_detector = LeakDetector()
+        leak_detector.observe_results(results_list)
+        print(format_memory_summary(results_list, leak_detector))
+    if args.analytics is not None:
+        analytics_path = args.analytics or os.path.join(args.reports_dir, ANALYTICS_FILE)
+        with AnalyticsStore(analytics_path) as analytics:
+            analytics.add_batch(results_list, tags)
+        print(f"Статистика сохранена в {analytics_path} (python -m utils.analytics {analytics_path} top)")
 
     # Выводим результаты
-    for result in results_list:
+    for file_index, result in enumerate(results_list):
         file_path = result["file_path"]
         file_results = result["results"]
         processing_time = result["time"]
-        file_index = input_files.index(file_path)
         print(f"\nРезультаты для файла {file_path} (ID: file_{file_index}) (время обработки: {processing_time:.2f} секунд):")
         print(format_results(file_results))
 
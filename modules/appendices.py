@@ -2,13 +2,12 @@ import re
 import logging
 from docx.document import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
 from .base import CheckModule
 
-logging.basicConfig(filename='processing.log', level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class AppendicesCheck(CheckModule):
+    CHECK_ID = "appendices"
     # Регулярные выражения для поиска приложений
     APPENDIX_HEADER_PATTERN = re.compile(r'^Приложение\s+([А-Я]|\d+)$')
     # Регулярное выражение для поиска ссылок на приложения в тексте
@@ -33,9 +32,9 @@ class AppendicesCheck(CheckModule):
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(document, Document):
-            return [f"Ошибка: document должен быть объектом Document, получено: {type(document)}"]
+            return [self.finding("document_type", actual=str(type(document)))]
 
         # Параметры проверки
         appendix_number_style = params.get("appendix_number_style", "numeric")  # "numeric" (1, 2, 3) или "alpha" (А, Б, В)
@@ -51,6 +50,10 @@ class AppendicesCheck(CheckModule):
         # Сбор всех параграфов
         paragraphs = []
         for i, para in enumerate(document.paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
+            # Разделы, оглавление и ссылки на приложения: три выражения на параграф
+            self.counters["regex"] += 3
             text = para.text.strip() if para.text else ""
             paragraphs.append((i, para, text))
 
@@ -67,18 +70,24 @@ class AppendicesCheck(CheckModule):
                 in_toc = True
             elif in_toc and text:
                 toc_content.append(text)
-            elif in_toc and re.match(r"^(Введение|Список сокращений|Список терминов)", text):
-                in_toc = False
+            elif in_toc:
+                self.counters["regex"] += 1
+                if re.match(r"^(Введение|Список сокращений|Список терминов)", text):
+                    in_toc = False
 
             # Ищем ссылки на приложения в тексте
             matches = self.APPENDIX_REF_PATTERN.findall(text)
             for appendix_num in matches:
                 appendix_references.append((appendix_num, i))
 
-        # Проверяем приложения
+        # Проверяем приложения (по собранным параграфам: повторные обращения к document.paragraphs
+        # и поиск разрыва страницы по preceding-sibling::* для каждого заголовка давали квадратичное время)
         expected_appendix_num = 1 if appendix_number_style == "numeric" else "А"
-        for para_idx, para in enumerate(document.paragraphs):
-            text = para.text.strip()
+        page_breaks = self.page_breaks_before(document)
+        for para_idx, para, text in paragraphs:
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
+            self.counters["regex"] += 1
             match = self.APPENDIX_HEADER_PATTERN.match(text)
             if not match:
                 continue
@@ -89,14 +98,14 @@ class AppendicesCheck(CheckModule):
 
             # Проверка стиля нумерации
             if appendix_number_style == "numeric" and not appendix_num.isdigit():
-                errors.append(f"Приложение (параграф {para_idx+1}): Ожидается числовая нумерация (1, 2, 3), получено '{appendix_num}'")
+                errors.append(self.finding("numeric_style", para_idx + 1, appendix_num))
             elif appendix_number_style == "alpha" and not re.match(r'^[А-Я]$', appendix_num):
-                errors.append(f"Приложение (параграф {para_idx+1}): Ожидается буквенная нумерация (А, Б, В), получено '{appendix_num}'")
+                errors.append(self.finding("alpha_style", para_idx + 1, appendix_num))
 
             # Проверка последовательности нумерации
             expected = str(expected_appendix_num) if appendix_number_style == "numeric" else expected_appendix_num
             if appendix_num != expected:
-                errors.append(f"Приложение (параграф {para_idx+1}): Неверный номер приложения, ожидается {expected}, получено {appendix_num}")
+                errors.append(self.finding("numbering", para_idx + 1, appendix_num, expected))
             if appendix_number_style == "numeric":
                 expected_appendix_num = int(expected_appendix_num) + 1
             else:
@@ -104,44 +113,41 @@ class AppendicesCheck(CheckModule):
 
             # Проверка выравнивания заголовка "Приложение N"
             if para.alignment != WD_ALIGN_PARAGRAPH.RIGHT:
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Заголовок 'Приложение {appendix_num}' должен быть выровнен по правому краю")
+                errors.append(self.finding("header_alignment", (appendix_num, para_idx + 1)))
 
             # Проверка разрыва страницы перед приложением
-            prev_elements = para._element.xpath('preceding-sibling::*')
-            has_page_break = any(elem.tag.endswith('br') and elem.get(qn('w:type')) == 'page' for elem in prev_elements)
-            if not has_page_break and para_idx > 0:
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Приложение должно начинаться с новой страницы (отсутствует разрыв страницы)")
+            if not page_breaks[para_idx] and para_idx > 0:
+                errors.append(self.finding("page_break", (appendix_num, para_idx + 1)))
 
             # Проверка тематического заголовка приложения
             title_idx = para_idx + 1
-            if title_idx >= len(document.paragraphs):
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Отсутствует тематический заголовок после 'Приложение {appendix_num}'")
+            if title_idx >= len(paragraphs):
+                errors.append(self.finding("title_missing", (appendix_num, para_idx + 1)))
                 continue
-            title_para = document.paragraphs[title_idx]
-            title_text = title_para.text.strip()
+            _, title_para, title_text = paragraphs[title_idx]
             if not title_text:
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Отсутствует тематический заголовок после 'Приложение {appendix_num}'")
+                errors.append(self.finding("title_missing", (appendix_num, para_idx + 1)))
                 continue
 
             # Проверка оформления тематического заголовка
             if not title_text[0].isupper():
-                errors.append(f"Приложение {appendix_num} (параграф {title_idx+1}): Тематический заголовок '{title_text}' должен начинаться с прописной буквы")
+                errors.append(self.finding("title_case", (appendix_num, title_idx + 1), title_text))
             if title_text.endswith('.'):
-                errors.append(f"Приложение {appendix_num} (параграф {title_idx+1}): Тематический заголовок '{title_text}' не должен заканчиваться точкой")
+                errors.append(self.finding("title_period", (appendix_num, title_idx + 1), title_text))
             if title_para.alignment != WD_ALIGN_PARAGRAPH.CENTER:
-                errors.append(f"Приложение {appendix_num} (параграф {title_idx+1}): Тематический заголовок '{title_text}' должен быть выровнен по центру")
+                errors.append(self.finding("title_alignment", (appendix_num, title_idx + 1), title_text))
 
             # Проверка положения приложения
             if references_idx is not None and para_idx < references_idx:
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Приложение должно располагаться после списка литературы")
+                errors.append(self.finding("after_references", (appendix_num, para_idx + 1)))
             if illustrations_list_idx is not None and para_idx < illustrations_list_idx:
-                errors.append(f"Приложение {appendix_num} (параграф {para_idx+1}): Приложение должно располагаться после списка иллюстративного материала")
+                errors.append(self.finding("after_illustrations", (appendix_num, para_idx + 1)))
 
         # Проверка ссылок на приложения
         referenced_appendices = set(ref[0] for ref in appendix_references)
         for appendix_num, _ in appendix_positions:
             if appendix_num not in referenced_appendices:
-                errors.append(f"Приложение {appendix_num}: Отсутствует ссылка на приложение в тексте")
+                errors.append(self.finding("unreferenced", appendix_num))
 
         # Проверка включения приложений в оглавление
         if appendix_positions:
@@ -150,7 +156,7 @@ class AppendicesCheck(CheckModule):
                 # Если приложение одно, в оглавлении должно быть просто "Приложение"
                 expected_toc_entry = "Приложение"
                 if not any(expected_toc_entry.upper() in toc_line.upper() for toc_line in toc_content):
-                    errors.append("Приложение не включено в оглавление (ожидается 'Приложение')")
+                    errors.append(self.finding("toc_single", expected=expected_toc_entry))
             else:
                 # Если приложений больше одного, проверяем их перечисление
                 appendix_nums = [num for num, _ in appendix_positions]
@@ -159,12 +165,12 @@ class AppendicesCheck(CheckModule):
                     first_num, last_num = appendix_nums[0], appendix_nums[-1]
                     expected_toc_entry = f"Приложения {first_num}–{last_num}"
                     if not any(expected_toc_entry.upper() in toc_line.upper() for toc_line in toc_content):
-                        errors.append(f"Приложения не включены в оглавление (ожидается '{expected_toc_entry}')")
+                        errors.append(self.finding("toc_range", expected=expected_toc_entry))
                 else:
                     # Если приложений 5 или меньше, они перечисляются
                     for appendix_num in appendix_nums:
                         expected_toc_entry = f"Приложение {appendix_num}"
                         if not any(expected_toc_entry.upper() in toc_line.upper() for toc_line in toc_content):
-                            errors.append(f"Приложение {appendix_num} не включено в оглавление (ожидается '{expected_toc_entry}')")
+                            errors.append(self.finding("toc_entry", appendix_num, expected=expected_toc_entry))
 
         return errors
\ No newline at end of file
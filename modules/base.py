@@ -1,3 +1,77 @@
+import time
+from collections import Counter
+from modules.findings import Finding
+
+# Счётчики работы проверок (CheckModule.counters): просмотренные параграфы и прогоны (runs),
+# вычисления XPath/ElementPath и регулярных выражений в основных циклах проверок
+COUNTERS = ("paragraphs", "runs", "xpath", "regex")
+
+
+class CheckTimeoutError(Exception):
+    """Проверка превысила выделенное ей время; содержит ошибки, найденные до прерывания."""
+
+    def __init__(self, partial_errors):
+        super().__init__("Превышено время проверки")
+        self.partial_errors = partial_errors
+
+
 class CheckModule:
+    # Ключ проверки в каталоге сообщений modules.findings.MESSAGES
+    CHECK_ID = None
+    # Момент времени (по time.monotonic), после которого проверка прерывается; None — без ограничения
+    deadline = None
+
+    def __init__(self):
+        # Счётчики работы проверки (см. COUNTERS); шаблон сбрасывает их перед каждым запуском
+        self.counters = Counter()
+
+    def reset_counters(self):
+        """Сбрасывает счётчики и возвращает накопленные значения."""
+        counters, self.counters = self.counters, Counter()
+        return counters
+
     def check(self, document):
-        raise NotImplementedError("Subclasses must implement this method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def check_deadline(self, errors):
+        """Прерывает проверку, если истекло выделенное ей время, сохраняя уже найденные ошибки."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise CheckTimeoutError(errors)
+
+    @staticmethod
+    def paragraph_style(para, cache):
+        """
+        Стиль параграфа (para.style) с кешем cache по идентификатору стиля в w:pStyle: python-docx при
+        каждом обращении к стилю по умолчанию перебирает все стили документа.
+        """
+        style_id = para._p.style
+        if style_id not in cache:
+            cache[style_id] = para.style
+        return cache[style_id]
+
+    def page_breaks_before(self, document):
+        """
+        Для каждого параграфа document.paragraphs: есть ли среди предшествующих ему элементов тела
+        разрыв страницы (элемент br с w:type="page"). Результат тот же, что у поиска по
+        preceding-sibling::* для каждого параграфа, но тело документа просматривается один раз.
+        """
+        # python-docx импортируется здесь: main импортирует base при запуске, а docx загружается лениво
+        from docx.oxml.ns import qn
+
+        self.counters["xpath"] += 1
+        flags = []
+        seen_break = False
+        p_tag = qn('w:p')
+        for element in document.element.body.iterchildren():
+            # Комментарии и инструкции обработки не входят в preceding-sibling::*
+            if not isinstance(element.tag, str):
+                continue
+            if element.tag == p_tag:
+                flags.append(seen_break)
+            if element.tag.endswith('br') and element.get(qn('w:type')) == 'page':
+                seen_break = True
+        return flags
+
+    def finding(self, rule, loc=None, actual=None, expected=None):
+        """Создаёт запись о нарушении правила rule этой проверки (см. modules.findings)."""
+        return Finding(self.CHECK_ID, rule, loc, actual, expected)
@@ -0,0 +1,334 @@
+"""
+Результаты проверок в виде компактных записей.
+
+Проверки возвращают не готовые строки, а записи Finding: ключ проверки, код правила, место в документе
+(номера считаются с 1, как в отчёте), фактическое и ожидаемое значения. Текст сообщения собирается
+из каталога MESSAGES только при выводе (отчёт, консоль, интерфейс), поэтому между процессами
+передаются и в журнале хранятся только значения, а результаты можно агрегировать по правилам.
+"""
+
+# Каталог сообщений: ключ проверки -> {код правила: шаблон str.format с полями loc, actual, expected}
+MESSAGES = {
+    "structure": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: document должен быть объектом Document, получено: {actual}",
+        "require_headings_type": "Ошибка: require_headings должен быть булевым значением, получено: {actual}",
+        "required_sections_type": "Ошибка: required_sections должен быть списком, получено: {actual}",
+        "required_sections_items": "Ошибка: все элементы required_sections должны быть строками",
+        "heading_case": "Заголовок '{actual}' (параграф {loc}) должен быть в верхнем регистре",
+        "heading_period": "Заголовок '{actual}' (параграф {loc}) не должен заканчиваться точкой",
+        "heading_hyphen": "Заголовок '{actual}' (параграф {loc}) содержит недопустимый перенос или сокращение",
+        "heading_spacing": "После заголовка '{actual[0]}' (параграф {loc}) интервал должен быть {expected}, "
+                           "текущий: {actual[1]}",
+        "chapter_page_break": "Глава '{actual}' (параграф {loc}) должна начинаться с новой страницы",
+        "style_error": "Ошибка при проверке стиля параграфа: {actual}",
+        "section_level": "Раздел '{loc}' имеет стиль 'Heading {actual}', ожидается 'Heading {expected}'",
+        "paragraphs_error": "Ошибка при доступе к параграфам документа: {actual}",
+        "no_headings": "В документе отсутствуют заголовки (стиль 'Heading')",
+        "missing_sections": "Отсутствуют некоторые обязательные разделы",
+        "section_order": "Нарушение порядка разделов: текущий порядок {actual}, ожидается {expected}",
+        "toc_case": "В оглавлении строка '{actual}' (параграф {loc}) должна быть в верхнем регистре",
+        "toc_hyphen": "В оглавлении строка '{actual}' (параграф {loc}) содержит недопустимые сокращения",
+        "toc_leader": "В оглавлении строка '{actual}' (параграф {loc}) должна заканчиваться отточием и номером страницы",
+        "toc_unmatched": "В оглавлении строка '{actual}' (параграф {loc}) не соответствует ни одному заголовку в тексте",
+    },
+    "page_params": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "page_size_unsupported": "Ошибка: неподдерживаемый размер страницы: {actual}",
+        "margins_type": "Ошибка: margins должен быть словарем, получено: {actual}",
+        "margins_missing_key": "Ошибка: в margins отсутствует ключ {loc}",
+        "margins_value": "Ошибка: margins[{loc}] должен быть неотрицательным числом, получено: {actual}",
+        "sections_error": "Ошибка при доступе к секциям документа: {actual}",
+        "page_number_alignment": "Секция {loc}: Номер страницы должен быть выровнен по центру верхнего поля",
+        "page_number_error": "Секция {loc}: Ошибка при проверке нумерации страниц: {actual}",
+        "title_page_number": "Титульный лист (первая страница) не должен содержать номер страницы",
+        "second_page_number": "Вторая страница должна иметь номер {expected}, текущий номер: {actual}",
+        "page_number_sequence": "Нарушение сквозной нумерации страниц: ожидается номер {expected}, получен {actual} "
+                                "в секции {loc}",
+        "section_error": "Секция {loc}: Ошибка при получении параметров страницы: {actual}",
+        "page_size_invalid": "Секция {loc}: Некорректные размеры страницы ({actual[0]:.2f} x {actual[1]:.2f} см)",
+        "page_size_landscape": "Секция {loc}: Размер страницы не соответствует ожидаемому ({expected[0]}, альбомная "
+                               "ориентация): получено {actual[0]:.2f} x {actual[1]:.2f} см, "
+                               "ожидается {expected[1]:.2f} x {expected[2]:.2f} см",
+        "orientation": "Секция {loc}: Ориентация страницы альбомная, ожидается портретная",
+        "page_size_portrait": "Секция {loc}: Размер страницы не соответствует ожидаемому ({expected[0]}, портретная "
+                              "ориентация): получено {actual[0]:.2f} x {actual[1]:.2f} см, "
+                              "ожидается {expected[1]:.2f} x {expected[2]:.2f} см",
+        "margin_left": "Секция {loc}: Поле слева ({actual:.2f} см) не соответствует ожидаемому "
+                       "({expected[0]} см ± {expected[1]} см)",
+        "margin_right": "Секция {loc}: Поле справа ({actual:.2f} см) не соответствует ожидаемому "
+                        "({expected[0]} см ± {expected[1]} см)",
+        "margin_top": "Секция {loc}: Верхнее поле ({actual:.2f} см) не соответствует ожидаемому "
+                      "({expected[0]} см ± {expected[1]} см)",
+        "margin_bottom": "Секция {loc}: Нижнее поле ({actual:.2f} см) не соответствует ожидаемому "
+                         "({expected[0]} см ± {expected[1]} см)",
+    },
+    "formatting": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: document должен быть объектом Document, получено: {actual}",
+        "file_path_type": "Ошибка: file_path должен быть строкой или содержимым файла, получено: {actual}",
+        "xml_error": "Ошибка при извлечении XML: {actual}",
+        "styles_error": "Ошибка при анализе стилей: {actual}",
+        "font": "{loc}: Используется шрифт {actual}, ожидается {expected}",
+        "font_color": "{loc}: Цвет шрифта должен быть чёрным, обнаружен другой цвет",
+        "font_size": "{loc}: Размер шрифта {actual} pt, ожидается {expected} pt",
+        "heading_alignment": "{loc}: Заголовок должен быть выровнен по центру, текущее выравнивание: {actual}",
+        "alignment_justify": "{loc}: Выравнивание должно быть по ширине, текущее выравнивание: {actual}",
+        "alignment_left": "{loc}: Выравнивание должно быть по левому краю, текущее выравнивание: {actual}",
+        "line_spacing": "{loc}: Междустрочный интервал {actual}, ожидается {expected}",
+        "first_line_indent": "{loc}: Абзацный отступ {actual:.2f} см, ожидается {expected} см",
+        "extra_indent": "{loc}: Дополнительные отступы слева ({actual[0]} см) или справа ({actual[1]} см) "
+                        "не допускаются",
+        "paragraph_error": "{loc}: Ошибка при проверке форматирования: {actual}",
+        "footnotes_error": "Ошибка при доступе к сноскам: {actual}",
+        "note_fonts": "Примечание: Допускается использование шрифтов разной гарнитуры для акцентирования терминов, "
+                      "формул, теорем",
+    },
+    "references": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: doc должен быть объектом Document, получено: {actual}",
+        "standard_unsupported": "References check for standard {actual} is not implemented",
+        "paragraphs_error": "Ошибка при доступе к параграфам документа: {actual}",
+        "no_section": "No references section found",
+        "empty_section": "References section is empty",
+        "entry_format": "Неверный формат ссылки по ГОСТ Р 7.0.5-2008 в строке {loc}",
+        "numbering": "Нарушение сквозной нумерации в списке литературы: ожидается номер {expected}, строка: {actual}",
+        "foreign_first": "Иностранные источники должны идти перед русскоязычными в списке литературы",
+        "foreign_order": "Иностранные источники в списке литературы не отсортированы по алфавиту",
+        "russian_order": "Русскоязычные источники в списке литературы не отсортированы по алфавиту",
+        "citation_format": "Неверный формат затекстовой ссылки в параграфе {loc}: [{actual}]",
+        "citation_title": "Затекстовая ссылка в параграфе {loc} должна содержать название документа для 4+ авторов: "
+                          "[{actual}]",
+        "citation_authors": "Затекстовая ссылка в параграфе {loc} должна содержать фамилии авторов (1-3): [{actual}]",
+        "citation_abbreviation": "Неверное сокращение заглавия в затекстовой ссылке в параграфе {loc}: [{actual}]",
+        "citation_unmatched": "Затекстовая ссылка в параграфе {loc} не соответствует ни одной записи в списке "
+                              "литературы: [{actual}]",
+    },
+    "tables": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: document должен быть объектом Document, получено: {actual}",
+        "caption_missing": "Таблица {loc}: Отсутствует заголовок перед таблицей",
+        "caption_format": "Таблица {loc[0]}: Неверный формат заголовка (параграф {loc[1]}): '{actual}', "
+                          "ожидается 'Табл. N – Название'",
+        "numbering": "Таблица {loc}: Неверный номер таблицы, ожидается {expected}, получено {actual}",
+        "title_case": "Таблица {loc[0]}: Название '{actual}' должно начинаться с прописной буквы (параграф {loc[1]})",
+        "title_period": "Таблица {loc[0]}: Название '{actual}' не должно заканчиваться точкой (параграф {loc[1]})",
+        "caption_alignment": "Таблица {loc[0]}: Заголовок '{actual}' должен быть выровнен по центру (параграф {loc[1]})",
+        "empty_cell": "Таблица {loc[0]}: Обнаружена пустая ячейка (таблица {loc[1]})",
+        "unreferenced": "Таблица {loc[0]}: Отсутствует ссылка на таблицу в тексте (таблица {loc[1]}, "
+                        "заголовок в параграфе {loc[2]})",
+    },
+    "illustrations": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: document должен быть объектом Document, получено: {actual}",
+        "caption_missing": "Рисунок {loc[0]}: Отсутствует подрисуночный текст после рисунка (параграф {loc[1]})",
+        "caption_format": "Рисунок {loc[0]}: Неверный формат подрисуночного текста (параграф {loc[1]}): '{actual}', "
+                          "ожидается 'Рис. N – Название'",
+        "numbering": "Рисунок {loc}: Неверный номер рисунка, ожидается {expected}, получено {actual}",
+        "title_case": "Рисунок {loc[0]}: Название '{actual}' должно начинаться с прописной буквы (параграф {loc[1]})",
+        "title_period": "Рисунок {loc[0]}: Название '{actual}' не должно заканчиваться точкой (параграф {loc[1]})",
+        "caption_alignment": "Рисунок {loc[0]}: Подрисуночный текст '{actual}' должен быть выровнен по центру "
+                             "(параграф {loc[1]})",
+        "unreferenced": "Рисунок {loc}: Отсутствует ссылка на рисунок в тексте",
+        "list_missing": "Отсутствует раздел 'Список иллюстративного материала' после списка литературы, "
+                        "хотя иллюстрации присутствуют в тексте",
+        "list_not_in_toc": "Раздел 'Список иллюстративного материала' не включён в оглавление",
+    },
+    "appendices": {
+        "params_type": "Ошибка: params должен быть словарем, получено: {actual}",
+        "document_type": "Ошибка: document должен быть объектом Document, получено: {actual}",
+        "numeric_style": "Приложение (параграф {loc}): Ожидается числовая нумерация (1, 2, 3), получено '{actual}'",
+        "alpha_style": "Приложение (параграф {loc}): Ожидается буквенная нумерация (А, Б, В), получено '{actual}'",
+        "numbering": "Приложение (параграф {loc}): Неверный номер приложения, ожидается {expected}, получено {actual}",
+        "header_alignment": "Приложение {loc[0]} (параграф {loc[1]}): Заголовок 'Приложение {loc[0]}' должен быть "
+                            "выровнен по правому краю",
+        "page_break": "Приложение {loc[0]} (параграф {loc[1]}): Приложение должно начинаться с новой страницы "
+                      "(отсутствует разрыв страницы)",
+        "title_missing": "Приложение {loc[0]} (параграф {loc[1]}): Отсутствует тематический заголовок после "
+                         "'Приложение {loc[0]}'",
+        "title_case": "Приложение {loc[0]} (параграф {loc[1]}): Тематический заголовок '{actual}' должен начинаться "
+                      "с прописной буквы",
+        "title_period": "Приложение {loc[0]} (параграф {loc[1]}): Тематический заголовок '{actual}' не должен "
+                        "заканчиваться точкой",
+        "title_alignment": "Приложение {loc[0]} (параграф {loc[1]}): Тематический заголовок '{actual}' должен быть "
+                           "выровнен по центру",
+        "after_references": "Приложение {loc[0]} (параграф {loc[1]}): Приложение должно располагаться после "
+                            "списка литературы",
+        "after_illustrations": "Приложение {loc[0]} (параграф {loc[1]}): Приложение должно располагаться после "
+                               "списка иллюстративного материала",
+        "unreferenced": "Приложение {loc}: Отсутствует ссылка на приложение в тексте",
+        "toc_single": "Приложение не включено в оглавление (ожидается '{expected}')",
+        "toc_range": "Приложения не включены в оглавление (ожидается '{expected}')",
+        "toc_entry": "Приложение {loc} не включено в оглавление (ожидается '{expected}')",
+    },
+    # Сообщения шаблона проверки; loc — название проверки в родительном падеже
+    "template": {
+        "skipped": "Проверка {loc} не выполнена: исчерпан лимит времени на документ",
+        "truncated": "Проверка {loc} прервана по превышению лимита времени, результаты неполные",
+        "failed": "Ошибка при проверке {loc}: {actual}",
+        "report_error": "Ошибка при сохранении отчёта: {actual}",
+        # loc — код правила, actual — сколько записей не показано, expected — ограничение на правило
+        "capped": "Правило {loc}: ещё {actual} однотипных нарушений не показано (не более {expected} на правило)",
+    },
+}
+
+# Места в документе, которые проверка форматирования указывает в начале сообщения: тип -> шаблон
+LOCATIONS = {
+    "paragraph": "Параграф {0}",
+    "table_cell": "Таблица {0}, ячейка ({1}, {2}), параграф {3}",
+    "footnote": "Сноска {0}, параграф {1}",
+    "appendix": "Приложение, параграф {0}",
+    "paragraphs": "Параграфы {0}–{1}",
+    "appendix_paragraphs": "Приложение, параграфы {0}–{1}",
+}
+
+# Места, подряд идущие записи для которых объединяются в диапазон: тип места -> тип диапазона
+RANGE_LOCATIONS = {"paragraph": "paragraphs", "appendix": "appendix_paragraphs"}
+
+# Метка сериализованной записи в JSON (журнал, протокол кластера)
+JSON_TAG = "$finding"
+
+
+def render_location(loc):
+    """Форматирует место вида ("тип", номер, ...) по таблице LOCATIONS; прочие значения — как есть."""
+    if isinstance(loc, tuple) and loc and loc[0] in LOCATIONS:
+        return LOCATIONS[loc[0]].format(*loc[1:])
+    return loc
+
+
+class Finding:
+    """
+    Нарушение, найденное проверкой.
+
+    Сравнивается со строкой по тексту сообщения (в том числе оператором in), поэтому код, который
+    работает со списками сообщений, продолжает работать со списками записей.
+    """
+
+    __slots__ = ("check", "rule", "loc", "actual", "expected")
+
+    def __init__(self, check, rule, loc=None, actual=None, expected=None):
+        self.check = check
+        self.rule = rule
+        # После JSON кортежи приходят списками: место всегда храним кортежем
+        self.loc = tuple(loc) if isinstance(loc, list) else loc
+        self.actual = actual
+        self.expected = expected
+
+    @property
+    def message(self):
+        """Текст сообщения на русском языке."""
+        template = MESSAGES.get(self.check, {}).get(self.rule)
+        if template is None:
+            return f"{self.check}.{self.rule}: {self.loc}, {self.actual}, {self.expected}"
+        return template.format(loc=render_location(self.loc), actual=self.actual, expected=self.expected)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return (f"Finding({self.check!r}, {self.rule!r}, loc={self.loc!r}, actual={self.actual!r}, "
+                f"expected={self.expected!r})")
+
+    def _values(self):
+        return self.check, self.rule, self.loc, self.actual, self.expected
+
+    def __eq__(self, other):
+        if isinstance(other, Finding):
+            return self._values() == other._values()
+        if isinstance(other, str):
+            return self.message == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.message)
+
+    def __contains__(self, text):
+        return text in self.message
+
+    def __reduce__(self):
+        # Передаются только значения полей; строки кодов проверок и правил pickle сохраняет по одному разу
+        return Finding, self._values()
+
+    def to_dict(self):
+        """Представление для внешних клиентов (HTTP API): поля записи и готовый текст сообщения."""
+        return {"check": self.check, "rule": self.rule, "loc": self.loc, "actual": self.actual,
+                "expected": self.expected, "message": self.message}
+
+
+def to_json(obj):
+    """Функция default для json.dumps: записывает Finding компактным списком значений."""
+    if isinstance(obj, Finding):
+        return {JSON_TAG: list(obj._values())}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def from_json(obj):
+    """Функция object_hook для json.loads: восстанавливает записи, сохранённые через to_json."""
+    if len(obj) == 1 and JSON_TAG in obj:
+        return Finding(*obj[JSON_TAG])
+    return obj
+
+
+def to_api_json(obj):
+    """Функция default для json.dumps в ответах HTTP API: запись с текстом сообщения."""
+    if isinstance(obj, Finding):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def aggregate(findings, max_per_rule=None, blank=frozenset()):
+    """
+    Сворачивает однотипные записи и ограничивает их количество.
+
+    Записи одного правила с одинаковыми фактическим и ожидаемым значениями для подряд идущих
+    параграфов объединяются в одну запись с диапазоном ("Параграфы 5–812: ..."). Параграфы из
+    blank (номера пустых параграфов, которые проверки пропускают; можно передать функцию,
+    возвращающую множество, — она вызывается, только если между записями есть пропуск)
+    не разрывают диапазон.
+    Если после этого у правила остаётся больше max_per_rule записей, лишние заменяются одной
+    записью с их количеством. Порядок записей сохраняется, строки (не Finding) не изменяются.
+    """
+    runs = {}  # (проверка, правило, тип места, значения) -> [позиция в items, первая запись, последний номер]
+    items = []
+    for finding in findings:
+        loc = finding.loc if isinstance(finding, Finding) else None
+        if not (isinstance(loc, tuple) and len(loc) == 2 and loc[0] in RANGE_LOCATIONS):
+            items.append(finding)
+            continue
+        key = (finding.check, finding.rule, loc[0], _freeze(finding.actual), _freeze(finding.expected))
+        run = runs.get(key)
+        # Повторная запись для того же параграфа (например, по одной на каждый фрагмент текста) поглощается
+        if run is not None and loc[1] >= run[2]:
+            if loc[1] > run[2] + 1 and callable(blank):
+                blank = blank()
+            if all(n in blank for n in range(run[2] + 1, loc[1])):
+                run[2] = loc[1]
+                continue
+        run = [len(items), finding, loc[1]]
+        runs[key] = run
+        items.append(run)
+
+    result = []
+    counts = {}
+    omitted = {}
+    for item in items:
+        if isinstance(item, list):
+            first, last = item[1], item[2]
+            if last != first.loc[1]:
+                first = Finding(first.check, first.rule, (RANGE_LOCATIONS[first.loc[0]], first.loc[1], last),
+                                first.actual, first.expected)
+            item = first
+        if max_per_rule and isinstance(item, Finding):
+            rule = (item.check, item.rule)
+            counts[rule] = counts.get(rule, 0) + 1
+            if counts[rule] > max_per_rule:
+                omitted[rule] = omitted.get(rule, 0) + 1
+                continue
+        result.append(item)
+    for (check, rule), count in omitted.items():
+        result.append(Finding("template", "capped", f"{check}.{rule}", count, max_per_rule))
+    return result
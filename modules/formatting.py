@@ -1,25 +1,28 @@
 import logging
+from io import BytesIO
 from docx.document import Document
 from docx.oxml.ns import qn
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from modules.base import CheckModule
+from modules.base import CheckModule, CheckTimeoutError
 from utils.xml_utils import extract_xml
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 class FormattingCheck(CheckModule):
+    CHECK_ID = "formatting"
+
     def check(self, document, file_path, params=None):
         # Проверка входных параметров
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(document, Document):
-            return [f"Ошибка: document должен быть объектом Document, получено: {type(document)}"]
-        if not isinstance(file_path, str):
-            return [f"Ошибка: file_path должен быть строкой, получено: {type(file_path)}"]
+            return [self.finding("document_type", actual=str(type(document)))]
+        # Вместо пути можно передать содержимое файла (документ, полученный из памяти без временного файла)
+        if not isinstance(file_path, (str, bytes, bytearray, BytesIO)):
+            return [self.finding("file_path_type", actual=str(type(file_path)))]
 
         expected_font = params.get("font", "Times New Roman")
         expected_font_size = params.get("font_size", 14)  # в pt
@@ -33,12 +36,13 @@ class FormattingCheck(CheckModule):
         try:
             document_xml, styles_xml = extract_xml(file_path)
         except Exception as e:
-            return [f"Ошибка при извлечении XML: {str(e)}"]
+            return [self.finding("xml_error", actual=str(e))]
 
         # Проверка стилей в styles.xml
         style_fonts = {}
         style_sizes = {}
         try:
+            self.counters["xpath"] += 1
             for style in styles_xml.findall(".//w:style", namespaces={
                 "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}):
                 style_id = style.get(qn("w:styleId"))
@@ -55,23 +59,30 @@ class FormattingCheck(CheckModule):
                     if size_val:
                         style_sizes[style_id] = int(size_val) / 2  # Размер в half-points, переводим в pt
         except Exception as e:
-            errors.append(f"Ошибка при анализе стилей: {str(e)}")
+            errors.append(self.finding("styles_error", actual=str(e)))
 
         # Проверка форматирования параграфов
+        styles = {}
         for i, para in enumerate(document.paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
             try:
                 # Пропускаем пустые параграфы
                 if not para.text.strip():
                     continue
+                # Прогоны параграфа просматриваются трижды: шрифт, цвет и размер
+                runs = para.runs
+                self.counters["runs"] += 3 * len(runs)
 
                 # Проверка стиля параграфа
-                style_id = para.style.style_id if para.style else None
+                style = self.paragraph_style(para, styles)
+                style_id = style.style_id if style else None
                 is_heading = style_id and style_id.startswith("Heading")
 
                 # Проверка шрифта
                 font_name = None
                 run_fonts = set()
-                for run in para.runs:
+                for run in runs:
                     if run.font.name:
                         run_fonts.add(run.font.name)
                     elif style_id and style_id in style_fonts:
@@ -81,18 +92,17 @@ class FormattingCheck(CheckModule):
                     if font_name and font_name != expected_font:
                         # Исключение: допускается использование других шрифтов для акцентирования
                         if not (is_heading or "формул" in para.text.lower() or "теорем" in para.text.lower()):
-                            errors.append(
-                                f"Параграф {i + 1}: Используется шрифт {font_name}, ожидается {expected_font}")
+                            errors.append(self.finding("font", ("paragraph", i + 1), font_name, expected_font))
 
                 # Проверка цвета шрифта (должен быть чёрным)
-                for run in para.runs:
+                for run in runs:
                     if run.font.color and run.font.color.rgb != (0, 0, 0):
-                        errors.append(f"Параграф {i + 1}: Цвет шрифта должен быть чёрным, обнаружен другой цвет")
+                        errors.append(self.finding("font_color", ("paragraph", i + 1)))
 
                 # Проверка размера шрифта
                 font_size = None
                 run_sizes = set()
-                for run in para.runs:
+                for run in runs:
                     if run.font.size:
                         run_sizes.add(run.font.size.pt)
                     elif style_id and style_id in style_sizes:
@@ -101,80 +111,75 @@ class FormattingCheck(CheckModule):
                     font_size = run_sizes.pop() if len(run_sizes) == 1 else None
                     expected_size = 12 if R"^сноск" in para.text.lower() or r"^таблиц" in para.text.lower() or r"^приложени" in para.text.lower() or r"^рис" in para.text.lower() else expected_font_size
                     if font_size and font_size != expected_size:
-                        errors.append(f"Параграф {i + 1}: Размер шрифта {font_size} pt, ожидается {expected_size} pt")
+                        errors.append(self.finding("font_size", ("paragraph", i + 1), font_size, expected_size))
 
                 # Проверка выравнивания
                 alignment = para.alignment
                 if alignment is not None:
                     if is_heading:
                         if alignment != WD_ALIGN_PARAGRAPH.CENTER:
-                            errors.append(
-                                f"Параграф {i + 1}: Заголовок должен быть выровнен по центру, текущее выравнивание: {alignment}")
+                            errors.append(self.finding("heading_alignment", ("paragraph", i + 1), str(alignment)))
                     else:
                         if expected_alignment == "justify" and alignment != WD_ALIGN_PARAGRAPH.JUSTIFY:
-                            errors.append(
-                                f"Параграф {i + 1}: Выравнивание должно быть по ширине, текущее выравнивание: {alignment}")
+                            errors.append(self.finding("alignment_justify", ("paragraph", i + 1), str(alignment)))
                         elif expected_alignment == "left" and alignment != WD_ALIGN_PARAGRAPH.LEFT:
-                            errors.append(
-                                f"Параграф {i + 1}: Выравнивание должно быть по левому краю, текущее выравнивание: {alignment}")
+                            errors.append(self.finding("alignment_left", ("paragraph", i + 1), str(alignment)))
 
                 # Проверка междустрочного интервала
                 line_spacing = para.paragraph_format.line_spacing
                 if line_spacing is not None and line_spacing != expected_line_spacing:
                     # Проверка интервала после заголовков уже есть в structure.py, здесь проверяем только основной текст
                     if not is_heading:
-                        errors.append(
-                            f"Параграф {i + 1}: Междустрочный интервал {line_spacing}, ожидается {expected_line_spacing}")
+                        errors.append(self.finding("line_spacing", ("paragraph", i + 1), line_spacing, expected_line_spacing))
 
                 # Проверка абзацного отступа
                 first_line_indent = para.paragraph_format.first_line_indent
                 if first_line_indent is not None:
                     indent_cm = first_line_indent.cm if first_line_indent else 0
                     if abs(indent_cm - expected_indent) > 0.01:  # Допуск 0.01 см
-                        errors.append(
-                            f"Параграф {i + 1}: Абзацный отступ {indent_cm:.2f} см, ожидается {expected_indent} см")
+                        errors.append(self.finding("first_line_indent", ("paragraph", i + 1), indent_cm, expected_indent))
 
                 # Проверка отсутствия дополнительных отступов (кроме абзацного)
                 left_indent = para.paragraph_format.left_indent.cm if para.paragraph_format.left_indent else 0
                 right_indent = para.paragraph_format.right_indent.cm if para.paragraph_format.right_indent else 0
                 if left_indent != 0 or right_indent != 0:
-                    errors.append(
-                        f"Параграф {i + 1}: Дополнительные отступы слева ({left_indent} см) или справа ({right_indent} см) не допускаются")
+                    errors.append(self.finding("extra_indent", ("paragraph", i + 1), [left_indent, right_indent]))
 
             except Exception as e:
-                errors.append(f"Параграф {i + 1}: Ошибка при проверке форматирования: {str(e)}")
+                errors.append(self.finding("paragraph_error", ("paragraph", i + 1), str(e)))
 
         # Проверка форматирования в таблицах
         for table_idx, table in enumerate(document.tables):
             for row_idx, row in enumerate(table.rows):
+                self.check_deadline(errors)
                 for cell_idx, cell in enumerate(row.cells):
                     for para_idx, para in enumerate(cell.paragraphs):
+                        self.counters["paragraphs"] += 1
                         try:
                             if not para.text.strip():
                                 continue
+                            runs = para.runs
+                            self.counters["runs"] += 2 * len(runs)
                             # Проверка шрифта в таблицах
                             run_fonts = set()
-                            for run in para.runs:
+                            for run in runs:
                                 if run.font.name:
                                     run_fonts.add(run.font.name)
                             if run_fonts:
                                 font_name = run_fonts.pop() if len(run_fonts) == 1 else None
                                 if font_name and font_name != expected_font:
-                                    errors.append(
-                                        f"Таблица {table_idx + 1}, ячейка ({row_idx + 1}, {cell_idx + 1}), параграф {para_idx + 1}: Используется шрифт {font_name}, ожидается {expected_font}")
+                                    errors.append(self.finding("font", ("table_cell", table_idx + 1, row_idx + 1, cell_idx + 1, para_idx + 1), font_name, expected_font))
                             # Проверка размера шрифта в таблицах (должен быть 12 pt)
                             run_sizes = set()
-                            for run in para.runs:
+                            for run in runs:
                                 if run.font.size:
                                     run_sizes.add(run.font.size.pt)
                             if run_sizes:
                                 font_size = run_sizes.pop() if len(run_sizes) == 1 else None
                                 if font_size and font_size != 12:
-                                    errors.append(
-                                        f"Таблица {table_idx + 1}, ячейка ({row_idx + 1}, {cell_idx + 1}), параграф {para_idx + 1}: Размер шрифта {font_size} pt, ожидается 12 pt")
+                                    errors.append(self.finding("font_size", ("table_cell", table_idx + 1, row_idx + 1, cell_idx + 1, para_idx + 1), font_size, 12))
                         except Exception as e:
-                            errors.append(
-                                f"Таблица {table_idx + 1}, ячейка ({row_idx + 1}, {cell_idx + 1}), параграф {para_idx + 1}: Ошибка при проверке форматирования: {str(e)}")
+                            errors.append(self.finding("paragraph_error", ("table_cell", table_idx + 1, row_idx + 1, cell_idx + 1, para_idx + 1), str(e)))
 
         # Проверка форматирования в сносках
         try:
@@ -190,18 +195,23 @@ class FormattingCheck(CheckModule):
                 # Извлекаем XML из footnotes_part
                 import xml.etree.ElementTree as ET
                 footnotes_xml = ET.fromstring(footnotes_part.blob)
+                self.counters["xpath"] += 1
                 footnotes = footnotes_xml.findall(".//w:footnote", namespaces={
                     "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"})
 
                 for footnote_idx, footnote in enumerate(footnotes):
+                    self.check_deadline(errors)
                     # Пропускаем служебные сноски (например, footnote с id="-1" или "0")
                     footnote_id = footnote.get(qn("w:id"))
                     if footnote_id in ("-1", "0"):
                         continue
 
                     # Извлекаем параграфы из сноски
+                    self.counters["xpath"] += 1
                     for para_idx, para in enumerate(footnote.findall(".//w:p", namespaces={
                         "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"})):
+                        self.counters["paragraphs"] += 1
+                        self.counters["xpath"] += 3
                         try:
                             # Извлекаем текст параграфа
                             para_text = "".join([t.text for t in para.findall(".//w:t", namespaces={
@@ -222,8 +232,7 @@ class FormattingCheck(CheckModule):
                             if run_fonts:
                                 font_name = run_fonts.pop() if len(run_fonts) == 1 else None
                                 if font_name and font_name != expected_font:
-                                    errors.append(
-                                        f"Сноска {footnote_idx + 1}, параграф {para_idx + 1}: Используется шрифт {font_name}, ожидается {expected_font}")
+                                    errors.append(self.finding("font", ("footnote", footnote_idx + 1, para_idx + 1), font_name, expected_font))
 
                             # Проверка размера шрифта в сносках (должен быть 12 pt)
                             run_sizes = set()
@@ -238,49 +247,50 @@ class FormattingCheck(CheckModule):
                             if run_sizes:
                                 font_size = run_sizes.pop() if len(run_sizes) == 1 else None
                                 if font_size and font_size != 12:
-                                    errors.append(
-                                        f"Сноска {footnote_idx + 1}, параграф {para_idx + 1}: Размер шрифта {font_size} pt, ожидается 12 pt")
+                                    errors.append(self.finding("font_size", ("footnote", footnote_idx + 1, para_idx + 1), font_size, 12))
                         except Exception as e:
-                            errors.append(
-                                f"Сноска {footnote_idx + 1}, параграф {para_idx + 1}: Ошибка при проверке форматирования: {str(e)}")
+                            errors.append(self.finding("paragraph_error", ("footnote", footnote_idx + 1, para_idx + 1), str(e)))
             else:
                 logger.debug("Сноски в документе отсутствуют.")
+        except CheckTimeoutError:
+            raise
         except Exception as e:
-            errors.append(f"Ошибка при доступе к сноскам: {str(e)}")
+            errors.append(self.finding("footnotes_error", actual=str(e)))
 
         # Проверка форматирования в приложениях (предполагаем, что приложения начинаются после раздела "Приложения")
         in_appendices = False
         for i, para in enumerate(document.paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
             if para.text.strip().lower().startswith("приложение"):
                 in_appendices = True
             if in_appendices and para.text.strip():
                 try:
+                    runs = para.runs
+                    self.counters["runs"] += 2 * len(runs)
                     # Проверка шрифта в приложениях
                     run_fonts = set()
-                    for run in para.runs:
+                    for run in runs:
                         if run.font.name:
                             run_fonts.add(run.font.name)
                     if run_fonts:
                         font_name = run_fonts.pop() if len(run_fonts) == 1 else None
                         if font_name and font_name != expected_font:
-                            errors.append(
-                                f"Приложение, параграф {i + 1}: Используется шрифт {font_name}, ожидается {expected_font}")
+                            errors.append(self.finding("font", ("appendix", i + 1), font_name, expected_font))
                     # Проверка размера шрифта в приложениях (должен быть 12 pt)
                     run_sizes = set()
-                    for run in para.runs:
+                    for run in runs:
                         if run.font.size:
                             run_sizes.add(run.font.size.pt)
                     if run_sizes:
                         font_size = run_sizes.pop() if len(run_sizes) == 1 else None
                         if font_size and font_size != 12:
-                            errors.append(
-                                f"Приложение, параграф {i + 1}: Размер шрифта {font_size} pt, ожидается 12 pt")
+                            errors.append(self.finding("font_size", ("appendix", i + 1), font_size, 12))
                 except Exception as e:
-                    errors.append(f"Приложение, параграф {i + 1}: Ошибка при проверке форматирования: {str(e)}")
+                    errors.append(self.finding("paragraph_error", ("appendix", i + 1), str(e)))
 
         # Добавляем примечание о допустимом использовании других шрифтов
-        if not any("допускается использование других шрифтов" in error for error in errors):
-            errors.append(
-                "Примечание: Допускается использование шрифтов разной гарнитуры для акцентирования терминов, формул, теорем")
+        if not any(error.rule == "note_fonts" for error in errors):
+            errors.append(self.finding("note_fonts"))
 
         return errors
\ No newline at end of file
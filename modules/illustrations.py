@@ -4,10 +4,10 @@ from docx.document import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from .base import CheckModule
 
-logging.basicConfig(filename='processing.log', level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class IllustrationsCheck(CheckModule):
+    CHECK_ID = "illustrations"
     # Регулярные выражения для поиска ссылок на рисунки в тексте
     FIGURE_REF_PATTERN = re.compile(r'(?:рисунок|рис\.)\s+(\d+(?:\.\d+)?)', re.IGNORECASE)
     # Регулярное выражение для подрисуночного текста
@@ -30,9 +30,9 @@ class IllustrationsCheck(CheckModule):
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(document, Document):
-            return [f"Ошибка: document должен быть объектом Document, получено: {type(document)}"]
+            return [self.finding("document_type", actual=str(type(document)))]
 
         # Параметры проверки
         use_chapter_numbering = params.get("use_chapter_numbering", False)  # Использовать нумерацию в пределах главы (например, 1.1)
@@ -50,11 +50,14 @@ class IllustrationsCheck(CheckModule):
         paragraphs = []
         current_chapter = "0"  # По умолчанию, если глав нет
         for i, para in enumerate(document.paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
             text = para.text.strip() if para.text else ""
             paragraphs.append((i, para, text))
 
             # Определяем текущую главу для нумерации рисунков
             if text.upper().startswith("ГЛАВА"):
+                self.counters["regex"] += 1
                 match = re.match(r'ГЛАВА\s+(\d+)', text, re.IGNORECASE)
                 if match:
                     current_chapter = match.group(1)
@@ -65,6 +68,7 @@ class IllustrationsCheck(CheckModule):
                 in_appendices = True
 
             # Ищем раздел "Список иллюстративного материала"
+            self.counters["regex"] += 1
             if self.ILLUSTRATIONS_LIST_PATTERN.match(text):
                 illustrations_list_idx = i
 
@@ -73,10 +77,13 @@ class IllustrationsCheck(CheckModule):
                 in_toc = True
             elif in_toc and text:
                 toc_content.append(text)
-            elif in_toc and re.match(r"^(Введение|Список сокращений|Список терминов)", text):
-                in_toc = False
+            elif in_toc:
+                self.counters["regex"] += 1
+                if re.match(r"^(Введение|Список сокращений|Список терминов)", text):
+                    in_toc = False
 
             # Ищем ссылки на рисунки в тексте
+            self.counters["regex"] += 1
             matches = self.FIGURE_REF_PATTERN.findall(text)
             for figure_num in matches:
                 figure_references.append((figure_num, i))
@@ -84,23 +91,31 @@ class IllustrationsCheck(CheckModule):
         # Проверяем иллюстрации
         expected_figure_num = 1
         figures_found = 0
-        for para_idx, para in enumerate(document.paragraphs):
+        for para_idx, para, _ in paragraphs:
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
             # Ищем рисунки в параграфе (через <w:drawing> или <w:pict>)
-            has_drawing = any(run._element.xpath('.//w:drawing') or run._element.xpath('.//w:pict') for run in para.runs)
+            has_drawing = False
+            for run in para.runs:
+                self.counters["runs"] += 1
+                self.counters["xpath"] += 1
+                if run._element.xpath('.//w:drawing | .//w:pict'):
+                    has_drawing = True
+                    break
             if not has_drawing:
                 continue
             figures_found += 1
 
             # Ищем подрисуночный текст (следующий параграф после рисунка)
             caption_idx = para_idx + 1
-            if caption_idx >= len(document.paragraphs):
-                errors.append(f"Рисунок {figures_found}: Отсутствует подрисуночный текст после рисунка (параграф {para_idx+1})")
+            if caption_idx >= len(paragraphs):
+                errors.append(self.finding("caption_missing", (figures_found, para_idx + 1)))
                 continue
-            caption_para = document.paragraphs[caption_idx]
-            caption_text = caption_para.text.strip()
+            _, caption_para, caption_text = paragraphs[caption_idx]
+            self.counters["regex"] += 1
             match = self.FIGURE_CAPTION_PATTERN.match(caption_text)
             if not match:
-                errors.append(f"Рисунок {figures_found}: Неверный формат подрисуночного текста (параграф {caption_idx+1}): '{caption_text}', ожидается 'Рис. N – Название'")
+                errors.append(self.finding("caption_format", (figures_found, caption_idx + 1), caption_text))
                 continue
 
             # Извлекаем номер и название
@@ -114,31 +129,31 @@ class IllustrationsCheck(CheckModule):
             else:
                 expected_caption = str(expected_figure_num)
             if figure_num != expected_caption:
-                errors.append(f"Рисунок {figures_found}: Неверный номер рисунка, ожидается {expected_caption}, получено {figure_num}")
+                errors.append(self.finding("numbering", figures_found, figure_num, expected_caption))
             expected_figure_num += 1
 
             # Проверка оформления подрисуночного текста
             if not figure_title[0].isupper():
-                errors.append(f"Рисунок {figure_num}: Название '{figure_title}' должно начинаться с прописной буквы (параграф {caption_idx+1})")
+                errors.append(self.finding("title_case", (figure_num, caption_idx + 1), figure_title))
             if figure_title.endswith('.'):
-                errors.append(f"Рисунок {figure_num}: Название '{figure_title}' не должно заканчиваться точкой (параграф {caption_idx+1})")
+                errors.append(self.finding("title_period", (figure_num, caption_idx + 1), figure_title))
             if caption_para.alignment != WD_ALIGN_PARAGRAPH.CENTER:
-                errors.append(f"Рисунок {figure_num}: Подрисуночный текст '{caption_text}' должен быть выровнен по центру (параграф {caption_idx+1})")
+                errors.append(self.finding("caption_alignment", (figure_num, caption_idx + 1), caption_text))
 
         # Проверка ссылок на рисунки
         referenced_figures = set(ref[0] for ref in figure_references)
         for figure_num, _ in figure_positions:
             if figure_num not in referenced_figures:
-                errors.append(f"Рисунок {figure_num}: Отсутствует ссылка на рисунок в тексте")
+                errors.append(self.finding("unreferenced", figure_num))
 
         # Проверка раздела "Список иллюстративного материала"
         if not in_appendices and figures_found > 0:
             if illustrations_list_idx is None:
-                errors.append("Отсутствует раздел 'Список иллюстративного материала' после списка литературы, хотя иллюстрации присутствуют в тексте")
+                errors.append(self.finding("list_missing"))
             else:
                 # Проверяем, что раздел включён в оглавление
-                illustrations_list_title = document.paragraphs[illustrations_list_idx].text.strip()
+                illustrations_list_title = paragraphs[illustrations_list_idx][2]
                 if not any(illustrations_list_title.upper() in toc_line.upper() for toc_line in toc_content):
-                    errors.append("Раздел 'Список иллюстративного материала' не включён в оглавление")
+                    errors.append(self.finding("list_not_in_toc", illustrations_list_idx + 1, illustrations_list_title))
 
         return errors
\ No newline at end of file
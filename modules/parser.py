@@ -1,17 +1,33 @@
 import os
-from docx import Document as DocxDocument
-from pdfminer.high_level import extract_text
-from odf.opendocument import load as load_odt
+import importlib
+from io import BytesIO
+from utils.validation import enforce_element_limit
 
 
 class DocumentParser:
-    def parse(self, file_path):
+    # Загрузчики форматов: расширение -> (модуль, функция). Модули импортируются при первом разборе
+    # файла такого формата, чтобы запуск для .docx не загружал pdfminer и odfpy
+    BACKENDS = {
+        '.docx': ('docx', 'Document'),
+        '.pdf': ('pdfminer.high_level', 'extract_text'),
+        '.odt': ('odf.opendocument', 'load'),
+    }
+
+    @classmethod
+    def load_backend(cls, ext):
+        """Возвращает функцию разбора для расширения файла, импортируя её модуль при необходимости."""
+        if ext not in cls.BACKENDS:
+            raise ValueError("Unsupported file format")
+        module_name, func_name = cls.BACKENDS[ext]
+        return getattr(importlib.import_module(module_name), func_name)
+
+    def parse(self, file_path, data=None, limits=None):
+        """
+        Разбирает файл; если передано содержимое data (bytes), file_path задаёт только имя и формат.
+        Если переданы limits (InputLimits), для .docx до разбора проверяется количество элементов XML
+        (при превышении выбрасывается InputLimitError).
+        """
         ext = os.path.splitext(file_path)[1].lower()
-        if ext == '.docx':
-            return DocxDocument(file_path)
-        elif ext == '.pdf':
-            return extract_text(file_path)
-        elif ext == '.odt':
-            return load_odt(file_path)
-        else:
-            raise ValueError("Unsupported file format")
\ No newline at end of file
+        if ext == '.docx' and limits is not None:
+            enforce_element_limit(file_path, data, limits)
+        return self.load_backend(ext)(BytesIO(data) if data is not None else file_path)
@@ -3,10 +3,10 @@ import logging
 from .base import CheckModule
 from docx.document import Document
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class ReferencesCheck(CheckModule):
+    CHECK_ID = "references"
     # Скомпилированные регулярные выражения
     REF_FILTER_PATTERN = re.compile(r"\d{4}|\s//|\sС\.|\sURL:|\sдис\.|\sканд\.|\sдокт\.")
     PATTERNS = {
@@ -36,13 +36,13 @@ class ReferencesCheck(CheckModule):
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(doc, Document):
-            return [f"Ошибка: doc должен быть объектом Document, получено: {type(doc)}"]
+            return [self.finding("document_type", actual=str(type(doc)))]
 
         standard = params.get("standard", "ГОСТ Р 7.0.5-2008")
         if standard not in self.PATTERNS:
-            return [f"References check for standard {standard} is not implemented"]
+            return [self.finding("standard_unsupported", actual=standard)]
 
         patterns = self.PATTERNS[standard]
 
@@ -50,10 +50,11 @@ class ReferencesCheck(CheckModule):
         paragraphs = []
         try:
             for p in doc.paragraphs:
+                self.counters["paragraphs"] += 1
                 text = p.text.strip() if p.text else ""
                 paragraphs.append(text)
         except Exception as e:
-            return [f"Ошибка при доступе к параграфам документа: {str(e)}"]
+            return [self.finding("paragraphs_error", actual=str(e))]
 
         ref_section = []
         in_references = False
@@ -73,29 +74,36 @@ class ReferencesCheck(CheckModule):
 
         # Если заголовка нет, возвращаем ошибку
         if not has_ref_header:
-            return ["No references section found"]
+            return [self.finding("no_section")]
 
         # Проверяем, есть ли хоть одна ссылка
         valid_refs = [line for line in ref_section if line.strip() and self.REF_FILTER_PATTERN.search(line)]
         if not valid_refs:
-            return ["References section is empty"]
+            return [self.finding("empty_section")]
 
         errors = []
         # Проверка формата ссылок в списке литературы
         ref_entries = []
+        # Номер строки в списке — по первому вхождению (как ref_section.index), без поиска на каждую ошибку
+        line_numbers = {}
+        for number, line in enumerate(ref_section, start=1):
+            line_numbers.setdefault(line, number)
         for line in ref_section:
+            self.check_deadline(errors)
+            self.counters["regex"] += 1
             if not line.strip() or not self.REF_FILTER_PATTERN.search(line):
                 continue
 
             # Проверяем соответствие хотя бы одному шаблону
             matches_any = False
             for ref_type, pattern in patterns.items():
+                self.counters["regex"] += 1
                 if pattern.match(line):
                     matches_any = True
                     break
             if not matches_any:
-                logger.debug(f"Неверный формат ссылки: {line}")
-                errors.append(f"Неверный формат ссылки по ГОСТ Р 7.0.5-2008 в строке {ref_section.index(line) + 1}")
+                logger.debug("Неверный формат ссылки: %s", line)
+                errors.append(self.finding("entry_format", line_numbers[line], line))
             else:
                 ref_entries.append(line)
 
@@ -105,7 +113,7 @@ class ReferencesCheck(CheckModule):
             for i, line in enumerate(numbered_refs, start=1):
                 expected_num = f"{i}."
                 if not line.startswith(expected_num):
-                    errors.append(f"Нарушение сквозной нумерации в списке литературы: ожидается номер {expected_num}, строка: {line}")
+                    errors.append(self.finding("numbering", i, line, expected_num))
 
         # Проверка алфавитного порядка
         ref_titles = [re.sub(r'^\d+\.\s', '', line).strip() for line in numbered_refs]
@@ -115,25 +123,31 @@ class ReferencesCheck(CheckModule):
             russian_refs = [t for t in ref_titles if re.match(r'^[А-ЯЁ]', t)]
             all_refs = foreign_refs + russian_refs
             if all_refs != ref_titles:
-                errors.append("Иностранные источники должны идти перед русскоязычными в списке литературы")
+                errors.append(self.finding("foreign_first"))
             # Проверка алфавитного порядка внутри групп
             if foreign_refs and foreign_refs != sorted(foreign_refs):
-                errors.append("Иностранные источники в списке литературы не отсортированы по алфавиту")
+                errors.append(self.finding("foreign_order"))
             if russian_refs and russian_refs != sorted(russian_refs):
-                errors.append("Русскоязычные источники в списке литературы не отсортированы по алфавиту")
+                errors.append(self.finding("russian_order"))
 
         # Проверка затекстовых ссылок
         citations = []
+        self.counters["regex"] += len(paragraphs)
         for i, para in enumerate(paragraphs):
             matches = self.CITATION_PATTERN.findall(para)
             for match in matches:
                 citations.append((match, i))
 
+        # Записи списка без номеров для сопоставления со ссылками (один раз, а не для каждой ссылки)
+        ref_cleaned = [re.sub(r'^\d+\.\s', '', ref).strip() for ref in ref_entries]
+
         # Проверка формата затекстовых ссылок
         for citation, para_idx in citations:
+            self.check_deadline(errors)
+            self.counters["regex"] += 1
             # Проверка формата ссылки
             if not re.match(r'^(?:[А-ЯЁ][а-яё]+(?:,\s*[А-ЯЁ][а-яё]+){0,2}|.+?)(?:,\s*\d{4})?(?:,\s*(?:ч\.|вып\.)\s*\d+)?,\s*с\.\s*\d+(?:-\d+)?$', citation):
-                errors.append(f"Неверный формат затекстовой ссылки в параграфе {para_idx+1}: [{citation}]")
+                errors.append(self.finding("citation_format", para_idx + 1, citation))
             else:
                 # Извлекаем информацию из ссылки
                 parts = citation.split(',')
@@ -153,26 +167,25 @@ class ReferencesCheck(CheckModule):
                 if len(authors) > 3:
                     # Если больше 3 авторов, должно быть название
                     if not re.match(r'^[^\s].*?(?:\.\.\.)?$', ref_part):
-                        errors.append(f"Затекстовая ссылка в параграфе {para_idx+1} должна содержать название документа для 4+ авторов: [{citation}]")
+                        errors.append(self.finding("citation_title", para_idx + 1, citation))
                 else:
                     # Проверяем, что указаны фамилии
                     for author in authors:
                         if not re.match(r'^[А-ЯЁ][а-яё]+$', author.strip()):
-                            errors.append(f"Затекстовая ссылка в параграфе {para_idx+1} должна содержать фамилии авторов (1-3): [{citation}]")
+                            errors.append(self.finding("citation_authors", para_idx + 1, citation))
 
                 # Проверка сокращения заглавий
                 if '...' in ref_part:
                     if not re.match(r'^[^\s].*?\.\.\.$', ref_part):
-                        errors.append(f"Неверное сокращение заглавия в затекстовой ссылке в параграфе {para_idx+1}: [{citation}]")
+                        errors.append(self.finding("citation_abbreviation", para_idx + 1, citation))
 
                 # Проверка соответствия записи в списке литературы
                 found = False
-                for ref in ref_entries:
-                    ref_clean = re.sub(r'^\d+\.\s', '', ref).strip()
+                for ref_clean in ref_cleaned:
                     if ref_part in ref_clean or (year and year in ref_clean) or (volume and volume in ref_clean):
                         found = True
                         break
                 if not found:
-                    errors.append(f"Затекстовая ссылка в параграфе {para_idx+1} не соответствует ни одной записи в списке литературы: [{citation}]")
+                    errors.append(self.finding("citation_unmatched", para_idx + 1, citation))
 
         return errors
\ No newline at end of file
@@ -1,25 +1,39 @@
 import re
 import logging
+import functools
 from docx.document import Document
-from docx.oxml.ns import qn
-from .base import CheckModule
+from .base import CheckModule, CheckTimeoutError
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class StructureCheck(CheckModule):
+    CHECK_ID = "structure"
+    # Скомпилированные регулярные выражения
+    ABBREVIATIONS_PATTERN = re.compile(r'\b(ОАО|АО|ООО|ЗАО)\b')
+    TOC_END_PATTERN = re.compile(r"^(Введение|Список сокращений|Список терминов)")
+    TOC_LINE_PATTERN = re.compile(r'.*\.\.\.\s*\d+$')
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def section_patterns(required_sections):
+        """Компилирует шаблоны поиска обязательных разделов (результат кешируется по кортежу разделов)."""
+        return [
+            re.compile(rf"^(?:\d+\.\s*)?{re.escape(section.lower())}(?:\.|:)?\s*$")
+            for section in required_sections
+        ]
+
     def check(self, document, params=None):
         # Проверка входных параметров
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(document, Document):
-            return [f"Ошибка: document должен быть объектом Document, получено: {type(document)}"]
+            return [self.finding("document_type", actual=str(type(document)))]
 
         require_headings = params.get("require_headings", True)
         if not isinstance(require_headings, bool):
-            return [f"Ошибка: require_headings должен быть булевым значением, получено: {type(require_headings)}"]
+            return [self.finding("require_headings_type", actual=str(type(require_headings)))]
 
         required_sections = params.get("required_sections", [
             "Оглавление",
@@ -29,18 +43,14 @@ class StructureCheck(CheckModule):
             "Список литературы"
         ])
         if not isinstance(required_sections, list):
-            return [f"Ошибка: required_sections должен быть списком, получено: {type(required_sections)}"]
+            return [self.finding("required_sections_type", actual=str(type(required_sections)))]
         if not all(isinstance(s, str) for s in required_sections):
-            return [f"Ошибка: все элементы required_sections должны быть строками"]
+            return [self.finding("required_sections_items")]
 
         errors = []
 
         # Подготовка для поиска
-        required_sections_lower = [s.lower() for s in required_sections]
-        section_patterns = [
-            re.compile(rf"^(?:\d+\.\s*)?{re.escape(section_lower)}(?:\.|:)?\s*$")
-            for section_lower in required_sections_lower
-        ]
+        section_patterns = self.section_patterns(tuple(required_sections))
 
         # Проверка наличия заголовков и разделов
         headings = []
@@ -51,68 +61,82 @@ class StructureCheck(CheckModule):
         in_toc = False
 
         try:
-            for i, para in enumerate(document.paragraphs):
+            # Список параграфов и признаки разрыва страницы перед ними строятся один раз: обращение к
+            # document.paragraphs и поиск по preceding-sibling::* на каждом заголовке давали квадратичное время
+            document_paragraphs = document.paragraphs
+            page_breaks = self.page_breaks_before(document)
+            styles = {}
+            for i, para in enumerate(document_paragraphs):
+                self.check_deadline(errors)
+                self.counters["paragraphs"] += 1
                 text = para.text.strip() if para.text else ""
                 paragraphs.append((i, para, text))
 
                 # Проверка заголовков
                 try:
-                    if para.style and para.style.name and para.style.name.startswith('Heading'):
+                    style = self.paragraph_style(para, styles)
+                    if style and style.name and style.name.startswith('Heading'):
                         headings.append(para)
                         text_upper = text.upper()
-                        level = int(para.style.name.split()[-1])
+                        level = int(style.name.split()[-1])
                         heading_levels[text] = level
 
                         # Проверка оформления заголовков
                         if text_upper != text:
-                            errors.append(f"Заголовок '{text}' (параграф {i+1}) должен быть в верхнем регистре")
+                            errors.append(self.finding("heading_case", i + 1, text))
                         if text.endswith('.'):
-                            errors.append(f"Заголовок '{text}' (параграф {i+1}) не должен заканчиваться точкой")
-                        if '-' in text and not re.search(r'\b(ОАО|АО|ООО|ЗАО)\b', text):
-                            errors.append(f"Заголовок '{text}' (параграф {i+1}) содержит недопустимый перенос или сокращение")
+                            errors.append(self.finding("heading_period", i + 1, text))
+                        if '-' in text:
+                            self.counters["regex"] += 1
+                            if not self.ABBREVIATIONS_PATTERN.search(text):
+                                errors.append(self.finding("heading_hyphen", i + 1, text))
                         # Проверка интервала после заголовка (должно быть 1.5)
-                        if i + 1 < len(document.paragraphs):
-                            next_para = document.paragraphs[i + 1]
+                        if i + 1 < len(document_paragraphs):
+                            next_para = document_paragraphs[i + 1]
                             if next_para.paragraph_format.line_spacing != 1.5:
-                                errors.append(f"После заголовка '{text}' (параграф {i+1}) интервал должен быть 1.5, текущий: {next_para.paragraph_format.line_spacing}")
+                                errors.append(self.finding("heading_spacing", i + 1,
+                                                           [text, next_para.paragraph_format.line_spacing], 1.5))
                         # Проверка, начинается ли глава с новой страницы
                         if "ГЛАВА" in text_upper:
-                            prev_elements = para._element.xpath('preceding-sibling::*')
-                            has_page_break = any(elem.tag.endswith('br') and elem.get(qn('w:type')) == 'page' for elem in prev_elements)
-                            if not has_page_break:
-                                errors.append(f"Глава '{text}' (параграф {i+1}) должна начинаться с новой страницы")
+                            if not page_breaks[i]:
+                                errors.append(self.finding("chapter_page_break", i + 1, text))
                 except Exception as e:
-                    return [f"Ошибка при проверке стиля параграфа: {str(e)}"]
+                    return [self.finding("style_error", actual=str(e))]
 
                 # Проверка разделов
                 text_lower = text.lower()
                 for section, pattern in zip(required_sections, section_patterns):
+                    self.counters["regex"] += 1
                     if pattern.match(text_lower):
                         found_sections[section] = i
                         # Проверка уровня заголовка
                         if text in heading_levels and heading_levels[text] != 1:
-                            errors.append(f"Раздел '{section}' имеет стиль 'Heading {heading_levels[text]}', ожидается 'Heading 1'")
+                            errors.append(self.finding("section_level", section, heading_levels[text], 1))
                         # Проверка, является ли это оглавлением
                         if section.lower() == "оглавление":
                             in_toc = True
                         break
                     elif in_toc and text:
                         toc_content.append((text, i))
-                    elif in_toc and re.match(r"^(Введение|Список сокращений|Список терминов)", text):
-                        in_toc = False
+                    elif in_toc:
+                        self.counters["regex"] += 1
+                        if self.TOC_END_PATTERN.match(text):
+                            in_toc = False
 
+        except CheckTimeoutError:
+            raise
         except Exception as e:
-            return [f"Ошибка при доступе к параграфам документа: {str(e)}"]
+            return [self.finding("paragraphs_error", actual=str(e))]
 
         # Проверка наличия заголовков
         if require_headings and not headings:
-            errors.append("В документе отсутствуют заголовки (стиль 'Heading')")
+            errors.append(self.finding("no_headings"))
 
         # Проверка отсутствующих разделов
         missing_sections = [s for s in required_sections if s not in found_sections]
         if missing_sections:
-            logger.debug(f"Отсутствуют разделы: {', '.join(missing_sections)}")
-            errors.append("Отсутствуют некоторые обязательные разделы")
+            logger.debug("Отсутствуют разделы: %s", ', '.join(missing_sections))
+            errors.append(self.finding("missing_sections", actual=missing_sections))
 
         # Проверка порядка разделов
         if len(found_sections) > 1:
@@ -121,28 +145,27 @@ class StructureCheck(CheckModule):
             found_sections_order = [section for section, _ in found_sections_list]
             expected_order = [s for s in required_sections if s in found_sections_order]
             if found_sections_order != expected_order:
-                errors.append(f"Нарушение порядка разделов: текущий порядок {found_sections_order}, ожидается {expected_order}")
+                errors.append(self.finding("section_order", actual=found_sections_order, expected=expected_order))
 
         # Проверка оформления оглавления
         if "Оглавление" in found_sections:
-            allowed_abbreviations = r'\b(ОАО|АО|ООО|ЗАО)\b'
+            paragraph_texts = {para_text.strip() for _, _, para_text in paragraphs}
             for toc_line, idx in toc_content:
+                self.check_deadline(errors)
                 # Проверка, что заголовки в верхнем регистре
                 if not toc_line.isupper():
-                    errors.append(f"В оглавлении строка '{toc_line}' (параграф {idx+1}) должна быть в верхнем регистре")
+                    errors.append(self.finding("toc_case", idx + 1, toc_line))
                 # Проверка на отсутствие сокращений
-                if '-' in toc_line and not re.search(allowed_abbreviations, toc_line):
-                    errors.append(f"В оглавлении строка '{toc_line}' (параграф {idx+1}) содержит недопустимые сокращения")
+                if '-' in toc_line:
+                    self.counters["regex"] += 1
+                    if not self.ABBREVIATIONS_PATTERN.search(toc_line):
+                        errors.append(self.finding("toc_hyphen", idx + 1, toc_line))
                 # Проверка отточия перед номером страницы
-                if not re.match(r'.*\.\.\.\s*\d+$', toc_line):
-                    errors.append(f"В оглавлении строка '{toc_line}' (параграф {idx+1}) должна заканчиваться отточием и номером страницы")
+                self.counters["regex"] += 1
+                if not self.TOC_LINE_PATTERN.match(toc_line):
+                    errors.append(self.finding("toc_leader", idx + 1, toc_line))
                 # Проверка совпадения заголовков
-                found = False
-                for _, para, para_text in paragraphs:
-                    if para_text.strip() == toc_line.split('...')[0].strip():
-                        found = True
-                        break
-                if not found:
-                    errors.append(f"В оглавлении строка '{toc_line}' (параграф {idx+1}) не соответствует ни одному заголовку в тексте")
+                if toc_line.split('...')[0].strip() not in paragraph_texts:
+                    errors.append(self.finding("toc_unmatched", idx + 1, toc_line))
 
         return errors
\ No newline at end of file
@@ -1,13 +1,15 @@
 import re
 import logging
+from bisect import bisect_left
 from docx.document import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
 from modules.base import CheckModule
 
-logging.basicConfig(filename='processing.log', level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class TablesCheck(CheckModule):
+    CHECK_ID = "tables"
     # Регулярные выражения для поиска ссылок на таблицы в тексте
     TABLE_REF_PATTERN = re.compile(r'(?:таблица|табл\.)\s+(\d+(?:\.\d+)?)', re.IGNORECASE)
     # Регулярное выражение для заголовков таблиц
@@ -28,9 +30,9 @@ class TablesCheck(CheckModule):
         if params is None:
             params = {}
         if not isinstance(params, dict):
-            return [f"Ошибка: params должен быть словарем, получено: {type(params)}"]
+            return [self.finding("params_type", actual=str(type(params)))]
         if not isinstance(document, Document):
-            return [f"Ошибка: document должен быть объектом Document, получено: {type(document)}"]
+            return [self.finding("document_type", actual=str(type(document)))]
 
         # Параметры проверки
         use_chapter_numbering = params.get("use_chapter_numbering", False)
@@ -42,49 +44,63 @@ class TablesCheck(CheckModule):
         current_chapter = "0"  # По умолчанию, если глав нет
 
         # Сбор всех параграфов и определение текущей главы
-        for i, para in enumerate(document.paragraphs):
+        paragraphs = document.paragraphs
+        tables = document.tables
+        for i, para in enumerate(paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
             text = para.text.strip() if para.text else ""
             # Определяем текущую главу для нумерации таблиц
             if text.upper().startswith("ГЛАВА"):
+                self.counters["regex"] += 1
                 match = re.match(r'ГЛАВА\s+(\d+)', text, re.IGNORECASE)
                 if match:
                     current_chapter = match.group(1)
             chapter_numbers[i] = current_chapter
 
             # Ищем ссылки на таблицы в тексте
+            self.counters["regex"] += 1
             matches = self.TABLE_REF_PATTERN.findall(text)
             for table_num in matches:
                 table_references.append((table_num, i))
 
+        # Заголовок относится к первой таблице, перед которой в документе не меньше (i + 1) параграфов
+        # (включая параграфы ячеек предыдущих таблиц), — как при поиске preceding::w:p[i + 1] от каждой таблицы.
+        # Число параграфов перед каждой таблицей считается за один проход, таблица для заголовка
+        # находится двоичным поиском: перебор пар "заголовок — таблица" давал кубическое время.
+        self.counters["xpath"] += 1
+        body = document.element.body
+        p_tag, tbl_tag = qn('w:p'), qn('w:tbl')
+        preceding_counts = []  # Число параграфов перед каждой таблицей document.tables
+        seen = 0
+        for element in body.iter(p_tag, tbl_tag):
+            if element.tag == p_tag:
+                seen += 1
+            elif element.getparent() is body:
+                preceding_counts.append(seen)
+
+        captions = {}  # Индекс таблицы -> индекс параграфа её заголовка (первого подходящего)
+        for i, para in enumerate(paragraphs):
+            self.check_deadline(errors)
+            self.counters["paragraphs"] += 1
+            self.counters["regex"] += 1
+            if self.TABLE_CAPTION_PATTERN.match(para.text.strip()):
+                captions.setdefault(bisect_left(preceding_counts, i + 1), i)
+
         # Проверяем таблицы
         expected_table_num = 1
-        for table_idx, table in enumerate(document.tables):
-            # Ищем заголовок таблицы (предшествующий параграф)
-            caption_idx = None
-            for i, para in enumerate(document.paragraphs):
-                text = para.text.strip()
-                match = self.TABLE_CAPTION_PATTERN.match(text)
-                if match:
-                    # Проверяем, относится ли этот заголовок к текущей таблице
-                    # Для этого ищем следующую таблицу после параграфа
-                    next_table_idx = None
-                    for j, t in enumerate(document.tables):
-                        if t._element.xpath(f'preceding::w:p[{i+1}]'):
-                            next_table_idx = j
-                            break
-                    if next_table_idx == table_idx:
-                        caption_idx = i
-                        break
-
+        for table_idx, table in enumerate(tables):
+            self.check_deadline(errors)
+            caption_idx = captions.get(table_idx)
             if caption_idx is None:
-                errors.append(f"Таблица {table_idx+1}: Отсутствует заголовок перед таблицей")
+                errors.append(self.finding("caption_missing", table_idx + 1))
                 continue
 
-            caption_para = document.paragraphs[caption_idx]
+            caption_para = paragraphs[caption_idx]
             caption_text = caption_para.text.strip()
             match = self.TABLE_CAPTION_PATTERN.match(caption_text)
             if not match:
-                errors.append(f"Таблица {table_idx+1}: Неверный формат заголовка (параграф {caption_idx+1}): '{caption_text}', ожидается 'Табл. N – Название'")
+                errors.append(self.finding("caption_format", (table_idx + 1, caption_idx + 1), caption_text))
                 continue
 
             # Извлекаем номер и название
@@ -98,27 +114,27 @@ class TablesCheck(CheckModule):
             else:
                 expected_caption = str(expected_table_num)
             if table_num != expected_caption:
-                errors.append(f"Таблица {table_idx+1}: Неверный номер таблицы, ожидается {expected_caption}, получено {table_num}")
+                errors.append(self.finding("numbering", table_idx + 1, table_num, expected_caption))
             expected_table_num += 1
 
             # Проверка оформления заголовка
             if not table_title[0].isupper():
-                errors.append(f"Таблица {table_num}: Название '{table_title}' должно начинаться с прописной буквы (параграф {caption_idx+1})")
+                errors.append(self.finding("title_case", (table_num, caption_idx + 1), table_title))
             if table_title.endswith('.'):
-                errors.append(f"Таблица {table_num}: Название '{table_title}' не должно заканчиваться точкой (параграф {caption_idx+1})")
+                errors.append(self.finding("title_period", (table_num, caption_idx + 1), table_title))
             if caption_para.alignment != WD_ALIGN_PARAGRAPH.CENTER:
-                errors.append(f"Таблица {table_num}: Заголовок '{caption_text}' должен быть выровнен по центру (параграф {caption_idx+1})")
+                errors.append(self.finding("caption_alignment", (table_num, caption_idx + 1), caption_text))
 
             # Проверка содержимого таблицы
             for row in table.rows:
                 for cell in row.cells:
                     if not cell.text.strip():
-                        errors.append(f"Таблица {table_num}: Обнаружена пустая ячейка (таблица {table_idx+1})")
+                        errors.append(self.finding("empty_cell", (table_num, table_idx + 1)))
 
         # Проверка ссылок на таблицы
         referenced_tables = set(ref[0] for ref in table_references)
         for table_num, table_idx, caption_idx in table_positions:
             if table_num not in referenced_tables:
-                errors.append(f"Таблица {table_num}: Отсутствует ссылка на таблицу в тексте (таблица {table_idx+1}, заголовок в параграфе {caption_idx+1})")
+                errors.append(self.finding("unreferenced", (table_num, table_idx + 1, caption_idx + 1)))
 
         return errors
\ No newline at end of file
@@ -1,29 +1,32 @@
 import os
+import time
 import logging
-from datetime import datetime
-from modules.structure import StructureCheck
-from modules.page_params import PageParamsCheck
-from modules.formatting import FormattingCheck
-from modules.references import ReferencesCheck
-from modules.tables import TablesCheck
-from modules.illustrations import IllustrationsCheck
-from modules.appendices import AppendicesCheck
-
-# Настройка логирования (вызываем только если обработчики ещё не добавлены)
-if not logging.getLogger().hasHandlers():
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("processing.log", mode='w', encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+import importlib
+import functools
+import contextlib
+from modules.base import CheckTimeoutError
+from modules.findings import Finding, aggregate
+from utils.report_sink import render_markdown
+
 logger = logging.getLogger(__name__)
 
+# Реестр проверок: ключ -> (модуль, класс). Модули проверок (и python-docx вместе с ними)
+# импортируются при первом использовании проверки, а не при импорте шаблона
+CHECK_REGISTRY = {
+    "structure": ("modules.structure", "StructureCheck"),
+    "page_params": ("modules.page_params", "PageParamsCheck"),
+    "formatting": ("modules.formatting", "FormattingCheck"),
+    "references": ("modules.references", "ReferencesCheck"),
+    "tables": ("modules.tables", "TablesCheck"),
+    "illustrations": ("modules.illustrations", "IllustrationsCheck"),
+    "appendices": ("modules.appendices", "AppendicesCheck"),
+}
+
 class CheckTemplate:
     def __init__(self, structure_params=None, page_params=None, formatting_params=None, references_params=None,
-                 tables_params=None, illustrations_params=None, appendices_params=None):
+                 tables_params=None, illustrations_params=None, appendices_params=None,
+                 check_time_limit=None, document_time_limit=None, aggregate_findings=True,
+                 max_findings_per_rule=None):
         # Параметры для существующих проверок
         self.structure_params = structure_params or {"require_headings": True}
         self.page_params = page_params or {
@@ -44,108 +47,151 @@ class CheckTemplate:
         self.illustrations_params = illustrations_params or {"use_chapter_numbering": False}
         self.appendices_params = appendices_params or {"appendix_number_style": "numeric"}
 
-        # Инициализация модулей проверки
-        self.structure_check = StructureCheck()
-        self.page_params_check = PageParamsCheck()
-        self.formatting_check = FormattingCheck()
-        self.references_check = ReferencesCheck()
-        self.tables_check = TablesCheck()
-        self.illustrations_check = IllustrationsCheck()
-        self.appendices_check = AppendicesCheck()
-
-    def apply(self, doc, file_path, report_file=None):
-        logger.debug(f"Начало применения шаблона проверки для файла: {file_path}")
-        results = {}
-
-        # Проверка структуры
-        try:
-            results["structure"] = self.structure_check.check(doc, self.structure_params)
-            logger.debug(f"Результат проверки структуры: {results['structure']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке структуры для файла {file_path}: {str(e)}")
-            results["structure"] = [f"Ошибка при проверке структуры: {str(e)}"]
-
-        # Проверка параметров страницы
-        try:
-            results["page_params"] = self.page_params_check.check(doc, self.page_params)
-            logger.debug(f"Результат проверки параметров страницы: {results['page_params']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке параметров страницы для файла {file_path}: {str(e)}")
-            results["page_params"] = [f"Ошибка при проверке параметров страницы: {str(e)}"]
-
-        # Проверка форматирования
-        try:
-            results["formatting"] = self.formatting_check.check(doc, file_path, self.formatting_params)
-            logger.debug(f"Результат проверки форматирования: {results['formatting']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке форматирования для файла {file_path}: {str(e)}")
-            results["formatting"] = [f"Ошибка при проверке форматирования: {str(e)}"]
-
-        # Проверка списка литературы
+        # Модули проверки создаются при первом обращении (см. get_check)
+        self._checks = {}
+
+        # Лимиты времени в секундах: check_time_limit — число для всех проверок или словарь
+        # {ключ проверки: секунды}, document_time_limit — на все проверки документа
+        self.check_time_limit = check_time_limit
+        self.document_time_limit = document_time_limit
+
+        # Однотипные нарушения подряд идущих параграфов объединяются в диапазоны, а число записей
+        # одного правила ограничивается max_findings_per_rule (None или 0 — без ограничения)
+        self.aggregate_findings = aggregate_findings
+        self.max_findings_per_rule = max_findings_per_rule
+
+        # Время выполнения проверок, их счётчики (modules.base.COUNTERS) и прерванные по лимиту
+        # проверки для последнего документа
+        self.check_times = {}
+        self.check_counters = {}
+        self.truncated_checks = []
+
+    # Порядок запуска проверок: (ключ результата в CHECK_REGISTRY, атрибут параметров, название для сообщений)
+    CHECKS = [
+        ("structure", "structure_params", "структуры"),
+        ("page_params", "page_params", "параметров страницы"),
+        ("formatting", "formatting_params", "форматирования"),
+        ("references", "references_params", "ссылок"),
+        ("tables", "tables_params", "таблиц"),
+        ("illustrations", "illustrations_params", "иллюстраций"),
+        ("appendices", "appendices_params", "приложений"),
+    ]
+
+    def get_check(self, key):
+        """Возвращает модуль проверки по ключу, импортируя и создавая его при первом обращении."""
+        check_module = self._checks.get(key)
+        if check_module is None:
+            module_name, class_name = CHECK_REGISTRY[key]
+            check_module = getattr(importlib.import_module(module_name), class_name)()
+            self._checks[key] = check_module
+        return check_module
+
+    def load_checks(self):
+        """Загружает все модули проверки сразу (перед запуском пула, чтобы процессы их унаследовали)."""
+        for key, _, _ in self.CHECKS:
+            self.get_check(key)
+        return self
+
+    def compile(self):
+        """
+        Заранее готовит всё, что не зависит от документа (шаблоны поиска разделов структуры).
+
+        Вызывается в родительском процессе до запуска пула, чтобы процессы, созданные через fork,
+        получили готовый шаблон без повторной компиляции.
+        """
+        required_sections = self.structure_params.get("required_sections")
+        if isinstance(required_sections, list) and all(isinstance(s, str) for s in required_sections):
+            self.get_check("structure").section_patterns(tuple(required_sections))
+        return self
+
+    def _check_deadline(self, key, document_deadline):
+        """Возвращает момент (по time.monotonic), до которого должна завершиться проверка."""
+        limit = self.check_time_limit
+        if isinstance(limit, dict):
+            limit = limit.get(key)
+        deadline = time.monotonic() + limit if limit else None
+        if document_deadline is not None:
+            deadline = document_deadline if deadline is None else min(deadline, document_deadline)
+        return deadline
+
+    @staticmethod
+    def _blank_paragraphs(doc):
         try:
-            results["references"] = self.references_check.check(doc, self.references_params)
-            logger.debug(f"Результат проверки ссылок: {results['references']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке ссылок для файла {file_path}: {str(e)}")
-            results["references"] = [f"Ошибка при проверке ссылок: {str(e)}"]
-
-        # Проверка таблиц
-        try:
-            results["tables"] = self.tables_check.check(doc, self.tables_params)
-            logger.debug(f"Результат проверки таблиц: {results['tables']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке таблиц для файла {file_path}: {str(e)}")
-            results["tables"] = [f"Ошибка при проверке таблиц: {str(e)}"]
-
-        # Проверка иллюстраций
-        try:
-            results["illustrations"] = self.illustrations_check.check(doc, self.illustrations_params)
-            logger.debug(f"Результат проверки иллюстраций: {results['illustrations']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке иллюстраций для файла {file_path}: {str(e)}")
-            results["illustrations"] = [f"Ошибка при проверке иллюстраций: {str(e)}"]
-
-        # Проверка приложений
-        try:
-            results["appendices"] = self.appendices_check.check(doc, self.appendices_params)
-            logger.debug(f"Результат проверки приложений: {results['appendices']}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке приложений для файла {file_path}: {str(e)}")
-            results["appendices"] = [f"Ошибка при проверке приложений: {str(e)}"]
+            return frozenset(i for i, para in enumerate(doc.paragraphs, start=1) if not para.text.strip())
+        except Exception:
+            return frozenset()
+
+    def apply(self, doc, file_path, report_file=None, source=None, profiler=None):
+        """
+        Применяет проверки к документу. source — содержимое файла (bytes), если документ получен
+        из памяти: тогда file_path используется только в сообщениях и отчёте.
+        profiler (utils.profiling.DocumentProfiler) профилирует каждую проверку отдельно.
+        """
+        logger.debug("Начало применения шаблона проверки для файла: %s", file_path)
+        results = {}
+        # Время выполнения каждой проверки в секундах (используется моделью стоимости)
+        self.check_times = {}
+        self.check_counters = {}
+        self.truncated_checks = []
+        document_deadline = time.monotonic() + self.document_time_limit if self.document_time_limit else None
+        # Номера пустых параграфов (не разрывают диапазоны при объединении нарушений); вычисляются,
+        # только если между однотипными нарушениями встретился пропуск
+        blank = functools.cache(lambda: self._blank_paragraphs(doc))
+
+        for key, params_attr, label in self.CHECKS:
+            params = getattr(self, params_attr)
+            if document_deadline is not None and time.monotonic() >= document_deadline:
+                logger.warning("Проверка %s для файла %s пропущена: исчерпан лимит времени на документ", label, file_path)
+                results[key] = [Finding("template", "skipped", label)]
+                self.truncated_checks.append(key)
+                continue
+
+            check_module = self.get_check(key)
+            check_module.reset_counters()
+            start_time = time.perf_counter()
+            check_module.deadline = self._check_deadline(key, document_deadline)
+            with profiler.check(key) if profiler is not None else contextlib.nullcontext():
+                try:
+                    if key == "formatting":
+                        # Проверке форматирования дополнительно нужен путь к файлу для разбора XML
+                        results[key] = check_module.check(doc, source if source is not None else file_path, params)
+                    else:
+                        results[key] = check_module.check(doc, params)
+                    logger.debug("Результат проверки %s: нарушений: %s", label, len(results[key]))
+                except CheckTimeoutError as e:
+                    logger.warning("Проверка %s для файла %s прервана по превышению лимита времени", label, file_path)
+                    results[key] = list(e.partial_errors) + [Finding("template", "truncated", label)]
+                    self.truncated_checks.append(key)
+                except Exception as e:
+                    logger.error("Ошибка при проверке %s для файла %s: %s", label, file_path, e)
+                    results[key] = [Finding("template", "failed", label, str(e))]
+                finally:
+                    check_module.deadline = None
+            self.check_times[key] = time.perf_counter() - start_time
+            self.check_counters[key] = dict(check_module.reset_counters())
+            if self.aggregate_findings and len(results[key]) > 1:
+                results[key] = aggregate(results[key], self.max_findings_per_rule, blank)
 
         # Сохранение отчёта, если указано
         if report_file:
             try:
                 self._save_report(results, report_file, file_path)
             except Exception as e:
-                logger.error(f"Ошибка при сохранении отчёта для файла {file_path}: {str(e)}")
-                results["report"] = [f"Ошибка при сохранении отчёта: {str(e)}"]
+                logger.error("Ошибка при сохранении отчёта для файла %s: %s", file_path, e)
+                results["report"] = [Finding("template", "report_error", actual=str(e))]
 
-        logger.debug(f"Завершение применения шаблона проверки для файла: {file_path}")
+        logger.debug("Завершение применения шаблона проверки для файла: %s", file_path)
         return results
 
     def _save_report(self, results, report_file, file_path):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         file_index = os.path.basename(report_file).replace("report_check_file_", "").replace(".md", "")
 
         try:
             with open(report_file, 'w', encoding='utf-8') as f:
-                f.write(f"# Отчёт о проверке документа (ID: file_{file_index})\n")
-                f.write(f"Дата и время: {now}\n\n")
-                total_errors = 0
-                for check, result in results.items():
-                    f.write(f"## {check.capitalize()}\n")
-                    if not result:
-                        f.write("Проверка пройдена успешно\n")
-                    else:
-                        f.write("Ошибки:\n")
-                        for error in result:
-                            f.write(f"- {error}\n")
-                        total_errors += len(result)
-                    f.write("\n")
-                f.write(f"**Общее количество ошибок: {total_errors}**\n")
+                f.write(render_markdown(file_index, results, check_times=self.check_times,
+                                        counters=self.check_counters))
             os.chmod(report_file, 0o600)
-            logger.info(f"Отчёт сохранён: {report_file}")
+            logger.info("Отчёт сохранён: %s", report_file)
         except Exception as e:
-            logger.error(f"Не удалось сохранить отчёт: {str(e)}")
+            logger.error("Не удалось сохранить отчёт: %s", e)
             raise Exception(f"Не удалось сохранить отчёт: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import cpu_count
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from main import (process_file, timeout_result, warm_up, configure_worker, COST_HISTORY_FILE,
+                  DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_CHECK_TIME_LIMIT,
+                  DEFAULT_DOCUMENT_TIME_LIMIT, DEFAULT_HARD_TIMEOUT)
+from modules.findings import to_api_json
+from utils.cost_model import CostModel
+from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+from utils import metrics
+from utils.logs import setup_logging, add_logging_arguments
+
+logger = logging.getLogger(__name__)
+
+# Максимальный размер загружаемого документа в байтах
+DEFAULT_MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+# Сколько задач может ожидать обработки; при переполнении новые задачи отклоняются с кодом 503
+DEFAULT_MAX_PENDING = 1000
+# Сколько завершённых задач хранится для получения результатов (самые старые удаляются)
+DEFAULT_MAX_FINISHED = 10000
+# Наибольшее время ожидания результата в запросе GET /jobs/<id>?wait=<секунды>
+MAX_WAIT = 60
+
+
+class ServiceBusyError(Exception):
+    """Очередь задач сервиса заполнена."""
+
+
+class CheckService:
+    """
+    Очередь проверок документов, обрабатываемых постоянным пулом прогретых процессов.
+
+    Документы принимаются из памяти (bytes) и передаются в процессы пула без временных файлов.
+    Пул и шаблон проверки создаются один раз при запуске сервиса, поэтому время ответа на задачу
+    складывается только из ожидания в очереди и самой проверки. Результаты отдаются через API,
+    поэтому отчёты в Markdown не записываются; reports_dir хранит только историю времени проверок.
+    """
+
+    def __init__(self, reports_dir="reports", num_workers=None, max_pending=DEFAULT_MAX_PENDING,
+                 max_finished=DEFAULT_MAX_FINISHED, max_upload_size=DEFAULT_MAX_UPLOAD_SIZE,
+                 check_time_limit=DEFAULT_CHECK_TIME_LIMIT, document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT,
+                 hard_timeout=DEFAULT_HARD_TIMEOUT, input_limits=None, max_findings_per_rule=None, profile_dir=None,
+                 memory_top=None):
+        self.reports_dir = reports_dir
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.max_upload_size = max_upload_size
+        self.hard_timeout = hard_timeout
+        os.makedirs(reports_dir, exist_ok=True)
+        self.cost_model = CostModel(os.path.join(reports_dir, COST_HISTORY_FILE))
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> задача (в порядке поступления)
+        self._next_index = 0
+
+        # Параметры процессов пула те же, что у пакетной обработки (см. main.configure_worker)
+        worker_args = (check_time_limit, document_time_limit, input_limits, max_findings_per_rule, profile_dir,
+                       memory_top)
+        configure_worker(*worker_args)
+        if PREFORK_START_METHOD:
+            warm_up()
+        self.pool = WorkerPool(process_file, num_workers or cpu_count(), rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                               max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_worker,
+                               initargs=worker_args, mp_context=PREFORK_START_METHOD, prestart=True)
+
+    def pending_count(self):
+        with self._lock:
+            return self._pending_count()
+
+    def _pending_count(self):
+        return sum(1 for job in self._jobs.values() if not job["future"].done())
+
+    def submit(self, data, file_name="document.docx"):
+        """Ставит документ (содержимое в байтах) в очередь и возвращает идентификатор задачи."""
+        features = CostModel.document_features(file_name, data=data)
+        job_id = uuid.uuid4().hex
+        # Проверка заполненности очереди и добавление задачи выполняются под одной блокировкой,
+        # иначе одновременные запросы могут превысить max_pending
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise ServiceBusyError(f"В очереди уже {self.max_pending} задач")
+            file_index = self._next_index
+            self._next_index += 1
+            # Без директории отчётов: индекс задачи начинается с нуля при каждом запуске сервиса,
+            # и отчёты с одинаковыми именами перезаписывали бы друг друга
+            future = self.pool.submit((file_name, file_index, None, data),
+                                      memory=self.cost_model.estimate_memory(features), timeout=self.hard_timeout)
+            self._jobs[job_id] = {
+                "file_name": file_name,
+                "file_index": file_index,
+                "future": future,
+                "submitted_at": time.time()
+            }
+            self._evict_finished()
+        future.add_done_callback(functools.partial(self._observe, features))
+        logger.info("Задача %s: файл %s (%s байт) поставлен в очередь", job_id, file_name, len(data))
+        return job_id
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["future"].done()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _observe(self, features, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            timed_out = isinstance(future.exception(), TaskTimeoutError)
+            metrics.DOCUMENTS.inc(status="timed_out" if timed_out else "error")
+            return
+        metrics.observe_result(future.result())
+        check_times = future.result().get("check_times")
+        if check_times:
+            with self._lock:
+                self.cost_model.observe(features, check_times)
+
+    def _job_result(self, job):
+        future = job["future"]
+        try:
+            return future.result(timeout=0)
+        except TaskTimeoutError:
+            return timeout_result(job["file_name"], self.hard_timeout)
+        except CancelledError:
+            return {"file_path": job["file_name"], "results": {"error": ["Задача отменена"]}, "time": 0.0}
+        except Exception as e:
+            return {"file_path": job["file_name"],
+                    "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]}, "time": 0.0}
+
+    def status(self, job_id, wait_timeout=0):
+        """
+        Возвращает состояние задачи ("queued", "running", "done") и результат завершённой задачи
+        или None, если задача неизвестна. wait_timeout — сколько секунд ждать завершения задачи.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job["future"]
+        if wait_timeout > 0 and not future.done():
+            wait([future], timeout=min(wait_timeout, MAX_WAIT))
+        status = {"job_id": job_id, "file_name": job["file_name"], "submitted_at": job["submitted_at"]}
+        if future.done():
+            status["status"] = "done"
+            status["result"] = self._job_result(job)
+        else:
+            status["status"] = "running" if future.running() else "queued"
+        return status
+
+    def close(self):
+        self.pool.shutdown(cancel_pending=True)
+        self.cost_model.save()
+
+
+class CheckRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP-интерфейс сервиса проверки:
+        POST /jobs           — тело запроса: содержимое .docx; имя файла в заголовке X-File-Name
+                               (в кодировке URL). Ответ 202: {"job_id": ..., "status": "queued"}.
+        GET /jobs/<job_id>   — состояние и результат задачи; параметр wait=<секунды> задаёт
+                               ожидание завершения задачи.
+        GET /health          — состояние сервиса.
+        GET /metrics         — метрики в текстовом формате Prometheus (utils.metrics).
+    """
+
+    server_version = "VKRCheck/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, code, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=to_api_json).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, code, message):
+        self._send_json(code, {"error": message})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/jobs":
+            self._send_error(404, "Неизвестный адрес")
+            return
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self._send_error(411, "Требуется заголовок Content-Length")
+            return
+        length = int(length)
+        if length > self.service.max_upload_size:
+            self._send_error(413, f"Размер файла превышает {self.service.max_upload_size} байт")
+            return
+        data = self.rfile.read(length)
+        # Файл .docx — zip-архив, поэтому начинается с сигнатуры PK
+        if not data.startswith(b"PK"):
+            self._send_error(400, "Неподдерживаемый формат файла, ожидается .docx")
+            return
+        file_name = os.path.basename(unquote(self.headers.get("X-File-Name", ""))) or "document.docx"
+        if not file_name.lower().endswith(".docx"):
+            file_name += ".docx"
+        try:
+            job_id = self.service.submit(data, file_name)
+        except ServiceBusyError as e:
+            self._send_error(503, str(e))
+            return
+        self._send_json(202, {"job_id": job_id, "status": "queued"}, {"Location": f"/jobs/{job_id}"})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(200, {"status": "ok", "pending": self.service.pending_count(),
+                                  "workers": self.service.pool.num_workers})
+            return
+        if url.path == "/metrics":
+            body = metrics.REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not url.path.startswith("/jobs/"):
+            self._send_error(404, "Неизвестный адрес")
+            return
+        try:
+            wait_timeout = float(parse_qs(url.query).get("wait", ["0"])[0])
+        except ValueError:
+            self._send_error(400, "Параметр wait должен быть числом")
+            return
+        status = self.service.status(url.path[len("/jobs/"):], wait_timeout)
+        if status is None:
+            self._send_error(404, "Задача не найдена")
+            return
+        self._send_json(200, status)
+
+
+def create_server(service, host="127.0.0.1", port=8080):
+    """Создаёт HTTP-сервер для сервиса проверки (port=0 — любой свободный порт)."""
+    server = ThreadingHTTPServer((host, port), CheckRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    """Запускает HTTP-сервис проверки документов."""
+    parser = argparse.ArgumentParser(description="HTTP-сервис проверки документов .docx.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Адрес сервиса (по умолчанию: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Порт сервиса (по умолчанию: 8080)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Количество процессов пула (по умолчанию: число CPU)")
+    parser.add_argument("--reports-dir", type=str, default="reports",
+                        help="Директория для истории времени проверок (по умолчанию: reports)")
+    parser.add_argument("--max-upload-size", type=int, default=DEFAULT_MAX_UPLOAD_SIZE >> 20,
+                        help="Максимальный размер загружаемого файла в МБ (по умолчанию: 50)")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Максимальное количество задач в очереди (по умолчанию: 1000)")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    try:
+        setup_logging(args.log_level, args.log_file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    service = CheckService(args.reports_dir, num_workers=args.processes, max_pending=args.max_pending,
+                           max_upload_size=args.max_upload_size * 1024 * 1024)
+    server = create_server(service, args.host, args.port)
+    logger.info("Сервис проверки запущен на http://%s:%s", args.host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        logger.info("Сервис проверки остановлен")
+
+
+if __name__ == "__main__":
+    main()
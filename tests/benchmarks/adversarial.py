@@ -0,0 +1,199 @@
+"""
+Документы наихудшего случая для проверок: каждый доводит до предела одну особенность реальных работ,
+на которых проверка занимала минуты.
+
+    long_references  — список литературы из длинных записей с URL (и ссылки на них в тексте)
+    run_churn        — абзац из десятков тысяч фрагментов после многократных исправлений в режиме правки
+    long_table       — таблица из тысяч строк
+    nested_tables    — таблицы, вложенные друг в друга на десятки уровней
+    many_tables      — сотни таблиц с заголовками и ссылками
+    many_appendices  — сотни заголовков "Приложение N"
+    many_headings    — сотни заголовков глав и такое же оглавление
+
+Размер задаётся масштабом scale: при scale=1 получаются объёмы из реальных случаев (500 записей
+по 500 знаков, 100 тыс. фрагментов, 5 тыс. строк и т. д.). Тесты (tests/unit_tests/test_adversarial.py)
+проверяют документы двух масштабов и требуют, чтобы время и память проверок росли не быстрее
+чем почти линейно.
+
+    python -m tests.benchmarks.adversarial OUT_DIR --scale 1
+"""
+import os
+import sys
+import argparse
+from xml.sax.saxutils import escape
+
+from tests.benchmarks.corpus import CorpusGenerator
+
+# Объёмы при scale=1
+FULL_SIZE = {
+    "long_references": 500,
+    "run_churn": 100000,
+    "long_table": 5000,
+    "nested_tables": 40,
+    "many_tables": 300,
+    "many_appendices": 300,
+    "many_headings": 500,
+}
+SURNAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Новиков")
+TEXT = ("Система автоматизированной проверки оформления выпускных квалификационных работ анализирует "
+        "структуру документа, параметры страницы, шрифты, таблицы, рисунки и список литературы.")
+
+
+def _p(text, ppr=""):
+    return (f'<w:p>{f"<w:pPr>{ppr}</w:pPr>" if ppr else ""}'
+            f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>')
+
+
+def _heading(text):
+    return _p(text.upper(), '<w:pStyle w:val="1"/>')
+
+
+def _page_break():
+    return '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _table(rows, cols, cell=None):
+    """Таблица rows x cols; cell(row, col) возвращает содержимое ячейки (по умолчанию число)."""
+    grid = "".join('<w:gridCol w:w="2000"/>' for _ in range(cols))
+    body = []
+    for row in range(rows):
+        cells = "".join(f'<w:tc><w:tcPr><w:tcW w:w="2000" w:type="dxa"/></w:tcPr>'
+                        f'{cell(row, col) if cell else _p(str(row * cols + col))}</w:tc>' for col in range(cols))
+        body.append(f"<w:tr>{cells}</w:tr>")
+    return (f'<w:tbl><w:tblPr><w:tblW w:w="{2000 * cols}" w:type="dxa"/></w:tblPr>'
+            f'<w:tblGrid>{grid}</w:tblGrid>{"".join(body)}</w:tbl>')
+
+
+def _frame(*parts):
+    """Обязательные разделы работы вокруг содержимого parts."""
+    return "".join([_heading("Оглавление"), _p("ВВЕДЕНИЕ...3"), _page_break(), _heading("Введение"), _p(TEXT),
+                    *parts, _page_break(), _heading("Заключение"), _p(TEXT), _page_break(),
+                    _heading("Список литературы"), _p("Иванов А.Б. Методы анализа. Москва: Наука, 2020. 300 с.")])
+
+
+def long_references(n):
+    """n записей по ~500 знаков с URL (каждая четвёртая без даты обращения) и n ссылок на них в тексте."""
+    entries, citations = [], []
+    for i in range(n):
+        surname = SURNAMES[i % len(SURNAMES)]
+        url = "https://example.org/" + "/".join(f"section{i}-{k}?query=value{k}&page={k}" for k in range(8))
+        entry = (f"{surname} А.Б., {SURNAMES[(i + 1) % len(SURNAMES)]} В.Г. Исследование методов автоматической "
+                 f"проверки оформления документов, часть {i} // Электронный архив научных публикаций. URL: {url}")
+        entries.append(_p(entry if i % 4 == 3 else f"{entry} (дата обращения: 10.05.2021)."))
+        citations.append(f"[{surname}, {2000 + i % 24}, с. {i + 1}]")
+    body = [_p(f"{TEXT} {' '.join(citations[k:k + 10])}") for k in range(0, n, 10)]
+    return "".join([_heading("Оглавление"), _p("ВВЕДЕНИЕ...3"), _heading("Введение"), *body,
+                    _heading("Заключение"), _p(TEXT), _heading("Список литературы"), *sorted(entries)])
+
+
+def run_churn(n):
+    """Абзац из n фрагментов: вставки и удаления режима правки, фрагменты с собственными свойствами."""
+    runs = []
+    for i in range(n):
+        run = (f'<w:r w:rsidR="00{i % 997:06d}"><w:rPr><w:rFonts w:ascii="Times New Roman" '
+               f'w:hAnsi="Times New Roman"/><w:sz w:val="28"/></w:rPr><w:t xml:space="preserve">с{i} </w:t></w:r>')
+        if i % 3 == 1:
+            run = f'<w:ins w:id="{i}" w:author="Студент" w:date="2024-05-01T10:00:00Z">{run}</w:ins>'
+        elif i % 3 == 2:
+            run = (f'<w:del w:id="{i}" w:author="Студент" w:date="2024-05-01T10:00:00Z"><w:r>'
+                   f'<w:delText xml:space="preserve">удалено{i} </w:delText></w:r></w:del>')
+        runs.append(run)
+    return _frame(f'<w:p>{"".join(runs)}</w:p>', _p(TEXT))
+
+
+def long_table(n):
+    """Таблица из n строк и 5 столбцов с заголовком и ссылкой на неё."""
+    return _frame(_p(f"{TEXT} Данные приведены в табл. 1."), _p("Табл. 1 – Результаты", '<w:jc w:val="center"/>'),
+                  _table(n, 5))
+
+
+def nested_tables(n):
+    """Таблица, вложенная сама в себя n раз (в каждой ячейке — абзац и следующая таблица)."""
+    table = _table(2, 2)
+    for depth in range(n):
+        inner = table
+        table = _table(2, 2, lambda row, col: _p(f"Уровень {depth}") + (inner if row == col == 0 else ""))
+    return _frame(_p(f"{TEXT} Данные приведены в табл. 1."), _p("Табл. 1 – Вложенные данные"), table)
+
+
+def many_tables(n):
+    """n таблиц 3 x 3, перед каждой — ссылка и заголовок."""
+    parts = []
+    for i in range(1, n + 1):
+        parts += [_p(f"{TEXT} Результаты приведены в табл. {i}."),
+                  _p(f"Табл. {i} – Результаты эксперимента {i}", '<w:jc w:val="center"/>'), _table(3, 3)]
+    return _frame(*parts)
+
+
+def many_appendices(n):
+    """n приложений с разрывом страницы, заголовком, тематическим заголовком и ссылкой в тексте."""
+    references = [_p(f"{TEXT} Подробности приведены в приложение {i}.") for i in range(1, n + 1)]
+    appendices = []
+    for i in range(1, n + 1):
+        appendices += [_page_break(), _p(f"Приложение {i}", '<w:jc w:val="right"/>'),
+                       _p(f"Материалы к разделу {i}", '<w:jc w:val="center"/>'), _p(TEXT)]
+    toc = [_p(f"ПРИЛОЖЕНИЕ {i}...{i + 10}") for i in range(1, n + 1)]
+    return "".join([_heading("Оглавление"), *toc, _heading("Введение"), *references, _heading("Заключение"),
+                    _p(TEXT), _heading("Список литературы"),
+                    _p("Иванов А.Б. Методы анализа. Москва: Наука, 2020. 300 с."), *appendices])
+
+
+def many_headings(n):
+    """n глав по 10 абзацев и оглавление из n строк."""
+    toc = [_p(f"ГЛАВА {i}. РАЗДЕЛ НОМЕР {i}...{i + 3}") for i in range(1, n + 1)]
+    chapters = []
+    for i in range(1, n + 1):
+        chapters += [_page_break(), _heading(f"Глава {i}. Раздел номер {i}")] + [_p(TEXT)] * 10
+    return "".join([_heading("Оглавление"), *toc, _heading("Введение"), _p(TEXT), *chapters,
+                    _heading("Заключение"), _p(TEXT), _heading("Список литературы"),
+                    _p("Иванов А.Б. Методы анализа. Москва: Наука, 2020. 300 с.")])
+
+
+CASES = {
+    "long_references": long_references,
+    "run_churn": run_churn,
+    "long_table": long_table,
+    "nested_tables": nested_tables,
+    "many_tables": many_tables,
+    "many_appendices": many_appendices,
+    "many_headings": many_headings,
+}
+
+
+def case_size(name, scale):
+    return max(1, round(FULL_SIZE[name] * scale))
+
+
+def build_case(name, scale=1.0, generator=None):
+    """Документ наихудшего случая name (bytes) в масштабе scale."""
+    generator = generator or CorpusGenerator()
+    return generator.package(CASES[name](case_size(name, scale)))
+
+
+def write_cases(output_dir, scale=1.0, names=None):
+    """Сохраняет документы наихудших случаев в output_dir; возвращает {имя: путь}."""
+    generator = CorpusGenerator()
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for name in names or CASES:
+        paths[name] = os.path.join(output_dir, f"{name}.docx")
+        with open(paths[name], "wb") as f:
+            f.write(build_case(name, scale, generator))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация документов наихудшего случая для проверок.")
+    parser.add_argument("output_dir", help="Директория для документов")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Масштаб объёма относительно реальных случаев (по умолчанию: 1)")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=None,
+                        help="Случаи для генерации (по умолчанию: все)")
+    args = parser.parse_args(argv)
+    for name, path in write_cases(args.output_dir, args.scale, args.cases).items():
+        print(f"{name}: {path} ({os.path.getsize(path) >> 10} КБ)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
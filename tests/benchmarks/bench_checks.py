@@ -0,0 +1,218 @@
+"""
+Воспроизводимые замеры проверок на масштабируемых документах (tests/benchmarks/fixtures.py).
+
+Каждая проверка шаблона (и разбор документа как "parse") запускается repeat раз на каждом документе;
+сохраняются медиана и 95-й процентиль времени и пик памяти Python (tracemalloc, отдельным запуском,
+чтобы трассировка не искажала время). Результаты сравниваются с базовыми замерами (baseline JSON):
+замедление или рост памяти сверх порога считается регрессией, и запуск завершается с кодом 1.
+
+    python -m tests.benchmarks.bench_checks                       # замеры и сравнение с baseline.json
+    python -m tests.benchmarks.bench_checks --save-baseline       # замеры становятся новым baseline
+    python -m tests.benchmarks.bench_checks --fixtures p10 p100 --repeat 9 --threshold 0.1
+"""
+import gc
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+
+from main import build_template
+from modules.base import CheckTimeoutError
+from modules.parser import DocumentParser
+from tests.benchmarks.fixtures import FIXTURES, DEFAULT_FIXTURES, FIXTURE_VERSION, fixture_path
+
+logger = logging.getLogger(__name__)
+
+# Базовые замеры по умолчанию и кеш документов фикстур
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_FIXTURES_DIR = os.path.join(tempfile.gettempdir(), "vkr_bench_fixtures")
+DEFAULT_REPEAT = 5
+# Допустимое относительное замедление медианы и рост пика памяти по сравнению с baseline
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.25
+# Изменения меньше этих абсолютных величин считаются шумом измерений
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA = 256 * 1024
+# Лимит времени одного запуска проверки в секундах: сверхлинейная проверка на большом документе
+# прерывается (результат помечается "truncated"), а не останавливает замеры
+DEFAULT_TIME_LIMIT = 300.0
+
+
+def percentile(values, q):
+    """Процентиль q (0–100) с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _run_check(template, key, params, doc, source, time_limit):
+    """Один запуск проверки key (так же, как в CheckTemplate.apply); возвращает (секунды, прервана ли)."""
+    check_module = template.get_check(key)
+    check_module.reset_counters()
+    check_module.deadline = time.monotonic() + time_limit if time_limit else None
+    start = time.perf_counter()
+    try:
+        if key == "formatting":
+            check_module.check(doc, source, params)
+        else:
+            check_module.check(doc, params)
+        truncated = False
+    except CheckTimeoutError:
+        truncated = True
+    finally:
+        check_module.deadline = None
+    return time.perf_counter() - start, truncated
+
+
+def _measure(run, repeat):
+    """Замеры функции run() -> (секунды, прервана ли): время repeat запусков и пик памяти отдельного запуска."""
+    times = []
+    truncated = False
+    for _ in range(repeat):
+        gc.collect()
+        seconds, truncated = run()
+        times.append(seconds)
+        # Прерванная по лимиту проверка повторно не запускается: её время определяется лимитом
+        if truncated:
+            break
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"median": statistics.median(times), "p95": percentile(times, 95), "min": min(times),
+            "runs": len(times), "peak_memory": peak, "truncated": truncated}
+
+
+def benchmark_document(path, repeat=DEFAULT_REPEAT, time_limit=DEFAULT_TIME_LIMIT, template=None):
+    """Замеры разбора документа path ("parse") и каждой проверки шаблона: {проверка: замеры}."""
+    template = template or build_template()
+    with open(path, "rb") as f:
+        source = f.read()
+    parser = DocumentParser()
+
+    def parse():
+        start = time.perf_counter()
+        parser.parse(path, data=source)
+        return time.perf_counter() - start, False
+
+    results = {"parse": _measure(parse, repeat)}
+    doc = parser.parse(path, data=source)
+    for key, params_attr, _ in template.CHECKS:
+        params = getattr(template, params_attr)
+        results[key] = _measure(lambda: _run_check(template, key, params, doc, source, time_limit), repeat)
+        logger.info("%s: %s — медиана %.4f с, пик памяти %.1f МБ", os.path.basename(path), key,
+                    results[key]["median"], results[key]["peak_memory"] / 2 ** 20)
+    return results
+
+
+def run_benchmarks(fixtures=None, repeat=DEFAULT_REPEAT, fixtures_dir=DEFAULT_FIXTURES_DIR,
+                   time_limit=DEFAULT_TIME_LIMIT):
+    """Замеры по документам фикстур; результат сохраняется как baseline JSON."""
+    template = build_template()
+    results = {}
+    for name in fixtures or DEFAULT_FIXTURES:
+        results[name] = benchmark_document(fixture_path(name, fixtures_dir), repeat, time_limit, template)
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixture_version": FIXTURE_VERSION,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """
+    Сравнивает замеры с baseline; возвращает список регрессий (строки с описанием).
+    Проверки и документы, которых нет в baseline, не сравниваются.
+    """
+    regressions = []
+    for name, checks in current["results"].items():
+        for key, stats in checks.items():
+            base = baseline.get("results", {}).get(name, {}).get(key)
+            if base is None:
+                continue
+            if (stats["median"] > base["median"] * (1 + threshold)
+                    and stats["median"] - base["median"] > MIN_TIME_DELTA):
+                regressions.append(f"{name}/{key}: медиана {stats['median']:.4f} с, в baseline "
+                                   f"{base['median']:.4f} с (+{stats['median'] / base['median'] - 1:.0%})")
+            if (stats["peak_memory"] > base["peak_memory"] * (1 + memory_threshold)
+                    and stats["peak_memory"] - base["peak_memory"] > MIN_MEMORY_DELTA):
+                regressions.append(f"{name}/{key}: пик памяти {stats['peak_memory'] / 2 ** 20:.1f} МБ, "
+                                   f"в baseline {base['peak_memory'] / 2 ** 20:.1f} МБ")
+            if stats["truncated"] and not base["truncated"]:
+                regressions.append(f"{name}/{key}: проверка прервана по лимиту времени")
+    return regressions
+
+
+def format_table(current, baseline=None):
+    """Таблица замеров (и отношения медианы к baseline, если он задан) для вывода на консоль."""
+    lines = [f"{'документ':<12} {'проверка':<14} {'медиана, с':>11} {'p95, с':>9} {'память, МБ':>11} {'к baseline':>11}"]
+    for name, checks in current["results"].items():
+        for key, stats in checks.items():
+            base = (baseline or {}).get("results", {}).get(name, {}).get(key)
+            ratio = f"{stats['median'] / base['median']:.2f}x" if base and base["median"] else "—"
+            mark = " (прервана)" if stats["truncated"] else ""
+            lines.append(f"{name:<12} {key:<14} {stats['median']:>11.4f} {stats['p95']:>9.4f} "
+                         f"{stats['peak_memory'] / 2 ** 20:>11.1f} {ratio:>11}{mark}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры времени и памяти проверок на масштабируемых документах.")
+    parser.add_argument("--fixtures", nargs="+", choices=sorted(FIXTURES), default=DEFAULT_FIXTURES,
+                        help=f"Документы для замеров (по умолчанию: {' '.join(DEFAULT_FIXTURES)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Количество запусков каждой проверки (по умолчанию: {DEFAULT_REPEAT})")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE,
+                        help="Файл базовых замеров (по умолчанию: tests/benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить замеры как новый baseline")
+    parser.add_argument("--output", type=str, default=None, help="Сохранить замеры в JSON-файл")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое замедление медианы, доля (по умолчанию: 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="Допустимый рост пика памяти, доля (по умолчанию: 0.25)")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="Лимит времени одного запуска проверки в секундах, 0 — без ограничения "
+                             "(по умолчанию: 300)")
+    parser.add_argument("--fixtures-dir", type=str, default=DEFAULT_FIXTURES_DIR,
+                        help="Кеш документов фикстур")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    current = run_benchmarks(args.fixtures, args.repeat, args.fixtures_dir, args.time_limit or None)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_table(current, baseline))
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Замеры сохранены в {path}")
+    if baseline is None:
+        return 0
+    regressions = compare(current, baseline, args.threshold, args.memory_threshold)
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    if not regressions:
+        print("Регрессий относительно baseline нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+import os
+import re
+import zlib
+import time
+import random
+import struct
+import argparse
+import logging
+from xml.sax.saxutils import escape, unescape
+
+logger = logging.getLogger(__name__)
+
+# Распакованный образец работы: его стили, нумерация, колонтитулы, параметры раздела и изображения
+# переносятся в каждый сгенерированный документ, а текст абзацев служит источником предложений
+SEED_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "extracted_docx")
+# Сколько изображений образца (самых маленьких) используется для рисунков
+DEFAULT_IMAGES = 4
+# Параграфов основного текста на страницу (примерно 1800 знаков на странице)
+PARAGRAPHS_PER_PAGE = 4
+# Уровень сжатия изменяемых частей: документы генерируются тысячами, поэтому важнее скорость
+COMPRESS_LEVEL = 1
+
+# Описание документа по умолчанию: страницы основного текста и количество элементов каждого вида;
+# error_rate — доля элементов с внесённым нарушением (errors задаёт долю для отдельных видов нарушений)
+DEFAULT_SPEC = {
+    "pages": 60, "chapters": 3, "tables": 10, "figures": 10, "references": 40, "citations": 80,
+    "footnotes": 10, "appendices": 2, "error_rate": 0.05, "errors": {},
+}
+# Виды нарушений, вносимых в документ с вероятностью error_rate ("margins" — один раз на документ)
+ERROR_KINDS = ("font", "size", "alignment", "indent", "heading", "caption", "numbering", "reference", "citation",
+               "footnote", "margins")
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+IMAGE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+SURNAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Новиков")
+EMU_PER_CM = 360000
+# Поля страницы по требованиям (слева 3 см, справа 1 см, сверху и снизу 2 см) в twips
+PAGE_MARGINS = '<w:pgMar w:top="1134" w:right="567" w:bottom="1134" w:left="1701" w:header="708" w:footer="708" w:gutter="0"/>'
+# Межстрочный интервал 1,5 задаётся в каждом абзаце явно: проверки читают его из свойств абзаца
+SPACING = '<w:spacing w:line="360" w:lineRule="auto"/>'
+CENTERED = '<w:ind w:firstLine="0"/><w:jc w:val="center"/>'
+
+
+class _Part:
+    """Часть архива, сжатая один раз: (имя, crc32, способ сжатия, сжатые данные, исходный размер)."""
+
+    __slots__ = ("name", "crc", "method", "data", "size")
+
+    def __init__(self, name, data, compress=True):
+        self.name = name.encode("utf-8")
+        self.crc = zlib.crc32(data)
+        self.size = len(data)
+        if compress:
+            compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+            self.method, self.data = 8, compressor.compress(data) + compressor.flush()
+        else:
+            # Изображения уже сжаты: храним как есть
+            self.method, self.data = 0, data
+
+
+def _zip_bytes(parts):
+    """Собирает архив ZIP из частей _Part (без повторного сжатия неизменных частей образца)."""
+    # 1 января 2025 года, 00:00 в формате даты и времени MS-DOS
+    dos_time, dos_date = 0, (2025 - 1980) << 9 | 1 << 5 | 1
+    chunks, directory, offset = [], [], 0
+    for part in parts:
+        header = struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, 0, part.method, dos_time, dos_date,
+                             part.crc, len(part.data), part.size, len(part.name), 0)
+        directory.append(struct.pack("<4s6H3L5H2L", b"PK\x01\x02", 20, 20, 0, part.method, dos_time, dos_date,
+                                     part.crc, len(part.data), part.size, len(part.name), 0, 0, 0, 0, 0, offset)
+                         + part.name)
+        chunks += [header, part.name, part.data]
+        offset += len(header) + len(part.name) + len(part.data)
+    directory_size = sum(len(entry) for entry in directory)
+    end = struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, len(parts), len(parts), directory_size, offset, 0)
+    return b"".join(chunks + directory + [end])
+
+
+class CorpusGenerator:
+    """
+    Генератор синтетических выпускных работ: WordprocessingML пишется напрямую по шаблонам строк,
+    а неизменные части образца (стили, нумерация, колонтитулы, тема, изображения) сжимаются
+    один раз при создании генератора, поэтому документ собирается за миллисекунды.
+
+    Документ содержит оглавление, введение, главы с затекстовыми ссылками, таблицами, рисунками
+    и сносками, заключение, список литературы, список иллюстративного материала и приложения;
+    количество элементов и доля нарушений задаются описанием (см. DEFAULT_SPEC).
+    """
+
+    def __init__(self, seed_dir=SEED_DIR, images=DEFAULT_IMAGES):
+        self.seed_dir = seed_dir
+        document = self._read("word/document.xml").decode("utf-8")
+        body = document.index("<w:body>") + len("<w:body>")
+        self._document_head = document[:body]
+        self._sect_pr = re.search(r"<w:sectPr\b.*?</w:sectPr>", document, re.S).group(0)
+        self.sentences = self._harvest_sentences(document)
+
+        styles = self._read("word/styles.xml").decode("utf-8")
+        self._heading_styles = {}
+        for style_id, name in re.findall(r'<w:style [^>]*w:styleId="([^"]+)"[^>]*><w:name w:val="([^"]+)"', styles):
+            if name.startswith("heading "):
+                self._heading_styles[int(name.split()[1])] = style_id
+
+        footnotes = self._read("word/footnotes.xml").decode("utf-8")
+        self._footnotes_head = footnotes[:footnotes.rindex("</w:footnotes>")]
+
+        # Связи документа без изображений образца: идентификаторы сохраняются, поэтому ссылки
+        # на колонтитулы в параметрах раздела остаются верными
+        rels = self._read("word/_rels/document.xml.rels").decode("utf-8")
+        self._rels = [rel for rel in re.findall(r"<Relationship [^>]*/>", rels) if IMAGE_REL not in rel]
+
+        media_dir = os.path.join(seed_dir, "word", "media")
+        by_content = {}
+        for name in sorted(os.listdir(media_dir)):
+            with open(os.path.join(media_dir, name), "rb") as f:
+                by_content.setdefault(f.read(), name)
+        self.images = sorted(by_content.items(), key=lambda item: len(item[0]))[:images]
+        self._image_parts = [_Part(f"word/media/{name}", data, compress=False) for data, name in self.images]
+
+        dynamic = {"word/document.xml", "word/_rels/document.xml.rels", "word/footnotes.xml"}
+        self._static_parts = []
+        for root, dirs, files in os.walk(seed_dir):
+            dirs.sort()
+            for file_name in sorted(files):
+                name = os.path.relpath(os.path.join(root, file_name), seed_dir).replace(os.sep, "/")
+                if name not in dynamic and not name.startswith("word/media/"):
+                    self._static_parts.append(_Part(name, self._read(name)))
+
+    def _read(self, name):
+        with open(os.path.join(self.seed_dir, *name.split("/")), "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _harvest_sentences(document):
+        """Предложения из длинных абзацев образца (источник правдоподобного текста)."""
+        sentences = []
+        for paragraph in re.findall(r"<w:p[ >].*?</w:p>", document, re.S):
+            text = "".join(re.findall(r"<w:t(?: [^>]*)?>([^<]*)</w:t>", paragraph))
+            if len(text) < 200:
+                continue
+            for sentence in re.split(r"(?<=[.!?])\s+", text):
+                # Ссылки, номера таблиц и рисунков образца сбили бы подсчёт ожидаемых нарушений
+                if 40 <= len(sentence) <= 400 and not re.search(r"\[|\]|табл|рис|прил", sentence, re.I):
+                    sentences.append(unescape(sentence, {"&quot;": '"', "&apos;": "'"}))
+        return sentences or ["Текст раздела выпускной квалификационной работы."]
+
+    # Шаблоны элементов WordprocessingML
+
+    @staticmethod
+    def _rpr(font=None, size=None):
+        """Свойства фрагмента в порядке схемы: гарнитура, цвет (чёрный задаётся явно), размер в пунктах."""
+        fonts = f'<w:rFonts w:ascii="{font}" w:hAnsi="{font}" w:cs="{font}"/>' if font else ""
+        sizes = f'<w:sz w:val="{size * 2}"/><w:szCs w:val="{size * 2}"/>' if size else ""
+        return f'<w:rPr>{fonts}<w:color w:val="000000"/>{sizes}</w:rPr>'
+
+    def _run(self, text, font=None, size=None):
+        return f'<w:r>{self._rpr(font, size)}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+    @staticmethod
+    def _ppr(ppr=""):
+        # Порядок схемы: стиль абзаца, интервалы, отступы, выравнивание
+        if "w:spacing" in ppr:
+            return f"<w:pPr>{ppr}</w:pPr>"
+        if ppr.startswith("<w:pStyle"):
+            style_end = ppr.index("/>") + 2
+            return f"<w:pPr>{ppr[:style_end]}{SPACING}{ppr[style_end:]}</w:pPr>"
+        return f"<w:pPr>{SPACING}{ppr}</w:pPr>"
+
+    def _paragraph(self, text, ppr="", size=None):
+        return f'<w:p>{self._ppr(ppr)}{self._run(text, size=size)}</w:p>'
+
+    def _heading(self, text, level=1, period=False):
+        text = text.upper() + ("." if period else "")
+        return self._paragraph(text, f'<w:pStyle w:val="{self._heading_styles.get(level, level)}"/>')
+
+    @staticmethod
+    def _page_break():
+        return '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+    def _centered(self, text):
+        return self._paragraph(text, CENTERED)
+
+    def _table(self, rng, rows, cols):
+        cell_width = 9300 // cols
+        grid = "".join(f'<w:gridCol w:w="{cell_width}"/>' for _ in range(cols))
+        borders = "".join(f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+                          for side in ("top", "left", "bottom", "right", "insideH", "insideV"))
+        cell_ppr = '<w:spacing w:line="240" w:lineRule="auto"/><w:ind w:firstLine="0"/><w:jc w:val="left"/>'
+        body = []
+        for row in range(rows):
+            cells = []
+            for col in range(cols):
+                text = f"Показатель {col + 1}" if row == 0 else f"{rng.randint(1, 999)},{rng.randint(0, 9)}"
+                cells.append(f'<w:tc><w:tcPr><w:tcW w:w="{cell_width}" w:type="dxa"/></w:tcPr>'
+                             f'{self._paragraph(text, cell_ppr, size=12)}</w:tc>')
+            body.append(f'<w:tr>{"".join(cells)}</w:tr>')
+        return (f'<w:tbl><w:tblPr><w:tblW w:w="9300" w:type="dxa"/><w:tblBorders>{borders}</w:tblBorders>'
+                f'</w:tblPr><w:tblGrid>{grid}</w:tblGrid>{"".join(body)}</w:tbl>')
+
+    def _figure(self, number, image_index):
+        _, name = self.images[image_index]
+        cx, cy = 8 * EMU_PER_CM, 5 * EMU_PER_CM
+        return (f'<w:p>{self._ppr(CENTERED)}<w:r><w:drawing>'
+                f'<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{cx}" cy="{cy}"/>'
+                f'<wp:docPr id="{number}" name="Рисунок {number}"/>'
+                '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+                '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+                '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+                f'<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+                f'<pic:blipFill><a:blip r:embed="rIdImage{image_index}"/><a:stretch><a:fillRect/></a:stretch>'
+                f'</pic:blipFill><pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+                '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic></a:graphicData></a:graphic>'
+                '</wp:inline></w:drawing></w:r></w:p>')
+
+    def _footnote(self, footnote_id, text, size):
+        return (f'<w:footnote w:id="{footnote_id}"><w:p><w:pPr><w:spacing w:line="240" w:lineRule="auto"/>'
+                f'<w:ind w:firstLine="0"/></w:pPr><w:r><w:rPr><w:vertAlign w:val="superscript"/></w:rPr>'
+                f'<w:footnoteRef/></w:r>{self._run(" " + text, size=size)}</w:p></w:footnote>')
+
+    def _text(self, rng, sentences):
+        return " ".join(rng.choice(self.sentences) for _ in range(sentences))
+
+    def _title(self, rng, words=5):
+        """Короткое название из слов случайного предложения образца (без дефисов и знаков препинания)."""
+        return " ".join(re.findall(r"[А-Яа-яЁё]{3,}", rng.choice(self.sentences))[:words]) or "Результаты"
+
+    def _reference(self, rng, number, broken):
+        """(фамилия, год, запись) — источник в одном из форматов ГОСТ Р 7.0.5-2008."""
+        surname = rng.choice(SURNAMES)
+        author = f"{surname} {rng.choice('АБВГДЕ')}.{rng.choice('АБВГДЕ')}."
+        title = self._title(rng).capitalize()
+        year = rng.randint(2005, 2024)
+        if broken:
+            # Нет года и страниц: запись не соответствует ни одному шаблону ГОСТ
+            return surname, year, f"{author} {title} // Вестник науки, № {rng.randint(1, 12)}"
+        kind = number % 3
+        if kind == 0:
+            return surname, year, (f"{author} {title} // Вестник науки. {year}. № {rng.randint(1, 12)}. "
+                                   f"С. {rng.randint(1, 50)}-{rng.randint(51, 99)}.")
+        if kind == 1:
+            return surname, year, f"{author} {title}. Москва: Наука, {year}. {rng.randint(100, 600)} с."
+        return surname, year, (f"{author} {title} // Портал науки. URL: https://example.org/articles/{number} "
+                               f"(дата обращения: {rng.randint(10, 28)}.0{rng.randint(1, 9)}.{year}).")
+
+    @staticmethod
+    def _spread(count, slots):
+        """Номера элементов 1..count, распределённые равномерно по слотам 0..slots-1: {слот: [номера]}."""
+        positions = {}
+        for k in range(count):
+            positions.setdefault((k * slots) // max(1, count), []).append(k + 1)
+        return positions
+
+    def document_parts(self, spec, rng):
+        """Основная часть и сноски документа по описанию spec, количество изображений и верны ли поля."""
+        rates = {kind: spec.get("error_rate", 0.0) for kind in ERROR_KINDS}
+        rates.update(spec.get("errors") or {})
+
+        def broken(kind):
+            return rates[kind] > 0 and rng.random() < rates[kind]
+
+        slots = max(1, spec["pages"] * PARAGRAPHS_PER_PAGE)
+        chapters = max(1, spec.get("chapters", 1))
+        appendices = spec.get("appendices", 0)
+        # Источники в алфавитном порядке; затекстовые ссылки указывают фамилию и год существующего источника
+        references = sorted((self._reference(rng, number, broken("reference"))
+                             for number in range(1, spec.get("references", 0) + 1)), key=lambda ref: ref[2])
+        chapter_titles = [f"Глава {c}. {self._title(rng)}" for c in range(1, chapters + 1)]
+        body = []
+
+        toc = ["Введение"] + chapter_titles + ["Заключение", "Список литературы"]
+        toc += ["Список иллюстративного материала"] if spec.get("figures") else []
+        if appendices == 1:
+            toc.append("Приложение")
+        elif appendices > 5:
+            toc.append(f"Приложения 1–{appendices}")
+        else:
+            toc += [f"Приложение {number}" for number in range(1, appendices + 1)]
+        body.append(self._heading("Оглавление"))
+        for page, entry in enumerate(toc, start=3):
+            body.append(self._paragraph(f"{entry.upper()}...{page * 2}", '<w:ind w:firstLine="0"/>'))
+        body.append(self._page_break())
+        body.append(self._heading("Введение"))
+        body.append(self._paragraph(self._text(rng, 4)))
+
+        chapter_starts = self._spread(chapters, slots)
+        tables = self._spread(spec.get("tables", 0), slots)
+        figures = self._spread(spec.get("figures", 0), slots)
+        citations = self._spread(spec.get("citations", 0) if references else 0, slots)
+        footnotes = self._spread(spec.get("footnotes", 0), slots)
+        appendix_refs = self._spread(appendices, slots)
+        footnote_parts = []
+        image_count = 0
+        for slot in range(slots):
+            for chapter in chapter_starts.get(slot, []):
+                body.append(self._page_break())
+                body.append(self._heading(chapter_titles[chapter - 1], period=broken("heading")))
+            ppr = ('<w:ind w:firstLine="0"/>' if broken("indent") else "") + \
+                  ('<w:jc w:val="left"/>' if broken("alignment") else "")
+            font = "Arial" if broken("font") else None
+            size = 16 if broken("size") else None
+            runs = [self._run(self._text(rng, rng.randint(3, 6)), font, size)]
+            for _ in citations.get(slot, []):
+                surname, year, _ = rng.choice(references)
+                citation = f"[{rng.randint(1, len(references))}]" if broken("citation") else \
+                    f"[{surname}, {year}, с. {rng.randint(5, 300)}]"
+                runs.append(self._run(f" {citation}"))
+            for number in tables.get(slot, []):
+                runs.append(self._run(f" Результаты приведены в табл. {number}."))
+            for number in figures.get(slot, []):
+                runs.append(self._run(f" Схема показана на рис. {number}."))
+            for number in appendix_refs.get(slot, []):
+                runs.append(self._run(f" Подробности приведены в приложение {number}."))
+            for footnote_id in footnotes.get(slot, []):
+                runs.append(f'<w:r><w:rPr><w:color w:val="000000"/><w:vertAlign w:val="superscript"/></w:rPr>'
+                            f'<w:footnoteReference w:id="{footnote_id}"/></w:r>')
+                footnote_parts.append(self._footnote(footnote_id, rng.choice(self.sentences),
+                                                     14 if broken("footnote") else 12))
+            body.append(f'<w:p>{self._ppr(ppr)}{"".join(runs)}</w:p>')
+
+            for number in tables.get(slot, []):
+                shown = number + 1 if broken("numbering") else number
+                title = self._title(rng, 3).capitalize()
+                caption = f"Таблица {shown}. {title}" if broken("caption") else f"Табл. {shown} – {title}"
+                body.append(self._centered(caption))
+                body.append(self._table(rng, rng.randint(3, 8), rng.randint(2, 5)))
+            for number in figures.get(slot, []):
+                body.append(self._figure(number, image_count % len(self.images)))
+                image_count += 1
+                shown = number + 1 if broken("numbering") else number
+                title = self._title(rng, 3).capitalize()
+                caption = f"Рисунок {shown} {title}" if broken("caption") else f"Рис. {shown} – {title}"
+                body.append(self._centered(caption))
+
+        body.append(self._page_break())
+        body.append(self._heading("Заключение"))
+        body.append(self._paragraph(self._text(rng, 4)))
+        body.append(self._page_break())
+        body.append(self._heading("Список литературы"))
+        for _, _, reference in references:
+            body.append(self._paragraph(reference))
+        if spec.get("figures"):
+            body.append(self._heading("Список иллюстративного материала"))
+            for number in range(1, spec["figures"] + 1):
+                body.append(self._paragraph(f"Рис. {number} – Схема", '<w:ind w:firstLine="0"/>'))
+        for number in range(1, appendices + 1):
+            body.append(self._page_break())
+            body.append(self._paragraph(f"Приложение {number}", '<w:ind w:firstLine="0"/><w:jc w:val="right"/>'))
+            body.append(self._centered(self._title(rng).capitalize()))
+            body.append(self._paragraph(self._text(rng, 3)))
+
+        return "".join(body), "".join(footnote_parts), min(image_count, len(self.images)), not broken("margins")
+
+    def package(self, body, footnotes="", images=0, margins=True):
+        """
+        Документ .docx (bytes) с основной частью body (WordprocessingML без параметров раздела),
+        сносками footnotes и первыми images изображениями образца (связи rIdImage0, rIdImage1, …).
+        """
+        sect_pr = re.sub(r"<w:pgMar [^>]*/>", PAGE_MARGINS, self._sect_pr) if margins else self._sect_pr
+        document = f'{self._document_head}{body}{sect_pr}</w:body></w:document>'
+        footnotes_xml = f'{self._footnotes_head}{footnotes}</w:footnotes>'
+        image_rels = [f'<Relationship Id="rIdImage{i}" Type="{IMAGE_REL}" Target="media/{name}"/>'
+                      for i, (_, name) in enumerate(self.images[:images])]
+        rels = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<Relationships xmlns="{REL_NS}">{"".join(self._rels + image_rels)}</Relationships>')
+        parts = [_Part("word/document.xml", document.encode("utf-8")),
+                 _Part("word/footnotes.xml", footnotes_xml.encode("utf-8")),
+                 _Part("word/_rels/document.xml.rels", rels.encode("utf-8"))]
+        return _zip_bytes(self._static_parts + parts + self._image_parts[:images])
+
+    def build(self, spec=None, seed=0):
+        """Содержимое документа .docx (bytes) по описанию spec; одинаковые spec и seed дают одинаковый документ."""
+        spec = dict(DEFAULT_SPEC, **(spec or {}))
+        body, footnotes, images, margins = self.document_parts(spec, random.Random(seed))
+        return self.package(body, footnotes, images, margins)
+
+    def write(self, path, spec=None, seed=0):
+        with open(path, "wb") as f:
+            f.write(self.build(spec, seed))
+        return path
+
+
+def vary_spec(spec, rng, spread):
+    """Описание со случайно изменёнными количествами элементов: каждое умножается на 1 ± spread."""
+    varied = dict(spec)
+    for key in ("pages", "tables", "figures", "references", "citations", "footnotes", "appendices"):
+        varied[key] = max(0, round(spec[key] * rng.uniform(1 - spread, 1 + spread)))
+    varied["pages"] = max(1, varied["pages"])
+    return varied
+
+
+def generate_corpus(output_dir, count, spec=None, seed=0, spread=0.5, generator=None):
+    """
+    Генерирует count документов thesis_NNNNN.docx в output_dir; количества элементов каждого документа
+    отличаются от spec не более чем в 1 ± spread раз. Возвращает список путей.
+    """
+    generator = generator or CorpusGenerator()
+    spec = dict(DEFAULT_SPEC, **(spec or {}))
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    width = max(5, len(str(count - 1)))
+    paths = []
+    for index in range(count):
+        path = os.path.join(output_dir, f"thesis_{index:0{width}d}.docx")
+        paths.append(generator.write(path, vary_spec(spec, rng, spread), seed=rng.getrandbits(32)))
+    return paths
+
+
+def main():
+    """Генерация корпуса синтетических работ для нагрузочных и масштабных тестов."""
+    parser = argparse.ArgumentParser(description="Генерация синтетических выпускных работ .docx по образцу.")
+    parser.add_argument("output_dir", help="Директория для документов")
+    parser.add_argument("--count", type=int, default=100, help="Количество документов (по умолчанию: 100)")
+    for key in ("pages", "chapters", "tables", "figures", "references", "citations", "footnotes", "appendices"):
+        parser.add_argument(f"--{key}", type=int, default=DEFAULT_SPEC[key],
+                            help=f"Количество в документе (по умолчанию: {DEFAULT_SPEC[key]})")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_SPEC["error_rate"],
+                        help=f"Доля элементов с нарушением (по умолчанию: {DEFAULT_SPEC['error_rate']})")
+    parser.add_argument("--error", action="append", default=[], metavar="ВИД=ДОЛЯ",
+                        help=f"Доля нарушений отдельного вида ({', '.join(ERROR_KINDS)}), например caption=0.5")
+    parser.add_argument("--spread", type=float, default=0.5,
+                        help="Разброс количеств элементов между документами, доля (по умолчанию: 0.5)")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора (по умолчанию: 0)")
+    parser.add_argument("--seed-dir", type=str, default=SEED_DIR, help="Распакованный образец работы")
+    args = parser.parse_args()
+
+    errors = {}
+    for value in args.error:
+        kind, sep, rate = value.partition("=")
+        if not sep or kind not in ERROR_KINDS:
+            parser.error(f"Неизвестный вид нарушения: {value}")
+        errors[kind] = float(rate)
+    spec = {key: getattr(args, key) for key in ("pages", "chapters", "tables", "figures", "references", "citations",
+                                                 "footnotes", "appendices")}
+    spec.update(error_rate=args.error_rate, errors=errors)
+    start = time.perf_counter()
+    paths = generate_corpus(args.output_dir, args.count, spec, args.seed, args.spread,
+                            CorpusGenerator(args.seed_dir))
+    print(f"Создано документов: {len(paths)} за {time.perf_counter() - start:.2f} с в {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+Дифференциальное тестирование быстрых режимов проверки относительно эталонного движка.
+
+Эталон — текущие проверки на python-docx (CheckTemplate в одном процессе, без лимитов времени).
+Кандидат — любой более быстрый режим: пул процессов рабочего запуска ("pool") или внешний движок,
+заданный как "модуль:Класс" (потоковый разбор, кеши, шардирование и т. п.; см. Engine). Оба движка
+проверяют один корпус; записи сравниваются как мультимножества по проверке, правилу, месту и значениям,
+расхождения сводятся по правилам, и вместе с ними выводится ускорение кандидата.
+
+Документ с расхождением можно свести (--minimize) к наименьшему фрагменту тела, на котором
+расхождение по тому же правилу сохраняется: иерархический delta debugging (ddmin) сначала по блокам
+тела (параграфы, таблицы), затем внутри оставшихся блоков (фрагменты текста, строки, ячейки).
+
+    python -m tests.benchmarks.differential                                  # синтетический корпус, пул
+    python -m tests.benchmarks.differential --corpus test_files --workers 4 --output diff.json
+    python -m tests.benchmarks.differential --candidate fast.engine:StreamingEngine --minimize minimized
+"""
+import io
+import os
+import copy
+import sys
+import json
+import time
+import logging
+import zipfile
+import argparse
+import statistics
+import importlib
+from collections import Counter
+from concurrent.futures import wait
+
+from lxml import etree
+
+from main import (process_file, warm_up, configure_time_limits, build_template, TIME_LIMITS,
+                  DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_HARD_TIMEOUT,
+                  DEFAULT_MAX_FINDINGS_PER_RULE)
+from modules.findings import Finding, render_location, to_json
+from modules.parser import DocumentParser
+from tests.benchmarks.adversarial import CASES, build_case
+from tests.load_test.load_generator import load_corpus
+from utils.worker_pool import WorkerPool, PREFORK_START_METHOD
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_SIZE = 20
+# Наибольшее количество запусков движков при сведении одного документа
+DEFAULT_MAX_TESTS = 500
+# Часть пакета .docx с телом документа и элементы, которые при сведении не удаляются (свойства
+# параграфов, фрагментов, таблиц и раздела: без них фрагмент проверялся бы по другим правилам)
+DOCUMENT_PART = "word/document.xml"
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+KEPT_ELEMENTS = {f"{{{W_NS}}}{name}" for name in ("pPr", "rPr", "tblPr", "tblGrid", "trPr", "tcPr", "sectPr")}
+
+
+class Engine:
+    """
+    Движок проверки: run(name, data) возвращает результаты в виде {проверка: [Finding]}, как
+    CheckTemplate.apply. Внешний движок наследует этот класс и задаётся в --candidate как "модуль:Класс".
+
+    aggregate_findings и max_findings_per_rule описывают документированное отличие движка от эталона:
+    записи свёрнуты в диапазоны параграфов и ограничены по числу (modules.findings.aggregate). Эталон
+    запускается с теми же настройками, поэтому свёртка расхождением не считается.
+    """
+
+    name = None
+    aggregate_findings = False
+    max_findings_per_rule = None
+
+    def __init__(self, workers=1):
+        self.workers = workers
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Готовит движок к проверкам (запуск процессов, прогрев кешей)."""
+
+    def close(self):
+        """Освобождает ресурсы движка."""
+
+    def run(self, name, data):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def run_batch(self, documents):
+        """Проверяет документы [(имя, содержимое)]; возвращает [(результаты, секунды на документ)]."""
+        batch = []
+        for name, data in documents:
+            start = time.perf_counter()
+            try:
+                results = self.run(name, data)
+            except Exception as e:
+                logger.error("Движок %s: ошибка при проверке %s: %s", self.name, name, e)
+                results = {"error": [f"Ошибка при обработке файла: {e}"]}
+            batch.append((results, time.perf_counter() - start))
+        return batch
+
+
+class ReferenceEngine(Engine):
+    """Эталон: разбор python-docx и проверки шаблона в текущем процессе без лимитов времени."""
+
+    name = "reference"
+
+    def __init__(self, workers=1, aggregate_findings=False, max_findings_per_rule=None):
+        super().__init__(workers)
+        self.aggregate_findings = aggregate_findings
+        self.max_findings_per_rule = max_findings_per_rule
+        self.parser = DocumentParser()
+        self.template = build_template()
+        self.template.check_time_limit = None
+        self.template.document_time_limit = None
+        self.template.aggregate_findings = aggregate_findings
+        self.template.max_findings_per_rule = max_findings_per_rule
+
+    def run(self, name, data):
+        doc = self.parser.parse(name, data=data)
+        return self.template.apply(doc, name, source=data)
+
+
+class PoolEngine(Engine):
+    """
+    Рабочий режим пакетной проверки: заранее запущенные процессы с общим шаблоном (main.process_file),
+    документы распределяются между workers процессами. Лимиты времени проверок отключены (остаётся
+    аварийный тайм-аут документа); записи свёрнуты, как в отчётах.
+    """
+
+    name = "pool"
+    aggregate_findings = True
+    max_findings_per_rule = DEFAULT_MAX_FINDINGS_PER_RULE
+
+    def __init__(self, workers=1):
+        super().__init__(workers)
+        self.pool = None
+        self._time_limits = None
+        self._next_index = 0
+
+    def start(self):
+        self._time_limits = (TIME_LIMITS["check"], TIME_LIMITS["document"])
+        configure_time_limits(None, None)
+        if PREFORK_START_METHOD:
+            warm_up()
+        self.pool = WorkerPool(process_file, self.workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                               max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_time_limits,
+                               initargs=(None, None), mp_context=PREFORK_START_METHOD, prestart=True)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_pending=True)
+            self.pool = None
+        if self._time_limits is not None:
+            configure_time_limits(*self._time_limits)
+            self._time_limits = None
+
+    def _submit(self, name, data):
+        self._next_index += 1
+        return self.pool.submit((name, self._next_index, None, data), timeout=DEFAULT_HARD_TIMEOUT)
+
+    @staticmethod
+    def _resolve(future):
+        """Результаты и время обработки документа в процессе пула (разбор и проверки)."""
+        try:
+            result = future.result()
+        except Exception as e:
+            return {"error": [f"Ошибка при обработке файла: {e}"]}, 0.0
+        seconds = result.get("time", 0.0) + result.get("check_times", {}).get("parse", 0.0)
+        return result["results"], seconds
+
+    def run(self, name, data):
+        return self._resolve(self._submit(name, data))[0]
+
+    def run_batch(self, documents):
+        futures = [self._submit(name, data) for name, data in documents]
+        wait(futures)
+        return [self._resolve(future) for future in futures]
+
+
+ENGINES = {
+    "reference": ReferenceEngine,
+    "pool": PoolEngine,
+}
+
+
+def load_engine(spec, workers=1):
+    """Движок по имени из ENGINES или по пути "модуль:Класс" (класс-наследник Engine)."""
+    if spec in ENGINES:
+        return ENGINES[spec](workers=workers)
+    if ":" not in spec:
+        raise ValueError(f"Неизвестный движок {spec}: ожидается одно из {', '.join(ENGINES)} или модуль:Класс")
+    module_name, class_name = spec.split(":", 1)
+    return getattr(importlib.import_module(module_name), class_name)(workers=workers)
+
+
+def findings(results):
+    """Записи всех проверок результата; строки ошибок обработки становятся записями проверки-ключа."""
+    items = []
+    for key, values in results.items():
+        for value in values:
+            items.append(value if isinstance(value, Finding) else Finding(key, "message", actual=str(value)))
+    return items
+
+
+def diff_findings(reference, candidate):
+    """
+    Расхождения записей кандидата с эталоном по правилам: {"проверка.правило": {"missing": [...],
+    "extra": [...]}} — записи эталона, которых нет у кандидата, и лишние записи кандидата.
+    Записи сравниваются как мультимножества: порядок не важен, повторы учитываются.
+    """
+    reference_counts = Counter(findings(reference))
+    candidate_counts = Counter(findings(candidate))
+    differences = {}
+    for side, counts in (("missing", reference_counts - candidate_counts),
+                         ("extra", candidate_counts - reference_counts)):
+        for finding, count in counts.items():
+            rule = differences.setdefault(f"{finding.check}.{finding.rule}", {"missing": [], "extra": []})
+            rule[side].extend([finding] * count)
+    return dict(sorted(differences.items()))
+
+
+def compare_corpus(documents, reference, candidate):
+    """
+    Проверяет документы [(имя, содержимое)] обоими движками и сравнивает записи.
+    Возвращает отчёт: расхождения по документам и сводку по правилам, время движков и ускорение.
+    """
+    start = time.perf_counter()
+    reference_batch = reference.run_batch(documents)
+    reference_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    candidate_batch = candidate.run_batch(documents)
+    candidate_elapsed = time.perf_counter() - start
+
+    rules = {}
+    report_documents = []
+    speedups = []
+    for (name, _), (expected, reference_time), (actual, candidate_time) in zip(documents, reference_batch,
+                                                                                 candidate_batch):
+        for side, results in (("reference", expected), ("candidate", actual)):
+            for finding in findings(results):
+                summary = rules.setdefault(f"{finding.check}.{finding.rule}",
+                                           {"reference": 0, "candidate": 0, "missing": 0, "extra": 0})
+                summary[side] += 1
+        differences = diff_findings(expected, actual)
+        for rule, difference in differences.items():
+            rules[rule]["missing"] += len(difference["missing"])
+            rules[rule]["extra"] += len(difference["extra"])
+        if candidate_time > 0:
+            speedups.append(reference_time / candidate_time)
+        report_documents.append({"name": name, "reference_time": reference_time, "candidate_time": candidate_time,
+                                 "differences": differences})
+    return {
+        "reference": reference.name or type(reference).__name__,
+        "candidate": candidate.name or type(candidate).__name__,
+        "documents": report_documents,
+        "differing_documents": sum(bool(document["differences"]) for document in report_documents),
+        "rules": dict(sorted(rules.items())),
+        "reference_time": reference_elapsed,
+        "candidate_time": candidate_elapsed,
+        "speedup": reference_elapsed / candidate_elapsed if candidate_elapsed > 0 else None,
+        "median_speedup": statistics.median(speedups) if speedups else None,
+    }
+
+
+def ddmin(items, test):
+    """
+    Алгоритм ddmin (Zeller): наименьшее (1-минимальное) подмножество items, сохраняющее порядок,
+    для которого test(подмножество) истинно. test(items) должен быть истинным.
+    """
+    if items and test([]):
+        return []
+    granularity = 2
+    while len(items) >= 2:
+        size = -(-len(items) // granularity)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        for chunk in chunks:
+            if test(chunk):
+                items, granularity = chunk, 2
+                break
+        else:
+            for i in range(len(chunks)):
+                complement = [item for j, chunk in enumerate(chunks) if j != i for item in chunk]
+                if test(complement):
+                    items, granularity = complement, max(granularity - 1, 2)
+                    break
+            else:
+                if granularity >= len(items):
+                    break
+                granularity = min(len(items), granularity * 2)
+    return items
+
+
+class Minimizer:
+    """Сведение документа с расхождением по правилу rule к наименьшему фрагменту тела (см. minimize)."""
+
+    def __init__(self, name, data, reference, candidate, rule, max_tests=DEFAULT_MAX_TESTS):
+        self.name = name
+        self.reference = reference
+        self.candidate = candidate
+        self.rule = rule
+        self.max_tests = max_tests
+        self.tests = 0
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.parts = [(info, archive.read(info)) for info in archive.infolist()]
+        document_xml = next(content for info, content in self.parts if info.filename == DOCUMENT_PART)
+        self.root = etree.fromstring(document_xml)
+        self.body = self.root.find(f"{{{W_NS}}}body")
+
+    def package(self):
+        """Пакет .docx с текущим (сокращённым) телом документа."""
+        buffer = io.BytesIO()
+        document_xml = etree.tostring(self.root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for info, content in self.parts:
+                archive.writestr(info, document_xml if info.filename == DOCUMENT_PART else content)
+        return buffer.getvalue()
+
+    def differs(self):
+        """Сохраняется ли расхождение по правилу в текущем документе (после max_tests запусков — нет)."""
+        if self.tests >= self.max_tests:
+            return False
+        self.tests += 1
+        data = self.package()
+        try:
+            differences = diff_findings(self.reference.run(self.name, data), self.candidate.run(self.name, data))
+        except Exception as e:
+            logger.debug("Сведение %s: ошибка движка на фрагменте: %s", self.name, e)
+            return False
+        return self.rule in differences
+
+    def reduce(self, parent):
+        """ddmin по удаляемым дочерним элементам parent, затем — внутри каждого оставшегося."""
+        children = list(parent)
+        removable = [child for child in children if isinstance(child.tag, str) and child.tag not in KEPT_ELEMENTS]
+        removable_ids = {id(child) for child in removable}
+
+        def keep_only(kept):
+            kept_ids = {id(child) for child in kept}
+            parent[:] = [child for child in children if id(child) not in removable_ids or id(child) in kept_ids]
+
+        def test(kept):
+            keep_only(kept)
+            return self.differs()
+
+        kept = ddmin(removable, test)
+        keep_only(kept)
+        for child in kept:
+            self.reduce(child)
+
+    def blocks(self):
+        """Блоки тела документа (всё, кроме свойств раздела)."""
+        return [child for child in self.body if isinstance(child.tag, str) and child.tag not in KEPT_ELEMENTS]
+
+    def fragment(self):
+        """XML оставшихся блоков тела (без свойств раздела и неиспользуемых объявлений пространств имён)."""
+        blocks = []
+        for child in self.blocks():
+            child = copy.deepcopy(child)
+            etree.cleanup_namespaces(child)
+            blocks.append(etree.tostring(child, encoding="unicode"))
+        return "\n".join(blocks)
+
+
+def minimize(name, data, reference, candidate, rule=None, max_tests=DEFAULT_MAX_TESTS):
+    """
+    Сводит документ с расхождением к наименьшему фрагменту тела, на котором движки расходятся
+    по правилу rule (по умолчанию — первому расходящемуся). Возвращает словарь: правило, содержимое
+    сведённого документа (data), XML фрагмента, число блоков тела до и после, число запусков движков.
+    None — если расхождения на документе нет.
+    """
+    differences = diff_findings(reference.run(name, data), candidate.run(name, data))
+    if not differences or (rule is not None and rule not in differences):
+        return None
+    minimizer = Minimizer(name, data, reference, candidate, rule or next(iter(differences)), max_tests)
+    blocks = len(minimizer.blocks())
+    minimizer.reduce(minimizer.body)
+    return {"rule": minimizer.rule, "data": minimizer.package(), "fragment": minimizer.fragment(),
+            "blocks_before": blocks, "blocks_after": len(minimizer.blocks()), "tests": minimizer.tests}
+
+
+def format_report(report, limit=5):
+    """Сводка сравнения для вывода на консоль: правила с расхождениями, документы и ускорение."""
+    lines = [f"Эталон: {report['reference']}, кандидат: {report['candidate']}; документов: "
+             f"{len(report['documents'])}, с расхождениями: {report['differing_documents']}"]
+    lines.append(f"{'правило':<36} {'эталон':>8} {'кандидат':>9} {'нет у кандидата':>16} {'лишние':>7}")
+    for rule, summary in report["rules"].items():
+        mark = " *" if summary["missing"] or summary["extra"] else ""
+        lines.append(f"{rule:<36} {summary['reference']:>8} {summary['candidate']:>9} {summary['missing']:>16} "
+                     f"{summary['extra']:>7}{mark}")
+    for document in report["documents"]:
+        for rule, difference in document["differences"].items():
+            for side, label in (("missing", "нет у кандидата"), ("extra", "лишняя")):
+                for finding in difference[side][:limit]:
+                    lines.append(f"  {document['name']}: {rule} ({label}): {render_location(finding.loc)} — "
+                                 f"{finding.message}")
+    speedup = f"{report['speedup']:.2f}x" if report["speedup"] else "—"
+    median = f"{report['median_speedup']:.2f}x" if report["median_speedup"] else "—"
+    lines.append(f"Время: эталон {report['reference_time']:.2f} с, кандидат {report['candidate_time']:.2f} с; "
+                 f"ускорение {speedup} (медиана по документам {median})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение записей быстрого режима проверки с эталоном.")
+    parser.add_argument("--candidate", default="pool",
+                        help=f"Проверяемый движок: {', '.join(ENGINES)} или модуль:Класс (по умолчанию: pool)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Количество процессов движка (по умолчанию: число ядер)")
+    parser.add_argument("--corpus", type=str, default=None,
+                        help="Каталог с документами .docx (по умолчанию: синтетический корпус)")
+    parser.add_argument("--count", type=int, default=DEFAULT_CORPUS_SIZE,
+                        help=f"Размер синтетического корпуса (по умолчанию: {DEFAULT_CORPUS_SIZE})")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение синтетического корпуса")
+    parser.add_argument("--adversarial", type=float, default=None, metavar="SCALE",
+                        help="Добавить документы наихудшего случая (tests/benchmarks/adversarial.py) в масштабе SCALE")
+    parser.add_argument("--minimize", type=str, default=None, metavar="DIR",
+                        help="Свести документы с расхождениями к наименьшим фрагментам и сохранить их в DIR")
+    parser.add_argument("--rule", type=str, default=None,
+                        help="Правило (проверка.правило), расхождение по которому сохраняется при сведении")
+    parser.add_argument("--max-tests", type=int, default=DEFAULT_MAX_TESTS,
+                        help=f"Наибольшее число запусков движков при сведении документа (по умолчанию: {DEFAULT_MAX_TESTS})")
+    parser.add_argument("--output", type=str, default=None, help="Сохранить отчёт в JSON-файл")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    # Журнал проверок каждого документа не нужен в выводе сравнения
+    logging.getLogger("main").setLevel(logging.ERROR)
+
+    documents = [(name, data) for name, data, _ in load_corpus(args.corpus, args.count, args.seed)]
+    if args.adversarial is not None:
+        documents += [(f"{name}.docx", build_case(name, args.adversarial)) for name in CASES]
+
+    with load_engine(args.candidate, args.workers) as candidate:
+        reference = ReferenceEngine(aggregate_findings=candidate.aggregate_findings,
+                                    max_findings_per_rule=candidate.max_findings_per_rule)
+        report = compare_corpus(documents, reference, candidate)
+        print(format_report(report))
+        if args.minimize:
+            os.makedirs(args.minimize, exist_ok=True)
+            contents = dict(documents)
+            report["minimized"] = {}
+            for document in report["documents"]:
+                if not document["differences"]:
+                    continue
+                result = minimize(document["name"], contents[document["name"]], reference, candidate,
+                                  args.rule, args.max_tests)
+                if result is None:
+                    continue
+                path = os.path.join(args.minimize, document["name"])
+                with open(path, "wb") as f:
+                    f.write(result.pop("data"))
+                report["minimized"][document["name"]] = dict(result, path=path)
+                print(f"{document['name']}: {result['rule']} — блоков тела {result['blocks_before']} -> "
+                      f"{result['blocks_after']} ({result['tests']} запусков), сохранено в {path}")
+                print(result["fragment"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=to_json)
+        print(f"Отчёт сохранён в {args.output}")
+    return 1 if report["differing_documents"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import os
+import zlib
+from io import BytesIO
+from docx import Document
+from tests.benchmarks.corpus import CorpusGenerator
+
+# Версия генератора: при изменении содержимого документов кеш фикстур пересоздаётся
+FIXTURE_VERSION = 2
+# Страниц основного текста на главу
+PAGES_PER_CHAPTER = 20
+
+# Документы для замеров: страницы основного текста и количество таблиц, рисунков,
+# источников в списке литературы, затекстовых ссылок на них и приложений
+FIXTURES = {
+    "p10": {"pages": 10, "tables": 2, "figures": 2, "references": 15, "citations": 30, "appendices": 1},
+    "p100": {"pages": 100, "tables": 20, "figures": 20, "references": 60, "citations": 200, "appendices": 3},
+    "p100-text": {"pages": 100, "tables": 0, "figures": 0, "references": 20, "citations": 0, "appendices": 0},
+    "p100-dense": {"pages": 100, "tables": 100, "figures": 100, "references": 300, "citations": 1000,
+                   "appendices": 20},
+    "p1000": {"pages": 1000, "tables": 100, "figures": 100, "references": 300, "citations": 2000, "appendices": 10},
+}
+# Набор по умолчанию: три масштаба документа
+DEFAULT_FIXTURES = ["p10", "p100", "p1000"]
+
+_generator = None
+
+
+def build_fixture(spec, path, seed=0):
+    """Создаёт документ без нарушений по описанию spec (см. FIXTURES) и сохраняет его в path."""
+    global _generator
+    if _generator is None:
+        _generator = CorpusGenerator()
+    spec = dict(spec, chapters=max(1, spec["pages"] // PAGES_PER_CHAPTER), footnotes=0, error_rate=0.0, errors={})
+    return _generator.write(path, spec, seed=seed)
+
+
+def fixture_path(name, fixtures_dir):
+    """Путь к документу фикстуры name; документ создаётся при первом обращении и затем берётся из кеша."""
+    path = os.path.join(fixtures_dir, f"{name}-v{FIXTURE_VERSION}.docx")
+    if not os.path.exists(path):
+        os.makedirs(fixtures_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        # Зерно зависит только от имени фикстуры, поэтому документ одинаков на всех машинах
+        build_fixture(FIXTURES[name], tmp_path, seed=zlib.crc32(name.encode("utf-8")))
+        os.replace(tmp_path, path)
+    return path
+
+
+def docx_bytes(paragraphs=10, text="Параграф с обычным текстом"):
+    """Небольшой документ в памяти: заголовок «Введение» и paragraphs абзацев с текстом text и номером абзаца."""
+    doc = Document()
+    doc.add_heading("Введение", level=1)
+    for i in range(paragraphs):
+        doc.add_paragraph(f"{text} {i}")
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
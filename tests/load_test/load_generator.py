@@ -0,0 +1,384 @@
+"""
+Нагрузочные испытания пула проверки с измерением задержек и масштабирования.
+
+Замкнутый цикл (closed): для каждого количества процессов пула в пуле постоянно находится concurrency
+документов (по умолчанию по одному на процесс) — новый документ отправляется, как только завершён
+предыдущий. Так измеряется предельная пропускная способность и её рост с числом процессов.
+
+Разомкнутый цикл (open): документы поступают с заданной интенсивностью (пуассоновский поток, документов
+в секунду) независимо от того, успевает ли пул, как заявки на проверку в период сдачи работ. Задержка
+отсчитывается от запланированного момента поступления, поэтому отставание генератора её не скрывает.
+
+Для каждого запуска сохраняются пропускная способность, процентили p50/p95/p99 задержки документа,
+её составляющие — ожидание в очереди пула и время обработки в процессе, — а также процессорное время,
+загрузка CPU и пик RSS каждого процесса пула (JSON, при необходимости — CSV для построения графиков).
+
+    python -m tests.load_test.load_generator closed --workers 1 2 4 8 --duration 60
+    python -m tests.load_test.load_generator open --workers 8 --rates 2 4 8 16 --duration 120
+    python -m tests.load_test.load_generator closed --corpus test_files --output closed.json --csv closed.csv
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+from concurrent.futures import wait, FIRST_COMPLETED
+from multiprocessing import cpu_count
+
+import psutil
+
+from main import (process_file, warm_up, configure_time_limits, DEFAULT_WORKER_RSS_LIMIT,
+                  DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_CHECK_TIME_LIMIT, DEFAULT_DOCUMENT_TIME_LIMIT,
+                  DEFAULT_HARD_TIMEOUT)
+from tests.benchmarks.bench_checks import percentile
+from tests.benchmarks.corpus import generate_corpus
+from utils.cost_model import CostModel
+from utils.worker_pool import WorkerPool, TaskTimeoutError, WorkerCrashedError, PREFORK_START_METHOD
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATION = 30.0
+# Документы синтетического корпуса (tests.benchmarks.corpus), если не задан каталог с документами
+DEFAULT_CORPUS_SIZE = 50
+DEFAULT_CORPUS_SPEC = {"pages": 40}
+# Документов на процесс, проверяемых до начала замеров (прогрев кешей процессов)
+WARMUP_PER_WORKER = 2
+# Наибольшее количество документов в очереди разомкнутого цикла: сверх него документы отклоняются,
+# как сервис отвечает "занят" (иначе перегруженный пул копил бы очередь до конца испытания)
+DEFAULT_MAX_OUTSTANDING = 1000
+# Время на завершение документов, поставленных в очередь до окончания испытания
+DRAIN_TIMEOUT = 300.0
+
+
+def timed_process_file(args):
+    """
+    Проверяет документ в процессе пула (как сервис: из памяти, без отчёта) и возвращает вместе
+    с результатом время начала и окончания обработки, процессорное время и RSS процесса.
+    time.monotonic общий для всех процессов системы, поэтому отметки сравнимы с отметками родителя.
+    """
+    started = time.monotonic()
+    cpu_start = time.process_time()
+    result = process_file(args)
+    timing = {
+        "pid": os.getpid(),
+        "started": started,
+        "finished": time.monotonic(),
+        "cpu": time.process_time() - cpu_start,
+        "rss": psutil.Process().memory_info().rss,
+    }
+    return result, timing
+
+
+def load_corpus(corpus_dir=None, count=DEFAULT_CORPUS_SIZE, seed=0):
+    """Документы испытания: [(имя файла, содержимое, оценка памяти)] из каталога или синтетический корпус."""
+    tmp_dir = None
+    if corpus_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        paths = generate_corpus(tmp_dir.name, count, DEFAULT_CORPUS_SPEC, seed=seed)
+    else:
+        paths = sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir)
+                       if name.lower().endswith(".docx"))
+    cost_model = CostModel()
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        features = CostModel.document_features(path, data=data)
+        documents.append((os.path.basename(path), data, cost_model.estimate_memory(features)))
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    if not documents:
+        raise ValueError(f"В каталоге {corpus_dir} нет документов .docx")
+    return documents
+
+
+def distribution(values):
+    """Среднее, процентили p50/p95/p99 и максимум (None для пустого списка)."""
+    if not values:
+        return None
+    return {"mean": sum(values) / len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "p99": percentile(values, 99), "max": max(values)}
+
+
+class LoadRun:
+    """
+    Один запуск испытания на пуле из workers процессов: отправка документов и учёт их завершения.
+
+    Отметки завершения ставятся обратным вызовом Future (в потоке-диспетчере пула), а новые документы
+    отправляются только из потока испытания: отправка из обратного вызова заблокировала бы диспетчер.
+    """
+
+    def __init__(self, documents, workers, hard_timeout=DEFAULT_HARD_TIMEOUT,
+                 check_time_limit=DEFAULT_CHECK_TIME_LIMIT, document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT):
+        self.documents = documents
+        self.workers = workers
+        self.hard_timeout = hard_timeout
+        self.check_time_limit = check_time_limit
+        self.document_time_limit = document_time_limit
+        self.records = []
+        self.rejected = 0
+        self._next = 0
+
+    def __enter__(self):
+        configure_time_limits(self.check_time_limit, self.document_time_limit)
+        if PREFORK_START_METHOD:
+            warm_up()
+        self.pool = WorkerPool(timed_process_file, self.workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                               max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_time_limits,
+                               initargs=(self.check_time_limit, self.document_time_limit),
+                               mp_context=PREFORK_START_METHOD, prestart=True)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.pool.shutdown(cancel_pending=True)
+
+    def submit(self, scheduled=None, record=True):
+        """Отправляет следующий документ корпуса; scheduled — запланированный момент поступления."""
+        name, data, memory = self.documents[self._next % len(self.documents)]
+        self._next += 1
+        entry = {"document": name, "submitted": scheduled if scheduled is not None else time.monotonic()}
+        future = self.pool.submit((name, self._next, None, data), memory=memory, timeout=self.hard_timeout)
+        future.add_done_callback(lambda f: entry.__setitem__("completed", time.monotonic()))
+        if record:
+            self.records.append(entry)
+        return future, entry
+
+    @staticmethod
+    def resolve(future, entry):
+        """Дополняет запись документа результатом и отметками процесса пула."""
+        try:
+            result, timing = future.result()
+        except TaskTimeoutError:
+            entry["status"] = "timed_out"
+            return
+        except WorkerCrashedError:
+            entry["status"] = "crashed"
+            return
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+            return
+        entry.update(timing)
+        entry["status"] = "error" if "error" in result["results"] else "ok"
+
+    def warm(self, count):
+        """Проверяет count документов без учёта в результатах."""
+        futures = [self.submit(record=False) for _ in range(count)]
+        wait([future for future, _ in futures])
+
+    def closed_loop(self, concurrency, duration):
+        """В пуле постоянно concurrency документов, пока не истечёт duration секунд."""
+        end = time.monotonic() + duration
+        outstanding = dict(self.submit() for _ in range(concurrency))
+        while outstanding:
+            done, _ = wait(outstanding, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.resolve(future, outstanding.pop(future))
+                if time.monotonic() < end:
+                    future, entry = self.submit()
+                    outstanding[future] = entry
+
+    def open_loop(self, rate, duration, max_outstanding=DEFAULT_MAX_OUTSTANDING, seed=0):
+        """Пуассоновский поток документов с интенсивностью rate в секунду в течение duration секунд."""
+        rng = random.Random(seed)
+        start = time.monotonic()
+        scheduled = start + rng.expovariate(rate)
+        outstanding = {}
+        while scheduled < start + duration:
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            for future in [future for future in outstanding if future.done()]:
+                self.resolve(future, outstanding.pop(future))
+            if len(outstanding) >= max_outstanding:
+                self.rejected += 1
+            else:
+                future, entry = self.submit(scheduled)
+                outstanding[future] = entry
+            scheduled += rng.expovariate(rate)
+        wait(outstanding, timeout=DRAIN_TIMEOUT)
+        for future, entry in outstanding.items():
+            if future.done():
+                self.resolve(future, entry)
+            else:
+                entry["status"] = "unfinished"
+
+    def summary(self):
+        """Пропускная способность, распределения задержек и нагрузка процессов пула."""
+        finished = [entry for entry in self.records if "started" in entry]
+        statuses = {}
+        for entry in self.records:
+            statuses[entry.get("status", "unfinished")] = statuses.get(entry.get("status", "unfinished"), 0) + 1
+        summary = {"documents": len(self.records), "statuses": statuses, "rejected": self.rejected,
+                   "throughput": 0.0, "latency": None, "queue_wait": None, "service": None, "processes": []}
+        if not finished:
+            return summary
+        window = max(entry["completed"] for entry in finished) - min(entry["submitted"] for entry in finished)
+        summary["elapsed"] = window
+        summary["throughput"] = len(finished) / window if window > 0 else 0.0
+        summary["latency"] = distribution([entry["completed"] - entry["submitted"] for entry in finished])
+        summary["queue_wait"] = distribution([max(0.0, entry["started"] - entry["submitted"]) for entry in finished])
+        summary["service"] = distribution([entry["finished"] - entry["started"] for entry in finished])
+        summary["transfer"] = distribution([max(0.0, entry["completed"] - entry["finished"]) for entry in finished])
+        workers = {}
+        for entry in finished:
+            worker = workers.setdefault(entry["pid"], {"pid": entry["pid"], "documents": 0, "cpu_seconds": 0.0,
+                                                       "busy_seconds": 0.0, "rss_peak": 0})
+            worker["documents"] += 1
+            worker["cpu_seconds"] += entry["cpu"]
+            worker["busy_seconds"] += entry["finished"] - entry["started"]
+            worker["rss_peak"] = max(worker["rss_peak"], entry["rss"])
+        for worker in workers.values():
+            # Доля одного ядра за время испытания; процессы, перезапущенные пулом, учитываются отдельно
+            worker["cpu_utilization"] = worker["cpu_seconds"] / window if window > 0 else 0.0
+        summary["processes"] = sorted(workers.values(), key=lambda worker: worker["pid"])
+        summary["cpu_seconds_per_document"] = sum(entry["cpu"] for entry in finished) / len(finished)
+        summary["rss_peak"] = max(worker["rss_peak"] for worker in workers.values())
+        return summary
+
+
+def run_closed(documents, workers_list, duration=DEFAULT_DURATION, concurrency_per_worker=1, **limits):
+    """Замкнутый цикл для каждого количества процессов; добавляет ускорение и эффективность к первому запуску."""
+    runs = []
+    for workers in workers_list:
+        concurrency = max(1, workers * concurrency_per_worker)
+        logger.info("Замкнутый цикл: %s процессов, %s документов в пуле, %s с", workers, concurrency, duration)
+        with LoadRun(documents, workers, **limits) as run:
+            run.warm(workers * WARMUP_PER_WORKER)
+            run.closed_loop(concurrency, duration)
+        runs.append({"mode": "closed", "workers": workers, "concurrency": concurrency, "duration": duration,
+                     **run.summary()})
+    base = runs[0] if runs and runs[0]["throughput"] else None
+    for item in runs:
+        if base is not None:
+            item["speedup"] = item["throughput"] / base["throughput"]
+            item["efficiency"] = item["speedup"] * base["workers"] / item["workers"]
+    return runs
+
+
+def run_open(documents, workers, rates, duration=DEFAULT_DURATION, max_outstanding=DEFAULT_MAX_OUTSTANDING,
+             seed=0, **limits):
+    """Разомкнутый цикл для каждой интенсивности поступления на одном пуле из workers процессов."""
+    runs = []
+    for rate in rates:
+        logger.info("Разомкнутый цикл: %s процессов, %s документов/с, %s с", workers, rate, duration)
+        with LoadRun(documents, workers, **limits) as run:
+            run.warm(workers * WARMUP_PER_WORKER)
+            run.open_loop(rate, duration, max_outstanding, seed)
+        runs.append({"mode": "open", "workers": workers, "rate": rate, "duration": duration, **run.summary()})
+    return runs
+
+
+def environment():
+    """Сведения о системе, на которой проводилось испытание."""
+    memory = psutil.virtual_memory()
+    return {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "cpu_count": cpu_count(),
+            "cpu_physical": psutil.cpu_count(logical=False), "memory_total": memory.total}
+
+
+CSV_FIELDS = ["mode", "workers", "concurrency", "rate", "documents", "rejected", "throughput", "speedup",
+              "efficiency", "latency_p50", "latency_p95", "latency_p99", "queue_wait_p50", "queue_wait_p95",
+              "queue_wait_p99", "service_p50", "service_p95", "service_p99", "cpu_seconds_per_document", "rss_peak"]
+
+
+def csv_rows(runs):
+    """Плоские строки запусков (по одной на запуск) для построения кривых масштабирования."""
+    for item in runs:
+        row = {field: item.get(field) for field in CSV_FIELDS}
+        for key in ("latency", "queue_wait", "service"):
+            for q in ("p50", "p95", "p99"):
+                row[f"{key}_{q}"] = item[key][q] if item.get(key) else None
+        yield row
+
+
+def format_table(runs):
+    """Сводная таблица запусков для вывода на консоль (времена в секундах)."""
+    lines = [f"{'режим':<7} {'проц.':>5} {'нагрузка':>9} {'док/с':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+             f"{'очередь p95':>12} {'обработка p95':>14} {'CPU/док':>8} {'RSS, МБ':>8}"]
+    for item in runs:
+        load = f"{item['rate']}/с" if item["mode"] == "open" else str(item["concurrency"])
+        if not item["latency"]:
+            lines.append(f"{item['mode']:<7} {item['workers']:>5} {load:>9} {'нет завершённых документов':>30}")
+            continue
+        lines.append(f"{item['mode']:<7} {item['workers']:>5} {load:>9} {item['throughput']:>8.2f} "
+                     f"{item['latency']['p50']:>8.3f} {item['latency']['p95']:>8.3f} {item['latency']['p99']:>8.3f} "
+                     f"{item['queue_wait']['p95']:>12.3f} {item['service']['p95']:>14.3f} "
+                     f"{item['cpu_seconds_per_document']:>8.3f} {item['rss_peak'] / 2 ** 20:>8.1f}")
+    return "\n".join(lines)
+
+
+def default_workers():
+    """Количества процессов для замкнутого цикла: степени двойки до количества ядер и само количество ядер."""
+    workers, n = [], 1
+    while n < cpu_count():
+        workers.append(n)
+        n *= 2
+    return workers + [cpu_count()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочные испытания пула проверки: замкнутый и разомкнутый цикл.")
+    parser.add_argument("mode", choices=["closed", "open"], help="Режим: closed — перебор количества процессов, "
+                                                                   "open — перебор интенсивности поступления")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Количества процессов пула (closed; по умолчанию 1, 2, 4, … до количества ядер) "
+                             "или одно количество (open; по умолчанию количество ядер)")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1.0, 2.0, 4.0],
+                        help="Интенсивности поступления, документов в секунду (open; по умолчанию: 1 2 4)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Документов в пуле на один процесс (closed; по умолчанию: 1)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help=f"Длительность каждого запуска в секундах (по умолчанию: {DEFAULT_DURATION:g})")
+    parser.add_argument("--max-outstanding", type=int, default=DEFAULT_MAX_OUTSTANDING,
+                        help=f"Наибольшая очередь разомкнутого цикла (по умолчанию: {DEFAULT_MAX_OUTSTANDING})")
+    parser.add_argument("--corpus", type=str, default=None,
+                        help=f"Каталог с документами .docx (по умолчанию синтетический корпус "
+                             f"из {DEFAULT_CORPUS_SIZE} документов, см. tests.benchmarks.corpus)")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно корпуса и потока поступления (по умолчанию: 0)")
+    parser.add_argument("--hard-timeout", type=float, default=DEFAULT_HARD_TIMEOUT,
+                        help=f"Жёсткий срок проверки документа в секундах (по умолчанию: {DEFAULT_HARD_TIMEOUT})")
+    parser.add_argument("--output", type=str, default="load_results.json",
+                        help="JSON-файл результатов, '-' — вывод на консоль (по умолчанию: load_results.json)")
+    parser.add_argument("--csv", type=str, default=None, help="Сохранить сводку запусков в CSV")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Сообщения о каждом проверенном документе заглушили бы ход испытания
+    logging.getLogger("main").setLevel(logging.WARNING)
+
+    documents = load_corpus(args.corpus, seed=args.seed)
+    limits = {"hard_timeout": args.hard_timeout}
+    if args.mode == "closed":
+        runs = run_closed(documents, args.workers or default_workers(), args.duration, args.concurrency, **limits)
+    else:
+        if args.workers and len(args.workers) > 1:
+            parser.error("В режиме open задаётся одно количество процессов")
+        workers = args.workers[0] if args.workers else cpu_count()
+        runs = run_open(documents, workers, args.rates, args.duration, args.max_outstanding, args.seed, **limits)
+
+    output = {"meta": {**environment(), "mode": args.mode, "documents_in_corpus": len(documents),
+                       "corpus": args.corpus or "synthetic"},
+              "runs": runs}
+    if args.output == "-":
+        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(format_table(runs))
+        print(f"Результаты сохранены в {args.output}")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(csv_rows(runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
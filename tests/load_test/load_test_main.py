@@ -3,38 +3,11 @@ import psutil
 import os
 import sys
 import threading
-import random
-import string
-from multiprocessing import Pool
-from docx import Document
-from docx.shared import Pt
-from main import process_file  # Импортируем process_file из main.py
-
-
-def generate_random_text(length=500):
-    """Генерирует случайный текст заданной длины."""
-    return ''.join(random.choices(string.ascii_letters + string.digits + " ", k=length))
-
-
-def generate_test_doc(args):
-    """Генерирует тестовый документ с уникальным содержимым."""
-    filename, num_paragraphs, include_references = args
-    if os.path.exists(filename):
-        return filename
-    doc = Document()
-    doc.add_heading("Оглавление", level=1)
-    doc.add_heading("Введение", level=1)
-    for i in range(num_paragraphs):
-        p = doc.add_paragraph(f"Тестовый параграф {i}: {generate_random_text()}")
-        p.style.font.name = "Times New Roman"
-        p.style.font.size = Pt(14)
-    doc.add_heading("Заключение", level=1)
-    if include_references:
-        doc.add_paragraph("Список литературы")
-        doc.add_paragraph(
-            f"Иванов И.И. Статья // Журнал. {random.randint(2010, 2023)}. № {random.randint(1, 10)}. С. 1-5.")
-    doc.save(filename)
-    return filename
+import argparse
+from main import process_multiple_files, JOURNAL_FILE  # Импортируем пакетную обработку из main.py
+from utils.journal import BatchJournal
+from utils.profiling import LeakDetector, format_memory_summary
+from tests.benchmarks.corpus import PARAGRAPHS_PER_PAGE, generate_corpus
 
 
 def monitor_resources(stop_event, interval=0.5):
@@ -51,42 +24,46 @@ def monitor_resources(stop_event, interval=0.5):
         time.sleep(interval)
 
 
-def infinite_load_test(num_files=10, base_paragraphs=100, num_processes=4):
-    """Бесконечное тестирование с N различными файлами."""
+def infinite_load_test(num_files=10, base_paragraphs=100, num_processes=4, reports_dir="test_reports", resume=False,
+                       memory_top=None):
+    """
+    Бесконечное тестирование с N различными файлами.
+
+    Результаты каждой итерации записываются в журнал в reports_dir; при resume=True первая итерация
+    продолжает прерванный запуск и обрабатывает только файлы, которых ещё нет в журнале.
+    Если memory_top не None, память замеряется в процессах пула для каждого документа (см. main.MEMORY_TOP),
+    после каждой итерации выводится сводка, а устойчивый рост RSS процессов пула отмечается как
+    подозрение на утечку.
+    """
     test_files_dir = "test_files"
     os.makedirs(test_files_dir, exist_ok=True)
+    os.makedirs(reports_dir, exist_ok=True)
 
-    # Подготовка аргументов для параллельной генерации файлов
-    file_args = []
-    print(f"Проверка и генерация {num_files} тестовых файлов параллельно с {num_processes} процессами...")
+    # Синтетические работы по образцу extracted_docx: объём и количество таблиц, рисунков, ссылок
+    # и приложений различаются между документами, а зерно фиксировано, поэтому набор воспроизводим
+    print(f"Генерация {num_files} тестовых файлов...")
     start_time = time.time()
-    for i in range(num_files):
-        num_paragraphs = base_paragraphs + random.randint(-50, 50)
-        file_path = os.path.join(test_files_dir, f"test_file_{i}.docx")
-        file_args.append((file_path, num_paragraphs, True))
-
-    with Pool(processes=num_processes) as pool:
-        file_paths = pool.map(generate_test_doc, file_args)
-
+    file_paths = generate_corpus(test_files_dir, num_files, {"pages": max(1, base_paragraphs // PARAGRAPHS_PER_PAGE)})
     gen_time = time.time() - start_time
-    print(f"Генерация/проверка завершена за {gen_time:.2f} секунд")
+    print(f"Генерация завершена за {gen_time:.2f} секунд")
 
     stop_event = threading.Event()
     monitor_thread = threading.Thread(target=monitor_resources, args=(stop_event,))
     monitor_thread.start()
 
     iteration = 0
-    pool = None
+    journal = BatchJournal(os.path.join(reports_dir, JOURNAL_FILE))
+    leak_detector = LeakDetector()
     try:
         while not stop_event.is_set():
             iteration += 1
             print(f"\nИтерация {iteration}: Тестирование {num_files} файлов")
             start_time = time.time()
-            pool = Pool(processes=8)
-            results_list = pool.map(process_file, file_paths)  # Используем process_file из main.py
-            pool.close()
-            pool.join()
-            pool = None
+            # Замер памяти имеет смысл только для заново проверенных документов, поэтому журнал при нём не читается
+            results_list = process_multiple_files(file_paths, reports_dir, num_processes=num_processes,
+                                                  journal=journal,
+                                                  resume=resume and iteration == 1 and memory_top is None,
+                                                  memory_top=memory_top)
             total_time = time.time() - start_time
 
             # Собираем времена обработки всех файлов
@@ -103,19 +80,34 @@ def infinite_load_test(num_files=10, base_paragraphs=100, num_processes=4):
                     print(f"  {check}: {res}")
             print(f"Total Time for {num_files} files: {total_time:.2f}s")
             print(f"Average Time per File: {avg_time_per_file:.2f}s")
+            if memory_top is not None:
+                leak_detector.observe_results(results_list)
+                print(format_memory_summary(results_list, leak_detector))
 
     except KeyboardInterrupt:
         print("\nОстановка тестирования через KeyboardInterrupt...")
         stop_event.set()
 
     finally:
-        if pool:
-            pool.terminate()
-            pool.join()
+        journal.close()
         stop_event.set()
         monitor_thread.join()
         print("Тестирование завершено.")
 
 
 if __name__ == "__main__":
-    infinite_load_test(num_files=10000, base_paragraphs=100, num_processes=8)
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(
+        description="Бесконечное нагрузочное тестирование проверки документов (замеры пропускной способности "
+                    "и задержек: python -m tests.load_test.load_generator).")
+    arg_parser.add_argument("--files", type=int, default=10000, help="Количество тестовых файлов (по умолчанию: 10000)")
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                            help="Количество процессов пула (по умолчанию: количество ядер)")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="Продолжить прерванный запуск по журналу в директории отчётов")
+    arg_parser.add_argument("--memory-profile", type=int, nargs="?", const=0, default=None, metavar="TOP",
+                            help="Замерять память в процессах пула для каждого документа и искать утечки; "
+                                 "TOP — сколько мест программы с наибольшим объёмом выделенной памяти показать")
+    cli_args = arg_parser.parse_args()
+    infinite_load_test(num_files=cli_args.files, base_paragraphs=100, num_processes=cli_args.processes,
+                       resume=cli_args.resume,
+                       memory_top=cli_args.memory_profile)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import io
+import os
+import tempfile
+import unittest
+from docx import Document
+from main import build_template
+from tests.benchmarks.corpus import CorpusGenerator
+from tests.benchmarks.adversarial import CASES, build_case, case_size
+from tests.benchmarks.bench_checks import benchmark_document
+
+# Масштаб малого документа каждого случая; большой документ в GROWTH раз больше
+SCALES = {"run_churn": 0.01, "long_table": 0.02, "many_appendices": 0.25, "many_headings": 0.1}
+DEFAULT_SCALE = 0.05
+GROWTH = 4
+# Допустимый рост времени и памяти при росте документа в GROWTH раз: почти линейный (квадратичная
+# проверка выросла бы в 16 раз) с поправкой на шум измерений малых величин
+MAX_GROWTH = 2 * GROWTH
+TIME_SLACK = 0.05
+MEMORY_SLACK = 1024 * 1024
+# Ни одна проверка на большом документе не должна упираться в лимит времени
+TIME_LIMIT = 10.0
+REPEAT = 2
+
+
+class TestAdversarial(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        template = build_template()
+        generator = CorpusGenerator()
+        cls.results = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in CASES:
+                scale = SCALES.get(name, DEFAULT_SCALE)
+                for factor in (1, GROWTH):
+                    path = os.path.join(tmp_dir, f"{name}_{factor}.docx")
+                    with open(path, "wb") as f:
+                        f.write(build_case(name, scale * factor, generator))
+                    cls.results[name, factor] = benchmark_document(path, REPEAT, TIME_LIMIT, template)
+
+    def test_cases_build(self):
+        generator = CorpusGenerator()
+        doc = Document(io.BytesIO(build_case("many_tables", 0.1, generator)))
+        self.assertEqual(len(doc.tables), case_size("many_tables", 0.1))
+        doc = Document(io.BytesIO(build_case("long_table", 0.01, generator)))
+        self.assertEqual(len(doc.tables[0].rows), case_size("long_table", 0.01))
+        doc = Document(io.BytesIO(build_case("nested_tables", 0.1, generator)))
+        self.assertEqual(len(doc.element.body.xpath(".//w:tbl")), case_size("nested_tables", 0.1) + 1)
+        doc = Document(io.BytesIO(build_case("many_appendices", 0.1, generator)))
+        headers = [p.text for p in doc.paragraphs if p.text.startswith("Приложение ")]
+        self.assertEqual(len(headers), case_size("many_appendices", 0.1))
+
+    def test_no_check_truncated(self):
+        for (name, factor), checks in self.results.items():
+            for key, stats in checks.items():
+                with self.subTest(case=name, factor=factor, check=key):
+                    self.assertFalse(stats["truncated"])
+
+    def test_time_growth(self):
+        for name in CASES:
+            small, large = self.results[name, 1], self.results[name, GROWTH]
+            for key in small:
+                with self.subTest(case=name, check=key):
+                    self.assertLessEqual(large[key]["min"], MAX_GROWTH * small[key]["min"] + TIME_SLACK)
+
+    def test_memory_growth(self):
+        for name in CASES:
+            small, large = self.results[name, 1], self.results[name, GROWTH]
+            for key in small:
+                with self.subTest(case=name, check=key):
+                    self.assertLessEqual(large[key]["peak_memory"],
+                                         MAX_GROWTH * small[key]["peak_memory"] + MEMORY_SLACK)
+
+
+if __name__ == "__main__":
+    unittest.main()
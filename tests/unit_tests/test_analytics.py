@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from modules.findings import Finding
+from utils.analytics import AnalyticsStore, parse_tags, rule_counts
+
+
+def result(name, findings, content_hash=None):
+    results = {"structure": [f for f in findings if f.check == "structure"],
+               "formatting": [f for f in findings if f.check != "structure"]}
+    return {"file_path": name, "results": results, "time": 0.1, "content_hash": content_hash}
+
+
+NO_HEADINGS = Finding("structure", "no_headings")
+FONT_RANGE = Finding("formatting", "font", ("paragraphs", 3, 7), "Arial", "Times New Roman")
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = AnalyticsStore(os.path.join(self.tmp_dir.name, "analytics.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags(["cohort=2026", "group = ИВТ-41"]), {"cohort": "2026", "group": "ИВТ-41"})
+        with self.assertRaises(ValueError):
+            parse_tags(["cohort"])
+
+    def test_rule_counts(self):
+        capped = Finding("template", "capped", "formatting.font", 40, 100)
+        counts = rule_counts({"structure": [NO_HEADINGS], "formatting": [FONT_RANGE, capped],
+                              "error": ["Файл не найден: a.docx"]})
+        self.assertEqual(counts, {("structure", "no_headings"): 1, ("formatting", "font"): 41, ("error", "error"): 1})
+
+    def test_top_rules_by_cohort(self):
+        self.store.add_batch([result("a.docx", [NO_HEADINGS, FONT_RANGE]), result("b.docx", [FONT_RANGE])],
+                             {"cohort": "2026", "group": "ИВТ-41"})
+        self.store.add_batch([result("c.docx", [NO_HEADINGS])], {"cohort": "2025"})
+        self.assertEqual(self.store.top_rules(("cohort", "2026")), [
+            ("formatting", "font", 2, 1.0, 2), ("structure", "no_headings", 1, 0.5, 1)])
+        self.assertEqual([rule[:3] for rule in self.store.top_rules()],
+                         [("formatting", "font", 2), ("structure", "no_headings", 2)])
+        self.assertEqual(self.store.document_count(), 3)
+
+    def test_compare_drafts(self):
+        self.store.add_batch([result("a.docx", [NO_HEADINGS, FONT_RANGE]), result("b.docx", [NO_HEADINGS])],
+                             {"group": "ИВТ-41", "draft": "1"})
+        self.store.add_batch([result("a.docx", [FONT_RANGE]), result("b.docx", [])], {"group": "ИВТ-41", "draft": "2"})
+        comparison = self.store.compare(("group", "ИВТ-41"), "draft")
+        self.assertEqual(comparison["1"], (2, {("structure", "no_headings"): (2, 2), ("formatting", "font"): (1, 1)}))
+        self.assertEqual(comparison["2"], (2, {("formatting", "font"): (1, 1)}))
+
+    def test_resumed_batch_is_not_counted_twice(self):
+        batch = [result("a.docx", [NO_HEADINGS], "hash-a"), result("b.docx", [], "hash-b")]
+        self.assertEqual(self.store.add_batch(batch, {"cohort": "2026"}), 2)
+        self.assertEqual(self.store.add_batch(batch, {"cohort": "2026"}), 0)
+        # Тот же документ с другими метками (например, следующий черновик) учитывается отдельно
+        self.assertEqual(self.store.add_batch(batch[:1], {"cohort": "2026", "draft": "2"}), 1)
+        self.assertEqual(self.store.document_count(("cohort", "2026")), 3)
+
+    def test_incremental_rollups_match_rebuild(self):
+        for draft in range(3):
+            self.store.add_batch([result(f"{i}.docx", [NO_HEADINGS, FONT_RANGE][:i % 3]) for i in range(10)],
+                                 {"cohort": "2026", "draft": str(draft)})
+        incremental = (self.store.top_rules(), self.store.top_rules(("draft", "1")),
+                       self.store.compare(("cohort", "2026"), "draft"))
+        self.store.rebuild_rollups()
+        self.assertEqual((self.store.top_rules(), self.store.top_rules(("draft", "1")),
+                          self.store.compare(("cohort", "2026"), "draft")), incremental)
+
+
+if __name__ == "__main__":
+    unittest.main()
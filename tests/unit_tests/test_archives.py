@@ -0,0 +1,79 @@
+import os
+import zipfile
+import tempfile
+import unittest
+from io import BytesIO
+from collections import Counter
+from unittest import mock
+from docx import Document
+from main import process_multiple_files
+from utils.archives import ArchiveReader, expand_archives, split_member
+from utils.journal import BatchJournal
+from utils.worker_pool import WorkerPool
+from tests.benchmarks.fixtures import docx_bytes
+
+
+class TestArchives(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.tmp_dir.name, "работы.zip")
+        with zipfile.ZipFile(self.archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("группа/первая.docx", docx_bytes(text="Первая работа"))
+            archive.writestr("вторая.docx", docx_bytes(text="Вторая работа"))
+            archive.writestr("~$вторая.docx", b"lock")
+            archive.writestr("__MACOSX/._вторая.docx", b"meta")
+            archive.writestr("readme.txt", b"text")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_expand_archives(self):
+        plain = os.path.join(self.tmp_dir.name, "a.docx")
+        keys = expand_archives([plain, self.archive_path])
+        self.assertEqual(keys, [plain, f"{self.archive_path}!группа/первая.docx", f"{self.archive_path}!вторая.docx"])
+        self.assertEqual(split_member(keys[1]), (self.archive_path, "группа/первая.docx"))
+        self.assertIsNone(split_member(plain))
+
+    def test_reader(self):
+        with ArchiveReader() as reader:
+            data = reader.read(f"{self.archive_path}!вторая.docx")
+        self.assertIn("Вторая работа", Document(BytesIO(data)).paragraphs[1].text)
+
+    def test_batch_keys_results_by_member(self):
+        keys = expand_archives([self.archive_path])
+        results = process_multiple_files(keys, os.path.join(self.tmp_dir.name, "reports"), num_processes=1)
+        self.assertEqual([r["file_path"] for r in results], keys)
+        for result in results:
+            self.assertNotIn("error", result["results"])
+
+    def test_members_read_once_and_queued_by_key(self):
+        keys = expand_archives([self.archive_path])
+        reads = Counter()
+        submitted = []
+        read = ArchiveReader.read
+        submit = WorkerPool.submit
+
+        def counting_read(reader, key):
+            reads[key] += 1
+            return read(reader, key)
+
+        def recording_submit(pool, args, *rest, **kwargs):
+            submitted.extend(args)
+            return submit(pool, args, *rest, **kwargs)
+
+        with mock.patch.object(ArchiveReader, "read", counting_read), \
+                mock.patch.object(WorkerPool, "submit", recording_submit), \
+                BatchJournal(os.path.join(self.tmp_dir.name, "journal.sqlite")) as journal:
+            results = process_multiple_files(keys, os.path.join(self.tmp_dir.name, "reports"), num_processes=2,
+                                             journal=journal)
+        # Хеш, оценка стоимости и предварительная проверка — по одному чтению; содержимое читает процесс пула
+        self.assertEqual(reads, Counter(keys))
+        self.assertEqual(sorted(args[0] for args in submitted), sorted(keys))
+        self.assertTrue(all(len(args) == 3 for args in submitted))
+        for result in results:
+            self.assertNotIn("error", result["results"])
+
+
+if __name__ == "__main__":
+    unittest.main()
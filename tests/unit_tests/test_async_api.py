@@ -0,0 +1,122 @@
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from async_api import AsyncChecker
+from utils.cost_model import CostModel
+from tests.benchmarks.fixtures import docx_bytes
+
+# Длительность блокирующих шагов в тесте отзывчивости и допустимый перерыв между тиками цикла событий
+BLOCKING_STEP = 0.5
+MAX_TICK_GAP = 0.25
+
+
+class TestAsyncChecker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.reports_dir = os.path.join(self.tmp_dir.name, "reports")
+        self.file_path = os.path.join(self.tmp_dir.name, "doc.docx")
+        with open(self.file_path, "wb") as f:
+            f.write(docx_bytes())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_paths_and_bytes(self):
+        async def run():
+            async with AsyncChecker(num_workers=1, reports_dir=self.reports_dir) as checker:
+                sources = [self.file_path, docx_bytes(), ("диплом.docx", docx_bytes())]
+                return [item async for item in checker.check_many(sources)]
+
+        results = dict(asyncio.run(run()))
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[0]["file_path"], self.file_path)
+        self.assertEqual(results[2]["file_path"], "диплом.docx")
+        for result in results.values():
+            self.assertIn("structure", result["results"])
+        self.assertFalse([name for name in os.listdir(self.reports_dir) if name.endswith(".md")])
+
+    def test_backpressure(self):
+        pulled = []
+
+        async def sources():
+            for i in range(6):
+                pulled.append(i)
+                yield docx_bytes()
+
+        async def run():
+            async with AsyncChecker(num_workers=1, max_concurrency=2, reports_dir=self.reports_dir) as checker:
+                async for _ in checker.check_many(sources()):
+                    # Пока потребитель не забрал результат, новые документы не читаются
+                    self.assertLessEqual(len(pulled), 2)
+                    break
+
+        asyncio.run(run())
+
+    def test_loop_not_blocked(self):
+        document_features = CostModel.document_features
+
+        def slow_features(*args, **kwargs):
+            time.sleep(BLOCKING_STEP)
+            return document_features(*args, **kwargs)
+
+        async def run():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.monotonic())
+                    await asyncio.sleep(0.01)
+
+            ticking = asyncio.ensure_future(ticker())
+            await asyncio.sleep(0)
+            try:
+                async with AsyncChecker(num_workers=1, reports_dir=self.reports_dir) as checker:
+                    result = await checker.check(docx_bytes())
+            finally:
+                ticking.cancel()
+            return ticks, result
+
+        with mock.patch("async_api.warm_up", side_effect=lambda: time.sleep(BLOCKING_STEP)), \
+                mock.patch.object(CostModel, "document_features", staticmethod(slow_features)):
+            started = time.monotonic()
+            ticks, result = asyncio.run(run())
+        self.assertIn("structure", result["results"])
+        # Цикл событий продолжает работать, пока идут прогрев, запуск пула и разбор документа
+        self.assertGreaterEqual(time.monotonic() - started, 2 * BLOCKING_STEP)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), MAX_TICK_GAP)
+
+    def test_cancellation_cancels_pending_tasks(self):
+        futures = []
+
+        async def run():
+            async with AsyncChecker(num_workers=1, max_concurrency=4, reports_dir=self.reports_dir) as checker:
+                submit = checker._pool.submit
+
+                def recording_submit(*args, **kwargs):
+                    future = submit(*args, **kwargs)
+                    futures.append(future)
+                    return future
+
+                checker._pool.submit = recording_submit
+                results = checker.check_many([docx_bytes(200) for _ in range(4)])
+                await results.__anext__()
+                await results.aclose()
+                # Задачи отменены прекращением итерации, а не остановкой пула
+                return [future.cancelled() for future in futures]
+
+        cancelled = asyncio.run(run())
+        self.assertEqual(len(futures), 4)
+        self.assertTrue(any(cancelled))
+        # Каждая задача либо отменена до запуска, либо выполнена пулом; выполнено меньше четырёх
+        ran = [future for future in futures if not future.cancelled()]
+        self.assertTrue(all(future.done() and future.exception() is None for future in ran))
+        self.assertLess(len(ran), 4)
+        self.assertEqual([future.cancelled() for future in futures], cancelled)
+
+
+if __name__ == "__main__":
+    unittest.main()
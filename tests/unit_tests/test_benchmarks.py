@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from docx import Document
+from tests.benchmarks.bench_checks import benchmark_document, compare, percentile
+from tests.benchmarks.fixtures import build_fixture
+
+
+def stats(median, peak_memory=1024 * 1024, truncated=False):
+    return {"median": median, "p95": median, "peak_memory": peak_memory, "truncated": truncated}
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_percentile(self):
+        self.assertEqual(percentile([3, 1, 2], 50), 2)
+        self.assertAlmostEqual(percentile(range(1, 101), 95), 95.05)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_fixture_is_deterministic(self):
+        spec = {"pages": 3, "tables": 2, "figures": 1, "references": 6, "citations": 5, "appendices": 2}
+        paths = [build_fixture(spec, os.path.join(self.tmp_dir.name, f"{i}.docx"), seed=7) for i in range(2)]
+        texts = [[p.text for p in Document(path).paragraphs] for path in paths]
+        self.assertEqual(texts[0], texts[1])
+        doc = Document(paths[0])
+        self.assertEqual(len(doc.tables), 2)
+        self.assertEqual(len(doc.inline_shapes), 1)
+        self.assertIn("Табл. 2", "\n".join(texts[0]))
+        self.assertIn("Приложение 2", texts[0])
+
+    def test_benchmark_document(self):
+        spec = {"pages": 2, "tables": 1, "figures": 1, "references": 3, "citations": 2, "appendices": 1}
+        path = build_fixture(spec, os.path.join(self.tmp_dir.name, "small.docx"))
+        results = benchmark_document(path, repeat=2)
+        self.assertEqual(list(results), ["parse", "structure", "page_params", "formatting", "references", "tables",
+                                         "illustrations", "appendices"])
+        for check_stats in results.values():
+            self.assertEqual(check_stats["runs"], 2)
+            self.assertLessEqual(check_stats["min"], check_stats["median"])
+            self.assertLessEqual(check_stats["median"], check_stats["p95"])
+            self.assertFalse(check_stats["truncated"])
+        self.assertGreater(results["parse"]["peak_memory"], 0)
+
+    def test_compare_thresholds(self):
+        baseline = {"results": {"p10": {"tables": stats(0.1), "parse": stats(0.001), "structure": stats(0.2)}}}
+        current = {"results": {"p10": {"tables": stats(0.2), "parse": stats(0.002), "structure": stats(0.21),
+                                        "references": stats(5.0)},
+                               "p100": {"tables": stats(9.0)}}}
+        regressions = compare(current, baseline, threshold=0.25)
+        # Замедление parse вдвое меньше порога шума, а references и p100 отсутствуют в baseline
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("p10/tables"))
+        current["results"]["p10"]["structure"] = stats(0.2, peak_memory=8 * 1024 * 1024, truncated=True)
+        self.assertEqual(len(compare(current, baseline, threshold=0.25)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
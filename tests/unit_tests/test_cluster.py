@@ -0,0 +1,146 @@
+import os
+import sys
+import socket
+import tempfile
+import threading
+import subprocess
+import zipfile
+import unittest
+import psutil
+from docx import Document
+from cluster import Coordinator, send_message, recv_message
+from utils.archives import expand_archives
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestCluster(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_paths = []
+        for i in range(4):
+            doc = Document()
+            doc.add_heading("Введение", level=1)
+            for j in range(10 + i):
+                doc.add_paragraph(f"Параграф {j} документа {i}")
+            path = os.path.join(self.tmp_dir.name, f"doc{i}.docx")
+            doc.save(path)
+            self.file_paths.append(path)
+        self.workers = []
+
+    def tearDown(self):
+        for process in self.workers:
+            # Процессы пула узла держат копии своих каналов и не завершаются сами после гибели узла
+            try:
+                children = psutil.Process(process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                children = []
+            process.kill()
+            process.wait()
+            for child in children:
+                try:
+                    child.kill()
+                except psutil.NoSuchProcess:
+                    pass
+        self.tmp_dir.cleanup()
+
+    def start_worker(self, port):
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "cluster.py"), "worker",
+                                    "--port", str(port), "--processes", "1",
+                                    "--reports-dir", os.path.join(self.tmp_dir.name, f"reports{len(self.workers)}")],
+                                   cwd=self.tmp_dir.name, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.workers.append(process)
+
+    def run_coordinator(self, coordinator):
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(coordinator.run(timeout=60)))
+        thread.start()
+        return thread, results
+
+    def test_two_workers(self):
+        coordinator = Coordinator(self.file_paths, port=0)
+        thread, results = self.run_coordinator(coordinator)
+        for _ in range(2):
+            self.start_worker(coordinator.address[1])
+        thread.join()
+        self.assertEqual([r["file_path"] for r in results], self.file_paths)
+        for result in results:
+            self.assertIn("structure", result["results"])
+
+    def test_duplicate_content_checked_once(self):
+        with open(self.file_paths[0], "rb") as f:
+            data = f.read()
+        copy_path = os.path.join(self.tmp_dir.name, "copy.docx")
+        with open(copy_path, "wb") as f:
+            f.write(data)
+        coordinator = Coordinator([self.file_paths[0], copy_path], port=0)
+        self.assertEqual(len(coordinator._pending), 1)
+        thread, results = self.run_coordinator(coordinator)
+        self.start_worker(coordinator.address[1])
+        thread.join()
+        self.assertEqual(results[1]["file_path"], copy_path)
+        self.assertEqual(results[0]["results"], results[1]["results"])
+
+    def test_lost_worker_tasks_are_redispatched(self):
+        coordinator = Coordinator(self.file_paths, port=0, heartbeat_timeout=1.0)
+        thread, results = self.run_coordinator(coordinator)
+        # Узел получает задачи и замолкает, не присылая ни результатов, ни heartbeat
+        silent = socket.create_connection(coordinator.address)
+        send_message(silent, {"type": "hello", "slots": 2})
+        stream = silent.makefile("rb")
+        message, _ = recv_message(stream)
+        self.assertEqual(message["type"], "task")
+        self.start_worker(coordinator.address[1])
+        thread.join()
+        silent.close()
+        self.assertTrue(all(r is not None and "structure" in r["results"] for r in results))
+
+    def test_unreadable_document_does_not_drop_workers(self):
+        coordinator = Coordinator(self.file_paths[:2], port=0, share_paths=False)
+        # Файл удалён после вычисления хеша: узел запросит содержимое, которое уже не прочитать
+        os.remove(self.file_paths[0])
+        thread, results = self.run_coordinator(coordinator)
+        self.start_worker(coordinator.address[1])
+        thread.join()
+        self.assertIn("Не удалось прочитать файл", results[0]["results"]["error"][0])
+        self.assertIn("structure", results[1]["results"])
+
+    def test_requeues_are_limited(self):
+        coordinator = Coordinator(self.file_paths[:1], port=0, max_attempts=2)
+        thread, results = self.run_coordinator(coordinator)
+        # Каждый узел получает документ и сразу отключается
+        for _ in range(2):
+            with socket.create_connection(coordinator.address) as sock:
+                send_message(sock, {"type": "hello", "slots": 1})
+                with sock.makefile("rb") as stream:
+                    message, _ = recv_message(stream)
+                self.assertEqual(message["type"], "task")
+        thread.join()
+        self.assertIn("рабочие узлы потеряны 2 раз", results[0]["results"]["error"][0])
+
+    def test_shared_path_is_not_required(self):
+        coordinator = Coordinator(self.file_paths[:1], port=0, share_paths=False)
+        thread, results = self.run_coordinator(coordinator)
+        self.start_worker(coordinator.address[1])
+        thread.join()
+        self.assertIn("structure", results[0]["results"])
+
+    def test_archive_members(self):
+        archive_path = os.path.join(self.tmp_dir.name, "bundle.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for path in self.file_paths[:2]:
+                archive.write(path, os.path.basename(path))
+        keys = expand_archives([archive_path])
+        coordinator = Coordinator(keys, port=0)
+        thread, results = self.run_coordinator(coordinator)
+        self.start_worker(coordinator.address[1])
+        thread.join()
+        self.assertEqual([r["file_path"] for r in results], keys)
+        self.assertTrue(all("structure" in r["results"] for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
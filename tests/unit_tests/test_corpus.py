@@ -0,0 +1,88 @@
+import io
+import os
+import time
+import zipfile
+import tempfile
+import unittest
+from collections import Counter
+from docx import Document
+from main import build_template
+from tests.benchmarks.corpus import CorpusGenerator, generate_corpus
+
+SPEC = {"pages": 6, "chapters": 2, "tables": 3, "figures": 2, "references": 6, "citations": 8, "footnotes": 2,
+        "appendices": 2, "error_rate": 0.0}
+
+
+class TestCorpus(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.generator = CorpusGenerator()
+        cls.template = build_template()
+
+    def findings(self, data):
+        """Количество нарушений каждого правила (проверка, правило) в документе data."""
+        doc = Document(io.BytesIO(data))
+        counts = Counter()
+        for key, params_attr, _ in self.template.CHECKS:
+            params = getattr(self.template, params_attr)
+            check = self.template.get_check(key)
+            found = check.check(doc, data, params) if key == "formatting" else check.check(doc, params)
+            counts.update((finding.check, finding.rule) for finding in found)
+        return counts
+
+    def test_document_features(self):
+        data = self.generator.build(SPEC, seed=3)
+        self.assertIsNone(zipfile.ZipFile(io.BytesIO(data)).testzip())
+        doc = Document(io.BytesIO(data))
+        texts = [p.text for p in doc.paragraphs]
+        self.assertEqual(len(doc.tables), 3)
+        self.assertEqual(len(doc.inline_shapes), 2)
+        self.assertIn("Табл. 3", "\n".join(texts))
+        self.assertIn("Приложение 2", texts)
+        self.assertEqual(sum(p.style.name == "Heading 1" and p.text.startswith("ГЛАВА") for p in doc.paragraphs), 2)
+        # Стили, нумерация и колонтитулы образца переносятся в документ
+        self.assertIn("Heading 2", [style.name for style in doc.styles])
+        self.assertIsNotNone(doc.part.numbering_part)
+        self.assertTrue(doc.sections[0].footer.paragraphs)
+
+    def test_deterministic(self):
+        self.assertEqual(self.generator.build(SPEC, seed=5), self.generator.build(SPEC, seed=5))
+        self.assertNotEqual(self.generator.build(SPEC, seed=5), self.generator.build(SPEC, seed=6))
+
+    def test_error_free_document(self):
+        counts = self.findings(self.generator.build(SPEC, seed=1))
+        for check in ("page_params", "references", "illustrations"):
+            self.assertFalse([rule for rule in counts if rule[0] == check], check)
+        self.assertNotIn(("formatting", "font"), counts)
+        self.assertNotIn(("formatting", "font_size"), counts)
+
+    def test_injected_errors_are_detected(self):
+        clean = self.findings(self.generator.build(SPEC, seed=1))
+        for kind, rule in [("reference", ("references", "entry_format")),
+                           ("citation", ("references", "citation_format")),
+                           ("caption", ("illustrations", "caption_format")),
+                           ("numbering", ("illustrations", "numbering")),
+                           ("margins", ("page_params", "margin_left")),
+                           ("font", ("formatting", "font")),
+                           ("footnote", ("formatting", "font_size")),
+                           ("heading", ("structure", "heading_period"))]:
+            with self.subTest(kind=kind):
+                counts = self.findings(self.generator.build(dict(SPEC, errors={kind: 1.0}), seed=1))
+                self.assertGreater(counts[rule], clean[rule])
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            start = time.perf_counter()
+            paths = generate_corpus(tmp_dir, 50, dict(SPEC, pages=60), seed=2, generator=self.generator)
+            elapsed = time.perf_counter() - start
+            self.assertEqual(len(paths), 50)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), [os.path.basename(path) for path in paths])
+            sizes = {os.path.getsize(path) for path in paths}
+            self.assertGreater(len(sizes), 1)
+        # Десятки документов по 60 страниц собираются быстрее, чем python-docx создаёт один
+        self.assertLess(elapsed, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+import tempfile
+from docx import Document
+from utils.cost_model import CostModel, EtaTracker, plan_chunks
+
+
+class TestCostModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.small_file = os.path.join(self.tmp_dir.name, "small.docx")
+        self.large_file = os.path.join(self.tmp_dir.name, "large.docx")
+        for path, count in ((self.small_file, 5), (self.large_file, 300)):
+            doc = Document()
+            for i in range(count):
+                doc.add_paragraph(f"Параграф {i} с обычным текстом для оценки стоимости")
+            doc.save(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_document_features(self):
+        features = CostModel.document_features(self.large_file)
+        self.assertGreater(features["xml_uncompressed"], features["xml_compressed"])
+        self.assertEqual(features["archive_size"], os.path.getsize(self.large_file))
+
+    def test_larger_document_costs_more(self):
+        model = CostModel()
+        small = model.estimate(model.document_features(self.small_file))
+        large = model.estimate(model.document_features(self.large_file))
+        self.assertGreater(large, small)
+
+    def test_missing_file_gets_minimal_cost(self):
+        model = CostModel()
+        features = model.document_features(os.path.join(self.tmp_dir.name, "missing.docx"))
+        self.assertEqual(model.estimate(features), CostModel.MIN_COST)
+
+    def test_observe_and_history(self):
+        history_file = os.path.join(self.tmp_dir.name, "history.json")
+        model = CostModel(history_file)
+        features = model.document_features(self.large_file)
+        before = model.estimate_checks(features)["structure"]
+        model.observe(features, {"structure": before * 10})
+        model.save()
+
+        reloaded = CostModel(history_file)
+        self.assertGreater(reloaded.estimate_checks(features)["structure"], before)
+
+
+class TestScheduling(unittest.TestCase):
+
+    def test_plan_chunks_longest_first(self):
+        costs = [1.0, 50.0, 0.5, 0.5, 20.0, 0.5]
+        chunks = plan_chunks(costs, num_workers=2)
+        self.assertEqual(chunks[0], [1])
+        self.assertEqual(chunks[1], [4])
+        self.assertEqual(sorted(i for chunk in chunks for i in chunk), list(range(len(costs))))
+
+    def test_eta_uses_observed_pace(self):
+        tracker = EtaTracker([10.0, 10.0, 10.0, 10.0], num_workers=2)
+        self.assertEqual(tracker.eta(), 20.0)
+        tracker.complete(0, 20.0)  # Фактически обработка идёт в два раза медленнее оценки
+        self.assertEqual(tracker.eta(), 30.0)
+        for key in (1, 2, 3):
+            tracker.complete(key, 10.0)
+        self.assertEqual(tracker.eta(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from docx import Document
+from modules.findings import Finding
+from tests.benchmarks.corpus import CorpusGenerator
+from tests.benchmarks.differential import (ReferenceEngine, PoolEngine, load_engine, diff_findings, compare_corpus,
+                                           ddmin, minimize, main)
+
+SPEC = {"pages": 4, "chapters": 2, "tables": 1, "figures": 1, "references": 4, "citations": 4, "footnotes": 1,
+        "appendices": 1, "error_rate": 0.0, "errors": {"heading": 1.0}}
+
+
+class DroppingEngine(ReferenceEngine):
+    """Быстрый режим с ошибкой: теряет записи о точке в конце заголовка."""
+
+    name = "dropping"
+
+    def run(self, name, data):
+        results = super().run(name, data)
+        results["structure"] = [f for f in results["structure"] if f.rule != "heading_period"]
+        return results
+
+
+class TestDifferential(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        generator = CorpusGenerator()
+        cls.documents = [(f"thesis_{seed}.docx", generator.build(SPEC, seed=seed)) for seed in range(3)]
+
+    def test_diff_findings(self):
+        a = Finding("tables", "numbering", 1, "2", "1")
+        b = Finding("structure", "heading_case", 4, "Введение")
+        c = Finding("structure", "heading_case", 9, "Глава")
+        differences = diff_findings({"tables": [a, a], "structure": [b]},
+                                    {"tables": [a], "structure": [c, b], "error": ["Ошибка"]})
+        self.assertEqual(list(differences), ["error.message", "structure.heading_case", "tables.numbering"])
+        self.assertEqual(differences["tables.numbering"], {"missing": [a], "extra": []})
+        self.assertEqual(differences["structure.heading_case"], {"missing": [], "extra": [c]})
+        self.assertEqual(diff_findings({"tables": [a, b]}, {"tables": [b, a]}), {})
+
+    def test_ddmin(self):
+        tests = []
+
+        def test(items):
+            tests.append(items)
+            return 3 in items and 17 in items
+
+        self.assertEqual(ddmin(list(range(40)), test), [3, 17])
+        self.assertLess(len(tests), 100)
+        self.assertEqual(ddmin(list(range(10)), lambda items: True), [])
+
+    def test_reference_is_deterministic(self):
+        report = compare_corpus(self.documents, ReferenceEngine(), ReferenceEngine())
+        self.assertEqual(report["differing_documents"], 0)
+        self.assertGreater(report["rules"]["structure.heading_period"]["reference"], 0)
+        self.assertGreater(report["speedup"], 0)
+
+    def test_pool_matches_reference(self):
+        with load_engine("pool", workers=2) as candidate:
+            self.assertIsInstance(candidate, PoolEngine)
+            reference = ReferenceEngine(aggregate_findings=True,
+                                        max_findings_per_rule=candidate.max_findings_per_rule)
+            report = compare_corpus(self.documents, reference, candidate)
+        self.assertEqual(report["differing_documents"], 0, report["documents"])
+        self.assertEqual(len(report["documents"]), 3)
+
+    def test_differences_are_reported(self):
+        report = compare_corpus(self.documents, ReferenceEngine(), DroppingEngine())
+        self.assertEqual(report["differing_documents"], 3)
+        summary = report["rules"]["structure.heading_period"]
+        self.assertEqual(summary["candidate"], 0)
+        self.assertEqual(summary["missing"], summary["reference"])
+        self.assertEqual([rule for rule, s in report["rules"].items() if s["missing"] or s["extra"]],
+                         ["structure.heading_period"])
+        for document in report["documents"]:
+            missing = document["differences"]["structure.heading_period"]["missing"]
+            self.assertTrue(all(finding.actual.endswith(".") for finding in missing))
+
+    def test_minimize(self):
+        name, data = self.documents[0]
+        result = minimize(name, data, ReferenceEngine(), DroppingEngine())
+        self.assertEqual(result["rule"], "structure.heading_period")
+        self.assertGreater(result["blocks_before"], 20)
+        # Остаётся один заголовок с точкой в конце
+        self.assertEqual(result["blocks_after"], 1)
+        paragraphs = [p for p in Document(io.BytesIO(result["data"])).paragraphs]
+        self.assertEqual(len(paragraphs), 1)
+        self.assertTrue(paragraphs[0].text.endswith("."))
+        self.assertIn("w:pStyle", result["fragment"])
+        self.assertIsNone(minimize(name, data, ReferenceEngine(), ReferenceEngine()))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "diff.json")
+            minimized = os.path.join(tmp_dir, "minimized")
+            corpus = os.path.join(tmp_dir, "corpus")
+            os.makedirs(corpus)
+            name, data = self.documents[0]
+            with open(os.path.join(corpus, name), "wb") as f:
+                f.write(data)
+            code = main(["--candidate", "tests.unit_tests.test_differential:DroppingEngine", "--corpus", corpus,
+                         "--minimize", minimized, "--output", output])
+            self.assertEqual(code, 1)
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+            self.assertEqual(report["candidate"], "dropping")
+            self.assertEqual(report["differing_documents"], 1)
+            self.assertEqual(len(os.listdir(minimized)), 1)
+            self.assertEqual(next(iter(report["minimized"].values()))["blocks_after"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import pickle
+import unittest
+from modules.findings import Finding, MESSAGES, to_json, from_json, to_api_json, aggregate
+
+
+class TestFinding(unittest.TestCase):
+
+    def test_renders_message(self):
+        finding = Finding("formatting", "font_size", ("paragraph", 12), 16.0, 14)
+        self.assertEqual(str(finding), "Параграф 12: Размер шрифта 16.0 pt, ожидается 14 pt")
+        finding = Finding("formatting", "font", ("table_cell", 1, 2, 3, 1), "Arial", "Times New Roman")
+        self.assertEqual(str(finding),
+                         "Таблица 1, ячейка (2, 3), параграф 1: Используется шрифт Arial, ожидается Times New Roman")
+        finding = Finding("page_params", "margin_left", 1, 2.5, [3, 0.1])
+        self.assertEqual(str(finding), "Секция 1: Поле слева (2.50 см) не соответствует ожидаемому (3 см ± 0.1 см)")
+
+    def test_compares_with_message(self):
+        finding = Finding("structure", "heading_case", 3, "Введение")
+        message = "Заголовок 'Введение' (параграф 3) должен быть в верхнем регистре"
+        self.assertEqual(finding, message)
+        self.assertIn(message, [finding])
+        self.assertIn("верхнем регистре", finding)
+        self.assertNotEqual(finding, "Заголовок 'Введение' (параграф 4) должен быть в верхнем регистре")
+        self.assertEqual(len({finding, Finding("structure", "heading_case", 3, "Введение")}), 1)
+
+    def test_unknown_rule(self):
+        self.assertEqual(str(Finding("structure", "unknown", 1, "a", "b")), "structure.unknown: 1, a, b")
+
+    def test_pickle(self):
+        findings = [Finding("formatting", "font_size", ("paragraph", i), 16.0, 14) for i in range(1000)]
+        restored = pickle.loads(pickle.dumps(findings))
+        self.assertEqual(restored, findings)
+        messages = [str(f) for f in findings]
+        self.assertLess(len(pickle.dumps(findings)), len(pickle.dumps(messages)))
+
+    def test_json_round_trip(self):
+        results = {"structure": [Finding("structure", "section_order", actual=["Введение", "Оглавление"],
+                                         expected=["Оглавление", "Введение"])],
+                   "tables": [Finding("tables", "title_case", ("1", 5), "таблица")],
+                   "error": ["Файл не найден: a.docx"]}
+        restored = json.loads(json.dumps(results, default=to_json), object_hook=from_json)
+        self.assertEqual(restored, results)
+        self.assertEqual([str(f) for f in restored["tables"]], [str(f) for f in results["tables"]])
+
+    def test_api_json(self):
+        finding = Finding("tables", "caption_missing", 2)
+        payload = json.loads(json.dumps({"tables": [finding]}, default=to_api_json))
+        self.assertEqual(payload["tables"][0]["rule"], "caption_missing")
+        self.assertEqual(payload["tables"][0]["message"], "Таблица 2: Отсутствует заголовок перед таблицей")
+
+    def test_catalog_templates_are_valid(self):
+        for check, rules in MESSAGES.items():
+            for rule, template in rules.items():
+                with self.subTest(check=check, rule=rule):
+                    self.assertIsInstance(template, str)
+                    self.assertNotIn("{}", template)
+
+
+class TestAggregate(unittest.TestCase):
+
+    @staticmethod
+    def font(paragraph, font="Arial"):
+        return Finding("formatting", "font", ("paragraph", paragraph), font, "Times New Roman")
+
+    def test_collapses_contiguous_paragraphs(self):
+        findings = [self.font(i) for i in range(5, 813)] + [self.font(812), self.font(900)]
+        result = aggregate(findings)
+        self.assertEqual([str(f) for f in result], [
+            "Параграфы 5–812: Используется шрифт Arial, ожидается Times New Roman",
+            "Параграф 900: Используется шрифт Arial, ожидается Times New Roman"])
+
+    def test_blank_paragraphs_do_not_break_range(self):
+        findings = [self.font(1), self.font(3), self.font(5), self.font(7)]
+        self.assertEqual(len(aggregate(findings)), 4)
+        result = aggregate(findings, blank=lambda: {2, 4})
+        self.assertEqual([f.loc for f in result], [("paragraphs", 1, 5), ("paragraph", 7)])
+
+    def test_groups_by_values_and_keeps_order(self):
+        findings = [self.font(1), Finding("formatting", "font_size", ("paragraph", 1), 16.0, 14), self.font(2),
+                    self.font(3, "Calibri"), Finding("formatting", "font_size", ("paragraph", 2), 16.0, 14),
+                    "ошибка"]
+        result = aggregate(findings)
+        self.assertEqual(result, [
+            "Параграфы 1–2: Используется шрифт Arial, ожидается Times New Roman",
+            "Параграфы 1–2: Размер шрифта 16.0 pt, ожидается 14 pt",
+            "Параграф 3: Используется шрифт Calibri, ожидается Times New Roman",
+            "ошибка"])
+
+    def test_cap_per_rule(self):
+        findings = [self.font(i) for i in range(1, 20, 2)] + [Finding("formatting", "font_color", ("paragraph", 1))]
+        result = aggregate(findings, max_per_rule=3)
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result[3].rule, "font_color")
+        self.assertEqual(str(result[4]),
+                         "Правило formatting.font: ещё 7 однотипных нарушений не показано (не более 3 на правило)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import pytest
+from io import BytesIO
 from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -122,3 +123,11 @@ def test_empty_document(formatting_check):
     doc.save(file_path)
     errors = formatting_check.check(doc, file_path, {"font": "Times New Roman"})
     assert len(errors) == 0
+
+# Тест 11: Документ, переданный из памяти (содержимое файла вместо пути)
+def test_document_from_bytes(formatting_check):
+    doc = create_test_document(font="Arial")
+    buffer = BytesIO()
+    doc.save(buffer)
+    errors = formatting_check.check(Document(BytesIO(buffer.getvalue())), buffer.getvalue())
+    assert any("Используется шрифт Arial, ожидается Times New Roman" in error for error in errors)
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from docx import Document
+from main import process_multiple_files, rejected_result, timeout_result
+from utils.journal import BatchJournal
+
+
+class TestBatchJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmp_dir.name, "journal.sqlite")
+        self.file_path = os.path.join(self.tmp_dir.name, "doc.docx")
+        with open(self.file_path, 'wb') as f:
+            f.write("содержимое документа".encode("utf-8"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_file_hash(self):
+        self.assertEqual(len(BatchJournal.file_hash(self.file_path)), 64)
+        self.assertIsNone(BatchJournal.file_hash(os.path.join(self.tmp_dir.name, "missing.docx")))
+
+    def test_record_survives_reopen(self):
+        content_hash = BatchJournal.file_hash(self.file_path)
+        result = {"file_path": self.file_path, "results": {"structure": []}, "time": 0.5}
+        with BatchJournal(self.journal_path) as journal:
+            journal.record(content_hash, result, report_path="reports/report_check_file_0.md")
+
+        with BatchJournal(self.journal_path) as journal:
+            self.assertEqual(journal.get_result(content_hash), result)
+            self.assertEqual(journal.summary(), {"ok": 1})
+            self.assertEqual(journal.entries()[0]["report_path"], "reports/report_check_file_0.md")
+
+    def test_statuses(self):
+        with BatchJournal(self.journal_path) as journal:
+            journal.record("a", {"file_path": "a.docx", "results": {"error": ["ошибка"]}, "time": 0.0})
+            journal.record("b", {"file_path": "b.docx", "results": {"error": ["срок"]}, "time": 1.0,
+                                 "timed_out": True})
+            self.assertEqual(journal.summary(), {"error": 1, "timeout": 1})
+            self.assertEqual([e["file_path"] for e in journal.entries(status="timeout")], ["b.docx"])
+            journal.record("c", rejected_result("c.docx", ["слишком много абзацев"]))
+            self.assertEqual(journal.summary(), {"error": 1, "timeout": 1, "rejected": 1})
+            self.assertIsNone(journal.get_result("a", statuses=BatchJournal.REUSABLE_STATUSES))
+            self.assertIsNone(journal.get_result("b", statuses=BatchJournal.REUSABLE_STATUSES))
+            self.assertTrue(journal.get_result("c", statuses=BatchJournal.REUSABLE_STATUSES)["rejected"])
+
+    def test_resume_retries_failed_entries(self):
+        paths = []
+        for name in ("ok", "crashed", "timed_out"):
+            doc = Document()
+            doc.add_heading("Введение", level=1)
+            doc.add_paragraph(f"Документ {name}")
+            paths.append(os.path.join(self.tmp_dir.name, f"{name}.docx"))
+            doc.save(paths[-1])
+        reports_dir = os.path.join(self.tmp_dir.name, "reports")
+        os.makedirs(reports_dir)
+        stored = {"file_path": paths[0], "results": {"structure": []}, "time": 0.5}
+        with BatchJournal(self.journal_path) as journal:
+            journal.record(BatchJournal.file_hash(paths[0]), stored)
+            journal.record(BatchJournal.file_hash(paths[1]),
+                           {"file_path": paths[1], "time": 0.0, "results": {"error": [
+                               "Ошибка при обработке файла: Процесс пула завершился аварийно (код -9)"]}})
+            journal.record(BatchJournal.file_hash(paths[2]), timeout_result(paths[2], 60))
+
+            results = process_multiple_files(paths, reports_dir, num_processes=1, journal=journal, resume=True)
+
+            # Успешный результат взят из журнала, файлы со сбоем и превышением срока обработаны заново
+            self.assertEqual(results[0]["time"], 0.5)
+            for result in results[1:]:
+                self.assertNotIn("error", result["results"])
+                self.assertIn("structure", result["results"])
+            self.assertEqual(journal.summary(), {"ok": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
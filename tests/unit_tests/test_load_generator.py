@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from tests.load_test.load_generator import load_corpus, run_closed, run_open, csv_rows, distribution, CSV_FIELDS
+from tests.benchmarks.corpus import generate_corpus
+
+
+class TestLoadGenerator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generate_corpus(tmp_dir, 3, {"pages": 1, "tables": 1, "figures": 1, "references": 3, "citations": 2,
+                                         "appendices": 1}, seed=4)
+            cls.documents = load_corpus(tmp_dir)
+
+    def check_run(self, run):
+        self.assertGreater(run["documents"], 0)
+        self.assertEqual(run["statuses"], {"ok": run["documents"]})
+        self.assertGreater(run["throughput"], 0)
+        for key in ("latency", "queue_wait", "service"):
+            self.assertLessEqual(run[key]["p50"], run[key]["p95"])
+            self.assertLessEqual(run[key]["p95"], run[key]["p99"])
+        # Задержка складывается из ожидания в очереди, обработки и передачи результата
+        self.assertGreaterEqual(run["latency"]["max"], run["service"]["max"])
+        self.assertEqual(sum(process["documents"] for process in run["processes"]), run["documents"])
+        for process in run["processes"]:
+            self.assertGreater(process["cpu_seconds"], 0)
+            self.assertGreater(process["rss_peak"], 0)
+
+    def test_load_corpus(self):
+        self.assertEqual(len(self.documents), 3)
+        name, data, memory = self.documents[0]
+        self.assertTrue(name.endswith(".docx"))
+        self.assertTrue(data.startswith(b"PK"))
+        self.assertGreater(memory, 0)
+
+    def test_closed_loop(self):
+        runs = run_closed(self.documents, [1], duration=1.0)
+        self.assertEqual(len(runs), 1)
+        self.check_run(runs[0])
+        self.assertEqual(runs[0]["speedup"], 1.0)
+        rows = list(csv_rows(runs))
+        self.assertEqual(list(rows[0]), CSV_FIELDS)
+        self.assertEqual(rows[0]["latency_p95"], runs[0]["latency"]["p95"])
+
+    def test_open_loop(self):
+        runs = run_open(self.documents, 1, [4.0], duration=1.0, seed=1)
+        self.check_run(runs[0])
+        self.assertEqual(runs[0]["rate"], 4.0)
+        self.assertEqual(runs[0]["rejected"], 0)
+
+    def test_open_loop_rejects_over_capacity(self):
+        runs = run_open(self.documents, 1, [50.0], duration=0.5, max_outstanding=2, seed=1)
+        self.assertGreater(runs[0]["rejected"], 0)
+        # Отклонённые документы не попадают в очередь, а принятые проверяются полностью
+        self.assertEqual(runs[0]["statuses"], {"ok": runs[0]["documents"]})
+
+    def test_distribution(self):
+        self.assertIsNone(distribution([]))
+        stats = distribution([1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(stats["mean"], 2.5)
+        self.assertEqual(stats["max"], 4.0)
+        self.assertEqual(stats["p50"], 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
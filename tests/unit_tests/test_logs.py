@@ -0,0 +1,94 @@
+import os
+import logging
+import tempfile
+import unittest
+from utils import logs
+from utils.logs import RateLimitFilter, resolve_level, setup_logging, shutdown_logging
+from utils.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+def log_in_worker(index):
+    logger.info("Сообщение процесса пула %s", index)
+    logger.debug("Отладочное сообщение %s", index)
+    return os.getpid()
+
+
+def record(msg, created, level=logging.DEBUG, name=__name__):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    record.created = created
+    return record
+
+
+class TestLogs(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = root.handlers[:], root.level
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        shutdown_logging()
+        root = logging.getLogger()
+        root.handlers[:], level = self.saved
+        root.setLevel(level)
+        self.tmp_dir.cleanup()
+
+    def test_resolve_level(self):
+        self.assertEqual(resolve_level("debug"), logging.DEBUG)
+        self.assertEqual(resolve_level(logging.WARNING), logging.WARNING)
+        with self.assertRaises(ValueError):
+            resolve_level("verbose")
+
+    def test_rate_limit(self):
+        rate_limit = RateLimitFilter(limit=3, interval=10, loggers=(__name__,))
+        passed = [rate_limit.filter(record("Параграф %s", 100 + i)) for i in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        # Другой шаблон и предупреждения не ограничиваются
+        self.assertTrue(rate_limit.filter(record("Другое сообщение %s", 101)))
+        self.assertTrue(rate_limit.filter(record("Параграф %s", 102, logging.WARNING)))
+        with self.assertLogs(__name__, logging.DEBUG) as captured:
+            self.assertTrue(rate_limit.filter(record("Параграф %s", 111)))
+        self.assertIn("Однотипных сообщений скрыто: 7", captured.output[0])
+
+    def test_rate_limit_only_checks(self):
+        rate_limit = RateLimitFilter(limit=3, interval=10)
+        # Сообщения о каждом документе не ограничиваются, сообщения проверок по абзацам — ограничиваются
+        for name in ("main", "modules.template"):
+            self.assertTrue(all(rate_limit.filter(record("Файл %s обработан", 100 + i, logging.INFO, name))
+                                for i in range(10)))
+        passed = [rate_limit.filter(record("Неверный формат ссылки: %s", 100 + i, name="modules.references"))
+                  for i in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+
+    def test_suppressed_count_flushed_on_shutdown(self):
+        log_file = os.path.join(self.tmp_dir.name, "processing.log")
+        setup_logging("DEBUG", log_file, console=False)
+        check_logger = logging.getLogger("modules.references")
+        for i in range(logs.DEFAULT_RATE_LIMIT + 5):
+            check_logger.debug("Неверный формат ссылки: %s", i)
+        shutdown_logging()
+        with open(log_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len([line for line in lines if "Неверный формат ссылки" in line]),
+                         logs.DEFAULT_RATE_LIMIT + 1)
+        self.assertIn("Однотипных сообщений скрыто: 5", lines[-1])
+
+    def test_workers_write_through_parent(self):
+        log_file = os.path.join(self.tmp_dir.name, "processing.log")
+        setup_logging("INFO", log_file, console=False)
+        self.assertIsInstance(logs.worker_log_config()[1], int)
+        with WorkerPool(log_in_worker, 2, max_tasks_per_worker=1) as pool:
+            pids = [pool.submit(i).result(timeout=60) for i in range(4)]
+        shutdown_logging()
+        self.assertNotIn(os.getpid(), pids)
+        with open(log_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        messages = sorted(line.split(" - ")[-1] for line in lines if "процесса пула" in line)
+        self.assertEqual(messages, [f"Сообщение процесса пула {i}" for i in range(4)])
+        self.assertFalse([line for line in lines if "Отладочное" in line])
+
+
+if __name__ == "__main__":
+    unittest.main()
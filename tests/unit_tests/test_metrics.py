@@ -0,0 +1,116 @@
+import os
+import time
+import tempfile
+import unittest
+from urllib.request import urlopen
+from docx import Document
+from main import process_multiple_files
+from modules.findings import Finding
+from utils import metrics
+from utils.metrics import Registry, start_http_server, write_textfile
+from utils.worker_pool import WorkerPool
+
+
+def sleep_task(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def sample_value(text, sample):
+    """Значение строки метрики sample (имя с метками) из текстового формата."""
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def scrape(self, server):
+        with urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=30) as response:
+            self.assertEqual(response.headers["Content-Type"], metrics.CONTENT_TYPE)
+            return response.read().decode("utf-8")
+
+    def test_exposition_format(self):
+        registry = Registry()
+        requests = registry.counter("test_requests_total", "Запросы", ["path"])
+        latency = registry.histogram("test_latency_seconds", "Время", buckets=(0.1, 1))
+        requests.inc(path='a"b')
+        requests.inc(2, path="/x")
+        for value in (0.05, 0.5, 3):
+            latency.observe(value)
+        text = registry.render()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{path="/x"} 2', text)
+        self.assertIn('test_requests_total{path="a\\"b"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_sum 3.55", text)
+        self.assertIn("test_latency_seconds_count 3", text)
+        with self.assertRaises(ValueError):
+            requests.inc(method="GET")
+        with self.assertRaises(ValueError):
+            registry.counter("test_requests_total", "Повтор")
+
+    def test_observe_result(self):
+        before = metrics.FINDINGS.value(check="tables")
+        failed = metrics.CHECK_ERRORS.value(check="structure", reason="failed")
+        metrics.observe_result({
+            "file_path": "a.docx", "time": 1.5, "check_times": {"tables": 0.2},
+            "results": {"tables": [Finding("tables", "no_caption", 1), Finding("template", "capped", "tables.x", 9, 5)],
+                        "structure": [Finding("template", "failed", "structure", "ошибка")]}})
+        self.assertEqual(metrics.FINDINGS.value(check="tables"), before + 1)
+        self.assertEqual(metrics.CHECK_ERRORS.value(check="structure", reason="failed"), failed + 1)
+        rejected = metrics.DOCUMENTS.value(status="rejected")
+        metrics.observe_result({"file_path": "b.docx", "results": {"error": ["слишком большой"]}, "time": 0.0,
+                                "rejected": True})
+        self.assertEqual(metrics.DOCUMENTS.value(status="rejected"), rejected + 1)
+
+    def test_scrape_batch_and_pool(self):
+        paths = []
+        for i in range(2):
+            doc = Document()
+            doc.add_heading("ВВЕДЕНИЕ", level=1)
+            doc.add_paragraph(f"Текст документа {i}")
+            paths.append(os.path.join(self.tmp_dir.name, f"{i}.docx"))
+            doc.save(paths[-1])
+        server = start_http_server(0)
+        try:
+            ok = sample_value(self.scrape(server), 'vkr_documents_total{status="ok"}') or 0
+            process_multiple_files(paths, os.path.join(self.tmp_dir.name, "reports"), num_processes=2)
+            text = self.scrape(server)
+            self.assertEqual(sample_value(text, 'vkr_documents_total{status="ok"}'), ok + 2)
+            self.assertEqual(sample_value(text, 'vkr_batch_documents{state="completed"}'), 2)
+            self.assertGreaterEqual(sample_value(text, 'vkr_check_duration_seconds_count{check="formatting"}'), 2)
+            self.assertIsNotNone(sample_value(text, "vkr_queue_wait_seconds_count"))
+
+            with WorkerPool(sleep_task, 2, prestart=True) as pool:
+                futures = [pool.submit(1.0) for _ in range(3)]
+                time.sleep(0.5)
+                text = self.scrape(server)
+                self.assertEqual(sample_value(text, "vkr_pool_busy_workers"), 2)
+                self.assertEqual(sample_value(text, "vkr_pool_queue_depth"), 1)
+                self.assertEqual(sample_value(text, "vkr_pool_utilization"), 1)
+                for future in futures:
+                    future.result(timeout=30)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_write_textfile(self):
+        path = os.path.join(self.tmp_dir.name, "vkr.prom")
+        write_textfile(path)
+        with open(path, encoding="utf-8") as f:
+            self.assertIn("# TYPE vkr_documents_total counter", f.read())
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["vkr.prom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
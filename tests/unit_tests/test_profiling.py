@@ -0,0 +1,129 @@
+import os
+import time
+import pstats
+import tempfile
+import unittest
+import tracemalloc
+from docx import Document
+import main
+from main import process_multiple_files
+from utils.profiling import DocumentProfiler, StackSampler, MemoryTracker, LeakDetector, format_memory_summary
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        main.PROFILE_DIR = None
+        main.MEMORY_TOP = None
+        self.tmp_dir.cleanup()
+
+    def make_docx(self, name="a.docx"):
+        doc = Document()
+        doc.add_heading("ВВЕДЕНИЕ", level=1)
+        for i in range(20):
+            doc.add_paragraph(f"Текст параграфа {i}").add_run(" и ещё один прогон")
+        path = os.path.join(self.tmp_dir.name, name)
+        doc.save(path)
+        return path
+
+    def test_sampler_collapsed_stacks(self):
+        with StackSampler(interval=0.001) as sampler:
+            with sampler.label("structure"):
+                busy_loop(0.2)
+            busy_loop(0.05)
+        lines = sampler.collapsed().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("structure;"))
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any("busy_loop" in line for line in lines))
+
+    def test_document_profiler_files(self):
+        with DocumentProfiler(self.tmp_dir.name, "file_3", sample_interval=0.001) as profiler:
+            with profiler.check("tables"):
+                busy_loop(0.05)
+            with profiler.check("appendices"):
+                busy_loop(0.05)
+        names = sorted(os.listdir(self.tmp_dir.name))
+        self.assertEqual(names, ["file_3.appendices.pstats", "file_3.collapsed", "file_3.pstats",
+                                 "file_3.tables.pstats"])
+        stats = pstats.Stats(os.path.join(self.tmp_dir.name, "file_3.pstats"))
+        self.assertTrue(any(func[2] == "busy_loop" for func in stats.stats))
+
+    def test_counters_in_result_and_report(self):
+        path = self.make_docx()
+        reports_dir = os.path.join(self.tmp_dir.name, "reports")
+        profile_dir = os.path.join(self.tmp_dir.name, "profile")
+        result = process_multiple_files([path], reports_dir, num_processes=1, profile_dir=profile_dir)[0]
+        # Форматирование проходит по параграфам дважды: основной текст и приложения
+        self.assertEqual(result["counters"]["formatting"]["paragraphs"], 2 * 21)
+        self.assertEqual(result["counters"]["formatting"]["runs"], 3 * 41)
+        self.assertGreater(result["counters"]["structure"]["regex"], 0)
+        self.assertIn("file_0.formatting.pstats", os.listdir(profile_dir))
+        with open(os.path.join(reports_dir, "report_check_file_0.md"), encoding="utf-8") as f:
+            report = f.read()
+        self.assertIn("## Профиль проверок", report)
+        self.assertIn("| formatting |", report)
+
+    def test_memory_tracker(self):
+        retained = []
+        tracker = MemoryTracker(top=3)
+        tracker.start()
+        temporary = [bytes(1024) for _ in range(4000)]
+        retained.extend(bytes(1024) for _ in range(2000))
+        del temporary
+        memory = tracker.stop()
+        self.assertGreater(memory["peak"], 6000 * 1024)
+        self.assertGreater(memory["retained"], 2000 * 1024)
+        self.assertLess(memory["retained"], 4000 * 1024)
+        self.assertEqual(memory["pid"], os.getpid())
+        self.assertTrue(any("test_profiling.py" in site for site, _, _ in memory["top"]))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_memory_tracker_keeps_external_tracing(self):
+        tracemalloc.start()
+        try:
+            tracker = MemoryTracker()
+            tracker.start()
+            tracker.stop()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_leak_detector(self):
+        detector = LeakDetector(min_samples=10, min_slope=1024 * 1024)
+        for i in range(30):
+            detector.observe({"pid": 1, "started": 1.0, "rss": 100 * 2 ** 20 + i * 2 * 2 ** 20})
+            # Колебания RSS без устойчивого роста и перезапущенный процесс с тем же pid
+            detector.observe({"pid": 2, "started": 1.0, "rss": 100 * 2 ** 20 + (i % 2) * 50 * 2 ** 20})
+            detector.observe({"pid": 1, "started": 2.0, "rss": 100 * 2 ** 20})
+        suspects = detector.suspects()
+        self.assertEqual([(pid, count) for pid, count, _, _ in suspects], [(1, 30)])
+        self.assertAlmostEqual(suspects[0][2], 2 * 2 ** 20)
+
+    def test_memory_profile_in_pool(self):
+        paths = [self.make_docx(f"{i}.docx") for i in range(2)]
+        results = process_multiple_files(paths, os.path.join(self.tmp_dir.name, "reports"), num_processes=2,
+                                         memory_top=2)
+        for result in results:
+            memory = result["memory"]
+            self.assertNotEqual(memory["pid"], os.getpid())
+            self.assertGreater(memory["peak"], 0)
+            self.assertLessEqual(len(memory["top"]), 2)
+        summary = format_memory_summary(results, LeakDetector())
+        self.assertIn("2 документов", summary)
+        self.assertIn("Устойчивого роста RSS", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
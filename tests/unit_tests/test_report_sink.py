@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from docx import Document
+from main import process_multiple_files
+from modules.findings import Finding
+from utils.report_sink import (SQLiteReportSink, JsonlReportSink, open_report_sink, load_report, load_reports,
+                               render_markdown, render_html)
+
+
+def result(file_path, findings):
+    return {"file_path": file_path, "results": {"structure": findings, "tables": []}, "time": 0.1}
+
+
+class TestReportSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sqlite_batches_writes(self):
+        path = os.path.join(self.tmp_dir.name, "reports.sqlite")
+        finding = Finding("structure", "no_headings")
+        with SQLiteReportSink(path, batch_size=3, flush_interval=3600) as sink:
+            sink.write(0, result("a.docx", [finding]))
+            sink.write(1, result("b.docx", []))
+            # Пакет ещё не набран: в базе ничего нет
+            self.assertEqual(load_reports(path), {})
+            sink.write(2, result("c.docx", []))
+            self.assertEqual(len(load_reports(path)), 3)
+            sink.write(3, result("d.docx", []))
+        file_path, results, created_at = load_report(path, 0)
+        self.assertEqual(file_path, "a.docx")
+        self.assertEqual(results["structure"], [finding])
+        self.assertEqual(len(load_reports(path)), 4)
+        self.assertIsNone(load_report(path, 10))
+
+    def test_jsonl_last_record_wins(self):
+        path = os.path.join(self.tmp_dir.name, "reports.jsonl")
+        with JsonlReportSink(path) as sink:
+            sink.write(0, result("a.docx", [Finding("structure", "no_headings")]))
+            sink.write(0, result("a.docx", []))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"file_index": 1, "file_pa')
+        self.assertEqual(load_report(path, 0)[1]["structure"], [])
+        self.assertEqual(list(load_reports(path)), [0])
+
+    def test_render(self):
+        results = {"structure": [Finding("structure", "heading_case", 2, "Введение")], "tables": []}
+        markdown = render_markdown(5, results, 0)
+        self.assertIn("# Отчёт о проверке документа (ID: file_5)", markdown)
+        self.assertIn("- Заголовок 'Введение' (параграф 2) должен быть в верхнем регистре", markdown)
+        self.assertIn("**Общее количество ошибок: 1**", markdown)
+        page = render_html(5, results, 0, "<a>.docx")
+        self.assertIn("&lt;a&gt;.docx", page)
+        self.assertIn("<li>Заголовок &#x27;Введение&#x27; (параграф 2) должен быть в верхнем регистре</li>", page)
+
+    def test_batch_without_markdown_files(self):
+        file_paths = []
+        for name in ("a.docx", "b.docx"):
+            doc = Document()
+            doc.add_paragraph("Введение")
+            file_paths.append(os.path.join(self.tmp_dir.name, name))
+            doc.save(file_paths[-1])
+        reports_dir = os.path.join(self.tmp_dir.name, "reports")
+        os.makedirs(reports_dir)
+        with open_report_sink("sqlite", reports_dir) as sink:
+            results = process_multiple_files(file_paths, reports_dir, num_processes=1, report_sink=sink)
+        self.assertFalse([name for name in os.listdir(reports_dir) if name.endswith(".md")])
+        stored = load_reports(sink.path)
+        self.assertEqual(sorted(stored), [0, 1])
+        self.assertEqual(stored[1][1], results[1]["results"])
+
+
+if __name__ == "__main__":
+    unittest.main()
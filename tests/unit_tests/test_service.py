@@ -0,0 +1,129 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+import main
+from service import CheckService, ServiceBusyError, create_server
+from utils.validation import InputLimits
+from tests.benchmarks.fixtures import docx_bytes
+
+
+class TestCheckService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.service = CheckService(cls.tmp_dir.name, num_workers=1)
+        cls.server = create_server(cls.service, port=0)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+        cls.tmp_dir.cleanup()
+
+    def request(self, method, path, data=None, headers=None):
+        request = Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        try:
+            with urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_upload_and_get_result(self):
+        code, body = self.request("POST", "/jobs", docx_bytes(), {"X-File-Name": quote("диплом.docx")})
+        self.assertEqual(code, 202)
+        code, status = self.request("GET", f"/jobs/{body['job_id']}?wait=30")
+        self.assertEqual(code, 200)
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["file_name"], "диплом.docx")
+        self.assertIn("structure", status["result"]["results"])
+        self.assertIn("formatting", status["result"]["results"])
+        # Результат отдаётся через API: отчёты на каждую задачу не накапливаются в директории
+        self.assertFalse([name for name in os.listdir(self.tmp_dir.name) if name.endswith(".md")])
+
+    def test_rejects_non_docx(self):
+        code, body = self.request("POST", "/jobs", b"plain text")
+        self.assertEqual(code, 400)
+
+    def test_unknown_job(self):
+        code, _ = self.request("GET", "/jobs/unknown")
+        self.assertEqual(code, 404)
+
+    def test_health(self):
+        code, body = self.request("GET", "/health")
+        self.assertEqual(code, 200)
+        self.assertEqual(body["workers"], 1)
+
+    def test_metrics(self):
+        code, body = self.request("POST", "/jobs", docx_bytes(), {"X-File-Name": "metrics.docx"})
+        self.request("GET", f"/jobs/{body['job_id']}?wait=30")
+        with urlopen(self.base_url + "/metrics", timeout=60) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+            text = response.read().decode("utf-8")
+        self.assertIn('vkr_documents_total{status="ok"}', text)
+        self.assertIn('vkr_check_duration_seconds_count{check="structure"}', text)
+        self.assertIn("vkr_pool_workers 1", text)
+
+
+class TestServiceWorkerSettings(unittest.TestCase):
+
+    def test_workers_use_batch_settings(self):
+        limits = InputLimits(max_parts=1)
+        # configure_worker меняет и настройки главного процесса: восстанавливаем их после теста
+        with mock.patch.multiple(main, INPUT_LIMITS=main.INPUT_LIMITS, MAX_FINDINGS_PER_RULE=main.MAX_FINDINGS_PER_RULE,
+                                 PROFILE_DIR=main.PROFILE_DIR, MEMORY_TOP=main.MEMORY_TOP), \
+                tempfile.TemporaryDirectory() as tmp_dir:
+            service = CheckService(tmp_dir, num_workers=1, input_limits=limits)
+            try:
+                self.assertIs(service.pool.initializer, main.configure_worker)
+                self.assertIs(service.pool.initargs[2], limits)
+                status = service.status(service.submit(docx_bytes()), wait_timeout=30)
+            finally:
+                service.close()
+        self.assertTrue(status["result"]["rejected"])
+
+
+class TestServiceQueue(unittest.TestCase):
+
+    def test_max_pending_under_concurrent_submits(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = CheckService(tmp_dir, num_workers=1, max_pending=2)
+            data = docx_bytes()
+            accepted, busy = [], []
+            barrier = threading.Barrier(8)
+
+            def submit():
+                barrier.wait()
+                try:
+                    accepted.append(service.submit(data))
+                except ServiceBusyError:
+                    busy.append(True)
+
+            try:
+                # Задачи не завершаются, поэтому все принятые задачи остаются в очереди
+                with mock.patch.object(service.pool, "submit", side_effect=lambda *args, **kwargs: Future()):
+                    threads = [threading.Thread(target=submit) for _ in range(8)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join(30)
+                self.assertEqual(len(accepted), 2)
+                self.assertEqual(len(busy), 6)
+                self.assertEqual(service.pending_count(), 2)
+            finally:
+                service.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+import subprocess
+import importlib.util
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Бюджет времени импорта в микросекундах (с большим запасом на медленные машины CI)
+MAIN_IMPORT_BUDGET_US = 500_000
+UI_IMPORT_BUDGET_US = 1_500_000
+# Модули, которые не должны загружаться при запуске: они нужны только при разборе или проверке документа
+LAZY_MODULES = ("docx", "lxml", "pdfminer", "odf", "modules.structure", "modules.formatting")
+
+
+def import_times(code):
+    """Запускает интерпретатор с -X importtime и возвращает {модуль: суммарное время импорта в мкс}."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                               capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise AssertionError(completed.stderr)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative.strip())
+    return times
+
+
+class TestStartup(unittest.TestCase):
+
+    def assert_lazy(self, times, modules=LAZY_MODULES):
+        loaded = [name for name in times if name.split(".")[0] in modules or name in modules]
+        self.assertEqual(loaded, [])
+
+    def test_main_import_budget(self):
+        times = import_times("import main")
+        # Пул процессов (и psutil) нужен консольному запуску только для нескольких файлов
+        self.assert_lazy(times, LAZY_MODULES + ("psutil", "utils.worker_pool"))
+        self.assertLess(times["main"], MAIN_IMPORT_BUDGET_US)
+
+    @unittest.skipIf(importlib.util.find_spec("PyQt6") is None, "PyQt6 не установлен")
+    def test_ui_import_budget(self):
+        times = import_times("import ui")
+        self.assert_lazy(times)
+        self.assertLess(times["ui"], UI_IMPORT_BUDGET_US)
+
+    def test_docx_parsing_does_not_load_other_backends(self):
+        times = import_times(
+            "import docx, tempfile, os\n"
+            "from modules.parser import DocumentParser\n"
+            "path = os.path.join(tempfile.mkdtemp(), 'doc.docx')\n"
+            "docx.Document().save(path)\n"
+            "DocumentParser().parse(path)\n")
+        self.assertNotIn("pdfminer", times)
+        self.assertNotIn("odf", times)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from docx import Document
+from modules.template import CheckTemplate
+
+
+class TestCheckTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "doc.docx")
+        doc = Document()
+        doc.add_heading("Введение", level=1)
+        for i in range(20):
+            doc.add_paragraph(f"Параграф {i}, см. таблица 1 и рис. 1")
+        doc.save(self.file_path)
+        self.doc = Document(self.file_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_check_times_recorded(self):
+        template = CheckTemplate()
+        results = template.apply(self.doc, self.file_path)
+        self.assertEqual(set(template.check_times), set(results))
+        self.assertEqual(template.truncated_checks, [])
+
+    def test_check_time_limit_truncates(self):
+        template = CheckTemplate(check_time_limit={"structure": 1e-9})
+        results = template.apply(self.doc, self.file_path)
+        self.assertEqual(template.truncated_checks, ["structure"])
+        self.assertIn("Проверка структуры прервана по превышению лимита времени, результаты неполные",
+                      results["structure"])
+
+    def test_document_time_limit_skips_remaining_checks(self):
+        template = CheckTemplate(document_time_limit=1e-9)
+        results = template.apply(self.doc, self.file_path)
+        self.assertEqual(template.truncated_checks, [key for key, *_ in CheckTemplate.CHECKS])
+        self.assertTrue(all(len(errors) >= 1 for errors in results.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import zipfile
+import tempfile
+import unittest
+from io import BytesIO
+from main import process_file, process_multiple_files
+from modules.parser import DocumentParser
+from utils.validation import InputLimits, InputLimitError, prevalidate, enforce_element_limit
+from tests.benchmarks.fixtures import docx_bytes
+
+
+def rewrite(data, replace=None, extra=None):
+    """Пересобирает архив документа, заменяя или добавляя части."""
+    replace = replace or {}
+    buffer = BytesIO()
+    with zipfile.ZipFile(BytesIO(data)) as source, zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            if info.filename in replace and replace[info.filename] is None:
+                continue
+            target.writestr(info.filename, replace.get(info.filename, source.read(info.filename)))
+        for name, content in (extra or {}).items():
+            target.writestr(name, content)
+    return buffer.getvalue()
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_valid_document(self):
+        self.assertEqual(prevalidate("doc.docx", docx_bytes()), [])
+
+    def test_not_a_zip(self):
+        problems = prevalidate("doc.docx", b"not a zip at all")
+        self.assertTrue(problems[0].startswith("Повреждённый архив"))
+
+    def test_missing_main_document(self):
+        problems = prevalidate("doc.docx", rewrite(docx_bytes(), replace={"word/document.xml": None}))
+        self.assertIn("отсутствует", problems[0])
+
+    def test_zip_bomb_ratio(self):
+        bomb = rewrite(docx_bytes(), extra={"word/media/bomb.bin": b"\0" * (20 * 1024 * 1024)})
+        problems = prevalidate("doc.docx", bomb)
+        self.assertIn("сжата", problems[0])
+
+    def test_limits_are_configurable(self):
+        data = docx_bytes()
+        self.assertTrue(prevalidate("doc.docx", data, InputLimits(max_parts=3)))
+        self.assertTrue(prevalidate("doc.docx", data, InputLimits(max_uncompressed_size=1024)))
+        with self.assertRaises(TypeError):
+            InputLimits(max_unknown=1)
+
+    def test_element_limit_enforced_while_parsing(self):
+        data = docx_bytes(200)
+        self.assertGreater(enforce_element_limit("doc.docx", data), 200)
+        with self.assertRaises(InputLimitError):
+            DocumentParser().parse("doc.docx", data=data, limits=InputLimits(max_elements=100))
+
+    def test_dtd_rejected(self):
+        data = docx_bytes()
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            xml = archive.read("word/document.xml")
+        xml = xml.replace(b"?>", b'?><!DOCTYPE d [<!ENTITY a "aaaa">]>', 1)
+        with self.assertRaises(InputLimitError):
+            enforce_element_limit("doc.docx", rewrite(data, replace={"word/document.xml": xml}))
+
+    def test_rejected_file_does_not_reach_pool(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            good = os.path.join(tmp_dir, "good.docx")
+            bad = os.path.join(tmp_dir, "bad.docx")
+            with open(good, "wb") as f:
+                f.write(docx_bytes())
+            with open(bad, "wb") as f:
+                f.write(b"PK\x03\x04 broken")
+            results = process_multiple_files([good, bad], os.path.join(tmp_dir, "reports"), num_processes=1)
+            self.assertNotIn("error", results[0]["results"])
+            self.assertTrue(results[1]["rejected"])
+            # process_file отклоняет документ и без предварительной проверки в родительском процессе
+            self.assertTrue(process_file((bad, 0, os.path.join(tmp_dir, "reports")))["rejected"])
+
+
+if __name__ == "__main__":
+    unittest.main()
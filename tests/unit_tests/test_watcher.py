@@ -0,0 +1,137 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from watcher import FolderWatcher, InotifyWatcher, PollingWatcher, report_path_for
+from tests.benchmarks.fixtures import docx_bytes
+
+
+class RecordingPool:
+    """Пул, который только запоминает отправленные задачи."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, args, memory=0, timeout=None):
+        self.submitted.append(args)
+        return Future()
+
+
+def inotify_available():
+    try:
+        InotifyWatcher([tempfile.gettempdir()]).close()
+        return True
+    except OSError:
+        return False
+
+
+class TestFolderWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_watcher(self, use_inotify, action, expected_results=1):
+        results = []
+        done = threading.Event()
+
+        def on_result(path, result):
+            results.append((path, result))
+            if len(results) >= expected_results:
+                done.set()
+
+        stop_event = threading.Event()
+        watcher = FolderWatcher([self.directory], settle_time=0.5, num_workers=1, use_inotify=use_inotify,
+                                poll_interval=0.1, on_result=on_result)
+        thread = threading.Thread(target=watcher.run, args=(stop_event,))
+        thread.start()
+        try:
+            time.sleep(0.3)
+            action()
+            done.wait(30)
+            # Даём время на возможную лишнюю повторную проверку
+            time.sleep(1.0)
+        finally:
+            stop_event.set()
+            thread.join(30)
+        return results
+
+    def write_slowly(self, path):
+        data = docx_bytes()
+        with open(path, "wb") as f:
+            f.write(data[:len(data) // 2])
+            f.flush()
+            time.sleep(0.2)  # Меньше settle_time: недописанный файл не должен попасть в проверку
+            f.write(data[len(data) // 2:])
+
+    def check_debounced(self, use_inotify):
+        path = os.path.join(self.directory, "работа.docx")
+        results = self.run_watcher(use_inotify, lambda: self.write_slowly(path))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], path)
+        self.assertIn("structure", results[0][1]["results"])
+        self.assertTrue(os.path.exists(report_path_for(path)))
+
+    def test_polling_debounces_partial_writes(self):
+        self.check_debounced(use_inotify=False)
+
+    @unittest.skipUnless(inotify_available(), "inotify недоступен")
+    def test_inotify_debounces_partial_writes(self):
+        self.check_debounced(use_inotify=True)
+
+    def test_initial_scan_and_unchanged_content(self):
+        path = os.path.join(self.directory, "старая.docx")
+        with open(path, "wb") as f:
+            f.write(docx_bytes())
+        # Повторное сохранение того же содержимого не вызывает повторной проверки
+        results = self.run_watcher(False, lambda: os.utime(path))
+        self.assertEqual(len(results), 1)
+
+    def test_polling_watcher_reports_changes(self):
+        watcher = PollingWatcher([self.directory], poll_interval=0.01)
+        path = os.path.join(self.directory, "a.docx")
+        with open(path, "wb") as f:
+            f.write(b"PK")
+        self.assertEqual(watcher.changes(0.01), {path})
+        self.assertEqual(watcher.changes(0.01), set())
+        os.remove(path)
+        self.assertEqual(watcher.changes(0.01), {path})
+
+    def test_incomplete_file_is_retried(self):
+        path = os.path.join(self.directory, "работа.docx")
+        data = docx_bytes()
+        with open(path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        watcher = FolderWatcher([self.directory], settle_time=1.0)
+        pool = RecordingPool()
+        watcher._note_change(path, 0.0)
+        watcher._submit_settled(pool, 5.0)
+        self.assertEqual(pool.submitted, [])
+        # Файл дописан без нового события наблюдателя: он остаётся кандидатом и проверяется снова
+        with open(path, "wb") as f:
+            f.write(data)
+        for now in (10.0, 12.0):
+            watcher._submit_settled(pool, now)
+        self.assertEqual([args[0] for args in pool.submitted], [path])
+        self.assertEqual(watcher._candidates, {})
+
+    def test_checked_forgets_removed_files(self):
+        path = os.path.join(self.directory, "работа.docx")
+        with open(path, "wb") as f:
+            f.write(docx_bytes())
+        watcher = FolderWatcher([self.directory], settle_time=1.0)
+        watcher._note_change(path, 0.0)
+        watcher._submit_settled(RecordingPool(), 5.0)
+        self.assertIn(path, watcher._checked)
+        os.remove(path)
+        watcher._note_change(path, 6.0)
+        self.assertEqual(watcher._checked, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import time
+import unittest
+from utils.worker_pool import WorkerPool, WorkerCrashedError, TaskTimeoutError, PREFORK_START_METHOD
+
+# Объект, подготовленный в родительском процессе до запуска пула
+WARM_STATE = {}
+
+
+def square(x):
+    return x * x
+
+
+def get_pid(_):
+    return os.getpid()
+
+
+def fail(_):
+    raise ValueError("ошибка в задаче")
+
+
+def crash(_):
+    os._exit(3)
+
+
+def read_warm_state(_):
+    return WARM_STATE.get("template")
+
+
+def busy_interval(delay):
+    start = time.time()
+    time.sleep(delay)
+    return start, time.time()
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def test_results(self):
+        with WorkerPool(square, 2) as pool:
+            futures = [pool.submit(i) for i in range(10)]
+            self.assertEqual([f.result(timeout=30) for f in futures], [i * i for i in range(10)])
+
+    def test_done_callbacks_can_use_pool(self):
+        chained = []
+        with WorkerPool(square, 1) as pool:
+            def resubmit(future):
+                # Обработчик вызывается вне блокировки пула и может ставить новые задачи
+                pool.stats()
+                chained.append(pool.submit(future.result()))
+
+            pool.submit(3).add_done_callback(resubmit)
+            deadline = time.monotonic() + 30
+            while not chained and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(chained[0].result(timeout=30), 81)
+            observed = []
+            pool.submit(0).add_done_callback(lambda future: observed.append(pool.stats()))
+        self.assertEqual(len(observed), 1)
+
+    def test_task_exception(self):
+        with WorkerPool(fail, 1) as pool:
+            future = pool.submit(None)
+            with self.assertRaises(RuntimeError) as ctx:
+                future.result(timeout=30)
+            self.assertIn("ошибка в задаче", str(ctx.exception))
+
+    def test_crashed_worker_is_replaced(self):
+        with WorkerPool(crash, 1) as pool:
+            with self.assertRaises(WorkerCrashedError):
+                pool.submit(None).result(timeout=30)
+        with WorkerPool(square, 1) as pool:
+            self.assertEqual(pool.submit(3).result(timeout=30), 9)
+
+    def test_hard_timeout_kills_worker(self):
+        with WorkerPool(busy_interval, 1) as pool:
+            hung = pool.submit(30, timeout=0.5)
+            quick = pool.submit(0)
+            with self.assertRaises(TaskTimeoutError):
+                hung.result(timeout=30)
+            quick.result(timeout=30)
+        self.assertEqual(pool.timed_out_tasks, 1)
+
+    @unittest.skipUnless(PREFORK_START_METHOD, "fork недоступен на этой платформе")
+    def test_prestarted_workers_inherit_parent_state(self):
+        WARM_STATE["template"] = "скомпилированный шаблон"
+        try:
+            with WorkerPool(read_warm_state, 2, mp_context=PREFORK_START_METHOD, prestart=True) as pool:
+                self.assertEqual(len(pool._idle), 2)
+                self.assertEqual(pool.submit(None).result(timeout=30), "скомпилированный шаблон")
+        finally:
+            WARM_STATE.clear()
+
+    def test_recycle_after_max_tasks(self):
+        with WorkerPool(get_pid, 1, max_tasks_per_worker=2) as pool:
+            pids = [pool.submit(None).result(timeout=30) for _ in range(4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(pool.recycled_workers, 2)
+
+    def test_recycle_on_rss_limit(self):
+        with WorkerPool(get_pid, 1, rss_limit=1) as pool:
+            pids = [pool.submit(None).result(timeout=30) for _ in range(2)]
+        self.assertNotEqual(pids[0], pids[1])
+
+    def test_memory_budget_limits_concurrency(self):
+        # Бюджет позволяет выполнять только одну задачу за раз, несмотря на два процесса
+        with WorkerPool(busy_interval, 2, memory_budget=100) as pool:
+            futures = [pool.submit(0.3, memory=80) for _ in range(2)]
+            (start1, end1), (start2, end2) = [f.result(timeout=30) for f in futures]
+        self.assertTrue(start2 >= end1 or start1 >= end2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,26 +11,25 @@ import queue
 import traceback
 
 # Импортируем вашу существующую логику
-from main import process_file, format_results
+from main import (process_file, format_results, warm_up, timeout_result, COST_HISTORY_FILE,
+                  DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_HARD_TIMEOUT)
+from utils.cost_model import CostModel, EtaTracker
+from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+from utils import metrics
+from utils.logs import setup_logging
 
 # Настройка логирования
 log_queue = queue.Queue()
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 queue_handler = QueueHandler(log_queue)
 queue_handler.setLevel(logging.DEBUG)
 logger.handlers = []  # Удаляем старые обработчики
 logger.addHandler(queue_handler)
 
-# Добавляем логирование в файл для диагностики
-file_handler = logging.FileHandler("debug.log")
-file_handler.setLevel(logging.DEBUG)
-logger.addHandler(file_handler)
-
 def process_file_wrapper(args):
     """Функция-обёртка для обработки одного файла."""
     file_path, file_index, reports_dir = args  # Добавляем reports_dir
-    logger.debug(f"Начало обработки файла: {file_path} (индекс: {file_index})")
+    logger.debug("Начало обработки файла: %s (индекс: %s)", file_path, file_index)
     start_time = time.time()
     result = process_file((file_path, file_index, reports_dir))
     end_time = time.time()
@@ -47,6 +46,7 @@ class ProcessingThread(QThread):
     file_processed = pyqtSignal(dict)  # Сигнал для обработки одного файла
     finished = pyqtSignal(list)  # Сигнал для завершения обработки
     error = pyqtSignal(str)  # Сигнал для ошибок
+    eta = pyqtSignal(float)  # Сигнал с оценкой оставшегося времени в секундах
 
     def __init__(self, file_paths, reports_dir):
         super().__init__()
@@ -65,38 +65,74 @@ class ProcessingThread(QThread):
         try:
             # Определяем количество процессов
             max_workers = min(os.cpu_count() or 1, 8)  # Ограничиваем до 8 процессов
-            logger.debug(f"ProcessingThread: Используется {max_workers} процессов для обработки")
+            logger.debug("ProcessingThread: Используется %s процессов для обработки", max_workers)
 
             results_list = []
             completed_files = 0
 
+            # Оцениваем стоимость файлов, чтобы самые долгие запускались первыми
+            cost_model = CostModel(os.path.join(self.reports_dir, COST_HISTORY_FILE))
+            features = [cost_model.document_features(file_path) for file_path in self.file_paths]
+            costs = [cost_model.estimate(f) for f in features]
+            memory = [cost_model.estimate_memory(f) for f in features]
+            eta_tracker = EtaTracker(costs, max_workers)
+            self.eta.emit(eta_tracker.eta())
+
             # Создаём список задач с индексами и передаём reports_dir
             tasks = [(file_path, i, self.reports_dir) for i, file_path in enumerate(self.file_paths)]
+            tasks.sort(key=lambda task: costs[task[1]], reverse=True)
+
+            # Готовим шаблон проверки заранее: процессы пула, созданные через fork, получат его готовым
+            if PREFORK_START_METHOD:
+                warm_up()
 
-            # Используем ProcessPoolExecutor для параллельной обработки
-            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Используем пул с допуском задач по памяти: количество процессов ограничено сверху,
+            # а одновременно выполняются только документы, помещающиеся в бюджет памяти
+            with WorkerPool(process_file_wrapper, max_workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                            max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER,
+                            mp_context=PREFORK_START_METHOD, prestart=True) as executor:
                 # Запускаем задачи
-                self.futures = [executor.submit(process_file_wrapper, task) for task in tasks]
+                # Зависший файл останавливается по жёсткому сроку и не блокирует остальные
+                future_tasks = {executor.submit(task, memory=memory[task[1]], timeout=DEFAULT_HARD_TIMEOUT): task
+                                for task in tasks}
+                self.futures = list(future_tasks)
 
                 # Обрабатываем результаты по мере их завершения
-                for future in concurrent.futures.as_completed(self.futures):
+                for future in concurrent.futures.as_completed(future_tasks):
                     if not self._is_running:
                         logger.debug("ProcessingThread: Обработка прервана")
                         break
+                    file_path, file_index, _ = future_tasks[future]
+                    # Остановленный по сроку или упавший файл тоже считается обработанным, как в main.py
                     try:
                         result = future.result()
-                        results_list.append(result)
-                        completed_files += 1
-                        # Отправляем сигнал о завершении обработки одного файла
-                        self.file_processed.emit(result)
-                        # Обновляем прогресс
-                        progress_value = int((completed_files) / total_files * 100)
-                        self.progress.emit(progress_value)
+                    except TaskTimeoutError:
+                        logger.error("Файл %s превысил жёсткий срок обработки %s с", file_path, DEFAULT_HARD_TIMEOUT)
+                        result = {"file_path": file_path, "file_index": file_index,
+                                  "results": timeout_result(file_path, DEFAULT_HARD_TIMEOUT),
+                                  "time": float(DEFAULT_HARD_TIMEOUT)}
                     except Exception as e:
-                        error_msg = f"Ошибка при обработке файла: {str(e)}\n{traceback.format_exc()}"
-                        logger.error(error_msg)
-                        self.error.emit(error_msg)
-
+                        logger.error("Ошибка в процессе пула: %s", e)
+                        result = {"file_path": file_path, "file_index": file_index,
+                                  "results": {"file_path": file_path,
+                                              "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
+                                              "time": 0.0},
+                                  "time": 0.0}
+                    results_list.append(result)
+                    completed_files += 1
+                    metrics.observe_result(result["results"])
+                    check_times = result["results"].get("check_times")
+                    if check_times:
+                        cost_model.observe(features[file_index], check_times)
+                    eta_tracker.complete(file_index, result["time"])
+                    self.eta.emit(eta_tracker.eta())
+                    # Отправляем сигнал о завершении обработки одного файла
+                    self.file_processed.emit(result)
+                    # Обновляем прогресс
+                    progress_value = int((completed_files) / total_files * 100)
+                    self.progress.emit(progress_value)
+
+            cost_model.save()
             if self._is_running:
                 self.finished.emit(results_list)
         except Exception as e:
@@ -165,6 +201,10 @@ class MainWindow(QMainWindow):
         layout.addWidget(QLabel("Прогресс обработки:"))
         layout.addWidget(self.progress_bar)
 
+        # Оценка оставшегося времени
+        self.eta_label = QLabel("Осталось: —")
+        layout.addWidget(self.eta_label)
+
         # Текстовое поле для логов
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
@@ -237,6 +277,7 @@ class MainWindow(QMainWindow):
         # Запуск обработки в отдельном потоке
         self.processing_thread = ProcessingThread(file_paths, self.reports_dir)
         self.processing_thread.progress.connect(self.update_progress)
+        self.processing_thread.eta.connect(self.update_eta)
         self.processing_thread.log_message.connect(self.log_text.append)
         self.processing_thread.file_processed.connect(self.file_processed)
         self.processing_thread.finished.connect(self.processing_finished)
@@ -246,6 +287,9 @@ class MainWindow(QMainWindow):
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def update_eta(self, seconds):
+        self.eta_label.setText(f"Осталось: ~{seconds:.0f} с")
+
     def handle_error(self, error_msg):
         self.log_text.append(error_msg)
         self.results_text.append("Обработка завершена с ошибкой. Подробности в логах.")
@@ -370,6 +414,7 @@ class MainWindow(QMainWindow):
         event.accept()
 
 if __name__ == "__main__":
+    setup_logging()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,295 @@
+import time
+import sqlite3
+import argparse
+import logging
+
+from modules.findings import Finding
+
+logger = logging.getLogger(__name__)
+
+# Файл аналитического хранилища в директории отчётов
+ANALYTICS_FILE = "analytics.sqlite"
+# Ключ и значение "метки" для сводки по всем документам хранилища
+ALL_TAG = ("", "")
+
+
+def parse_tags(values):
+    """Разбирает метки вида "ключ=значение" (например, cohort=2026, group=ИВТ-41, draft=2) в словарь."""
+    tags = {}
+    for value in values or []:
+        key, sep, tag_value = value.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"Метка должна иметь вид ключ=значение: {value}")
+        tags[key.strip()] = tag_value.strip()
+    return tags
+
+
+def rule_counts(results):
+    """
+    Сводит результаты документа к количеству нарушений по правилам: {(проверка, правило): количество}.
+
+    Диапазон параграфов считается одним нарушением (в него входят и пустые параграфы, и повторные записи
+    для одного параграфа), как и в записи об ограничении, которая хранит число скрытых записей своего
+    правила; сообщения, не являющиеся Finding (ошибки обработки), учитываются как правило "error".
+    """
+    counts = {}
+    for check, findings in results.items():
+        if not isinstance(findings, list):
+            continue
+        for finding in findings:
+            if not isinstance(finding, Finding):
+                key, count = (check, "error"), 1
+            elif finding.check == "template" and finding.rule == "capped":
+                key, count = tuple(finding.loc.split(".", 1)), finding.actual
+            else:
+                key, count = (finding.check, finding.rule), 1
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+class AnalyticsStore:
+    """
+    Аналитическое хранилище результатов проверок в SQLite.
+
+    Для каждого документа хранятся метки (когорта, группа, студент, номер черновика и т. п.) и количество
+    нарушений по каждому правилу. Сводки по правилам (rollups) для каждой метки и каждой пары меток
+    документа обновляются инкрементально в той же транзакции, в которой добавляется пакет, поэтому запросы
+    "какое правило нарушается чаще всего в когорте" и "как изменилась группа между черновиками" читают
+    несколько десятков строк независимо от размера истории.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            content_hash TEXT,
+            file_path TEXT NOT NULL,
+            tags TEXT NOT NULL,
+            checked_at REAL NOT NULL,
+            findings INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS documents_hash ON documents (content_hash, tags);
+        CREATE INDEX IF NOT EXISTS documents_checked_at ON documents (checked_at);
+        CREATE TABLE IF NOT EXISTS tags (
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            PRIMARY KEY (key, value, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS tags_doc ON tags (doc_id, key);
+        CREATE TABLE IF NOT EXISTS findings (
+            doc_id INTEGER NOT NULL,
+            check_id TEXT NOT NULL,
+            rule TEXT NOT NULL,
+            occurrences INTEGER NOT NULL,
+            PRIMARY KEY (doc_id, check_id, rule)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS findings_rule ON findings (check_id, rule);
+        CREATE TABLE IF NOT EXISTS rollups (
+            tag_key TEXT NOT NULL,
+            tag_value TEXT NOT NULL,
+            by_key TEXT NOT NULL,
+            by_value TEXT NOT NULL,
+            check_id TEXT NOT NULL,
+            rule TEXT NOT NULL,
+            documents INTEGER NOT NULL,
+            occurrences INTEGER NOT NULL,
+            PRIMARY KEY (tag_key, tag_value, by_key, by_value, check_id, rule)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS tag_totals (
+            tag_key TEXT NOT NULL,
+            tag_value TEXT NOT NULL,
+            by_key TEXT NOT NULL,
+            by_value TEXT NOT NULL,
+            documents INTEGER NOT NULL,
+            PRIMARY KEY (tag_key, tag_value, by_key, by_value)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_batch(self, results, tags=None, checked_at=None):
+        """
+        Добавляет результаты пакета (список словарей, которые возвращает process_file) с общими метками.
+
+        Документ, уже добавленный с тем же содержимым (content_hash) и теми же метками, пропускается,
+        поэтому повторная загрузка продолженного пакета не удваивает статистику.
+        Возвращает количество добавленных документов.
+        """
+        tags = dict(tags or {})
+        tag_signature = ";".join(f"{key}={value}" for key, value in sorted(tags.items()))
+        # Сводки ведутся по всем документам (пустая метка), по каждой метке и по каждой упорядоченной паре меток
+        tag_items = [ALL_TAG + ALL_TAG] + [(key, value) + ALL_TAG for key, value in sorted(tags.items())]
+        tag_items += [(key, value, by_key, by_value) for key, value in sorted(tags.items())
+                      for by_key, by_value in sorted(tags.items()) if by_key != key]
+        checked_at = checked_at if checked_at is not None else time.time()
+        rollups = {}
+        added = 0
+        with self.conn:
+            for result in results:
+                if result is None:
+                    continue
+                content_hash = result.get("content_hash")
+                if content_hash and self.conn.execute(
+                        "SELECT 1 FROM documents WHERE content_hash = ? AND tags = ?",
+                        (content_hash, tag_signature)).fetchone():
+                    continue
+                counts = rule_counts(result.get("results", {}))
+                doc_id = self.conn.execute(
+                    "INSERT INTO documents (content_hash, file_path, tags, checked_at, findings) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (content_hash, result["file_path"], tag_signature, checked_at, sum(counts.values()))).lastrowid
+                self.conn.executemany("INSERT INTO tags (key, value, doc_id) VALUES (?, ?, ?)",
+                                      [(key, value, doc_id) for key, value in tags.items()])
+                self.conn.executemany(
+                    "INSERT INTO findings (doc_id, check_id, rule, occurrences) VALUES (?, ?, ?, ?)",
+                    [(doc_id, check_id, rule, count) for (check_id, rule), count in counts.items()])
+                for (check_id, rule), count in counts.items():
+                    rollup = rollups.setdefault((check_id, rule), [0, 0])
+                    rollup[0] += 1
+                    rollup[1] += count
+                added += 1
+            # Сводки обновляются один раз на пакет: по строке на пару (метка, правило)
+            self.conn.executemany(
+                "INSERT INTO rollups (tag_key, tag_value, by_key, by_value, check_id, rule, documents, occurrences) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (tag_key, tag_value, by_key, by_value, check_id, rule) DO UPDATE SET "
+                "documents = documents + excluded.documents, occurrences = occurrences + excluded.occurrences",
+                [tag_item + (check_id, rule, documents, occurrences)
+                 for tag_item in tag_items for (check_id, rule), (documents, occurrences) in rollups.items()])
+            self.conn.executemany(
+                "INSERT INTO tag_totals (tag_key, tag_value, by_key, by_value, documents) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (tag_key, tag_value, by_key, by_value) DO UPDATE SET "
+                "documents = documents + excluded.documents",
+                [tag_item + (added,) for tag_item in tag_items])
+        logger.info("В аналитическое хранилище %s добавлено документов: %s", self.path, added)
+        return added
+
+    def document_count(self, tag=None):
+        """Количество документов с меткой tag (пара ключ, значение) или всех документов."""
+        key, value = tag or ALL_TAG
+        row = self.conn.execute(
+            "SELECT documents FROM tag_totals WHERE tag_key = ? AND tag_value = ? AND by_key = '' AND by_value = ''",
+            (key, value)).fetchone()
+        return row[0] if row else 0
+
+    def top_rules(self, tag=None, limit=10):
+        """
+        Правила, которые нарушаются в наибольшем числе документов с меткой tag (или во всех документах).
+        Возвращает список (проверка, правило, документов, доля документов, нарушений).
+        """
+        key, value = tag or ALL_TAG
+        total = self.document_count(tag)
+        rows = self.conn.execute(
+            "SELECT check_id, rule, documents, occurrences FROM rollups "
+            "WHERE tag_key = ? AND tag_value = ? AND by_key = '' AND by_value = '' "
+            "ORDER BY documents DESC, occurrences DESC LIMIT ?", (key, value, limit)).fetchall()
+        return [(check_id, rule, documents, documents / total if total else 0.0, occurrences)
+                for check_id, rule, documents, occurrences in rows]
+
+    def compare(self, tag, by, rules=None):
+        """
+        Сравнивает документы с меткой tag по значениям метки by (например, группу по номерам черновиков).
+        Возвращает {значение by: (документов, {(проверка, правило): (документов с нарушением, нарушений)})}.
+        """
+        key, value = tag
+        totals = self.conn.execute(
+            "SELECT by_value, documents FROM tag_totals WHERE tag_key = ? AND tag_value = ? AND by_key = ?",
+            (key, value, by)).fetchall()
+        comparison = {by_value: (documents, {}) for by_value, documents in totals}
+        query = ("SELECT by_value, check_id, rule, documents, occurrences FROM rollups "
+                 "WHERE tag_key = ? AND tag_value = ? AND by_key = ?")
+        for by_value, check_id, rule, documents, occurrences in self.conn.execute(query, (key, value, by)):
+            if rules is None or (check_id, rule) in rules:
+                comparison[by_value][1][(check_id, rule)] = (documents, occurrences)
+        return comparison
+
+    def rebuild_rollups(self):
+        """Пересчитывает сводки по исходным таблицам (после ручного удаления документов)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM rollups")
+            self.conn.execute("DELETE FROM tag_totals")
+            self.conn.execute(
+                "INSERT INTO rollups SELECT '', '', '', '', check_id, rule, COUNT(*), SUM(occurrences) FROM findings "
+                "GROUP BY check_id, rule")
+            self.conn.execute(
+                "INSERT INTO rollups SELECT t.key, t.value, '', '', f.check_id, f.rule, COUNT(*), SUM(f.occurrences) "
+                "FROM tags t JOIN findings f ON f.doc_id = t.doc_id GROUP BY t.key, t.value, f.check_id, f.rule")
+            self.conn.execute(
+                "INSERT INTO rollups SELECT t.key, t.value, b.key, b.value, f.check_id, f.rule, COUNT(*), "
+                "SUM(f.occurrences) FROM tags t JOIN tags b ON b.doc_id = t.doc_id AND b.key != t.key "
+                "JOIN findings f ON f.doc_id = t.doc_id GROUP BY t.key, t.value, b.key, b.value, f.check_id, f.rule")
+            self.conn.execute("INSERT INTO tag_totals SELECT '', '', '', '', COUNT(*) FROM documents")
+            self.conn.execute(
+                "INSERT INTO tag_totals SELECT key, value, '', '', COUNT(*) FROM tags GROUP BY key, value")
+            self.conn.execute(
+                "INSERT INTO tag_totals SELECT t.key, t.value, b.key, b.value, COUNT(*) FROM tags t "
+                "JOIN tags b ON b.doc_id = t.doc_id AND b.key != t.key GROUP BY t.key, t.value, b.key, b.value")
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Запросы к аналитическому хранилищу результатов проверок."""
+    parser = argparse.ArgumentParser(description="Статистика нарушений по когортам, группам и черновикам.")
+    parser.add_argument("store", help=f"Путь к аналитическому хранилищу ({ANALYTICS_FILE} в директории отчётов)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    top_parser = subparsers.add_parser("top", help="Правила, которые нарушаются чаще всего")
+    top_parser.add_argument("--tag", type=str, default=None, help="Только документы с меткой ключ=значение")
+    top_parser.add_argument("--limit", type=int, default=10, help="Количество правил (по умолчанию: 10)")
+    compare_parser = subparsers.add_parser("compare", help="Сравнение по значениям метки (например, по черновикам)")
+    compare_parser.add_argument("--tag", type=str, required=True, help="Документы с меткой ключ=значение")
+    compare_parser.add_argument("--by", type=str, required=True, help="Ключ метки для сравнения (например, draft)")
+    compare_parser.add_argument("--limit", type=int, default=10,
+                                help="Количество правил, отобранных по первому значению (по умолчанию: 10)")
+    subparsers.add_parser("rebuild", help="Пересчитать сводки по исходным данным")
+    args = parser.parse_args()
+
+    try:
+        tag = next(iter(parse_tags([args.tag]).items())) if getattr(args, "tag", None) else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    with AnalyticsStore(args.store) as store:
+        if args.command == "top":
+            total = store.document_count(tag)
+            print(f"Документов: {total}")
+            for check_id, rule, documents, share, occurrences in store.top_rules(tag, args.limit):
+                print(f"{check_id}.{rule}: {documents} док. ({share:.0%}), нарушений: {occurrences}")
+        elif args.command == "compare":
+            comparison = store.compare(tag, args.by)
+            by_values = sorted(comparison)
+            if not by_values:
+                print("Нет документов с указанными метками")
+                return
+            first_rules = comparison[by_values[0]][1]
+            rules = sorted(first_rules, key=lambda rule: -first_rules[rule][0])[:args.limit]
+            for by_value in by_values:
+                documents, _ = comparison[by_value]
+                print(f"{args.by}={by_value}: документов {documents}")
+            for rule in rules:
+                shares = []
+                for by_value in by_values:
+                    documents, counts = comparison[by_value]
+                    shares.append(f"{args.by}={by_value}: {counts.get(rule, (0, 0))[0] / documents:.0%}")
+                print(f"{rule[0]}.{rule[1]}: " + ", ".join(shares))
+        else:
+            store.rebuild_rollups()
+            print("Сводки пересчитаны")
+    logger.debug("Запрос выполнен за %.1f мс", (time.perf_counter() - start) * 1000)
+
+
+if __name__ == "__main__":
+    main()
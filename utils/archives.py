@@ -0,0 +1,114 @@
+import re
+import mmap
+import logging
+import threading
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Документ внутри архива обозначается как "<путь к архиву>!<имя в архиве>"
+ARCHIVE_SEPARATOR = "!"
+MEMBER_KEY_PATTERN = re.compile(r"^(.*?\.zip)!(.+)$", re.IGNORECASE)
+
+
+def is_archive(path):
+    return path.lower().endswith(".zip")
+
+
+def split_member(key):
+    """Возвращает (путь к архиву, имя в архиве) для документа из архива или None для обычного файла."""
+    match = MEMBER_KEY_PATTERN.match(key)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def is_document_member(info):
+    """Подходит ли элемент архива для проверки (.docx, не служебный файл macOS и не файл блокировки Word)."""
+    if info.is_dir() or info.filename.startswith("__MACOSX/"):
+        return False
+    name = info.filename.rsplit("/", 1)[-1]
+    return name.lower().endswith(".docx") and not name.startswith((".", "~$"))
+
+
+def expand_archives(paths):
+    """
+    Заменяет архивы .zip в списке путей на документы .docx из них (в виде "архив!имя").
+    Архив, который не удалось прочитать, остаётся в списке как есть и получит результат с ошибкой.
+    """
+    expanded = []
+    for path in paths:
+        if not is_archive(path):
+            expanded.append(path)
+            continue
+        try:
+            with zipfile.ZipFile(path) as archive:
+                members = [info.filename for info in archive.infolist() if is_document_member(info)]
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.error("Не удалось прочитать архив %s: %s", path, e)
+            expanded.append(path)
+            continue
+        logger.info("Архив %s: документов для проверки: %s", path, len(members))
+        expanded.extend(f"{path}{ARCHIVE_SEPARATOR}{member}" for member in members)
+    return expanded
+
+
+class _MappedFile(mmap.mmap):
+    """Отображение файла в память с интерфейсом, который ожидает zipfile (mmap до Python 3.13 не имеет seekable)."""
+
+    def seekable(self):
+        return True
+
+
+class ArchiveReader:
+    """
+    Читает документы из архивов без распаковки на диск.
+
+    Каждый архив открывается один раз и отображается в память (mmap): центральный каталог
+    разбирается однократно, а содержимое элементов читается из страниц, общих с кешем файловой системы.
+    Чтение из нескольких потоков допускается.
+    """
+
+    def __init__(self):
+        self._archives = {}  # путь к архиву -> (файл, mmap или None, ZipFile)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _archive(self, archive_path):
+        with self._lock:
+            return self._open(archive_path)
+
+    def _open(self, archive_path):
+        if archive_path not in self._archives:
+            f = open(archive_path, "rb")
+            try:
+                mapped = _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Пустой файл или файловая система без поддержки mmap: читаем через обычный файл
+                mapped = None
+            try:
+                archive = zipfile.ZipFile(mapped if mapped is not None else f)
+            except Exception:
+                if mapped is not None:
+                    mapped.close()
+                f.close()
+                raise
+            self._archives[archive_path] = (f, mapped, archive)
+        return self._archives[archive_path][2]
+
+    def read(self, key):
+        """Возвращает содержимое документа "архив!имя" в байтах."""
+        archive_path, member = split_member(key)
+        return self._archive(archive_path).read(member)
+
+    def close(self):
+        with self._lock:
+            archives, self._archives = self._archives, {}
+        for f, mapped, archive in archives.values():
+            archive.close()
+            if mapped is not None:
+                mapped.close()
+            f.close()
@@ -0,0 +1,202 @@
+import io
+import os
+import json
+import logging
+import zipfile
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+APP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+
+class CostModel:
+    """
+    Оценивает время обработки документа до отправки его в пул процессов.
+
+    Стоимость каждой проверки считается как coef * units ** exponent, где units — объём
+    работы в условных килобайтах word/document.xml. Коэффициенты по умолчанию получены
+    замерами на сгенерированных документах, а затем уточняются по фактическому времени
+    проверок: для каждой проверки хранится поправочный множитель (скользящее среднее
+    отношения фактического времени к предсказанному), который сохраняется между запусками.
+    """
+
+    # Коэффициенты по умолчанию: ключ проверки -> (коэффициент, показатель степени)
+    DEFAULT_COSTS = {
+        "parse": (3.5e-5, 1.0),  # единицы — размер архива в КБ
+        "structure": (3.9e-4, 1.48),
+        "page_params": (2e-3, 0.0),
+        "formatting": (1.6e-3, 1.11),
+        "references": (1.5e-4, 1.0),
+        "tables": (1.8e-4, 1.0),
+        "illustrations": (2.7e-4, 1.0),
+        "appendices": (2.6e-4, 1.0),
+    }
+    # Статистика docProps/app.xml может быть устаревшей (например, у документов,
+    # созданных из шаблона python-docx), поэтому она используется только как нижняя граница
+    KB_PER_PARAGRAPH = 0.5
+    KB_PER_WORD = 0.007
+    # Оценка для файлов, которые не удалось разобрать (обработка завершится быстро с ошибкой)
+    MIN_COST = 0.01
+    # Память процесса на один документ: дерево lxml занимает примерно в 30 раз больше
+    # несжатого document.xml, а python-docx держит в памяти все части архива (включая изображения)
+    XML_MEMORY_FACTOR = 30
+    ARCHIVE_MEMORY_FACTOR = 2
+    MIN_MEMORY = 8 * 1024 * 1024
+
+    def __init__(self, history_file=None, smoothing=0.3):
+        self.history_file = history_file
+        self.smoothing = smoothing
+        self.scales = {check: 1.0 for check in self.DEFAULT_COSTS}
+        if history_file and os.path.exists(history_file):
+            try:
+                with open(history_file, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for check, scale in saved.get("scales", {}).items():
+                    if check in self.scales and scale > 0:
+                        self.scales[check] = float(scale)
+            except Exception as e:
+                logger.warning("Не удалось загрузить историю времени проверок %s: %s", history_file, e)
+
+    @classmethod
+    def document_features(cls, file_path, data=None):
+        """
+        Читает из архива .docx размеры document.xml и статистику docProps/app.xml без разбора документа.
+        Если передано содержимое data (bytes), характеристики читаются из него, а не из файла.
+        """
+        features = {
+            "archive_size": 0,
+            "xml_compressed": 0,
+            "xml_uncompressed": 0,
+            "paragraphs": 0,
+            "words": 0
+        }
+        try:
+            features["archive_size"] = len(data) if data is not None else os.path.getsize(file_path)
+            with zipfile.ZipFile(io.BytesIO(data) if data is not None else file_path, 'r') as zip_ref:
+                info = zip_ref.getinfo('word/document.xml')
+                features["xml_compressed"] = info.compress_size
+                features["xml_uncompressed"] = info.file_size
+                if 'docProps/app.xml' in zip_ref.namelist():
+                    app_xml = ET.fromstring(zip_ref.read('docProps/app.xml'))
+                    for key, tag in (("paragraphs", "Paragraphs"), ("words", "Words")):
+                        value = app_xml.findtext(f"{APP_NS}{tag}")
+                        if value and value.strip().isdigit():
+                            features[key] = int(value.strip())
+        except Exception as e:
+            logger.debug("Не удалось прочитать характеристики файла %s: %s", file_path, e)
+        return features
+
+    def _units(self, check, features):
+        if check == "parse":
+            return features["archive_size"] / 1024
+        return max(features["xml_uncompressed"] / 1024,
+                   features["paragraphs"] * self.KB_PER_PARAGRAPH,
+                   features["words"] * self.KB_PER_WORD)
+
+    def _base_cost(self, check, features):
+        coef, exponent = self.DEFAULT_COSTS[check]
+        units = self._units(check, features)
+        if units <= 0:
+            return 0.0
+        return coef * units ** exponent
+
+    def estimate_checks(self, features):
+        """Возвращает оценку времени (в секундах) для каждой проверки."""
+        return {check: self.scales[check] * self._base_cost(check, features) for check in self.DEFAULT_COSTS}
+
+    def estimate(self, features):
+        """Возвращает оценку полного времени обработки документа в секундах."""
+        if not features["xml_uncompressed"]:
+            return self.MIN_COST
+        return max(self.MIN_COST, sum(self.estimate_checks(features).values()))
+
+    def estimate_memory(self, features):
+        """Возвращает оценку дополнительной памяти процесса (в байтах) на обработку документа."""
+        return max(self.MIN_MEMORY,
+                   self.XML_MEMORY_FACTOR * features["xml_uncompressed"]
+                   + self.ARCHIVE_MEMORY_FACTOR * features["archive_size"])
+
+    def observe(self, features, check_times):
+        """Уточняет поправочные множители по фактическому времени проверок документа."""
+        for check, actual in check_times.items():
+            if check not in self.DEFAULT_COSTS:
+                continue
+            base = self._base_cost(check, features)
+            if base <= 0 or actual <= 0:
+                continue
+            ratio = actual / base
+            self.scales[check] = (1 - self.smoothing) * self.scales[check] + self.smoothing * ratio
+
+    def save(self):
+        if not self.history_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.history_file) or ".", exist_ok=True)
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump({"scales": self.scales}, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.warning("Не удалось сохранить историю времени проверок %s: %s", self.history_file, e)
+
+
+def plan_chunks(costs, num_workers, chunks_per_worker=4):
+    """
+    Разбивает задачи на пакеты для отправки в пул: самые дорогие документы идут первыми
+    и по одному, а мелкие объединяются в пакеты примерно одинаковой стоимости.
+
+    Args:
+        costs (list): Оценки стоимости задач.
+        num_workers (int): Количество процессов.
+        chunks_per_worker (int): Сколько пакетов в среднем приходится на один процесс.
+
+    Returns:
+        list: Список пакетов, каждый пакет — список индексов задач.
+    """
+    order = sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)
+    total = sum(costs)
+    target = total / max(1, num_workers * chunks_per_worker)
+
+    chunks = []
+    current = []
+    current_cost = 0.0
+    for i in order:
+        if costs[i] >= target:
+            chunks.append([i])
+            continue
+        current.append(i)
+        current_cost += costs[i]
+        if current_cost >= target:
+            chunks.append(current)
+            current = []
+            current_cost = 0.0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class EtaTracker:
+    """Оценивает оставшееся время пакетной обработки по модели стоимости и фактическому темпу."""
+
+    def __init__(self, costs, num_workers):
+        self.costs = dict(enumerate(costs)) if isinstance(costs, list) else dict(costs)
+        self.num_workers = max(1, num_workers)
+        self.remaining = set(self.costs)
+        self.estimated_done = 0.0
+        self.actual_done = 0.0
+
+    def complete(self, key, actual_time):
+        if key not in self.remaining:
+            return
+        self.remaining.discard(key)
+        self.estimated_done += self.costs[key]
+        self.actual_done += actual_time
+
+    def eta(self):
+        """Возвращает оценку оставшегося времени в секундах."""
+        if not self.remaining:
+            return 0.0
+        # Поправка на фактический темп: во сколько раз модель ошибается на уже обработанных файлах
+        correction = self.actual_done / self.estimated_done if self.estimated_done > 0 else 1.0
+        remaining_costs = [self.costs[key] for key in self.remaining]
+        # Время не может быть меньше самой долгой оставшейся задачи
+        return correction * max(sum(remaining_costs) / self.num_workers, max(remaining_costs))
@@ -0,0 +1,145 @@
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import logging
+
+from modules.findings import to_json, from_json
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJournal:
+    """
+    Журнал пакетной обработки в SQLite.
+
+    Каждый обработанный файл записывается отдельной транзакцией сразу после получения результата:
+    хеш содержимого, путь, статус, результат (JSON) и путь к отчёту. База открыта в режиме WAL,
+    поэтому журнал можно читать (например, через python -m utils.journal) во время обработки,
+    а после аварийного завершения запуск с --resume пропускает уже обработанные файлы.
+    Повторно используются только детерминированные результаты (REUSABLE_STATUSES): файлы с ошибкой
+    или превышением срока (в том числе из-за сбоя процесса пула) при продолжении обрабатываются заново.
+    """
+
+    STATUSES = ("ok", "rejected", "error", "timeout")
+    REUSABLE_STATUSES = ("ok", "rejected")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            content_hash TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT NOT NULL,
+            report_path TEXT,
+            processing_time REAL,
+            finished_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS files_status ON files (status);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: запись переживает не только падение процесса, но и перезагрузку машины
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def file_hash(file_path, block_size=1024 * 1024):
+        """Возвращает SHA-256 содержимого файла или None, если файл не удалось прочитать."""
+        digest = hashlib.sha256()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    digest.update(block)
+        except OSError as e:
+            logger.warning("Не удалось вычислить хеш файла %s: %s", file_path, e)
+            return None
+        return digest.hexdigest()
+
+    @staticmethod
+    def result_status(result):
+        if result.get("rejected"):
+            return "rejected"
+        if result.get("timed_out"):
+            return "timeout"
+        if "error" in result.get("results", {}):
+            return "error"
+        return "ok"
+
+    def record(self, content_hash, result, report_path=None):
+        """Записывает результат обработки файла (заменяя прежнюю запись для того же содержимого)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (content_hash, file_path, status, result, report_path, "
+                "processing_time, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, result["file_path"], self.result_status(result),
+                 json.dumps(result, ensure_ascii=False, default=to_json), report_path, result.get("time"), time.time())
+            )
+
+    def get_result(self, content_hash, statuses=None):
+        """
+        Возвращает сохранённый результат для содержимого с данным хешем или None
+        (если передан statuses — только результат с одним из этих статусов).
+        """
+        query = "SELECT result FROM files WHERE content_hash = ?"
+        params = [content_hash]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        row = self.conn.execute(query, params).fetchone()
+        return json.loads(row[0], object_hook=from_json) if row else None
+
+    def summary(self):
+        """Возвращает количество записей по статусам."""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+
+    def entries(self, status=None, limit=None):
+        """Возвращает записи журнала (последние сначала) в виде словарей."""
+        query = "SELECT file_path, status, report_path, processing_time, finished_at FROM files"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY finished_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        columns = ("file_path", "status", "report_path", "processing_time", "finished_at")
+        return [dict(zip(columns, row)) for row in self.conn.execute(query, params)]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Выводит содержимое журнала пакетной обработки (в том числе во время выполнения пакета)."""
+    parser = argparse.ArgumentParser(description="Просмотр журнала пакетной обработки.")
+    parser.add_argument("journal", help="Путь к файлу журнала (journal.sqlite в директории отчётов)")
+    parser.add_argument("--status", choices=BatchJournal.STATUSES, default=None,
+                        help="Показать только записи с указанным статусом")
+    parser.add_argument("--limit", type=int, default=20, help="Количество выводимых записей (по умолчанию: 20)")
+    args = parser.parse_args()
+
+    with BatchJournal(args.journal) as journal:
+        summary = journal.summary()
+        print(f"Всего обработано файлов: {sum(summary.values())}")
+        for status, count in sorted(summary.items()):
+            print(f"  {status}: {count}")
+        for entry in journal.entries(args.status, args.limit):
+            finished = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["finished_at"]))
+            print(f"{finished} [{entry['status']}] {entry['file_path']} "
+                  f"({entry['processing_time'] or 0:.2f} с) -> {entry['report_path'] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
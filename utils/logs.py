@@ -0,0 +1,177 @@
+import os
+import atexit
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
+
+# Формат записей журнала и файл журнала по умолчанию
+LOG_FORMAT = '%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+LOG_FILE = "processing.log"
+# Уровень по умолчанию; переопределяется аргументом --log-level или переменной окружения VKR_LOG_LEVEL
+DEFAULT_LOG_LEVEL = "INFO"
+LOG_LEVEL_ENV = "VKR_LOG_LEVEL"
+# Однотипные сообщения (с одним шаблоном) уровня INFO и ниже: не более RATE_LIMIT за RATE_INTERVAL секунд
+DEFAULT_RATE_LIMIT = 20
+DEFAULT_RATE_INTERVAL = 10.0
+# Логгеры проверок, которые пишут сообщения по каждому абзацу или нарушению; сообщения о документах
+# в целом (main, modules.template и др.) не ограничиваются
+RATE_LIMITED_LOGGERS = ("modules.structure", "modules.formatting", "modules.tables", "modules.illustrations",
+                        "modules.appendices", "modules.page_params", "modules.references")
+
+_queue = None
+_listener = None
+_level = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Пропускает не более limit записей с одинаковым шаблоном сообщения (record.msg) за interval секунд.
+
+    Ограничиваются только записи логгеров loggers (и их потомков) уровня не выше max_level, остальные
+    пропускаются всегда. Когда окно заканчивается (или при вызове flush), выводится одна запись
+    с количеством скрытых сообщений. Фильтр ставится на обработчик очереди, поэтому отброшенные записи
+    не форматируются и не передаются между процессами.
+    """
+
+    def __init__(self, limit=DEFAULT_RATE_LIMIT, interval=DEFAULT_RATE_INTERVAL, max_level=logging.INFO,
+                 loggers=RATE_LIMITED_LOGGERS):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.max_level = max_level
+        self.loggers = tuple(loggers)
+        # (логгер, шаблон) -> [начало окна, количество записей в окне, уровень]
+        self._windows = {}
+
+    def _limited(self, record):
+        if record.levelno > self.max_level:
+            return False
+        return any(record.name == name or record.name.startswith(name + ".") for name in self.loggers)
+
+    def filter(self, record):
+        if not self._limited(record):
+            return True
+        key = (record.name, record.msg)
+        window = self._windows.get(key)
+        if window is None or record.created - window[0] >= self.interval:
+            self._windows[key] = [record.created, 1, record.levelno]
+            if window is not None:
+                self._report_suppressed(key, window)
+            return True
+        window[1] += 1
+        return window[1] <= self.limit
+
+    def flush(self):
+        """Выводит количество сообщений, скрытых в текущих окнах, и начинает окна заново."""
+        windows, self._windows = self._windows, {}
+        for key, window in windows.items():
+            self._report_suppressed(key, window)
+
+    def _report_suppressed(self, key, window):
+        name, msg = key
+        suppressed = window[1] - self.limit
+        if suppressed > 0:
+            logging.getLogger(name).log(window[2], "Однотипных сообщений скрыто: %s (%r)", suppressed, msg)
+
+
+def resolve_level(level=None):
+    """Уровень журнала: аргумент, затем VKR_LOG_LEVEL, затем DEFAULT_LOG_LEVEL; принимает имя или число."""
+    level = level or os.environ.get(LOG_LEVEL_ENV) or DEFAULT_LOG_LEVEL
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Неизвестный уровень журнала: {level}")
+    return value
+
+
+def _install_queue_handler(queue, level):
+    """Заменяет обработчики корневого логгера обработчиком очереди с ограничением частоты."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = QueueHandler(queue)
+    handler.addFilter(RateLimitFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def setup_logging(level=None, log_file=LOG_FILE, console=True):
+    """
+    Настраивает журнал в главном процессе (вызывается один раз из точки входа).
+
+    Записи всех процессов передаются через одну очередь, а в файл и на консоль их пишет единственный
+    QueueListener главного процесса, поэтому процессы пула не перезаписывают и не портят файл журнала.
+    Процессы WorkerPool подключаются к той же очереди сами (см. worker_log_config).
+    """
+    global _queue, _listener, _level
+    shutdown_logging()
+    _level = resolve_level(level)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, mode='w', encoding='utf-8'))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    _queue = multiprocessing.Queue()
+    _listener = QueueListener(_queue, *handlers)
+    _listener.start()
+    _install_queue_handler(_queue, _level)
+    # Обработчики atexit вызываются в обратном порядке: регистрируемся после создания очереди, чтобы
+    # остановить QueueListener раньше, чем multiprocessing закроет канал очереди при выходе
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def flush_rate_limits():
+    """Выводит количество сообщений, скрытых ограничением частоты к этому моменту, в текущем процессе."""
+    for handler in logging.getLogger().handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, RateLimitFilter):
+                log_filter.flush()
+
+
+def shutdown_logging():
+    """Дописывает скрытые и оставшиеся в очереди записи и закрывает обработчики."""
+    global _queue, _listener
+    flush_rate_limits()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler) and handler.queue is _queue:
+            root.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue is not None:
+        _queue.close()
+        _queue.join_thread()
+        _queue = None
+
+
+def worker_log_config():
+    """Параметры журнала для процесса пула: (очередь, уровень) или None, если setup_logging не вызывался."""
+    if _queue is None:
+        return None
+    return _queue, _level
+
+
+def configure_worker_logging(queue, level):
+    """Подключает процесс пула к очереди журнала главного процесса."""
+    _install_queue_handler(queue, level)
+
+
+def add_logging_arguments(parser):
+    """Добавляет аргументы --log-level и --log-file консольной точки входа."""
+    parser.add_argument("--log-level", type=str, default=None,
+                        help=f"Уровень журнала: DEBUG, INFO, WARNING, ERROR "
+                             f"(по умолчанию: {LOG_LEVEL_ENV} или {DEFAULT_LOG_LEVEL})")
+    parser.add_argument("--log-file", type=str, default=LOG_FILE,
+                        help=f"Файл журнала, пустая строка — только консоль (по умолчанию: {LOG_FILE})")
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,350 @@
+import os
+import math
+import weakref
+import logging
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Тип содержимого текстового формата Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Границы корзин гистограмм времени в секундах
+DOCUMENT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+CHECK_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Период записи файла для textfile-коллектора node_exporter
+DEFAULT_TEXTFILE_INTERVAL = 15.0
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    """Метрика с метками: значения хранятся по кортежу значений меток в порядке labelnames."""
+
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, получены {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Строки значений метрики в текстовом формате (без HELP и TYPE)."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+    def render(self):
+        return "\n".join([f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+                         + self.samples())
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    TYPE = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Счётчик не может уменьшаться")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Текущее значение; может вычисляться при каждом чтении функцией (set_function)."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_function(self, function):
+        """Значение без меток, вычисляемое при каждом чтении метрики."""
+        self._function = function
+
+    def value(self, **labels):
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Гистограмма с накопительными корзинами (_bucket), суммой (_sum) и количеством (_count)."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DOCUMENT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса, отдаваемых в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DOCUMENT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+DOCUMENTS = REGISTRY.counter("vkr_documents_total", "Проверенные документы по итогу обработки", ["status"])
+DOCUMENT_SECONDS = REGISTRY.histogram("vkr_document_duration_seconds", "Время проверки документа")
+CHECK_SECONDS = REGISTRY.histogram("vkr_check_duration_seconds", "Время одной проверки документа", ["check"],
+                                   buckets=CHECK_BUCKETS)
+FINDINGS = REGISTRY.counter("vkr_findings_total", "Записи о нарушениях в результатах проверок", ["check"])
+CHECK_ERRORS = REGISTRY.counter("vkr_check_errors_total", "Проверки, завершившиеся ошибкой или прерванные по лимиту",
+                                ["check", "reason"])
+QUEUE_WAIT_SECONDS = REGISTRY.histogram("vkr_queue_wait_seconds", "Ожидание задачи в очереди пула до запуска",
+                                        buckets=CHECK_BUCKETS)
+BATCH_DOCUMENTS = REGISTRY.gauge("vkr_batch_documents", "Документы текущего пакета", ["state"])
+WORKER_EVENTS = REGISTRY.counter("vkr_worker_events_total", "Перезапуски и аварии процессов пула", ["event"])
+POOL_WORKERS = REGISTRY.gauge("vkr_pool_workers", "Запущенные процессы пулов")
+POOL_BUSY_WORKERS = REGISTRY.gauge("vkr_pool_busy_workers", "Процессы пулов, выполняющие задачу")
+POOL_UTILIZATION = REGISTRY.gauge("vkr_pool_utilization", "Доля занятых процессов от наибольшего числа процессов пулов")
+POOL_QUEUE_DEPTH = REGISTRY.gauge("vkr_pool_queue_depth", "Задачи, ожидающие свободного процесса пула")
+POOL_RSS_BYTES = REGISTRY.gauge("vkr_pool_rss_bytes", "Суммарный RSS процессов пулов по последним задачам")
+
+# Пулы процессов, состояние которых отражают метрики vkr_pool_* (удаляются вместе с пулом)
+_pools = weakref.WeakSet()
+
+
+def track_pool(pool):
+    """Добавляет пул (utils.worker_pool.WorkerPool) в метрики vkr_pool_*."""
+    _pools.add(pool)
+
+
+def _pool_total(field):
+    return sum(pool.stats()[field] for pool in list(_pools))
+
+
+def _pool_utilization():
+    capacity = _pool_total("capacity")
+    return _pool_total("busy") / capacity if capacity else 0.0
+
+
+POOL_WORKERS.set_function(lambda: _pool_total("workers"))
+POOL_BUSY_WORKERS.set_function(lambda: _pool_total("busy"))
+POOL_UTILIZATION.set_function(_pool_utilization)
+POOL_QUEUE_DEPTH.set_function(lambda: _pool_total("pending"))
+POOL_RSS_BYTES.set_function(lambda: _pool_total("rss"))
+
+
+def observe_result(result):
+    """Учитывает результат документа (словарь, который возвращает process_file) в метриках."""
+    if result.get("rejected"):
+        status = "rejected"
+    elif result.get("timed_out"):
+        status = "timed_out"
+    elif "error" in result.get("results", {}):
+        status = "error"
+    else:
+        status = "ok"
+    DOCUMENTS.inc(status=status)
+    if status in ("ok", "timed_out"):
+        DOCUMENT_SECONDS.observe(result.get("time", 0.0))
+    for check, seconds in (result.get("check_times") or {}).items():
+        CHECK_SECONDS.observe(seconds, check=check)
+    for check, findings in result.get("results", {}).items():
+        if check == "error" or not isinstance(findings, list):
+            continue
+        # Служебные записи шаблона (прерывание, ошибка, ограничение числа записей) не считаются нарушениями
+        service = [f for f in findings if getattr(f, "check", None) == "template"]
+        FINDINGS.inc(len(findings) - len(service), check=check)
+        if any(f.rule == "failed" for f in service):
+            CHECK_ERRORS.inc(check=check, reason="failed")
+    for check in result.get("truncated") or []:
+        CHECK_ERRORS.inc(check=check, reason="truncated")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Отдаёт метрики по адресу http://host:port/metrics из фонового потока; возвращает сервер."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Метрики доступны на http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Атомарно записывает метрики в файл для textfile-коллектора node_exporter (*.prom)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class TextfileWriter:
+    """Периодически (и при остановке) записывает метрики в файл textfile-коллектора."""
+
+    def __init__(self, path, interval=DEFAULT_TEXTFILE_INTERVAL, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            write_textfile(self.path, self.registry)
+        except OSError as e:
+            logger.warning("Не удалось записать метрики в %s: %s", self.path, e)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self._write()
+
+
+def add_metrics_arguments(parser):
+    """Добавляет аргументы --metrics-port и --metrics-textfile консольной точки входа."""
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Отдавать метрики Prometheus на http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-textfile", type=str, default=None,
+                        help="Записывать метрики Prometheus в файл для textfile-коллектора node_exporter")
+
+
+def start_metrics(args):
+    """Запускает экспорт метрик по аргументам add_metrics_arguments; возвращает функцию остановки."""
+    server = start_http_server(args.metrics_port) if args.metrics_port is not None else None
+    writer = TextfileWriter(args.metrics_textfile) if args.metrics_textfile else None
+
+    def stop():
+        if writer is not None:
+            writer.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    return stop
@@ -0,0 +1,274 @@
+import os
+import gc
+import sys
+import cProfile
+import pstats
+import statistics
+import threading
+import contextlib
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import psutil
+
+# Период снятия стеков сэмплером в секундах
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Глубина стека, запоминаемого tracemalloc для каждого выделения памяти
+TRACEMALLOC_FRAMES = 1
+# Признаки утечки памяти процесса пула: не меньше LEAK_MIN_SAMPLES документов и рост RSS
+# не меньше LEAK_MIN_SLOPE байт на документ по линейной регрессии
+LEAK_MIN_SAMPLES = 20
+LEAK_MIN_SLOPE = 256 * 1024
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик: фоновый поток с периодом interval снимает стек потока thread_id
+    и копит свёрнутые стеки ("корень;функция;...;функция количество") — формат flamegraph.pl,
+    speedscope и inferno. Стек записывается, только пока задана метка (label), и начинается с неё.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self._label = None
+        self._base_depth = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    @contextmanager
+    def label(self, name):
+        """Записывает стеки под меткой name; кадры выше места вызова (общие для всех меток) отбрасываются."""
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code.co_filename in (__file__, contextlib.__file__):
+            frame = frame.f_back
+        depth = 0
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        self._base_depth, self._label = depth, name
+        try:
+            yield
+        finally:
+            self._label = None
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            label = self._label
+            frame = sys._current_frames().get(self.thread_id)
+            if label is None or frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            names.reverse()
+            self.stacks[";".join([label] + names[self._base_depth:])] += 1
+
+    def collapsed(self):
+        """Свёрнутые стеки, по одному на строку."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class DocumentProfiler:
+    """
+    Профилирование проверок одного документа (режим --profile): для каждой проверки cProfile
+    сохраняется в "<name>.<проверка>.pstats", сводный профиль документа — в "<name>.pstats",
+    свёрнутые стеки сэмплера — в "<name>.collapsed" (python -m pstats, snakeviz, flamegraph.pl).
+    """
+
+    def __init__(self, output_dir, name, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.name = name
+        self.profiles = {}
+        self.sampler = StackSampler(sample_interval)
+
+    def __enter__(self):
+        self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.sampler.stop()
+        self.save()
+
+    @contextmanager
+    def check(self, key):
+        """Профилирует проверку key."""
+        profile = cProfile.Profile()
+        with self.sampler.label(key):
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+        self.profiles[key] = profile
+
+    def save(self):
+        """Сохраняет профили; возвращает список записанных файлов."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        paths = []
+        for key, profile in self.profiles.items():
+            paths.append(f"{base}.{key}.pstats")
+            profile.dump_stats(paths[-1])
+        if self.profiles:
+            stats = pstats.Stats(*self.profiles.values())
+            paths.append(f"{base}.pstats")
+            stats.dump_stats(paths[-1])
+        paths.append(f"{base}.collapsed")
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(self.sampler.collapsed())
+        return paths
+
+
+class MemoryTracker:
+    """
+    Замер памяти при проверке одного документа (режим --memory-profile): пик памяти, выделенной
+    Python (tracemalloc), изменение RSS процесса и память Python, оставшаяся занятой после сборки
+    мусора. Если top > 0, дополнительно запоминаются top мест программы, где осталось больше
+    всего выделенной памяти (сравнение снимков tracemalloc до и после проверки).
+    """
+
+    def __init__(self, top=0):
+        self.top = top
+        self._process = psutil.Process()
+        self._rss_before = 0
+        self._traced_before = 0
+        self._snapshot = None
+        # Трассировку включил этот замер: тогда stop() её и выключает, а чужую (например,
+        # python -X tracemalloc) не трогает
+        self._started_tracing = False
+
+    def start(self):
+        # Если предыдущий замер прервался исключением, трассировка продолжается с нового пика
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+        gc.collect()
+        self._snapshot = tracemalloc.take_snapshot() if self.top else None
+        tracemalloc.reset_peak()
+        self._traced_before = tracemalloc.get_traced_memory()[0]
+        self._rss_before = self._process.memory_info().rss
+
+    def stop(self):
+        """Останавливает замер и возвращает словарь с результатами (хранится в результате документа)."""
+        peak = tracemalloc.get_traced_memory()[1]
+        rss = self._process.memory_info().rss
+        gc.collect()
+        memory = {
+            "pid": self._process.pid,
+            # Время запуска отличает процесс пула от перезапущенного с тем же pid
+            "started": self._process.create_time(),
+            "peak": peak - self._traced_before,
+            "retained": tracemalloc.get_traced_memory()[0] - self._traced_before,
+            "rss": rss,
+            "rss_delta": rss - self._rss_before,
+        }
+        if self._snapshot is not None:
+            # Выделения памяти самим tracemalloc и замороженными модулями не интересны
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+            snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+            stats = snapshot.compare_to(self._snapshot.filter_traces(filters), "lineno")
+            memory["top"] = [(str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+                             for stat in stats[:self.top] if stat.size_diff > 0]
+            self._snapshot = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return memory
+
+
+class LeakDetector:
+    """
+    Поиск утечек памяти в процессах пула: по замерам MemoryTracker (в порядке обработки документов)
+    для каждого процесса оценивается рост RSS на документ; процесс подозревается в утечке, если
+    RSS устойчиво растёт — наклон линейной регрессии не меньше min_slope байт на документ,
+    а медиана последней трети замеров выше медианы первой трети.
+    """
+
+    def __init__(self, min_samples=LEAK_MIN_SAMPLES, min_slope=LEAK_MIN_SLOPE):
+        self.min_samples = min_samples
+        self.min_slope = min_slope
+        self.samples = defaultdict(list)
+
+    def observe(self, memory):
+        """Добавляет замер (словарь MemoryTracker.stop())."""
+        self.samples[(memory["pid"], memory["started"])].append(memory["rss"])
+
+    def observe_results(self, results):
+        """Добавляет замеры из результатов документов (ключ "memory")."""
+        for result in results:
+            if result and result.get("memory"):
+                self.observe(result["memory"])
+
+    @staticmethod
+    def slope(values):
+        """Наклон линейной регрессии values по номеру замера."""
+        n = len(values)
+        mean_x, mean_y = (n - 1) / 2, sum(values) / n
+        variance = sum((x - mean_x) ** 2 for x in range(n))
+        return sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values)) / variance if variance else 0.0
+
+    def suspects(self):
+        """Процессы с подозрением на утечку: список (pid, документов, рост RSS на документ, общий рост RSS)."""
+        found = []
+        for (pid, _), values in self.samples.items():
+            if len(values) < self.min_samples:
+                continue
+            slope = self.slope(values)
+            third = len(values) // 3
+            if slope >= self.min_slope and statistics.median(values[-third:]) > statistics.median(values[:third]):
+                found.append((pid, len(values), slope, values[-1] - values[0]))
+        return found
+
+
+def format_memory_summary(results, leak_detector=None):
+    """Текстовая сводка замеров памяти по результатам документов (режим --memory-profile)."""
+    measured = [result for result in results if result and result.get("memory")]
+    if not measured:
+        return "Замеры памяти отсутствуют"
+    mb = 1024 * 1024
+    peaks = sorted(result["memory"]["peak"] for result in measured)
+    lines = [f"Память Python при проверке документа ({len(measured)} документов): "
+             f"медиана пика {statistics.median(peaks) / mb:.1f} МБ, наибольший пик {peaks[-1] / mb:.1f} МБ"]
+    worst = max(measured, key=lambda result: result["memory"]["peak"])
+    lines.append(f"Наибольший пик: {worst['file_path']} "
+                 f"(RSS {worst['memory']['rss'] / mb:.1f} МБ, прирост RSS {worst['memory']['rss_delta'] / mb:+.1f} МБ)")
+    for site, size, count in worst["memory"].get("top", []):
+        lines.append(f"    {site}: {size / 1024:+.1f} КБ, {count:+d} объектов")
+    retained = sorted(result["memory"]["retained"] for result in measured)
+    lines.append(f"Осталось занятым после проверки: медиана {statistics.median(retained) / 1024:.1f} КБ, "
+                 f"наибольшее {retained[-1] / 1024:.1f} КБ")
+    if leak_detector is not None:
+        suspects = leak_detector.suspects()
+        if not suspects:
+            lines.append("Устойчивого роста RSS процессов пула не обнаружено")
+        for pid, count, slope, growth in suspects:
+            lines.append(f"Подозрение на утечку: процесс {pid}, {count} документов, "
+                         f"рост RSS {slope / 1024:.0f} КБ на документ ({growth / mb:+.1f} МБ)")
+    return "\n".join(lines)
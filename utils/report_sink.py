@@ -0,0 +1,277 @@
+import os
+import json
+import html
+import time
+import sqlite3
+import argparse
+import logging
+from datetime import datetime
+
+from modules.base import COUNTERS
+from modules.findings import to_json, from_json
+
+logger = logging.getLogger(__name__)
+
+# Файлы хранилищ отчётов в директории отчётов
+SQLITE_REPORTS_FILE = "reports.sqlite"
+JSONL_REPORTS_FILE = "reports.jsonl"
+# Записи копятся в памяти и записываются одной транзакцией, когда их набирается BATCH_SIZE
+# или с последней записи прошло FLUSH_INTERVAL секунд
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+def render_profile(check_times, counters):
+    """Таблица Markdown со временем и счётчиками (COUNTERS) каждой проверки."""
+    lines = ["| Проверка | Время, с | " + " | ".join(COUNTERS) + " |", "|---" * (len(COUNTERS) + 2) + "|"]
+    for check, seconds in check_times.items():
+        values = counters.get(check, {})
+        lines.append(f"| {check} | {seconds:.3f} | " + " | ".join(str(values.get(name, 0)) for name in COUNTERS) + " |")
+    return lines
+
+
+def render_markdown(file_index, results, created_at=None, check_times=None, counters=None):
+    """
+    Формирует отчёт о проверке документа в Markdown (тот же формат, что report_check_file_N.md).
+    Если переданы check_times, в конце отчёта выводится профиль проверок (время и counters).
+    """
+    created = datetime.fromtimestamp(created_at) if created_at is not None else datetime.now()
+    lines = [f"# Отчёт о проверке документа (ID: file_{file_index})",
+             f"Дата и время: {created.strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    total_errors = 0
+    for check, result in results.items():
+        lines.append(f"## {check.capitalize()}")
+        if not result:
+            lines.append("Проверка пройдена успешно")
+        else:
+            lines.append("Ошибки:")
+            lines.extend(f"- {error}" for error in result)
+            total_errors += len(result)
+        lines.append("")
+    lines.append(f"**Общее количество ошибок: {total_errors}**")
+    if check_times:
+        lines.extend(["", "## Профиль проверок"] + render_profile(check_times, counters or {}))
+    return "\n".join(lines) + "\n"
+
+
+def render_html(file_index, results, created_at=None, file_path=None):
+    """Формирует отчёт о проверке документа в HTML."""
+    created = datetime.fromtimestamp(created_at) if created_at is not None else datetime.now()
+    title = f"Отчёт о проверке документа (ID: file_{file_index})"
+    parts = ["<!DOCTYPE html>", '<html lang="ru"><head><meta charset="utf-8">',
+             f"<title>{html.escape(title)}</title></head><body>", f"<h1>{html.escape(title)}</h1>"]
+    if file_path:
+        parts.append(f"<p>Файл: {html.escape(file_path)}</p>")
+    parts.append(f"<p>Дата и время: {created.strftime('%Y-%m-%d %H:%M:%S')}</p>")
+    total_errors = 0
+    for check, result in results.items():
+        parts.append(f"<h2>{html.escape(check.capitalize())}</h2>")
+        if not result:
+            parts.append("<p>Проверка пройдена успешно</p>")
+        else:
+            parts.append("<ul>")
+            parts.extend(f"<li>{html.escape(str(error))}</li>" for error in result)
+            parts.append("</ul>")
+            total_errors += len(result)
+    parts.append(f"<p><strong>Общее количество ошибок: {total_errors}</strong></p>")
+    parts.append("</body></html>")
+    return "\n".join(parts) + "\n"
+
+
+class ReportSink:
+    """
+    Хранилище отчётов пакета: результаты документов копятся в памяти и записываются пакетами
+    (одной транзакцией или одной операцией записи), а отчёты в Markdown/HTML формируются
+    по запросу из сохранённых результатов (см. load_report и python -m utils.report_sink).
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def report_ref(self, file_index):
+        """Ссылка на отчёт документа для журнала и сообщений: "<хранилище>#<индекс>"."""
+        return f"{self.path}#{file_index}"
+
+    def write(self, file_index, result):
+        """Добавляет результат документа (словарь, который возвращает process_file)."""
+        self._pending.append((file_index, result.get("file_path"), result.get("results", {}), result.get("time"),
+                              time.time()))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные результаты."""
+        if self._pending:
+            rows, self._pending = self._pending, []
+            self._write_rows(rows)
+            logger.debug("Записано отчётов в %s: %s", self.path, len(rows))
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class SQLiteReportSink(ReportSink):
+    """Отчёты в одной базе SQLite: таблица reports с результатом документа в JSON."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            file_index INTEGER PRIMARY KEY,
+            file_path TEXT,
+            results TEXT NOT NULL,
+            processing_time REAL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        super().__init__(path, batch_size, flush_interval)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Отчёты можно сформировать заново из журнала, поэтому fsync на каждую транзакцию не нужен
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def _write_rows(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO reports (file_index, file_path, results, processing_time, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(file_index, file_path, json.dumps(results, ensure_ascii=False, default=to_json), processing_time,
+                  created_at) for file_index, file_path, results, processing_time, created_at in rows])
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.conn.close()
+
+
+class JsonlReportSink(ReportSink):
+    """Отчёты в потоке JSON Lines: одна строка на документ; при повторной записи действует последняя."""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        super().__init__(path, batch_size, flush_interval)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _write_rows(self, rows):
+        self._file.write("".join(
+            json.dumps({"file_index": file_index, "file_path": file_path, "results": results,
+                        "time": processing_time, "created_at": created_at},
+                       ensure_ascii=False, default=to_json) + "\n"
+            for file_index, file_path, results, processing_time, created_at in rows))
+        self._file.flush()
+
+    def close(self):
+        try:
+            super().close()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+
+
+REPORT_SINKS = {"sqlite": (SQLiteReportSink, SQLITE_REPORTS_FILE), "jsonl": (JsonlReportSink, JSONL_REPORTS_FILE)}
+
+
+def open_report_sink(kind, reports_dir, **kwargs):
+    """Открывает хранилище отчётов вида kind ("sqlite" или "jsonl") в директории отчётов."""
+    sink_class, file_name = REPORT_SINKS[kind]
+    return sink_class(os.path.join(reports_dir, file_name), **kwargs)
+
+
+def load_reports(path):
+    """Возвращает сохранённые отчёты: {индекс: (путь к файлу, результаты, время создания)}."""
+    reports = {}
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line, object_hook=from_json)
+                except ValueError:
+                    # Последняя строка может быть недописана при аварийном завершении
+                    logger.warning("Пропущена повреждённая строка в %s", path)
+                    continue
+                reports[entry["file_index"]] = (entry["file_path"], entry["results"], entry["created_at"])
+        return reports
+    conn = sqlite3.connect(path)
+    try:
+        for file_index, file_path, results, created_at in conn.execute(
+                "SELECT file_index, file_path, results, created_at FROM reports ORDER BY file_index"):
+            reports[file_index] = (file_path, json.loads(results, object_hook=from_json), created_at)
+    finally:
+        conn.close()
+    return reports
+
+
+def load_report(path, file_index):
+    """Возвращает (путь к файлу, результаты, время создания) для документа с индексом file_index или None."""
+    if path.endswith(".jsonl"):
+        return load_reports(path).get(file_index)
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT file_path, results, created_at FROM reports WHERE file_index = ?",
+                           (file_index,)).fetchone()
+    finally:
+        conn.close()
+    return (row[0], json.loads(row[1], object_hook=from_json), row[2]) if row else None
+
+
+def main():
+    """Формирует отчёты в Markdown или HTML из хранилища отчётов пакета."""
+    parser = argparse.ArgumentParser(description="Отчёты о проверке документов из хранилища отчётов.")
+    parser.add_argument("store", help=f"Путь к хранилищу ({SQLITE_REPORTS_FILE} или {JSONL_REPORTS_FILE})")
+    parser.add_argument("--index", type=int, default=None,
+                        help="Индекс документа в пакете (без него выводится список документов)")
+    parser.add_argument("--format", choices=["md", "html"], default="md", help="Формат отчёта (по умолчанию: md)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Файл отчёта (без --index — директория для отчётов всех документов)")
+    args = parser.parse_args()
+
+    if args.index is None and args.output is None:
+        for file_index, (file_path, results, _) in load_reports(args.store).items():
+            total = sum(len(result) for result in results.values())
+            print(f"file_{file_index}: {file_path} (ошибок: {total})")
+        return
+
+    if args.index is None:
+        reports = load_reports(args.store).items()
+        os.makedirs(args.output, exist_ok=True)
+    else:
+        report = load_report(args.store, args.index)
+        if report is None:
+            parser.error(f"Документ с индексом {args.index} не найден в {args.store}")
+        reports = [(args.index, report)]
+
+    for file_index, (file_path, results, created_at) in reports:
+        if args.format == "md":
+            text = render_markdown(file_index, results, created_at)
+        else:
+            text = render_html(file_index, results, created_at, file_path)
+        if args.output is None:
+            print(text, end="")
+            continue
+        output = args.output
+        if args.index is None:
+            output = os.path.join(args.output, f"report_check_file_{file_index}.{args.format}")
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
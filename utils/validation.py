@@ -0,0 +1,139 @@
+import zipfile
+import logging
+import posixpath
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES_PART = "[Content_Types].xml"
+CONTENT_TYPES_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+MAIN_DOCUMENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+    "application/vnd.ms-word.document.macroEnabled.main+xml",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml",
+)
+# Размер блока при потоковом подсчёте элементов
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+
+class InputLimitError(Exception):
+    """Документ превышает ограничения на входные данные."""
+
+
+class InputLimits:
+    """
+    Ограничения на входной документ .docx.
+
+    Размеры и количество частей проверяются по центральному каталогу архива (без распаковки);
+    количество элементов XML — при разборе, потоковым подсчётом тегов до построения дерева.
+    Значение None отключает соответствующее ограничение.
+    """
+
+    # Суммарный размер распакованных частей в байтах
+    max_uncompressed_size = 512 * 1024 * 1024
+    # Количество частей (файлов) в архиве
+    max_parts = 5000
+    # Степень сжатия отдельной части (распакованный размер / сжатый); проверяется для частей
+    # больше RATIO_MIN_SIZE, так как небольшие однообразные части законно сжимаются сильно
+    # (сгенерированные документы из повторяющихся абзацев — в сотни раз)
+    max_compression_ratio = 500
+    # Количество элементов XML во всех частях документа
+    max_elements = 5_000_000
+    # Размер [Content_Types].xml, который разбирается при предварительной проверке
+    max_content_types_size = 1024 * 1024
+
+    RATIO_MIN_SIZE = 10 * 1024 * 1024
+
+    def __init__(self, **overrides):
+        for name, value in overrides.items():
+            if not hasattr(InputLimits, name):
+                raise TypeError(f"Неизвестное ограничение: {name}")
+            setattr(self, name, value)
+
+
+def _open_archive(file_path, data):
+    return zipfile.ZipFile(BytesIO(data) if data is not None else file_path)
+
+
+def prevalidate(file_path, data=None, limits=None):
+    """
+    Быстрая проверка документа по центральному каталогу архива и [Content_Types].xml.
+
+    Возвращает список найденных нарушений (пустой, если документ можно разбирать).
+    Содержимое частей, кроме [Content_Types].xml, не распаковывается.
+    """
+    limits = limits or InputLimits()
+    try:
+        with _open_archive(file_path, data) as archive:
+            infos = archive.infolist()
+            problems = []
+            if limits.max_parts is not None and len(infos) > limits.max_parts:
+                problems.append(f"Архив содержит {len(infos)} частей, допускается не более {limits.max_parts}")
+            total_size = sum(info.file_size for info in infos)
+            if limits.max_uncompressed_size is not None and total_size > limits.max_uncompressed_size:
+                problems.append(f"Распакованный размер документа {total_size >> 20} МБ превышает "
+                                f"{limits.max_uncompressed_size >> 20} МБ")
+            if limits.max_compression_ratio is not None:
+                for info in infos:
+                    if info.file_size < limits.RATIO_MIN_SIZE:
+                        continue
+                    ratio = info.file_size / max(1, info.compress_size)
+                    if ratio > limits.max_compression_ratio:
+                        problems.append(f"Часть {info.filename} сжата в {ratio:.0f} раз, "
+                                        f"допускается не более {limits.max_compression_ratio}")
+                        break
+            if problems:
+                return problems
+
+            names = {info.filename for info in infos}
+            if CONTENT_TYPES_PART not in names:
+                return [f"В архиве нет {CONTENT_TYPES_PART}: файл не является документом Word"]
+            content_types_info = archive.getinfo(CONTENT_TYPES_PART)
+            if content_types_info.file_size > limits.max_content_types_size:
+                return [f"{CONTENT_TYPES_PART} слишком большой ({content_types_info.file_size} байт)"]
+            content_types = ET.fromstring(archive.read(CONTENT_TYPES_PART))
+            main_parts = [override.get("PartName", "").lstrip("/")
+                          for override in content_types.iter(f"{CONTENT_TYPES_NS}Override")
+                          if override.get("ContentType") in MAIN_DOCUMENT_TYPES]
+            if not main_parts:
+                return ["В [Content_Types].xml не указан основной документ Word"]
+            missing = [part for part in main_parts if posixpath.normpath(part) not in names]
+            if missing:
+                return [f"Основной документ {missing[0]} отсутствует в архиве"]
+    except (OSError, zipfile.BadZipFile, ET.ParseError, RuntimeError, NotImplementedError) as e:
+        return [f"Повреждённый архив документа: {str(e)}"]
+    return []
+
+
+def enforce_element_limit(file_path, data=None, limits=None):
+    """
+    Считает элементы во всех XML-частях документа потоково (блоками, без построения дерева)
+    и выбрасывает InputLimitError, как только превышен limits.max_elements. Части с DTD
+    (<!DOCTYPE, <!ENTITY) отклоняются: в документах Word их не бывает, а сущности позволяют
+    раздуть документ при разборе.
+    """
+    limits = limits or InputLimits()
+    count = 0
+    with _open_archive(file_path, data) as archive:
+        for info in archive.infolist():
+            if not info.filename.endswith((".xml", ".rels")):
+                continue
+            with archive.open(info) as part:
+                previous = b""
+                while True:
+                    block = part.read(SCAN_BLOCK_SIZE)
+                    if not block:
+                        break
+                    # Хвост предыдущего блока нужен, чтобы не пропустить конструкции на границе блоков
+                    window = previous[-9:] + block
+                    if b"<!DOCTYPE" in window or b"<!ENTITY" in window:
+                        raise InputLimitError(f"Часть {info.filename} содержит объявление DTD")
+                    # Открывающие теги: все '<' кроме закрывающих '</'
+                    count += block.count(b"<") - block.count(b"</")
+                    if previous.endswith(b"<") and block.startswith(b"/"):
+                        count -= 1
+                    if limits.max_elements is not None and count > limits.max_elements:
+                        raise InputLimitError(f"Документ содержит больше {limits.max_elements} элементов XML")
+                    previous = block
+    return count
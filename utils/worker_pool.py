@@ -0,0 +1,358 @@
+import time
+import logging
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+import psutil
+
+from utils import metrics
+from utils.logs import worker_log_config, configure_worker_logging, flush_rate_limits
+
+logger = logging.getLogger(__name__)
+
+# Способ запуска прогретых процессов: fork наследует от родителя загруженные модули и подготовленные
+# объекты (copy-on-write); там, где fork недоступен (Windows), используется способ по умолчанию
+PREFORK_START_METHOD = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+
+
+class WorkerCrashedError(Exception):
+    """Процесс пула завершился, не вернув результат задачи."""
+
+
+class TaskTimeoutError(Exception):
+    """Задача не завершилась до жёсткого срока; процесс, выполнявший её, остановлен и заменён."""
+
+
+def _worker_main(func, conn, initializer, initargs, log_config=None):
+    """Цикл процесса пула: получает задачи по своему каналу и отправляет результат вместе с RSS."""
+    if log_config is not None:
+        configure_worker_logging(*log_config)
+    if initializer is not None:
+        initializer(*initargs)
+    process = psutil.Process()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        task_id, args = message
+        try:
+            result = func(args)
+            error = None
+        except Exception as e:
+            result = None
+            error = f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"
+        conn.send((task_id, result, error, process.memory_info().rss))
+    if log_config is not None:
+        flush_rate_limits()
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task = None  # (task_id, future, memory) выполняемой задачи
+        self.deadline = None  # Жёсткий срок выполняемой задачи (по time.monotonic)
+        self.tasks_done = 0
+        self.rss = 0
+
+
+class WorkerPool:
+    """
+    Пул процессов с допуском задач по бюджету памяти и перезапуском процессов.
+
+    Каждая задача сопровождается оценкой памяти: новая задача отправляется свободному процессу,
+    только если сумма оценок выполняемых задач вместе с ней укладывается в бюджет и в системе
+    остаётся достаточно свободной памяти (если ничего не выполняется, задача допускается всегда).
+    Процесс перезапускается, когда его RSS превышает rss_limit или после max_tasks_per_worker задач.
+    Если задача не завершилась за свой timeout, процесс принудительно останавливается, заменяется
+    новым, а Future задачи получает исключение TaskTimeoutError.
+    Результаты задач передаются в Future и процессы останавливаются вне блокировки пула, поэтому
+    submit и stats не ждут остановки процесса, а обработчики завершения Future могут ставить новые задачи.
+
+    Args:
+        func: Функция, выполняемая в процессах пула (должна сериализоваться pickle).
+        num_workers (int): Максимальное количество процессов.
+        memory_budget (int, optional): Бюджет памяти на выполняемые задачи в байтах
+            (по умолчанию 75% доступной памяти на момент создания пула).
+        rss_limit (int, optional): Порог RSS процесса в байтах для перезапуска.
+        max_tasks_per_worker (int, optional): Количество задач, после которого процесс перезапускается.
+        initializer: Функция, вызываемая при запуске каждого процесса.
+        initargs (tuple): Аргументы initializer.
+        mp_context (str, optional): Способ запуска процессов ("fork", "spawn", "forkserver").
+        prestart (bool): Запустить все процессы сразу, до старта потока-диспетчера, чтобы fork
+            выполнялся из однопоточного процесса.
+    """
+
+    # Доля доступной памяти, которую пул оставляет системе
+    MEMORY_RESERVE_FRACTION = 0.1
+    # Период повторной проверки свободной памяти, когда задача ждёт допуска
+    ADMISSION_POLL_INTERVAL = 1.0
+
+    def __init__(self, func, num_workers, memory_budget=None, rss_limit=None, max_tasks_per_worker=None,
+                 initializer=None, initargs=(), mp_context=None, prestart=False):
+        self.func = func
+        self.num_workers = max(1, num_workers)
+        if memory_budget is None:
+            memory_budget = int(psutil.virtual_memory().available * 0.75)
+        self.memory_budget = memory_budget
+        self.rss_limit = rss_limit
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.initializer = initializer
+        self.initargs = initargs
+        # Процессы пишут журнал через очередь главного процесса (если журнал настроен setup_logging)
+        self.log_config = worker_log_config()
+
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._lock = threading.Lock()
+        self._pending = deque()  # (task_id, args, memory, timeout, submitted, future)
+        self._idle = []
+        self._busy = []
+        self._next_task_id = 0
+        self._in_flight_memory = 0
+        self._shutdown = False
+        # Заполняются под блокировкой и обрабатываются потоком-диспетчером после её снятия
+        self._resolved = []  # (future, результат, исключение)
+        self._stopping = []  # (процесс, kill)
+        self._wakeup_reader, self._wakeup_writer = self._ctx.Pipe(duplex=False)
+        self.recycled_workers = 0
+        self.timed_out_tasks = 0
+        if prestart:
+            self._idle = [self._start_worker() for _ in range(self.num_workers)]
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="WorkerPoolDispatcher", daemon=True)
+        self._dispatcher.start()
+        metrics.track_pool(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(cancel_pending=exc_type is not None)
+
+    def submit(self, args, memory=0, timeout=None):
+        """
+        Ставит задачу в очередь и возвращает concurrent.futures.Future с её результатом.
+
+        Args:
+            args: Аргумент функции пула.
+            memory (int): Оценка памяти, нужной задаче, в байтах.
+            timeout (float, optional): Жёсткий срок выполнения задачи в секундах с момента её запуска.
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Пул процессов уже остановлен")
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            self._pending.append((task_id, args, memory, timeout, time.monotonic(), future))
+        self._wakeup()
+        return future
+
+    def stats(self):
+        """
+        Текущее состояние пула: запущенные и занятые процессы, наибольшее число процессов
+        (0 у остановленного пула), ожидающие задачи и суммарный RSS процессов по последним задачам.
+        """
+        with self._lock:
+            workers = self._idle + self._busy
+            return {"workers": len(workers), "busy": len(self._busy),
+                    "capacity": 0 if self._shutdown else self.num_workers, "pending": len(self._pending),
+                    "rss": sum(worker.rss for worker in workers)}
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Останавливает пул после выполнения очереди (или отменяет ожидающие задачи)."""
+        cancelled = []
+        with self._lock:
+            self._shutdown = True
+            if cancel_pending:
+                cancelled = [task[-1] for task in self._pending]
+                self._pending.clear()
+        # Отмена вызывает обработчики завершения Future, поэтому выполняется без блокировки
+        for future in cancelled:
+            future.cancel()
+        self._wakeup()
+        if wait:
+            self._dispatcher.join()
+
+    def _wakeup(self):
+        try:
+            self._wakeup_writer.send(None)
+        except OSError:
+            pass
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main,
+                                    args=(self.func, child_conn, self.initializer, self.initargs, self.log_config),
+                                    daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _stop_worker(self, worker, kill=False):
+        try:
+            if kill:
+                worker.process.kill()
+            else:
+                worker.conn.send(None)
+        except OSError:
+            pass
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+
+    def _can_admit(self, memory):
+        if not self._busy:
+            return True
+        if self._in_flight_memory + memory > self.memory_budget:
+            return False
+        system_memory = psutil.virtual_memory()
+        return system_memory.available - memory >= system_memory.total * self.MEMORY_RESERVE_FRACTION
+
+    def _dispatch(self):
+        """Отправляет ожидающие задачи свободным процессам в пределах бюджета памяти."""
+        while self._pending and len(self._busy) < self.num_workers:
+            task_id, args, memory, timeout, submitted, future = self._pending[0]
+            if future.cancelled():
+                self._pending.popleft()
+                continue
+            if not self._can_admit(memory):
+                return True
+            self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            metrics.QUEUE_WAIT_SECONDS.observe(time.monotonic() - submitted)
+            worker = self._idle.pop() if self._idle else self._start_worker()
+            try:
+                worker.conn.send((task_id, args))
+            except Exception as e:
+                self._resolved.append((future, None, e))
+                self._stopping.append((worker, True))
+                continue
+            worker.task = (task_id, future, memory)
+            worker.deadline = time.monotonic() + timeout if timeout else None
+            self._in_flight_memory += memory
+            self._busy.append(worker)
+        return False
+
+    def _finish_task(self, worker):
+        _, future, memory = worker.task
+        worker.task = None
+        worker.deadline = None
+        self._in_flight_memory -= memory
+        self._busy.remove(worker)
+        return future
+
+    def _handle_result(self, worker):
+        try:
+            task_id, result, error, rss = worker.conn.recv()
+        except (EOFError, OSError):
+            self._handle_crash(worker)
+            return
+        future = self._finish_task(worker)
+        worker.tasks_done += 1
+        worker.rss = rss
+        self._resolved.append((future, result, RuntimeError(error) if error is not None else None))
+
+        recycle_reason = None
+        if self.rss_limit and rss > self.rss_limit:
+            recycle_reason = f"RSS {rss >> 20} МБ превышает порог {self.rss_limit >> 20} МБ"
+        elif self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker:
+            recycle_reason = f"выполнено {worker.tasks_done} задач"
+        if recycle_reason:
+            logger.info("Перезапуск процесса %s: %s", worker.process.pid, recycle_reason)
+            self.recycled_workers += 1
+            metrics.WORKER_EVENTS.inc(event="recycled")
+            self._stopping.append((worker, False))
+        else:
+            self._idle.append(worker)
+
+    def _handle_crash(self, worker):
+        future = self._finish_task(worker)
+        exitcode = worker.process.exitcode
+        logger.error("Процесс %s завершился аварийно (код %s)", worker.process.pid, exitcode)
+        metrics.WORKER_EVENTS.inc(event="crashed")
+        self._stopping.append((worker, True))
+        self._resolved.append((future, None,
+                               WorkerCrashedError(f"Процесс пула завершился аварийно (код {exitcode})")))
+
+    def _handle_timeouts(self):
+        """Останавливает процессы, задачи которых превысили жёсткий срок."""
+        now = time.monotonic()
+        for worker in list(self._busy):
+            if worker.deadline is None or worker.deadline > now:
+                continue
+            future = self._finish_task(worker)
+            logger.error("Процесс %s остановлен: задача превысила жёсткий срок выполнения", worker.process.pid)
+            self.timed_out_tasks += 1
+            metrics.WORKER_EVENTS.inc(event="timed_out")
+            self._stopping.append((worker, True))
+            self._resolved.append((future, None, TaskTimeoutError("Задача превысила жёсткий срок выполнения")))
+
+    def _complete(self):
+        """Останавливает отмеченные процессы и передаёт результаты в Future (вызывается без блокировки)."""
+        with self._lock:
+            stopping, self._stopping = self._stopping, []
+            resolved, self._resolved = self._resolved, []
+        # Аварийные и зависшие процессы останавливаются до передачи исключения в Future
+        for worker, kill in stopping:
+            if kill:
+                self._stop_worker(worker, kill=True)
+        for future, result, error in resolved:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        # Штатная остановка ждёт завершения процесса, поэтому выполняется после передачи результатов
+        for worker, kill in stopping:
+            if not kill:
+                self._stop_worker(worker)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                waiting_for_memory = self._dispatch()
+                finished = self._shutdown and not self._pending and not self._busy
+                busy = list(self._busy)
+            self._complete()
+            if finished:
+                break
+            objects = [self._wakeup_reader]
+            for worker in busy:
+                objects.append(worker.conn)
+                objects.append(worker.process.sentinel)
+            timeout = self.ADMISSION_POLL_INTERVAL if waiting_for_memory else None
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            if deadlines:
+                until_deadline = max(0.0, min(deadlines) - time.monotonic())
+                timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+            ready = wait(objects, timeout=timeout)
+
+            with self._lock:
+                if self._wakeup_reader in ready:
+                    while self._wakeup_reader.poll():
+                        self._wakeup_reader.recv()
+                for worker in busy:
+                    if worker.conn in ready:
+                        self._handle_result(worker)
+                    elif worker.process.sentinel in ready:
+                        self._handle_crash(worker)
+                self._handle_timeouts()
+            self._complete()
+
+        for worker in self._idle:
+            self._stop_worker(worker)
+        self._idle = []
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
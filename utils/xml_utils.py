@@ -3,6 +3,9 @@ from zipfile import ZipFile
 from io import BytesIO
 
 def extract_xml(file_path):
+    """Читает document.xml и styles.xml из файла .docx (путь, файловый объект или содержимое в байтах)."""
+    if isinstance(file_path, (bytes, bytearray)):
+        file_path = BytesIO(file_path)
     with ZipFile(file_path, 'r') as zip_ref:
         doc_xml_data = zip_ref.read('word/document.xml')
         styles_xml_data = zip_ref.read('word/styles.xml')
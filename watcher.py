@@ -0,0 +1,354 @@
+import os
+import time
+import queue
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import zipfile
+import argparse
+import threading
+from io import BytesIO
+from multiprocessing import cpu_count
+
+from main import (process_file, timeout_result, warm_up, configure_worker, format_results,
+                  DEFAULT_WORKER_RSS_LIMIT, DEFAULT_MAX_TASKS_PER_WORKER, DEFAULT_CHECK_TIME_LIMIT,
+                  DEFAULT_DOCUMENT_TIME_LIMIT, DEFAULT_HARD_TIMEOUT)
+from utils.cost_model import CostModel
+from utils.worker_pool import WorkerPool, TaskTimeoutError, PREFORK_START_METHOD
+from utils import metrics
+from utils.logs import setup_logging, add_logging_arguments
+
+logger = logging.getLogger(__name__)
+
+# Файл считается дописанным, если его размер и время изменения не менялись столько секунд
+DEFAULT_SETTLE_TIME = 2.0
+# Период опроса директорий, если inotify недоступен
+DEFAULT_POLL_INTERVAL = 1.0
+# Отчёт сохраняется рядом с документом: <имя документа>.report.md
+REPORT_SUFFIX = ".report.md"
+# Скрытая директория внутри наблюдаемой, куда процессы пула пишут отчёты перед переносом к документу
+STAGING_DIR = ".vkr_reports"
+
+
+def is_candidate(path):
+    """Подходит ли файл для проверки (.docx, не скрытый и не файл блокировки Word ~$...)."""
+    name = os.path.basename(path)
+    return name.lower().endswith(".docx") and not name.startswith((".", "~$"))
+
+
+class InotifyWatcher:
+    """Получает события изменения файлов в директориях через inotify (Linux, вызовы libc через ctypes)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (за ним следует имя файла длиной len)
+
+    def __init__(self, directories):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("Библиотека libc не найдена")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify недоступен")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Не удалось инициализировать inotify")
+        self._directories = {}
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE
+                | self.IN_DELETE)
+        for directory in directories:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, f"Не удалось наблюдать за директорией {directory}")
+            self._directories[wd] = directory
+
+    def changes(self, timeout):
+        """Ждёт событий не дольше timeout секунд и возвращает множество изменившихся (и удалённых) путей."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        paths = set()
+        if not ready:
+            return paths
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, _, _, name_length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name and wd in self._directories:
+                paths.add(os.path.join(self._directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Находит изменившиеся файлы периодическим просмотром директорий (если inotify недоступен)."""
+
+    def __init__(self, directories, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.directories = list(directories)
+        self.poll_interval = poll_interval
+        self._signatures = {}
+        self._scan()
+
+    def _scan(self):
+        changed = set()
+        signatures = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.warning("Не удалось прочитать директорию %s: %s", directory, e)
+                continue
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                signatures[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                if self._signatures.get(entry.path) != signatures[entry.path]:
+                    changed.add(entry.path)
+        # Удалённые и перемещённые файлы
+        changed.update(path for path in self._signatures if path not in signatures)
+        self._signatures = signatures
+        return changed
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, self.poll_interval))
+        return self._scan()
+
+    def close(self):
+        pass
+
+
+def create_watcher(directories, use_inotify=True, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Возвращает наблюдатель на inotify, а если он недоступен — на периодическом опросе."""
+    if use_inotify:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify недоступен (%s), используется опрос директорий", e)
+    return PollingWatcher(directories, poll_interval)
+
+
+def report_path_for(file_path):
+    return os.path.splitext(file_path)[0] + REPORT_SUFFIX
+
+
+class FolderWatcher:
+    """
+    Проверяет документы .docx по мере их появления в наблюдаемых директориях.
+
+    Новый или изменённый файл отправляется в пул прогретых процессов, когда его размер и время
+    изменения не менялись settle_time секунд и архив читается целиком (защита от проверки
+    недописанных файлов). Документ передаётся в пул содержимым, поэтому проверяется именно
+    тот снимок, хеш которого запомнен; повторное сохранение без изменения содержимого не
+    вызывает повторной проверки. Отчёт сохраняется рядом с документом (<имя>.report.md).
+    Поддиректории не просматриваются.
+    """
+
+    def __init__(self, directories, settle_time=DEFAULT_SETTLE_TIME, num_workers=None, use_inotify=True,
+                 poll_interval=DEFAULT_POLL_INTERVAL, initial_scan=True, check_time_limit=DEFAULT_CHECK_TIME_LIMIT,
+                 document_time_limit=DEFAULT_DOCUMENT_TIME_LIMIT, hard_timeout=DEFAULT_HARD_TIMEOUT, on_result=None,
+                 input_limits=None, max_findings_per_rule=None, profile_dir=None, memory_top=None):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.settle_time = settle_time
+        self.num_workers = num_workers or cpu_count()
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.initial_scan = initial_scan
+        self.hard_timeout = hard_timeout
+        self.on_result = on_result
+        # Параметры процессов пула те же, что у пакетной обработки (см. main.configure_worker)
+        self.worker_args = (check_time_limit, document_time_limit, input_limits, max_findings_per_rule, profile_dir,
+                            memory_top)
+        self.cost_model = CostModel()
+        self._candidates = {}  # путь -> (момент последнего изменения, (размер, mtime))
+        self._checked = {}  # путь -> хеш последнего проверенного содержимого
+        self._in_progress = set()
+        self._completed = queue.Queue()
+        self._next_index = 0
+
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _note_change(self, path, now):
+        signature = self._signature(path)
+        if signature is None:
+            # Файл удалён или перемещён: его хеш больше не нужен
+            self._candidates.pop(path, None)
+            self._checked.pop(path, None)
+        else:
+            self._candidates[path] = (now, signature)
+
+    def _existing_files(self):
+        """Документы, для которых ещё нет отчёта или отчёт старше документа."""
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not is_candidate(entry.path):
+                    continue
+                report = report_path_for(entry.path)
+                if not os.path.exists(report) or os.path.getmtime(report) < entry.stat().st_mtime:
+                    yield entry.path
+
+    def _submit_settled(self, pool, now):
+        for path, (changed_at, signature) in list(self._candidates.items()):
+            if now - changed_at < self.settle_time or path in self._in_progress:
+                continue
+            current = self._signature(path)
+            if current != signature:
+                self._note_change(path, now)
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                # Недописанный архив не проходит проверку центрального каталога
+                with zipfile.ZipFile(BytesIO(data)) as archive:
+                    archive.getinfo("word/document.xml")
+            except (OSError, zipfile.BadZipFile, KeyError) as e:
+                # Файл остаётся кандидатом и проверяется снова через settle_time: дописанный файл
+                # может не вызвать нового события
+                logger.debug("Файл %s пока не готов к проверке: %s", path, e)
+                self._candidates[path] = (now, current)
+                continue
+            del self._candidates[path]
+            content_hash = hashlib.sha256(data).hexdigest()
+            if self._checked.get(path) == content_hash:
+                continue
+            self._checked[path] = content_hash
+            self._in_progress.add(path)
+            file_index = self._next_index
+            self._next_index += 1
+            staging_dir = os.path.join(os.path.dirname(path), STAGING_DIR)
+            features = CostModel.document_features(path, data=data)
+            future = pool.submit((path, file_index, staging_dir, data),
+                                 memory=self.cost_model.estimate_memory(features), timeout=self.hard_timeout)
+            future.add_done_callback(lambda f, path=path, file_index=file_index:
+                                     self._completed.put((path, file_index, f)))
+            logger.info("Файл %s отправлен на проверку", path)
+
+    def _finish(self, path, file_index, future):
+        self._in_progress.discard(path)
+        try:
+            result = future.result()
+        except TaskTimeoutError:
+            result = timeout_result(path, self.hard_timeout)
+        except Exception as e:
+            result = {"file_path": path, "results": {"error": [f"Ошибка при обработке файла: {str(e)}"]},
+                      "time": 0.0}
+        metrics.observe_result(result)
+        report = report_path_for(path)
+        staged = os.path.join(os.path.dirname(path), STAGING_DIR, f"report_check_file_{file_index}.md")
+        try:
+            if os.path.exists(staged):
+                os.replace(staged, report)
+            else:
+                with open(report, "w", encoding="utf-8") as f:
+                    f.write(f"# Отчёт о проверке документа {os.path.basename(path)}\n\n")
+                    f.write(format_results(result["results"]) + "\n")
+            logger.info("Файл %s проверен за %.2f с, отчёт: %s", path, result['time'], report)
+        except OSError as e:
+            logger.error("Не удалось сохранить отчёт для файла %s: %s", path, e)
+        if self.on_result:
+            self.on_result(path, result)
+
+    def run(self, stop_event=None):
+        """Наблюдает за директориями до установки stop_event (или до прерывания)."""
+        stop_event = stop_event or threading.Event()
+        configure_worker(*self.worker_args)
+        if PREFORK_START_METHOD:
+            warm_up()
+        watcher = create_watcher(self.directories, self.use_inotify, self.poll_interval)
+        logger.info("Наблюдение за директориями: %s (%s)", ', '.join(self.directories), type(watcher).__name__)
+        try:
+            with WorkerPool(process_file, self.num_workers, rss_limit=DEFAULT_WORKER_RSS_LIMIT,
+                            max_tasks_per_worker=DEFAULT_MAX_TASKS_PER_WORKER, initializer=configure_worker,
+                            initargs=self.worker_args, mp_context=PREFORK_START_METHOD, prestart=True) as pool:
+                if self.initial_scan:
+                    now = time.monotonic()
+                    for path in self._existing_files():
+                        # Уже лежащие файлы считаются дописанными
+                        self._candidates[path] = (now - self.settle_time, self._signature(path))
+                while not stop_event.is_set():
+                    now = time.monotonic()
+                    self._submit_settled(pool, now)
+                    while not self._completed.empty():
+                        self._finish(*self._completed.get())
+                    # Пока есть недописанные файлы, просыпаемся чаще, чтобы проверить их готовность
+                    timeout = self.settle_time / 4 if self._candidates or self._in_progress else 1.0
+                    for path in watcher.changes(timeout):
+                        if is_candidate(path):
+                            self._note_change(path, time.monotonic())
+                pool.shutdown(cancel_pending=True)
+                while not self._completed.empty():
+                    self._finish(*self._completed.get())
+        finally:
+            watcher.close()
+
+
+def main():
+    """Запуск проверки документов по мере их появления в директориях."""
+    parser = argparse.ArgumentParser(description="Наблюдение за директориями и проверка новых документов .docx.")
+    parser.add_argument("directories", nargs='+', help="Директории, в которые поступают документы")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Количество процессов для проверки (по умолчанию: число CPU)")
+    parser.add_argument("--settle-time", type=float, default=DEFAULT_SETTLE_TIME,
+                        help="Сколько секунд файл не должен меняться перед проверкой (по умолчанию: 2)")
+    parser.add_argument("--poll", action="store_true", help="Опрашивать директории вместо inotify")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Период опроса директорий в секундах (по умолчанию: 1)")
+    parser.add_argument("--no-initial-scan", action="store_true",
+                        help="Не проверять документы, уже лежащие в директориях при запуске")
+    add_logging_arguments(parser)
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+    try:
+        setup_logging(args.log_level, args.log_file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+    if missing:
+        print(f"Ошибка: директории не найдены: {', '.join(missing)}")
+        return
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    watcher = FolderWatcher(args.directories, settle_time=args.settle_time, num_workers=args.processes,
+                            use_inotify=not args.poll, poll_interval=args.poll_interval,
+                            initial_scan=not args.no_initial_scan)
+    stop_metrics = metrics.start_metrics(args)
+    try:
+        watcher.run(stop_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_metrics()
+
+
+if __name__ == "__main__":
+    main()